@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+回测引擎基准测试 - 默认 3000只股票 × 5年（1250个交易日）
+
+在临时目录生成随机游走的本地价格库，分别以单进程与多进程回放，
+输出每阶段耗时与吞吐（股票日/秒）
+
+运行: python benchmarks/bench_backtest.py [--symbols 3000] [--days 1250] [--workers 8]
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import BacktestEngine
+from src.data.price_store import PriceStore
+from src.data.storage import write_frame
+
+
+def make_store(root: Path, symbols: int, days: int, seed: int = 0) -> PriceStore:
+    """生成随机游走日线并逐只写入价格库"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2021-01-01", periods=days).strftime("%Y-%m-%d")
+    for i in range(symbols):
+        close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+        write_frame(pd.DataFrame({
+            "date": dates, "open": close, "close": close,
+            "high": close * 1.01, "low": close * 0.99,
+            "volume": rng.integers(1000, 100000, days).astype(float),
+        }), root / f"{i:06d}")
+    return PriceStore(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回测引擎基准测试")
+    parser.add_argument("--symbols", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=1250)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--serial-sample", type=int, default=100, help="单进程回放的抽样股票数（按比例外推总耗时）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        store = make_store(Path(tmp), args.symbols, args.days)
+        print(f"📊 价格库: {args.days} 天 × {args.symbols} 只股票 (生成 {time.perf_counter() - start:.1f}s)")
+
+        sample = store.symbols()[:min(args.serial_sample, args.symbols)]
+        serial = BacktestEngine(store=store, workers=1)
+        start = time.perf_counter()
+        serial.replay(sample)
+        serial_time = (time.perf_counter() - start) * args.symbols / len(sample)
+
+        engine = BacktestEngine(store=store, workers=args.workers)
+        start = time.perf_counter()
+        result = engine.run(by_year=True)
+        total = time.perf_counter() - start
+
+    rows = result["rows"]
+    print(f"  单进程回放:   {serial_time:8.2f}s (按 {len(sample)} 只外推)")
+    print(f"  {args.workers}进程回放:    {result['timing']['replay']:8.2f}s")
+    print(f"  评级统计:     {result['timing']['summary']:8.2f}s")
+    print(f"  合计:         {total:8.2f}s  ({rows / total:,.0f} 股票日/秒, 共 {rows:,} 股票日)")
+    print(result["summary"].to_string())
+
+
+if __name__ == "__main__":
+    main()
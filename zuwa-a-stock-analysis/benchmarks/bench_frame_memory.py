@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+单只股票日线内存占用对比 - 原地写入派生列 vs 只读行情 + 特征缓存
+
+原实现：技术分析Agent和量价分析把 sma5/rsi/macd/volume_ma5 等11列写回共享的 daily_data
+现实现：daily_data 只读（ReadOnlyFrame），派生指标保存在 FeatureStore 中
+
+运行: python benchmarks/bench_frame_memory.py [--rows 500] [--symbols 200]
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import gc
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.feature_store import FeatureStore
+from src.data.frozen import freeze
+from src.data.price_store import PRICE_COLUMNS
+
+
+def make_daily(rows: int, seed: int) -> pd.DataFrame:
+    """PriceStore 标准列的随机日线"""
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    df = pd.DataFrame({col: rng.random(rows) for col in PRICE_COLUMNS if col != 'date'})
+    df.insert(0, 'date', pd.bdate_range("2024-01-01", periods=rows).strftime("%Y-%m-%d"))
+    df['close'] = close
+    df['volume'] = rng.integers(10_000, 100_000, rows).astype(float)
+    return df
+
+
+def legacy(df: pd.DataFrame):
+    """原实现：在共享行情上逐列追加派生指标"""
+    df = df.copy()
+    for period in (5, 10, 20, 60):
+        df[f'sma{period}'] = df['close'].rolling(period, min_periods=1).mean()
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(14, min_periods=1).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14, min_periods=1).mean()
+    df['rsi'] = 100 - (100 / (1 + gain / (loss + 1e-10)))
+    df['macd'] = df['close'].ewm(span=12, min_periods=1).mean() - df['close'].ewm(span=26, min_periods=1).mean()
+    df['signal'] = df['macd'].ewm(span=9, min_periods=1).mean()
+    df['volume_ma5'] = df['volume'].rolling(5).mean()
+    df['volume_ma20'] = df['volume'].rolling(20).mean()
+    df['price_change'] = df['close'].pct_change()
+    df['volume_change'] = df['volume'].pct_change()
+    return df
+
+
+def overlay(df: pd.DataFrame):
+    """现实现：只读行情 + 特征缓存"""
+    df = freeze(df)
+    features = FeatureStore()
+    for period in (5, 10, 20, 60):
+        features.get(df, "sma", period=period, min_periods=1)
+    features.get(df, "rsi", period=14, min_periods=1, eps=1e-10)
+    features.get(df, "macd", adjust=True, min_periods=1)
+    features.get(df, "sma", period=5, column='volume')
+    features.get(df, "sma", period=20, column='volume')
+    features.get(df, "pct_change", column='close')
+    features.get(df, "pct_change", column='volume')
+    return df, features
+
+
+def measure(func, frames):
+    """逐只股票执行，返回 (单只峰值, 单只常驻) 字节数"""
+    peaks, retained = [], []
+    for df in frames:
+        gc.collect()
+        tracemalloc.start()
+        result = func(df)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+        retained.append(current)
+        del result
+    return float(np.median(peaks)), float(np.median(retained))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日线内存占用对比")
+    parser.add_argument("--rows", type=int, default=500, help="每只股票的K线数")
+    parser.add_argument("--symbols", type=int, default=200)
+    args = parser.parse_args()
+    
+    frames = [make_daily(args.rows, seed) for seed in range(args.symbols)]
+    base = frames[0].memory_usage(deep=True).sum()
+    
+    legacy_peak, legacy_kept = measure(legacy, frames)
+    overlay_peak, overlay_kept = measure(overlay, frames)
+    
+    kb = lambda n: f"{n / 1024:.1f} KB"
+    print(f"📊 单只股票 {args.rows} 根K线，原始行情 {kb(base)}（{args.symbols} 只取中位数）")
+    print(f"  原地写入派生列:    峰值 {kb(legacy_peak)} / 常驻 {kb(legacy_kept)}")
+    print(f"  只读行情+特征缓存: 峰值 {kb(overlay_peak)} / 常驻 {kb(overlay_kept)}")
+    print(f"  峰值降低 {1 - overlay_peak / legacy_peak:.1%}，常驻降低 {1 - overlay_kept / legacy_kept:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+导入耗时基准测试 - 命令行冷启动的导入预算
+
+在子进程中以 python -X importtime 导入入口模块（默认 main），多次运行取最小值，
+打印累计耗时最多的模块；--check 时超出预算或导入了重型依赖则以非零状态退出
+
+运行: python benchmarks/bench_import.py [--module main] [--runs 5] [--check]
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import subprocess
+import time
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# 导入 main 的耗时预算（毫秒）：只含标准库、asyncio 与轻量工具模块
+IMPORT_BUDGET_MS = 250
+
+# 导入入口模块时不应加载的模块（前缀匹配）
+FORBIDDEN_MODULES = ("pandas", "numpy", "akshare", "tushare", "openai", "yaml", "dotenv", "src.agents.")
+
+
+def import_profile(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    在新解释器中导入模块一次
+
+    Returns:
+        (总耗时毫秒, {模块名: (自身耗时us, 累计耗时us)})
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules[module][1] / 1000, modules
+
+
+def wall_time(args: List[str]) -> float:
+    """运行 python main.py <args> 的墙钟耗时（秒）"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", *args], cwd=ROOT, capture_output=True)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入耗时基准测试")
+    parser.add_argument("--module", default="main", help="入口模块")
+    parser.add_argument("--runs", type=int, default=5, help="运行次数（取最小值）")
+    parser.add_argument("--top", type=int, default=10, help="打印累计耗时最多的模块数")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS, help="导入耗时预算（毫秒）")
+    parser.add_argument("--check", action="store_true", help="超出预算或导入了重型依赖时以非零状态退出")
+    args = parser.parse_args()
+
+    runs = [import_profile(args.module) for _ in range(args.runs)]
+    total, modules = min(runs, key=lambda run: run[0])
+    heavy = sorted(name for name in modules if name.startswith(FORBIDDEN_MODULES) or name in FORBIDDEN_MODULES)
+
+    print(f"📦 import {args.module}: {total:.1f}ms（{args.runs} 次取最小，预算 {args.budget:.0f}ms），共 {len(modules)} 个模块")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][1])[1:args.top + 1]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  (自身 {self_us / 1000:6.1f}ms)  {name}")
+    if args.module == "main":
+        print(f"  python main.py --help: {min(wall_time(['--help']) for _ in range(args.runs)):.2f}s")
+    if heavy:
+        print(f"⚠️ 导入了重型依赖: {', '.join(heavy)}")
+
+    if args.check:
+        if total > args.budget:
+            print(f"❌ 导入耗时 {total:.1f}ms 超出预算 {args.budget:.0f}ms")
+            sys.exit(1)
+        if heavy:
+            sys.exit(1)
+        print("✅ 导入耗时在预算内")
+
+
+if __name__ == "__main__":
+    main()
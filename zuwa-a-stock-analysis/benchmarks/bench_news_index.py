@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+批量新闻匹配对比 - 逐只股票 str.contains vs 共享新闻索引（Aho-Corasick）
+
+原实现：每只股票各下载一次新闻流，并对 标题/内容 两列各做一次 str.contains
+现实现：新闻流只下载一次，所有股票名称和代码在一个自动机中一遍扫描
+
+运行: python benchmarks/bench_news_index.py [--symbols 500] [--news 2000]
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from src.data.news_index import NewsIndex
+
+CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严"
+
+
+def make_universe(n: int, rng: random.Random):
+    names = set()
+    while len(names) < n:
+        names.add("".join(rng.choice(CHARS) for _ in range(4)))
+    return [(f"{600000 + i:06d}", name) for i, name in enumerate(sorted(names))]
+
+
+def make_feed(n: int, universe, rng: random.Random) -> pd.DataFrame:
+    rows = []
+    for i in range(n):
+        body = "".join(rng.choice(CHARS) for _ in range(300))
+        code, name = rng.choice(universe)
+        rows.append({
+            "标题": f"{name}{''.join(rng.choice(CHARS) for _ in range(12))}",
+            "内容": f"{body[:150]}（{code}）{body[150:]}",
+            "发布时间": f"2026-03-05 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+            "来源": "东方财富",
+            "链接": f"http://news/{i}",
+        })
+    return pd.DataFrame(rows)
+
+
+def legacy(feed: pd.DataFrame, universe, download_seconds: float):
+    """原实现：每只股票下载一次并扫描两列"""
+    results = {}
+    for code, name in universe:
+        time.sleep(download_seconds)
+        df = feed.copy()
+        related = df[df['内容'].str.contains(name, na=False) | df['标题'].str.contains(name, na=False)]
+        results[code] = related.head(5)
+    return results
+
+
+def indexed(feed: pd.DataFrame, universe, download_seconds: float):
+    """现实现：下载一次，建立索引后按代码查询"""
+    def fetch():
+        time.sleep(download_seconds)
+        return feed.copy()
+
+    index = NewsIndex(fetcher=fetch)
+    index.watch_many(universe)
+    index.refresh()
+    return {code: index.get(code) for code, _ in universe}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量新闻匹配对比")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--news", type=int, default=2000, help="新闻流条数")
+    parser.add_argument("--download", type=float, default=0.0, help="模拟单次下载耗时（秒）")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    universe = make_universe(args.symbols, rng)
+    feed = make_feed(args.news, universe, rng)
+
+    timings = {}
+    for label, func in (("逐只 str.contains", legacy), ("共享新闻索引", indexed)):
+        start = time.perf_counter()
+        results = func(feed, universe, args.download)
+        timings[label] = time.perf_counter() - start
+        hits = sum(1 for v in results.values() if len(v))
+
+    print(f"📊 {args.symbols} 只股票 × {args.news} 条新闻（模拟下载 {args.download}s/次）")
+    for label, seconds in timings.items():
+        print(f"  {label:16s} {seconds:8.3f}s")
+    base, new = timings.values()
+    print(f"  加速 {base / new:.1f}x，{hits} 只股票有相关新闻")
+
+
+if __name__ == "__main__":
+    main()
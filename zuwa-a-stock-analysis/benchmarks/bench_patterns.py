@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+形态扫描基准测试 - 5000只股票 × 750个交易日的全历史形态矩阵
+
+对比 PatternScanner 一次扫描全部形态与逐只股票、逐根K线调用
+PatternRecognition.detect_patterns 的耗时，并测量"最近N日出现某形态"查询的耗时
+
+运行: python benchmarks/bench_patterns.py [--symbols 5000] [--days 750]
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.pattern_recognition import PATTERNS, PatternRecognition, PatternScanner
+
+
+def make_frames(days: int, symbols: int, seed: int = 0) -> dict:
+    """价格库标准列的随机日线"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-01", periods=days).strftime("%Y-%m-%d")
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.03, (days, symbols)), axis=0))
+    open_ = close * (1 + rng.normal(0, 0.01, (days, symbols)))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, (days, symbols)))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, (days, symbols)))
+    return {
+        f"{600000 + i:06d}": pd.DataFrame({
+            "date": dates, "open": open_[:, i], "high": high[:, i], "low": low[:, i], "close": close[:, i],
+        })
+        for i in range(symbols)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="形态扫描基准测试")
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=750)
+    parser.add_argument("--sample", type=int, default=3, help="逐根K线计算的抽样股票数（按比例外推总耗时）")
+    args = parser.parse_args()
+
+    frames = make_frames(args.days, args.symbols)
+    print(f"📊 面板规模: {args.days} 天 × {args.symbols} 只股票, {len(PATTERNS)} 种形态")
+
+    start = time.perf_counter()
+    scanner = PatternScanner.from_frames(frames)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrices = scanner.scan()
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = scanner.find(["涨停", "看涨吞没"], days=5)
+    find_time = time.perf_counter() - start
+
+    # 逐根K线：对每个交易日截取历史调用单只股票判断
+    sample = list(frames)[:args.sample]
+    start = time.perf_counter()
+    mismatches = 0
+    for symbol in sample:
+        df = frames[symbol]
+        for row in range(4, len(df)):
+            patterns = PatternRecognition.detect_patterns(df.iloc[:row + 1], symbol)
+            mismatches += sorted(patterns) != sorted(n for n in PATTERNS if matrices[n][symbol].iloc[row])
+    loop_time = (time.perf_counter() - start) * args.symbols / len(sample)
+
+    occurrences = sum(int(m.to_numpy().sum()) for m in matrices.values())
+    print(f"  构造面板:       {build_time:8.2f}s")
+    print(f"  全部形态矩阵:   {scan_time:8.2f}s ({occurrences} 次出现)")
+    print(f"  最近5日选股:    {find_time * 1000:8.2f}ms ({len(found)} 只)")
+    print(f"  逐根K线判断:    {loop_time:8.1f}s (按 {len(sample)} 只外推)")
+    print(f"  加速比:         {loop_time / (build_time + scan_time):8.1f}x")
+    print(f"  不一致的K线:    {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
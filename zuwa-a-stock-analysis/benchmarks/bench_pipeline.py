@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+分析流程基准测试 - 离线回放磁带，测量 analyze_stock 与各Agent的耗时
+
+默认生成合成磁带；也可指定 python main.py --record 录制的真实磁带。
+每个规模（默认 1 / 50 / 500 只股票）在独立子进程中以空缓存目录运行，
+结果追加到 benchmarks/results.jsonl，--check 与上一次同条件的结果对比，
+单股耗时变慢超过容忍度时以非零状态退出
+
+运行: python benchmarks/bench_pipeline.py [--cassette DIR] [--sizes 1 50 500] [--check]
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_FILE = Path(__file__).resolve().parent / "results.jsonl"
+
+
+def cassette_symbols(cassette_dir: Path) -> List[Tuple[str, str]]:
+    """磁带中录制过日线的股票（按录制顺序）"""
+    symbols = []
+    with open(Path(cassette_dir) / "index.jsonl", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["path"] != "akshare.stock_zh_a_hist" or entry.get("default"):
+                continue
+            kwargs = dict(json.loads(entry["key"])[2])
+            if kwargs.get("symbol") and (kwargs["symbol"], "") not in symbols:
+                symbols.append((kwargs["symbol"], ""))
+    return symbols
+
+
+def fingerprint(cassette_dir: Path) -> str:
+    """磁带指纹（索引文件的哈希），只比较同一份磁带上的结果"""
+    return hashlib.sha256((Path(cassette_dir) / "index.jsonl").read_bytes()).hexdigest()[:12]
+
+
+def run_size(cassette_dir: str, symbols: List[Tuple[str, str]], config: str, concurrency: int) -> Dict[str, Any]:
+    """子进程：空缓存目录 + 回放磁带，批量分析并统计各Agent耗时"""
+    cache = tempfile.mkdtemp(prefix="zuwa-bench-")
+    os.environ["ZUWA_CACHE_DIR"] = cache
+    os.chdir(ROOT)
+    logging.getLogger("Agent").setLevel(logging.WARNING)
+
+    from main import ZuwaStockAnalyzer
+    from src.utils.cassette import Cassette
+    from src.utils.tracing import start_tracing, stop_tracing
+
+    async def collect(analyzer) -> List[Dict[str, Any]]:
+        return [r async for r in analyzer.analyze_batch(symbols, concurrency, refresh=True)]
+
+    cassette = Cassette(cassette_dir, "replay")
+    with cassette.use(), contextlib.redirect_stdout(io.StringIO()):
+        analyzer = ZuwaStockAnalyzer(config)
+        tracer = start_tracing()
+        started = time.perf_counter()
+        results = asyncio.run(collect(analyzer))
+        wall = time.perf_counter() - started
+        stop_tracing()
+
+    per_symbol = np.array([r["timing"]["total"] for r in results if "timing" in r])
+    summary = tracer.summary()
+    agents = {
+        row["name"]: {"count": int(row["count"]), "mean_ms": round(row["wall_mean"] * 1000, 2),
+                      "cpu_ms": round(row["cpu"] / max(row["count"], 1) * 1000, 2)}
+        for _, row in summary[summary["cat"] == "agent"].iterrows()
+    }
+    totals = summary.groupby("cat")["wall"].sum().round(3).to_dict()
+    stats = cassette.stats()
+    return {
+        "size": len(symbols),
+        "errors": sum("error" in r for r in results),
+        "wall": round(wall, 3),
+        "throughput": round(len(symbols) / wall, 2) if wall else None,
+        "per_symbol_mean": round(float(per_symbol.mean()), 4) if len(per_symbol) else None,
+        "per_symbol_p50": round(float(np.percentile(per_symbol, 50)), 4) if len(per_symbol) else None,
+        "per_symbol_p95": round(float(np.percentile(per_symbol, 95)), 4) if len(per_symbol) else None,
+        "agents": agents,
+        "category_wall": totals,
+        "cassette": {"hits": stats["hits"], "misses": stats["misses"], "missed_paths": stats["missed_paths"]},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def previous_result(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """results.jsonl 中同一磁带、规模、并发与CPU数的最近一次结果"""
+    if not RESULTS_FILE.exists():
+        return None
+    match = None
+    keys = ("fixture", "size", "concurrency", "cpus")
+    with open(RESULTS_FILE, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            old = json.loads(line)
+            if all(old.get(k) == record.get(k) for k in keys):
+                match = old
+    return match
+
+
+def compare(record: Dict[str, Any], previous: Optional[Dict[str, Any]], tolerance: float) -> bool:
+    """打印与上一次结果的对比，返回是否出现性能回退"""
+    if previous is None or not previous.get("per_symbol_mean") or not record.get("per_symbol_mean"):
+        print("    (无可对比的历史结果)")
+        return False
+    ratio = record["per_symbol_mean"] / previous["per_symbol_mean"]
+    regressed = ratio > 1 + tolerance
+    print(f"    对比 {previous.get('commit') or '-'} ({previous['timestamp'][:10]}): 单股均值 "
+          f"{previous['per_symbol_mean'] * 1000:.1f}ms -> {record['per_symbol_mean'] * 1000:.1f}ms "
+          f"({(ratio - 1) * 100:+.1f}%){'  ⚠️ 回退' if regressed else ''}")
+    for name, agent in record["agents"].items():
+        old = previous.get("agents", {}).get(name)
+        if old and old["mean_ms"]:
+            change = agent["mean_ms"] / old["mean_ms"] - 1
+            if change > tolerance:
+                print(f"      ⚠️ {name}: {old['mean_ms']:.1f}ms -> {agent['mean_ms']:.1f}ms ({change * 100:+.1f}%)")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析流程基准测试（离线回放）")
+    parser.add_argument("--cassette", help="磁带目录，默认生成合成磁带")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--concurrency", type=int, default=4, help="同时分析的股票数")
+    parser.add_argument("--config", default="config/agents.yaml")
+    parser.add_argument("--seed", type=int, default=0, help="合成磁带的随机种子")
+    parser.add_argument("--check", action="store_true", help="与上一次同条件结果对比，回退时返回非零状态")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的单股耗时增幅")
+    parser.add_argument("--no-save", action="store_true", help="不写入 results.jsonl")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.cassette:
+            cassette_dir = Path(args.cassette).resolve()
+            symbols = cassette_symbols(cassette_dir)
+            fixture = f"cassette:{fingerprint(cassette_dir)}"
+        else:
+            from benchmarks.fixtures import write_synthetic_cassette
+            cassette_dir = Path(tmp) / "synthetic"
+            start = time.perf_counter()
+            symbols = write_synthetic_cassette(cassette_dir, max(args.sizes), seed=args.seed)
+            fixture = f"synthetic:{len(symbols)}:{args.seed}"
+            print(f"📼 合成磁带: {len(symbols)} 只股票 (生成 {time.perf_counter() - start:.1f}s)")
+
+        regressed = False
+        context = multiprocessing.get_context("spawn")
+        for size in args.sizes:
+            if size > len(symbols):
+                print(f"⚠️ 磁带中只有 {len(symbols)} 只股票，跳过 {size}")
+                continue
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_size, str(cassette_dir), symbols[:size],
+                                     str(Path(args.config).resolve()), args.concurrency).result()
+
+            record = {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "fixture": fixture,
+                "concurrency": args.concurrency,
+                **result,
+            }
+            print(f"\n📊 {size} 只股票: 总计 {record['wall']:.2f}s | {record['throughput']} 只/秒 | "
+                  f"单股 P50 {record['per_symbol_p50']}s / P95 {record['per_symbol_p95']}s | "
+                  f"失败 {record['errors']} | 磁带未命中 {record['cassette']['misses']}")
+            for name, agent in sorted(record["agents"].items(), key=lambda x: -x[1]["mean_ms"]):
+                print(f"    {name:12s} {agent['mean_ms']:8.1f}ms  CPU {agent['cpu_ms']:8.1f}ms  × {agent['count']}")
+            if args.check:
+                regressed |= compare(record, previous_result(record), args.tolerance)
+            if not args.no_save:
+                with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    if not args.no_save:
+        print(f"\n📁 结果已追加到: {RESULTS_FILE}")
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
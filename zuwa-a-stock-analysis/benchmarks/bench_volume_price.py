@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+量价序列基准测试 - 5000只股票 × 750个交易日的逐K线量价信号与健康度
+
+对比 volume_price_panel 一次计算整个面板与逐只股票、逐根K线调用
+AdvancedAnalyzer.analyze_volume_price_relationship 的耗时
+
+运行: python benchmarks/bench_volume_price.py [--symbols 5000] [--days 750]
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.advanced_analyzer import VOLUME_PRICE_SIGNALS, AdvancedAnalyzer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="量价序列基准测试")
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=750)
+    parser.add_argument("--sample", type=int, default=2, help="逐根K线计算的抽样股票数（按比例外推总耗时）")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2023-01-01", periods=args.days).strftime("%Y-%m-%d")
+    columns = [f"{600000 + i:06d}" for i in range(args.symbols)]
+    shape = (args.days, args.symbols)
+    close = pd.DataFrame(20 * np.exp(np.cumsum(rng.normal(0, 0.03, shape), axis=0)), index=index, columns=columns)
+    volume = pd.DataFrame(rng.lognormal(13, 0.5, shape).round(-2), index=index, columns=columns)
+    print(f"📊 面板规模: {args.days} 天 × {args.symbols} 只股票")
+
+    analyzer = AdvancedAnalyzer()
+    start = time.perf_counter()
+    panel = analyzer.analyze_volume_price_panel(close, volume)
+    panel_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for symbol in columns[:args.sample]:
+        df = pd.DataFrame({"close": close[symbol].to_numpy(), "volume": volume[symbol].to_numpy()})
+        for row in range(len(df)):
+            analyzer.analyze_volume_price_relationship(df.iloc[:row + 1])
+    loop_time = (time.perf_counter() - start) * args.symbols / args.sample
+
+    signals = sum(int(panel[name].to_numpy().sum()) for name in VOLUME_PRICE_SIGNALS)
+    print(f"  面板计算:       {panel_time:8.2f}s ({signals} 个量价信号)")
+    print(f"  逐根K线分析:    {loop_time:8.1f}s (按 {args.sample} 只外推)")
+    print(f"  加速比:         {loop_time / panel_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+合成磁带 - 生成与 AKShare / LLM 响应格式一致的随机数据，供基准测试离线回放
+
+真实录制的磁带（python main.py --record DIR ...）与合成磁带可以互换使用；
+合成磁带的日期以今天为终点，保证价格库、交易日历等按"今天"计算的逻辑走正常路径
+
+运行: python benchmarks/fixtures.py --out fixtures/synthetic --symbols 500
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import json
+import shutil
+from datetime import date, timedelta
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.cassette import LLM_PATH, Cassette
+
+# 默认LLM响应（合成磁带无法预知提示词，所有LLM调用回放同一条）
+LLM_RESPONSE = {
+    "signal": "NEUTRAL",
+    "confidence": 55,
+    "analysis": "合成磁带响应：量价平稳，资金面中性。",
+    "key_points": ["趋势震荡", "资金中性", "估值合理"],
+    "risks": ["市场波动"],
+    "target_price": None,
+}
+
+INDUSTRIES = ["白酒", "银行", "半导体", "医药", "光伏", "汽车", "券商", "软件"]
+
+
+def make_symbols(count: int) -> List[Tuple[str, str]]:
+    """沪深两市各半的股票代码与名称"""
+    symbols = []
+    for i in range(count):
+        code = f"{600000 + i // 2:06d}" if i % 2 == 0 else f"{1 + i // 2:06d}"
+        symbols.append((code, f"合成{i:04d}"))
+    return symbols
+
+
+def _daily(rng: np.random.Generator, dates: pd.DatetimeIndex) -> pd.DataFrame:
+    """AKShare 前复权日线（中文列名）"""
+    n = len(dates)
+    close = 20 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n)))
+    prev = np.concatenate([[close[0]], close[:-1]])
+    open_ = prev * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n))
+    volume = rng.integers(50_000, 500_000, n).astype(float)
+    return pd.DataFrame({
+        "日期": dates.strftime("%Y-%m-%d"),
+        "开盘": open_.round(2), "收盘": close.round(2), "最高": high.round(2), "最低": low.round(2),
+        "成交量": volume, "成交额": (volume * close * 100).round(0),
+        "振幅": ((high - low) / prev * 100).round(2),
+        "涨跌幅": ((close / prev - 1) * 100).round(2), "涨跌额": (close - prev).round(2),
+        "换手率": rng.uniform(0.2, 5, n).round(2),
+    })
+
+
+def _fund_flow(rng: np.random.Generator, dates: pd.DatetimeIndex, close: np.ndarray) -> pd.DataFrame:
+    """AKShare 个股资金流（金额单位元）"""
+    n = len(dates)
+    frame = {"日期": dates.strftime("%Y-%m-%d"), "收盘价": close, "涨跌幅": rng.normal(0, 2, n).round(2)}
+    for label in ("主力", "超大单", "大单", "中单", "小单"):
+        frame[f"{label}净流入-净额"] = rng.normal(0, 5e7, n).round(0)
+        frame[f"{label}净流入-净占比"] = rng.normal(0, 5, n).round(2)
+    return pd.DataFrame(frame)
+
+
+def write_synthetic_cassette(root, symbols: int = 500, days: int = 500, seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    生成合成磁带
+
+    Args:
+        root: 磁带目录（已存在时清空）
+        symbols: 股票数
+        days: 每只股票的日线长度（交易日）
+
+    Returns:
+        [(股票代码, 股票名称), ...]
+    """
+    root = Path(root)
+    if root.exists():
+        shutil.rmtree(root)
+    cassette = Cassette(root, "record")
+    rng = np.random.default_rng(seed)
+    stocks = make_symbols(symbols)
+    today = date.today()
+    dates = pd.bdate_range(end=today, periods=days)
+    # 参数中的日期在磁带里会被归一化，录制时写任意日期即可
+    day = "20250101"
+
+    cassette.add("akshare.tool_trade_date_hist_sina", pd.DataFrame({
+        "trade_date": pd.bdate_range(today - timedelta(days=3 * 365), today + timedelta(days=365)).date
+    }), default=True)
+
+    spot_rows = max(symbols, 5000)
+    spot_codes = [code for code, _ in stocks] + [f"{300000 + i:06d}" for i in range(spot_rows - symbols)]
+    cassette.add("akshare.stock_zh_a_spot_em", pd.DataFrame({
+        "序号": np.arange(1, spot_rows + 1),
+        "代码": spot_codes,
+        "名称": [name for _, name in stocks] + [f"其他{i}" for i in range(spot_rows - symbols)],
+        "最新价": rng.uniform(3, 200, spot_rows).round(2),
+        "涨跌幅": rng.normal(0, 2, spot_rows).round(2),
+        "成交量": rng.integers(10_000, 1_000_000, spot_rows).astype(float),
+        "成交额": rng.uniform(1e7, 5e9, spot_rows).round(0),
+        "换手率": rng.uniform(0.1, 10, spot_rows).round(2),
+        "量比": rng.uniform(0.5, 3, spot_rows).round(2),
+        "市盈率-动态": rng.uniform(5, 80, spot_rows).round(2),
+        "总市值": rng.uniform(5e9, 2e12, spot_rows).round(0),
+        "流通市值": rng.uniform(3e9, 1.5e12, spot_rows).round(0),
+    }), default=True)
+
+    for i, (code, name) in enumerate(stocks):
+        daily = _daily(rng, dates)
+        cassette.add("akshare.stock_zh_a_hist", daily, kwargs={
+            "symbol": code, "period": "daily", "start_date": day, "end_date": day, "adjust": "qfq"})
+        cassette.add("akshare.stock_individual_fund_flow", _fund_flow(rng, dates[-120:], daily["收盘"].to_numpy()[-120:]),
+                     kwargs={"stock": code, "market": "sh" if code.startswith("6") else "sz"})
+        cassette.add("akshare.stock_individual_info_em", pd.DataFrame({
+            "item": ["股票代码", "股票简称", "总市值", "流通市值", "行业", "上市时间", "总股本", "流通股"],
+            "value": [code, name, 1e11, 8e10, INDUSTRIES[i % len(INDUSTRIES)], 20010827, 1.2e9, 1.2e9],
+        }), kwargs={"symbol": code})
+
+    listed = stocks[::10]
+    cassette.add("akshare.stock_lhb_detail_em", pd.DataFrame({
+        "代码": [code for code, _ in listed],
+        "名称": [name for _, name in listed],
+        "上榜日": [str(dates[-1 - k % 20].date()) for k in range(len(listed))],
+        "龙虎榜净买额": rng.normal(0, 5e7, len(listed)).round(0),
+        "龙虎榜买入额": rng.uniform(1e7, 2e8, len(listed)).round(0),
+        "龙虎榜卖出额": rng.uniform(1e7, 2e8, len(listed)).round(0),
+        "上榜原因": "日涨幅偏离值达到7%的前5只证券",
+    }), default=True)
+
+    sh = [code for code, _ in stocks if code.startswith("6")]
+    sz = [code for code, _ in stocks if not code.startswith("6")]
+    cassette.add("akshare.stock_margin_detail_sse", pd.DataFrame({
+        "信用交易日期": day, "标的证券代码": sh, "标的证券简称": "合成",
+        "融资余额": rng.uniform(1e8, 5e9, len(sh)).round(0), "融资买入额": rng.uniform(1e7, 5e8, len(sh)).round(0),
+        "融资偿还额": rng.uniform(1e7, 5e8, len(sh)).round(0), "融券余量": rng.integers(0, 1e6, len(sh)),
+    }), default=True)
+    cassette.add("akshare.stock_margin_detail_szse", pd.DataFrame({
+        "证券代码": sz, "证券简称": "合成",
+        "融资买入额": rng.uniform(1e7, 5e8, len(sz)).round(0), "融资余额": rng.uniform(1e8, 5e9, len(sz)).round(0),
+        "融券卖出量": rng.integers(0, 1e5, len(sz)), "融券余量": rng.integers(0, 1e6, len(sz)),
+        "融券余额": rng.uniform(0, 1e7, len(sz)).round(0), "融资融券余额": rng.uniform(1e8, 5e9, len(sz)).round(0),
+    }), default=True)
+
+    news = 300
+    mentioned = [stocks[k % len(stocks)] for k in range(news)]
+    cassette.add("akshare.stock_news_em", pd.DataFrame({
+        "关键词": [code for code, _ in mentioned],
+        "标题": [f"{name}({code})发布经营公告 第{k}期" for k, (code, name) in enumerate(mentioned)],
+        "内容": [f"{name}经营稳健，订单增长。" for _, name in mentioned],
+        "发布时间": [f"{today} 09:{k % 60:02d}:00" for k in range(news)],
+        "文章来源": "合成财经",
+        "新闻链接": "",
+    }), default=True)
+    cassette.add("akshare.stock_news_main_cx", pd.DataFrame({
+        "tag": "市场", "summary": ["宏观政策稳定，市场流动性合理充裕"] * 20,
+        "interval_time": str(today), "pub_time": str(today), "url": "",
+    }), default=True)
+
+    cassette.add("akshare.stock_notice_report", pd.DataFrame({
+        "代码": [code for code, _ in stocks[:50]],
+        "公告标题": [f"{name}关于召开股东大会的通知" for _, name in stocks[:50]],
+        "公告类型": "临时公告", "公告日期": str(today), "公告链接": "",
+    }), default=True)
+    cassette.add("akshare.stock_gdfx_free_holding_analyse_em", pd.DataFrame({
+        "股票代码": [code for code, _ in stocks],
+        "股东名称": "香港中央结算有限公司",
+        "持股比例": rng.uniform(0.5, 8, len(stocks)).round(2),
+    }), default=True)
+    # 情报分析师按股票名称查询个股信息，统一回放一份
+    cassette.add("akshare.stock_individual_info_em", pd.DataFrame({
+        "item": ["行业"], "value": [INDUSTRIES[0]],
+    }), default=True)
+
+    cassette.add(LLM_PATH, json.dumps(LLM_RESPONSE, ensure_ascii=False), default=True)
+    return stocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成磁带")
+    parser.add_argument("--out", default="fixtures/synthetic")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stocks = write_synthetic_cassette(args.out, args.symbols, args.days, args.seed)
+    print(f"📼 合成磁带: {args.out}，{len(stocks)} 只股票 × {args.days} 个交易日")
+
+
+if __name__ == "__main__":
+    main()
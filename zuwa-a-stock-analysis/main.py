@@ -1,104 +1,244 @@
 """
 祖蛙沪深A股分析系统 - 主入口
+
+模块顶层只导入标准库与轻量模块，pandas、各Agent、回测与选股模块在用到时才导入，
+--help、报告等模式不必承担完整分析链路的导入耗时（预算见 benchmarks/bench_import.py）
 """
 import asyncio
 import argparse
-import yaml
+import json
+import os
+import tempfile
+import time
+from contextlib import ExitStack
 from datetime import datetime
-from typing import Dict, Any
-from dotenv import load_dotenv
-
-from src.agents import (
-    DataCollectionAgent,
-    TechnicalAnalysisAgent,
-    CapitalAnalysisAgent,
-    IntelligenceAgent,
-    SectorAnalysisAgent,
-    BullAnalystAgent,
-    BearAnalystAgent,
-    RetailSentimentAgent,
-    ChiefAnalystAgent,
-    AgentOutput
-)
-
-# 加载环境变量
-load_dotenv()
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
+
+from src.utils.cassette import Cassette
+from src.utils.concurrency import configure_executor, configure_source_limits, run_blocking
+from src.utils.helpers import DateTimeEncoder
+from src.utils.lazy import lazy_import
+from src.utils.llm_cache import get_llm_cache
+from src.utils.llm_scheduler import get_llm_scheduler, start_usage_scope
+from src.utils.tracing import Tracer, annotate, start_tracing, stop_tracing, traced
+
+# Agent键 -> (Agent类名, agents 配置节)，创建分析器后第一次用到Agent时才导入
+AGENT_REGISTRY = {
+    "data": ("DataCollectionAgent", "data_collector"),
+    "technical": ("TechnicalAnalysisAgent", "technical_analyst"),
+    "capital": ("CapitalAnalysisAgent", "capital_analyst"),
+    "intelligence": ("IntelligenceAgent", "intelligence_analyst"),
+    "sector": ("SectorAnalysisAgent", "sector_analyst"),
+    "bull": ("BullAnalystAgent", "bull_analyst"),
+    "bear": ("BearAnalystAgent", "bear_analyst"),
+    "retail_sentiment": ("RetailSentimentAgent", "retail_sentiment"),
+    "chief": ("ChiefAnalystAgent", "chief_analyst"),
+}
+
+
+def load_env():
+    """加载 .env 中的环境变量（不覆盖已设置的变量）"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def _silent(*args, **kwargs):
+    """静默输出"""
 
 
 class ZuwaStockAnalyzer:
     """祖蛙股票分析器"""
     
-    def __init__(self, config_path: str = "config/agents.yaml"):
-        """初始化分析器"""
+    def __init__(self, config_path: str = "config/agents.yaml", db_path: Optional[str] = None):
+        """
+        初始化分析器
+        
+        Args:
+            config_path: 配置文件路径
+            db_path: 可选，分析结果库文件（覆盖 results.path）
+        """
+        from src.data.dragon_tiger import get_dragon_tiger_store
+        from src.data.hedged import get_daily_fetcher
+        from src.data.margin_store import get_margin_store
+        from src.data.market_snapshot import get_market_snapshot
+        from src.data.news_index import get_news_index
+        from src.data.price_store import get_price_store
+        from src.data.result_store import DEFAULT_INTRADAY_TTL, config_hash, get_result_store
+        
+        load_env()
         self.config = self._load_config(config_path)
-        self.agents = self._init_agents()
+        self._agents = None
+        
+        # 分析结果库：同一交易日、同一配置的结果直接复用
+        results_config = self.config.get("results", {})
+        self.results = None
+        if results_config.get("enabled", True) or db_path:
+            self.results = get_result_store(db_path or results_config.get("path"))
+        self.config_hash = config_hash(self.config)
+        self.intraday_ttl = results_config.get("intraday_ttl", DEFAULT_INTRADAY_TTL)
+        
+        # 阻塞数据接口使用的线程池大小
+        configure_executor(self.config.get("system", {}).get("max_workers", 5))
+        
+        # 全市场行情快照有效期与各数据源在途请求上限
+        data_sources = self.config.get("data_sources", {})
+        get_market_snapshot(data_sources.get("akshare", {}).get("spot_ttl"))
+        get_news_index(data_sources.get("akshare", {}).get("news_ttl"))
+        get_price_store(history_days=data_sources.get("price_store", {}).get("history_days"))
+        get_dragon_tiger_store(data_sources.get("dragon_tiger", {}).get("history_days"))
+        get_margin_store(data_sources.get("margin", {}).get("history_days"))
+        hedge = data_sources.get("daily_hedge", {})
+        get_daily_fetcher(
+            hedge.get("sources"),
+            percentile=hedge.get("percentile"),
+            default_delay=hedge.get("default_delay"),
+            min_delay=hedge.get("min_delay")
+        )
+        configure_source_limits({
+            source: (options or {}).get("max_inflight")
+            for source, options in data_sources.items()
+        })
+        
+        # LLM响应缓存与请求调度
+        llm_config = self.config.get("llm", {})
+        get_llm_cache(
+            ttl=llm_config.get("cache_ttl"),
+            max_bytes=int(llm_config["cache_max_mb"] * 1024 * 1024) if llm_config.get("cache_max_mb") else None
+        )
+        get_llm_scheduler(
+            max_inflight=llm_config.get("max_inflight"),
+            timeout=llm_config.get("timeout"),
+            retries=llm_config.get("retries"),
+            backoff=llm_config.get("retry_backoff"),
+            token_budget=llm_config.get("token_budget"),
+            stream=llm_config.get("stream")
+        )
         
     def _load_config(self, path: str) -> Dict:
         """加载配置文件"""
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return lazy_import("yaml").safe_load(f)
         except Exception as e:
             print(f"⚠️ 无法加载配置文件: {e}")
             return {}
     
+    @property
+    def agents(self) -> Dict:
+        """全部Agent，第一次访问时创建（回测、报告、选股模式不导入Agent模块）"""
+        if self._agents is None:
+            self._agents = self._init_agents()
+        return self._agents
+    
     def _init_agents(self) -> Dict:
-        """初始化所有Agent"""
+        """按 AGENT_REGISTRY 初始化所有Agent"""
+        from src import agents
         agent_config = self.config.get("agents", {})
         
-        return {
-            "data": DataCollectionAgent(agent_config.get("data_collector", {})),
-            "technical": TechnicalAnalysisAgent(agent_config.get("technical_analyst", {})),
-            "capital": CapitalAnalysisAgent(agent_config.get("capital_analyst", {})),
-            "intelligence": IntelligenceAgent(agent_config.get("intelligence_analyst", {})),
-            "sector": SectorAnalysisAgent(agent_config.get("sector_analyst", {})),
-            "bull": BullAnalystAgent(agent_config.get("bull_analyst", {})),
-            "bear": BearAnalystAgent(agent_config.get("bear_analyst", {})),
-            "retail_sentiment": RetailSentimentAgent(agent_config.get("retail_sentiment", {})),
-            "chief": ChiefAnalystAgent(agent_config.get("chief_analyst", {}))
-        }
+        instances = {}
+        for key, (class_name, section) in AGENT_REGISTRY.items():
+            config = agent_config.get(section, {})
+            if key == "chief":
+                config = self._chief_config(config)
+            instances[key] = getattr(agents, class_name)(config)
+        return instances
+    
+    def _chief_config(self, chief_config: Dict) -> Dict:
+        """首席分析师配置：合并顶层的 weights / thresholds"""
+        config = dict(chief_config)
+        for key in ("weights", "thresholds"):
+            if self.config.get(key):
+                config[key] = self.config[key]
+        return config
     
-    async def analyze_stock(self, symbol: str, name: str = "") -> Dict[str, Any]:
+    @traced("analyze_stock", cat="pipeline")
+    async def analyze_stock(
+        self,
+        symbol: str,
+        name: str = "",
+        concurrent: bool = True,
+        verbose: bool = True,
+        progress: Optional[Callable[[str, float], None]] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
         """
         分析单只股票
         
         Args:
             symbol: 股票代码 (如: 600519)
             name: 股票名称 (如: 贵州茅台)
+            concurrent: 是否并发执行分析Agent，False时按原串行顺序逐个执行
+            verbose: 是否打印分析过程
+            progress: 进度回调 progress(步骤名称, 完成比例0-1)，每个步骤开始时调用
+            refresh: 忽略结果库中已保存的结果，重新分析
             
         Returns:
-            分析结果字典
+            分析结果字典（来自结果库时 cached 为 True）
         """
-        print(f"\n🐸 祖蛙开始分析: {symbol} {name}")
-        print("=" * 50)
+        from src.agents import AgentOutput
+        from src.analysis.feature_store import FeatureStore
+        from src.data.result_store import result_window
+        
+        log = print if verbose else _silent
+        report = progress or _silent
+        annotate(symbol=symbol)
+        log(f"\n🐸 祖蛙开始分析: {symbol} {name}")
+        log("=" * 50)
+        
+        trade_date, max_age, not_before = result_window(intraday_ttl=self.intraday_ttl)
+        if self.results is not None and not refresh:
+            stored = self.results.get(symbol, trade_date, self.config_hash, max_age=max_age, not_before=not_before)
+            if stored is not None:
+                stored["cached"] = True
+                report("完成", 1.0)
+                log(f"📦 使用结果库中 {trade_date} 的分析结果（--refresh 重新分析）")
+                return stored
+        
+        started = time.perf_counter()
+        step_times = {}
+        agent_times = {}
+        llm_usage = start_usage_scope()
         
         # Step 1: 数据收集
-        print("\n📊 Step 1: 数据收集...")
+        report("数据收集", 0.0)
+        log("\n📊 Step 1: 数据收集...")
+        step_start = time.perf_counter()
         data_result = await self.agents["data"].analyze(symbol, {"name": name})
         context = data_result.details
         context["symbol"] = symbol
         context["name"] = name
+        context["features"] = FeatureStore(symbol)
+        step_times["data"] = time.perf_counter() - step_start
         
         # Step 2: 并行执行各分析Agent
-        print("\n🔍 Step 2: 并行分析...")
+        report("多维分析", 0.15)
+        log(f"\n🔍 Step 2: {'并行' if concurrent else '串行'}分析...")
+        step_start = time.perf_counter()
+        
+        keys = ["technical", "capital", "intelligence", "sector", "retail_sentiment"]
         
-        tasks = [
-            ("technical", self.agents["technical"].analyze(symbol, context)),
-            ("capital", self.agents["capital"].analyze(symbol, context)),
-            ("intelligence", self.agents["intelligence"].analyze(symbol, context)),
-            ("sector", self.agents["sector"].analyze(symbol, context)),
-            ("retail_sentiment", self.agents["retail_sentiment"].analyze(symbol, context)),
-        ]
+        async def run_agent(key: str):
+            agent_start = time.perf_counter()
+            result = await self.agents[key].analyze(symbol, context)
+            agent_times[key] = time.perf_counter() - agent_start
+            return result
+        
+        if concurrent:
+            results = await asyncio.gather(*(run_agent(key) for key in keys))
+        else:
+            results = [await run_agent(key) for key in keys]
         
         agent_outputs = {}
-        for key, task in tasks:
-            result = await task
+        for key, result in zip(keys, results):
             agent_outputs[key] = result
             context[f"{key}_analysis"] = result.details
-            print(f"  ✅ {result.agent_name}: {result.summary[:50]}...")
+            log(f"  ✅ {result.agent_name}: {result.summary[:50]}...")
+        step_times["agents"] = time.perf_counter() - step_start
         
         # Step 3: 高级分析（量价关系等）
-        print("\n📊 Step 3: 深度数据分析...")
+        report("深度数据分析", 0.5)
+        log("\n📊 Step 3: 深度数据分析...")
+        step_start = time.perf_counter()
         
         from src.analysis.advanced_analyzer import get_advanced_analyzer
         advanced = get_advanced_analyzer()
@@ -106,58 +246,204 @@ class ZuwaStockAnalyzer:
         # 量价关系分析
         daily_data = context.get("daily_data")
         if daily_data is not None and not daily_data.empty:
-            vp_analysis = advanced.analyze_volume_price_relationship(daily_data)
+            vp_analysis = advanced.analyze_volume_price_relationship(daily_data, context["features"])
             if "error" not in vp_analysis:
-                agent_outputs["volume_price"] = type('obj', (object,), {
-                    'agent_name': '量价分析师',
-                    'signal': 'BULLISH' if vp_analysis.get('health_score', 50) > 60 else 'BEARISH' if vp_analysis.get('health_score', 50) < 40 else 'NEUTRAL',
-                    'confidence': abs(vp_analysis.get('health_score', 50) - 50) * 2,
-                    'summary': f"量价健康度: {vp_analysis.get('health_score', 'N/A')}/100, 信号: {vp_analysis.get('signals', [{}])[0].get('type', '无') if vp_analysis.get('signals') else '无'}",
-                    'details': vp_analysis,
-                    'timestamp': datetime.now(),
-                    'to_dict': lambda: {
-                        'agent_name': '量价分析师',
-                        'signal': 'BULLISH' if vp_analysis.get('health_score', 50) > 60 else 'BEARISH' if vp_analysis.get('health_score', 50) < 40 else 'NEUTRAL',
-                        'confidence': abs(vp_analysis.get('health_score', 50) - 50) * 2,
-                        'summary': f"量价健康度: {vp_analysis.get('health_score', 'N/A')}/100",
-                        'details': vp_analysis,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                })()
-                print(f"  ✅ 量价分析师: 健康度 {vp_analysis.get('health_score', 'N/A')}/100")
+                health = vp_analysis.get('health_score', 50)
+                signals = vp_analysis.get('signals')
+                agent_outputs["volume_price"] = AgentOutput(
+                    agent_name='量价分析师',
+                    signal='BULLISH' if health > 60 else 'BEARISH' if health < 40 else 'NEUTRAL',
+                    confidence=abs(health - 50) * 2,
+                    summary=f"量价健康度: {vp_analysis.get('health_score', 'N/A')}/100, 信号: {signals[0].get('type', '无') if signals else '无'}",
+                    details=vp_analysis,
+                    timestamp=datetime.now()
+                )
+                log(f"  ✅ 量价分析师: 健康度 {vp_analysis.get('health_score', 'N/A')}/100")
+        step_times["advanced"] = time.perf_counter() - step_start
         
         # Step 4: 多空辩论
-        print("\n🐂🐻 Step 4: 多空辩论...")
+        report("多空辩论", 0.6)
+        log("\n🐂🐻 Step 4: 多空辩论...")
+        step_start = time.perf_counter()
         
         bull_task = self.agents["bull"].analyze(symbol, context)
         bear_task = self.agents["bear"].analyze(symbol, context)
         
-        bull_result, bear_result = await asyncio.gather(bull_task, bear_task)
+        if concurrent:
+            bull_result, bear_result = await asyncio.gather(bull_task, bear_task)
+        else:
+            bull_result = await bull_task
+            bear_result = await bear_task
+        step_times["debate"] = time.perf_counter() - step_start
         
         agent_outputs["bull"] = bull_result
         agent_outputs["bear"] = bear_result
         
-        print(f"  🐂 多头: {bull_result.summary[:50]}...")
-        print(f"  🐻 空头: {bear_result.summary[:50]}...")
+        log(f"  🐂 多头: {bull_result.summary[:50]}...")
+        log(f"  🐻 空头: {bear_result.summary[:50]}...")
         
         # Step 5: 首席决策
-        print("\n🧠 Step 5: 首席分析师综合决策...")
+        report("首席决策", 0.9)
+        log("\n🧠 Step 5: 首席分析师综合决策...")
+        step_start = time.perf_counter()
         
         final_decision = await self.agents["chief"].make_decision(
             symbol, name, agent_outputs
         )
+        step_times["chief"] = time.perf_counter() - step_start
+        
+        report("完成", 1.0)
         
-        print("\n" + "=" * 50)
-        print(f"📈 最终结论: {final_decision.summary}")
-        print("=" * 50)
+        log("\n" + "=" * 50)
+        log(f"📈 最终结论: {final_decision.summary}")
+        log("=" * 50)
         
-        return {
+        result = {
             "symbol": symbol,
             "name": name,
             "timestamp": datetime.now().isoformat(),
             "final_decision": final_decision.to_dict(),
-            "agent_outputs": {k: v.to_dict() for k, v in agent_outputs.items()}
+            "agent_outputs": {k: v.to_dict() for k, v in agent_outputs.items()},
+            "timing": {
+                "mode": "concurrent" if concurrent else "serial",
+                "total": round(time.perf_counter() - started, 3),
+                "steps": {k: round(v, 3) for k, v in step_times.items()},
+                "agents": {k: round(v, 3) for k, v in agent_times.items()},
+                "features": context["features"].stats(),
+                "llm": llm_usage,
+            }
         }
+        if self.results is not None:
+            self.results.put(result, trade_date, self.config_hash)
+        return result
+    
+    async def analyze_batch(
+        self,
+        symbols: List[Tuple[str, str]],
+        concurrency: Optional[int] = None,
+        refresh: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        批量分析多只股票，按完成顺序逐个产出结果
+        
+        所有股票共用同一组Agent、行情快照和线程池，各数据源的在途请求数
+        由 data_sources.*.max_inflight 限制
+        
+        Args:
+            symbols: [(股票代码, 股票名称), ...]
+            concurrency: 同时分析的股票数，默认取 system.batch_concurrency
+            refresh: 忽略结果库中已保存的结果，重新分析
+            
+        Yields:
+            单只股票的分析结果，失败时包含 error 字段
+        """
+        if concurrency is None:
+            concurrency = self.config.get("system", {}).get("batch_concurrency", 4)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        from src.data.news_index import get_news_index
+        
+        # 一次性关注全部股票，新闻流只需扫描一遍
+        get_news_index().watch_many(symbols)
+        
+        async def run_one(symbol: str, name: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.analyze_stock(symbol, name, verbose=False, refresh=refresh)
+                except Exception as e:
+                    return {
+                        "symbol": symbol,
+                        "name": name,
+                        "timestamp": datetime.now().isoformat(),
+                        "error": str(e)
+                    }
+        
+        tasks = [asyncio.ensure_future(run_one(symbol, name)) for symbol, name in symbols]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def print_batch_line(self, result: Dict[str, Any], index: int, total: int):
+        """打印批量模式下单只股票的一行摘要"""
+        prefix = f"[{index}/{total}] {result['symbol']} {result.get('name', '')}".strip()
+        if "error" in result:
+            print(f"  ❌ {prefix}: {result['error']}")
+            return
+        
+        details = result["final_decision"]["details"]
+        elapsed = "结果库" if result.get("cached") else f"{result.get('timing', {}).get('total', 0):.1f}s"
+        print(f"  ✅ {prefix}: {details['rating']} {details['composite_score']:.1f}/100 ({elapsed})")
+    
+    def print_batch_summary(self, results: List[Dict[str, Any]], top: int = 20):
+        """打印批量分析排行"""
+        ok = [r for r in results if "error" not in r]
+        ok.sort(key=lambda r: r["final_decision"]["details"]["composite_score"], reverse=True)
+        
+        print("\n" + "=" * 60)
+        print(f"🐸 祖蛙批量分析排行 (成功 {len(ok)}/{len(results)})")
+        print("=" * 60)
+        for i, r in enumerate(ok[:top], 1):
+            details = r["final_decision"]["details"]
+            print(f"  {i:3d}. {r['symbol']} {r.get('name', ''):8s} {details['rating']:6s} {details['composite_score']:5.1f}")
+        usage = get_llm_scheduler().usage
+        if usage["requests"]:
+            print(f"  LLM: 请求 {usage['requests']} 次，Token {usage['prompt_tokens']}+{usage['completion_tokens']}，"
+                  f"重试 {usage['retries']}，超时 {usage['timeouts']}")
+        print("=" * 60)
+    
+    def print_timing(self, result: Dict[str, Any], baseline: Dict[str, Any] = None):
+        """
+        打印耗时报告
+        
+        Args:
+            result: analyze_stock 返回结果
+            baseline: 可选的串行执行结果，用于计算加速比
+        """
+        timing = result.get("timing", {})
+        base_timing = (baseline or {}).get("timing", {})
+        
+        print("\n" + "=" * 60)
+        print(f"⏱️ 耗时报告 ({timing.get('mode', 'N/A')})")
+        print("=" * 60)
+        if result.get("cached"):
+            print("  结果来自本地结果库，以下为当时分析的耗时（--refresh 重新分析）")
+        
+        def row(label: str, value: float, base: float = None):
+            line = f"  {label:18s} {value:8.2f}s"
+            if base is not None:
+                line += f"   串行 {base:8.2f}s"
+                if value > 0:
+                    line += f"   加速 {base / value:5.2f}x"
+            print(line)
+        
+        print("【各步骤】")
+        for key, value in timing.get("steps", {}).items():
+            row(key, value, base_timing.get("steps", {}).get(key))
+        
+        print("【各Agent】")
+        for key, value in sorted(timing.get("agents", {}).items(), key=lambda x: -x[1]):
+            row(key, value, base_timing.get("agents", {}).get(key))
+        
+        features = timing.get("features")
+        if features:
+            print(f"【特征缓存】命中 {features['hits']} / 计算 {features['misses']}")
+        llm = timing.get("llm")
+        if llm and llm.get("requests"):
+            print(f"【LLM】请求 {llm['requests']} 次，Token {llm['prompt_tokens']}+{llm['completion_tokens']}，"
+                  f"重试 {llm['retries']}，超时 {llm['timeouts']}")
+        from src.data.hedged import get_daily_fetcher
+        hedge = get_daily_fetcher().stats()
+        for name, source in hedge["sources"].items():
+            if source["count"]:
+                print(f"【日线 {name}】请求 {source['count']} 次，胜出 {source['wins']}，失败 {source['errors']}，"
+                      f"P50 {source['p50']}s / P90 {source['p90']}s")
+        
+        print("-" * 60)
+        row("总计", timing.get("total", 0), base_timing.get("total"))
+        print("=" * 60)
     
     def print_report(self, result: Dict[str, Any]):
         """打印分析报告"""
@@ -262,9 +548,11 @@ class ZuwaStockAnalyzer:
             
             main = details.get("main_force", {})
             print(f"  主力资金净流入: {main.get('net_flow', 'N/A')} 万")
-            print(f"  主力流入: {main.get('large_inflow', 'N/A')} 万")
-            print(f"  主力流出: {main.get('large_outflow', 'N/A')} 万")
+            if main.get("large_inflow") is not None:
+                print(f"  主力流入: {main['large_inflow']} 万")
+                print(f"  主力流出: {main.get('large_outflow', 'N/A')} 万")
             print(f"  5日净流入: {main.get('flow_5d', 'N/A')} 万")
+            print(f"  20日净流入: {main.get('flow_20d', 'N/A')} 万")
             
             north = details.get("north_bound", {})
             print(f"  北向资金今日: {north.get('net_today', 'N/A')} 万")
@@ -277,6 +565,8 @@ class ZuwaStockAnalyzer:
             
             margin = details.get("margin", {})
             print(f"  融资余额: {margin.get('margin_balance', 'N/A')} 万")
+            if margin.get("margin_change_5d") is not None:
+                print(f"    5日变化: {margin['margin_change_5d']}%")
         
         # 4. 情报Agent
         if "intelligence" in agent_outputs:
@@ -342,22 +632,355 @@ class ZuwaStockAnalyzer:
         print("\n" + "=" * 80)
 
 
+def load_symbols_file(path: str) -> List[Tuple[str, str]]:
+    """
+    读取股票列表文件
+    
+    每行一只股票，格式为 "代码" 或 "代码 名称" / "代码,名称"，# 开头为注释
+    """
+    symbols = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            parts = line.replace(',', ' ').split()
+            symbols.append((parts[0], parts[1] if len(parts) > 1 else ""))
+    return symbols
+
+
+async def load_index_symbols(index_code: str) -> List[Tuple[str, str]]:
+    """获取指数成分股 (如: 000300 沪深300)"""
+    ak = lazy_import("akshare")
+    
+    try:
+        df = await run_blocking(ak.index_stock_cons_csindex, symbol=index_code)
+        return list(zip(df['成分券代码'].astype(str), df['成分券名称'].astype(str)))
+    except Exception as e:
+        print(f"⚠️ 中证指数成分股获取失败，尝试备用接口: {e}")
+    
+    df = await run_blocking(ak.index_stock_cons, symbol=index_code)
+    return list(zip(df['品种代码'].astype(str), df['品种名称'].astype(str)))
+
+
+async def run_batch(analyzer: ZuwaStockAnalyzer, symbols: List[Tuple[str, str]], args) -> List[Dict[str, Any]]:
+    """批量模式：结果完成一个输出一个，--output 时逐行写入JSONL"""
+    print(f"\n🐸 祖蛙批量分析: {len(symbols)} 只股票")
+    
+    started = time.perf_counter()
+    results = []
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        async for result in analyzer.analyze_batch(symbols, args.concurrency, refresh=args.refresh):
+            results.append(result)
+            analyzer.print_batch_line(result, len(results), len(symbols))
+            if output:
+                output.write(json.dumps(result, ensure_ascii=False, cls=DateTimeEncoder) + "\n")
+                output.flush()
+    finally:
+        if output:
+            output.close()
+    
+    analyzer.print_batch_summary(results)
+    print(f"⏱️ 总耗时 {time.perf_counter() - started:.1f}s")
+    if args.output:
+        print(f"\n📁 分析结果已逐行保存到: {args.output}")
+    return results
+
+
+def run_report(analyzer: ZuwaStockAnalyzer, args):
+    """报告模式：从分析结果库查询，不重新分析"""
+    from src.data.result_store import get_result_store
+    store = analyzer.results or get_result_store(args.db)
+    if args.report == "top":
+        table = store.top(args.top, trade_date=args.end, config=analyzer.config_hash)
+        title = f"综合评分前 {args.top} 名"
+    elif args.report == "changes":
+        table = store.rating_changes(trade_date=args.end, since=args.start, config=analyzer.config_hash)
+        title = "评级变化"
+    else:
+        table = store.latest(config=analyzer.config_hash)
+        title = "各股票最新结果"
+    
+    print(f"\n🐸 祖蛙结果库 ({store.path}): {title}，{len(table)} 条")
+    if not table.empty:
+        print(table.drop(columns=["config_hash", "created"], errors="ignore").to_string(index=False))
+    if args.output:
+        table.to_json(args.output, orient="records", force_ascii=False, indent=2)
+        print(f"\n📁 查询结果已保存到: {args.output}")
+    return table
+
+
+def print_replay_coverage(weights: Dict[str, float]) -> None:
+    """打印回测中回放了哪些Agent、哪些无法回放（不参与加权）"""
+    from src.backtest.replay import PARTIAL_REPLAYS, replay_coverage
+    coverage = replay_coverage(weights)
+    replayed = [f"{k}（{PARTIAL_REPLAYS[k]}）" if k in coverage["partial"] else k for k in coverage["replayed"]]
+    print(f"🧩 回放的Agent: {', '.join(replayed) or '无'}")
+    if coverage["missing"]:
+        print(f"   未回放、不参与加权的Agent（缺少历史数据）: {', '.join(coverage['missing'])}")
+    if coverage["unweighted"]:
+        print(f"   已回放但未配置权重的Agent: {', '.join(coverage['unweighted'])}")
+
+
+def run_backtest(analyzer: ZuwaStockAnalyzer, args) -> Dict[str, Any]:
+    """回测模式：回放本地价格库中全部股票，按评级统计前瞻收益"""
+    from src.backtest import BacktestEngine
+    options = analyzer.config.get("backtest", {})
+    engine = BacktestEngine.from_config(
+        analyzer.config,
+        horizons=options.get("horizons") or (1, 5, 20),
+        workers=args.workers or options.get("workers") or None
+    )
+    print(f"\n🐸 祖蛙回测: {args.start or '最早'} ~ {args.end or '最新'}，{engine.workers} 个进程")
+    print_replay_coverage(engine.weights)
+    
+    result = engine.run(start=args.start, end=args.end, by_year=args.by_year)
+    if not result["rows"]:
+        print("⚠️ 本地价格库没有可回测的数据，请先同步日线")
+        return result
+    
+    print(f"📊 {result['symbols']} 只股票，{result['rows']:,} 个股票日")
+    print(result["summary"].to_string())
+    timing = result["timing"]
+    print(f"⏱️ 回放 {timing['replay']:.1f}s | 统计 {timing['summary']:.1f}s")
+    
+    if args.output:
+        result["summary"].reset_index().to_json(args.output, orient="records", force_ascii=False, indent=2)
+        print(f"\n📁 评级统计已保存到: {args.output}")
+    return result
+
+
+def run_optimize(analyzer: ZuwaStockAnalyzer, args) -> Dict[str, Any]:
+    """寻优模式：在缓存的Agent评分上搜索权重与阈值，按滚动检验结果挑选"""
+    from src.backtest import BacktestEngine, WeightOptimizer, write_config
+    options = analyzer.config.get("backtest", {})
+    horizon = options.get("horizon", 5)
+    engine = BacktestEngine.from_config(
+        analyzer.config,
+        horizons=sorted({*(options.get("horizons") or (1, 5, 20)), horizon}),
+        workers=args.workers or options.get("workers") or None
+    )
+    frame = engine.cached_replay(start=args.start, end=args.end)
+    if frame.empty:
+        print("⚠️ 本地价格库没有可回测的数据，请先同步日线")
+        return {}
+    
+    optimizer = WeightOptimizer(
+        frame, engine.weights, engine.thresholds,
+        horizon=horizon,
+        folds=options.get("folds", 5),
+        workers=engine.workers
+    )
+    print(f"\n🐸 祖蛙权重寻优: {frame['code'].nunique()} 只股票，{len(frame):,} 个股票日，"
+          f"寻优Agent: {', '.join(optimizer.agents)}")
+    print_replay_coverage(engine.weights)
+    tune_weights = not args.thresholds_only
+    if tune_weights and len(optimizer.agents) < 2:
+        # 单个Agent时各组权重归一化后是同一个综合评分，退回只寻优阈值
+        print(f"⚠️ 只有 {len(optimizer.agents)} 个有权重的Agent可回放，无法寻优权重，改为只寻优阈值（权重保持原值）")
+        tune_weights = False
+    started = time.perf_counter()
+    try:
+        result = optimizer.search(args.search, trials=args.trials or options.get("trials", 200),
+                                  tune_weights=tune_weights)
+    except ValueError as e:
+        print(f"⚠️ {e}")
+        return {}
+    print(f"⏱️ 评估 {len(result['table'])} 组候选，耗时 {time.perf_counter() - started:.1f}s")
+    
+    for label, candidate in (("当前配置", result["baseline"]), ("最优配置", result["best"])):
+        if candidate:
+            print(f"  {label}: 夏普 {candidate['sharpe']:.2f} | 胜率 {candidate['hit']:.1f}% | "
+                  f"buy {candidate['thresholds']['buy']:g} / hold {candidate['thresholds']['hold']:g} | "
+                  f"权重 {candidate['weights']}")
+    walk_forward = result["walk_forward"]
+    print(f"  滚动检验(样本外): 夏普 {walk_forward['sharpe']:.2f} | 胜率 {walk_forward['hit']:.1f}%")
+    
+    if args.write_config:
+        # 只寻优阈值时不改写权重；记录阈值是在哪些Agent的综合评分上寻优的
+        best = result["best"]
+        write_config(args.write_config, best["weights"] if tune_weights else {}, best["thresholds"],
+                     {"agents": best["agents"], "horizon": horizon})
+        print(f"\n📁 最优{'权重与阈值' if tune_weights else '阈值'}已写入: {args.write_config}"
+              f"（寻优Agent: {', '.join(best['agents'])}）")
+    return result
+
+
+async def run_screen(analyzer: ZuwaStockAnalyzer, args) -> Dict[str, Any]:
+    """选股模式：全市场快照 + 本地日线筛选候选，--analyze-top 时把排名靠前的股票交给完整分析"""
+    from src.screener import DEFAULT_HISTORY_DAYS, Screener
+    
+    options = analyzer.config.get("screener", {})
+    screener = Screener(history_days=options.get("history_days", DEFAULT_HISTORY_DAYS))
+    filters = [*(options.get("filters") or []), *(args.where or [])]
+    try:
+        result = await screener.run(
+            filters=filters,
+            sort=args.sort or options.get("sort", "tech_score"),
+            ascending=args.ascending,
+            top=max(args.top, args.analyze_top or 0),
+            patterns=args.pattern or [],
+            pattern_days=args.pattern_days,
+            sync=args.sync_history
+        )
+    except ValueError as e:
+        print(f"⚠️ {e}")
+        return {}
+    
+    table = result["table"]
+    timing = result["timing"]
+    print(f"\n🐸 祖蛙选股: {' → '.join(f'{label} {count}' for label, count in result['stages'])}")
+    if filters:
+        print(f"  条件: {' | '.join(filters)}")
+    print(f"⏱️ 快照 {timing['snapshot']:.2f}s | 日线 {timing['history']:.2f}s | "
+          f"指标 {timing['indicators']:.2f}s | 筛选 {timing['filter']:.2f}s")
+    if table.empty:
+        print("⚠️ 没有符合条件的股票")
+        return result
+    
+    columns = ["symbol", "name", "price", "pct_change", "volume_ratio", "turnover_rate",
+               "rsi", "ret_20d", "ma_bull", "vp_health", "tech_score", *(["patterns"] if args.pattern else [])]
+    print(table.head(args.top)[columns].to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    
+    if args.analyze_top:
+        symbols = list(zip(table["symbol"], table["name"]))[:args.analyze_top]
+        result["analysis"] = await run_batch(analyzer, symbols, args)
+    elif args.output:
+        table.to_json(args.output, orient="records", force_ascii=False, indent=2)
+        print(f"\n📁 候选列表已保存到: {args.output}")
+    return result
+
+
+def print_profile(tracer: Tracer, path: Optional[str] = None):
+    """打印链路追踪汇总，path 非空时导出 Chrome Trace JSON"""
+    table = tracer.summary()
+    print("\n" + "=" * 60)
+    print(f"🔬 链路追踪 ({len(tracer.spans)} 个span)")
+    print("=" * 60)
+    if table.empty:
+        print("  无追踪数据")
+    else:
+        table = table.copy()
+        for col in ("wall", "wall_mean", "wall_max", "cpu"):
+            table[col] = table[col].map(lambda v: f"{v:.3f}s")
+        table["bytes"] = table["bytes"].map(lambda v: f"{v / 1024:.1f}KB" if v else "-")
+        print(table.to_string(index=False))
+    if path:
+        print(f"\n📁 Chrome Trace 已保存到: {tracer.write_chrome_trace(path)}（chrome://tracing 或 ui.perfetto.dev 打开）")
+
+
 async def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="祖蛙沪深A股分析系统")
-    parser.add_argument("--symbol", required=True, help="股票代码 (如: 600519)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--symbol", help="股票代码 (如: 600519)")
+    target.add_argument("--symbols-file", help="批量模式：股票列表文件，每行一个代码（可跟名称）")
+    target.add_argument("--index", help="批量模式：分析指数全部成分股 (如: 000300)")
+    target.add_argument("--backtest", action="store_true", help="回测模式：按本地价格库回放评分并统计各评级的前瞻收益")
+    target.add_argument("--optimize", action="store_true", help="寻优模式：搜索首席分析师的权重与阈值")
+    target.add_argument("--report", choices=["top", "changes", "latest"],
+                        help="报告模式：查询结果库（top 综合评分排行 / changes 评级变化 / latest 各股票最新结果）")
+    target.add_argument("--screen", action="store_true", help="选股模式：全市场快照 + 本地日线按条件筛选并排序")
     parser.add_argument("--name", default="", help="股票名称 (如: 贵州茅台)")
     parser.add_argument("--config", default="config/agents.yaml", help="配置文件路径")
     parser.add_argument("--detailed", action="store_true", help="显示详细分析数据")
     parser.add_argument("--output", "-o", help="输出结果到JSON文件")
+    parser.add_argument("--serial", action="store_true", help="按原串行顺序执行各Agent")
+    parser.add_argument("--compare-serial", action="store_true", help="先串行再并发各执行一次，输出加速比")
+    parser.add_argument("--concurrency", type=int, help="批量模式下同时分析的股票数")
+    parser.add_argument("--start", help="回测起始日期；报告模式 changes 下为对比的交易日 (YYYY-MM-DD)")
+    parser.add_argument("--end", help="回测结束日期；报告模式下为查询的交易日 (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, help="回测进程数（默认CPU核数）")
+    parser.add_argument("--by-year", action="store_true", help="回测统计按年份分组")
+    parser.add_argument("--search", choices=["random", "grid"], default="random", help="寻优方式")
+    parser.add_argument("--trials", type=int, help="随机寻优的权重组数")
+    parser.add_argument("--thresholds-only", action="store_true",
+                        help="寻优时只搜索阈值、保持权重（可回放的有权重Agent不足两个时自动如此）")
+    parser.add_argument("--write-config", help="把最优权重与阈值写入该配置文件（agents.yaml 格式）")
+    parser.add_argument("--db", help="分析结果库文件（默认 <缓存目录>/results.db）")
+    parser.add_argument("--refresh", action="store_true", help="忽略结果库中当天已保存的结果，重新分析")
+    parser.add_argument("--top", type=int, default=20, help="报告模式 top / 选股模式显示的条数")
+    parser.add_argument("--where", action="append", metavar="EXPR",
+                        help="选股条件（pandas 表达式，可多次指定，如 \"rsi < 30 and volume_ratio > 2\"），"
+                             "字段见 src/screener.py 的 FIELDS，写错字段时会列出全部可用字段")
+    parser.add_argument("--sort", metavar="FIELD", help="选股排序字段（默认 tech_score 降序）")
+    parser.add_argument("--ascending", action="store_true", help="选股结果升序排序")
+    parser.add_argument("--pattern", action="append", metavar="NAME",
+                        help="选股：最近 --pattern-days 个交易日内出现过该K线形态，如 涨停、看涨吞没"
+                             "（可多次指定，满足任一）")
+    parser.add_argument("--pattern-days", type=int, default=5, help="选股形态的回看交易日数")
+    parser.add_argument("--sync-history", action="store_true", help="选股前同步候选股票的日线（访问网络）")
+    parser.add_argument("--analyze-top", type=int, metavar="N",
+                        help="选股后对前N只做完整分析（结果同批量模式，--output 逐行写入JSONL）")
+    parser.add_argument("--profile", nargs="?", const="", metavar="TRACE_JSON",
+                        help="链路追踪：打印各Agent/数据源/LLM的耗时汇总；给出路径时导出 Chrome Trace JSON")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="DIR", help="录制本次运行的 AKShare/Tushare/LLM 响应到磁带目录")
+    cassette.add_argument("--replay", metavar="DIR", help="离线回放磁带目录中的响应（不访问网络）")
     
     args = parser.parse_args()
+    load_env()
     
-    # 初始化分析器
-    analyzer = ZuwaStockAnalyzer(args.config)
+    with ExitStack() as stack:
+        # 录制/回放：使用独立的缓存目录，保证每次数据调用都经过磁带
+        cassette = None
+        if args.record or args.replay:
+            cassette_dir = args.record or args.replay
+            if args.record:
+                os.environ["ZUWA_CACHE_DIR"] = os.path.join(cassette_dir, "cache")
+            else:
+                os.environ["ZUWA_CACHE_DIR"] = stack.enter_context(tempfile.TemporaryDirectory(prefix="zuwa-replay-"))
+            cassette = stack.enter_context(Cassette(cassette_dir, "record" if args.record else "replay").use())
+            print(f"📼 {'录制' if args.record else '回放'}磁带: {cassette_dir}")
+        
+        # 初始化分析器
+        analyzer = ZuwaStockAnalyzer(args.config, db_path=args.db)
+        
+        # 链路追踪：开启时重新分析，不使用结果库中的结果
+        tracer = start_tracing() if args.profile is not None else None
+        if tracer:
+            args.refresh = True
+        try:
+            return await dispatch(analyzer, args)
+        finally:
+            if tracer:
+                stop_tracing()
+                print_profile(tracer, args.profile)
+            if cassette:
+                stats = cassette.stats()
+                print(f"📼 磁带: 录制 {stats['recorded']} 条，回放命中 {stats['hits']}，未命中 {stats['misses']}")
+
+
+async def dispatch(analyzer: ZuwaStockAnalyzer, args):
+    """按命令行参数执行对应模式"""
+    # 回测模式
+    if args.backtest:
+        return run_backtest(analyzer, args)
+    if args.optimize:
+        return run_optimize(analyzer, args)
+    if args.report:
+        return run_report(analyzer, args)
+    if args.screen:
+        return await run_screen(analyzer, args)
+    
+    # 批量模式
+    if args.symbols_file or args.index:
+        if args.symbols_file:
+            symbols = load_symbols_file(args.symbols_file)
+        else:
+            symbols = await load_index_symbols(args.index)
+        return await run_batch(analyzer, symbols, args)
     
     # 执行分析
-    result = await analyzer.analyze_stock(args.symbol, args.name)
+    baseline = None
+    if args.compare_serial:
+        baseline = await analyzer.analyze_stock(args.symbol, args.name, concurrent=False, refresh=True)
+    result = await analyzer.analyze_stock(
+        args.symbol, args.name,
+        concurrent=not args.serial,
+        refresh=args.refresh or args.compare_serial
+    )
     
     # 打印报告
     if args.detailed:
@@ -365,11 +988,12 @@ async def main():
     else:
         analyzer.print_report(result)
     
+    analyzer.print_timing(result, baseline)
+    
     # 保存到文件
     if args.output:
-        import json
         with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+            json.dump(result, f, ensure_ascii=False, indent=2, cls=DateTimeEncoder)
         print(f"\n📁 分析结果已保存到: {args.output}")
     
     return result
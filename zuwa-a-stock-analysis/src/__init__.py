@@ -1,10 +1,26 @@
 """
 祖蛙沪深A股分析系统
+
+顶层导出各子包的 __all__，访问时才导入所在模块（见 src.utils.lazy）
 """
-from src.agents import *
-from src.data import *
-from src.analysis import *
-from src.utils import *
+from src.utils.lazy import lazy_exports
+
+_SUBPACKAGES = ("src.agents", "src.data", "src.analysis", "src.utils")
+
+
+def _exports():
+    import importlib
+    exports = {}
+    for package in _SUBPACKAGES:
+        exports.update(importlib.import_module(package)._EXPORTS)
+    return exports
+
+
+_EXPORTS = _exports()
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
 
 __version__ = "1.0.0"
 __author__ = "祖蛙团队"
@@ -1,16 +1,25 @@
 """
 祖蛙系统 - Agent模块
+
+各Agent按名称注册、首次访问时才导入所在模块（见 src.utils.lazy）
 """
-from src.agents.base import BaseAgent, AgentOutput
-from src.agents.data_agent import DataCollectionAgent
-from src.agents.technical_agent import TechnicalAnalysisAgent
-from src.agents.capital_agent import CapitalAnalysisAgent
-from src.agents.intelligence_agent import IntelligenceAgent
-from src.agents.sector_agent import SectorAnalysisAgent
-from src.agents.bull_agent import BullAnalystAgent
-from src.agents.bear_agent import BearAnalystAgent
-from src.agents.retail_sentiment_agent import RetailSentimentAgent
-from src.agents.chief_agent import ChiefAnalystAgent
+from src.utils.lazy import lazy_exports
+
+_EXPORTS = {
+    "BaseAgent": "src.agents.base",
+    "AgentOutput": "src.agents.base",
+    "DataCollectionAgent": "src.agents.data_agent",
+    "TechnicalAnalysisAgent": "src.agents.technical_agent",
+    "CapitalAnalysisAgent": "src.agents.capital_agent",
+    "IntelligenceAgent": "src.agents.intelligence_agent",
+    "SectorAnalysisAgent": "src.agents.sector_agent",
+    "BullAnalystAgent": "src.agents.bull_agent",
+    "BearAnalystAgent": "src.agents.bear_agent",
+    "RetailSentimentAgent": "src.agents.retail_sentiment_agent",
+    "ChiefAnalystAgent": "src.agents.chief_agent",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
     "BaseAgent",
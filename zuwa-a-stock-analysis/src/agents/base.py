@@ -5,8 +5,11 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
+import functools
 import logging
 
+from src.utils import tracing
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -32,9 +35,33 @@ class AgentOutput:
         }
 
 
+def _traced_agent_method(func):
+    """包装Agent的分析方法：开启追踪时记录一个 agent 类别的 span"""
+    @functools.wraps(func)
+    async def wrapper(self, symbol: str, *args, **kwargs):
+        if not tracing.enabled():
+            return await func(self, symbol, *args, **kwargs)
+        with tracing.span(self.name, cat="agent", symbol=symbol, method=func.__name__) as span:
+            result = await func(self, symbol, *args, **kwargs)
+            span.set(signal=getattr(result, "signal", None), confidence=getattr(result, "confidence", None))
+            return result
+    wrapper.__traced__ = True
+    return wrapper
+
+
 class BaseAgent(ABC):
     """Agent基类"""
     
+    # 子类定义的这些方法自动接入链路追踪
+    TRACED_METHODS = ("analyze", "make_decision")
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for method in BaseAgent.TRACED_METHODS:
+            func = cls.__dict__.get(method)
+            if func is not None and not getattr(func, "__traced__", False):
+                setattr(cls, method, _traced_agent_method(func))
+    
     def __init__(self, name: str, config: Optional[Dict] = None):
         self.name = name
         self.config = config or {}
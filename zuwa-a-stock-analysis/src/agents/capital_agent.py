@@ -1,10 +1,16 @@
 """
 资金分析Agent - 使用AKShare获取真实资金流向数据
 """
+import asyncio
 from typing import Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 from src.agents.base import BaseAgent, AgentOutput
-import pandas as pd
+from src.data.dragon_tiger import get_dragon_tiger_store
+from src.data.fund_flow import latest_flow, parse_fund_flow, to_wan
+from src.data.margin_store import get_margin_store
+from src.data.market_snapshot import get_market_snapshot
+from src.utils.concurrency import run_blocking
+from src.utils.lazy import lazy_import
 
 
 class CapitalAnalysisAgent(BaseAgent):
@@ -21,12 +27,18 @@ class CapitalAnalysisAgent(BaseAgent):
             # 格式化股票代码
             code = symbol[2:] if symbol.startswith(('sh', 'sz', 'bj')) else symbol
             
-            # 获取各类资金数据
+            # 并发获取各类资金数据
+            main_force, north_bound, dragon_tiger, margin = await asyncio.gather(
+                self._analyze_main_force(code),
+                self._analyze_north_bound(code),
+                self._analyze_dragon_tiger(code),
+                self._analyze_margin(code)
+            )
             analysis = {
-                "main_force": await self._analyze_main_force(code),
-                "north_bound": await self._analyze_north_bound(code),
-                "dragon_tiger": await self._analyze_dragon_tiger(code),
-                "margin": await self._analyze_margin(code),
+                "main_force": main_force,
+                "north_bound": north_bound,
+                "dragon_tiger": dragon_tiger,
+                "margin": margin,
             }
             
             # 综合评分
@@ -56,47 +68,32 @@ class CapitalAnalysisAgent(BaseAgent):
     async def _analyze_main_force(self, code: str) -> Dict:
         """分析主力资金流向 - 使用AKShare"""
         try:
-            import akshare as ak
+            ak = lazy_import("akshare")
             
             # 获取个股资金流向
-            df = ak.stock_individual_fund_flow(stock=code, market="sh" if code.startswith('6') else "sz")
+            df = await run_blocking(ak.stock_individual_fund_flow, stock=code, market="sh" if code.startswith('6') else "sz")
             
             if df is None or df.empty:
                 return self._get_default_main_force()
             
-            # 获取最新数据
-            latest = df.iloc[0]
-            
-            # 解析数值（去除单位）
-            def parse_value(val):
-                if isinstance(val, str):
-                    val = val.replace('万', '').replace('亿', '').replace('%', '')
-                    try:
-                        return float(val)
-                    except:
-                        return 0
-                return float(val) if val else 0
-            
-            # 大单和超大单视为"主力"
-            main_inflow = parse_value(latest.get('大单流入', 0)) + parse_value(latest.get('超大单流入', 0))
-            main_outflow = parse_value(latest.get('大单流出', 0)) + parse_value(latest.get('超大单流出', 0))
-            net_flow = main_inflow - main_outflow
+            # 整表解析为元，按日期升序，滚动计算N日净流入
+            latest = latest_flow(parse_fund_flow(df))
+            if latest.get("main_net") is None:
+                return self._get_default_main_force()
             
-            # 5日数据
-            flow_5d = 0
-            if len(df) >= 5:
-                for i in range(min(5, len(df))):
-                    row = df.iloc[i]
-                    inflow = parse_value(row.get('大单流入', 0)) + parse_value(row.get('超大单流入', 0))
-                    outflow = parse_value(row.get('大单流出', 0)) + parse_value(row.get('超大单流出', 0))
-                    flow_5d += (inflow - outflow)
+            net_flow = to_wan(latest["main_net"])
+            large_in = sum(latest.get(c) or 0 for c in ("large_in", "super_large_in"))
+            large_out = sum(latest.get(c) or 0 for c in ("large_out", "super_large_out"))
             
             return {
-                "large_inflow": round(main_inflow, 2),
-                "large_outflow": round(main_outflow, 2),
-                "net_flow": round(net_flow, 2),
-                "flow_5d": round(flow_5d, 2),
-                "flow_20d": None,
+                "large_inflow": to_wan(large_in) if large_in else None,
+                "large_outflow": to_wan(large_out) if large_out else None,
+                "net_flow": net_flow,
+                "net_ratio": latest.get("main_net_pct"),
+                "flow_5d": to_wan(latest.get("main_net_5d")),
+                "flow_10d": to_wan(latest.get("main_net_10d")),
+                "flow_20d": to_wan(latest.get("main_net_20d")),
+                "date": latest.get("date"),
                 "signal": "流入" if net_flow > 0 else "流出" if net_flow < 0 else "中性"
             }
             
@@ -107,11 +104,11 @@ class CapitalAnalysisAgent(BaseAgent):
     async def _analyze_north_bound(self, code: str) -> Dict:
         """分析北向资金(沪股通/深股通)持股"""
         try:
-            import akshare as ak
+            ak = lazy_import("akshare")
             
             # 使用stock_gdfx_free_holding_analyse_em接口获取机构持股（包含北向）
             try:
-                df = ak.stock_gdfx_free_holding_analyse_em(date=datetime.now().strftime("%Y%m%d"))
+                df = await run_blocking(ak.stock_gdfx_free_holding_analyse_em, date=datetime.now().strftime("%Y%m%d"))
                 if df is not None and not df.empty:
                     # 筛选该股票
                     stock_data = df[df['股票代码'] == code]
@@ -131,11 +128,9 @@ class CapitalAnalysisAgent(BaseAgent):
             except Exception as e:
                 self.log(f"获取机构持股失败: {e}")
             
-            # 回退：从实时行情获取北向持股比例
-            spot_df = ak.stock_zh_a_spot_em()
-            stock_row = spot_df[spot_df['代码'] == code]
-            if not stock_row.empty:
-                row = stock_row.iloc[0]
+            # 回退：从共享行情快照获取北向持股比例
+            row = await run_blocking(get_market_snapshot().get, code)
+            if row:
                 # 北向持股数据可能在不同字段
                 return {
                     "today_buy": None,
@@ -152,90 +147,57 @@ class CapitalAnalysisAgent(BaseAgent):
             self.log(f"获取北向资金失败: {e}")
             return self._get_default_north_bound()
     
-    async def _analyze_dragon_tiger(self, code: str) -> Dict:
-        """分析龙虎榜 - 游资动向"""
+    async def _analyze_dragon_tiger(self, code: str, days: int = 30) -> Dict:
+        """分析龙虎榜 - 游资动向（本地龙虎榜库，每个交易日只下载一次）"""
         try:
-            import akshare as ak
-            from datetime import datetime, timedelta
-            
-            # 获取最近龙虎榜数据
-            end_date = datetime.now().strftime("%Y%m%d")
-            start_date = (datetime.now() - timedelta(days=30)).strftime("%Y%m%d")
+            store = get_dragon_tiger_store()
+            if not await run_blocking(store.sync):
+                return self._get_default_dragon_tiger()
             
-            try:
-                # 尝试使用stock_lhb_daily_detail接口
-                df = ak.stock_lhb_daily_detail(start_date=start_date, end_date=end_date)
-                
-                if df is not None and not df.empty:
-                    # 筛选该股票的龙虎榜记录
-                    stock_records = df[df['代码'] == code]
-                    
-                    if not stock_records.empty:
-                        latest = stock_records.iloc[0]
-                        
-                        return {
-                            "in_list": True,
-                            "list_date": str(latest.get('日期', '')),
-                            "buy_seats": [],
-                            "sell_seats": [],
-                            "net_amount": float(latest.get('净买额', 0)) if latest.get('净买额') else 0,
-                            "famous_salons": [],
-                            "signal": "游资买入" if float(latest.get('净买额', 0) or 0) > 0 else "游资卖出"
-                        }
-            except Exception as e:
-                self.log(f"获取龙虎榜详情失败: {e}")
+            records = store.lookup(code, days)
+            if not records:
+                return self._get_default_dragon_tiger()
             
-            # 回退：检查是否在最新龙虎榜列表中
-            try:
-                lhb_list = ak.stock_lhb_em(start_date=start_date, end_date=end_date)
-                if lhb_list is not None and code in lhb_list.get('代码', []).values:
-                    return {
-                        "in_list": True,
-                        "list_date": "近期",
-                        "signal": "上榜"
-                    }
-            except:
-                pass
-            
-            return self._get_default_dragon_tiger()
+            latest = records[0]
+            net_amount = float(latest.get('net_amount') or 0)
+            return {
+                "in_list": True,
+                "list_date": latest['date'],
+                "list_count": len(records),
+                "reason": latest.get('reason', ''),
+                "buy_seats": [],
+                "sell_seats": [],
+                "net_amount": round(net_amount, 2),
+                "net_amount_total": round(sum(float(r.get('net_amount') or 0) for r in records), 2),
+                "famous_salons": [],
+                "signal": "游资买入" if net_amount > 0 else "游资卖出"
+            }
             
         except Exception as e:
             self.log(f"获取龙虎榜失败: {e}")
             return self._get_default_dragon_tiger()
     
     async def _analyze_margin(self, code: str) -> Dict:
-        """分析融资融券"""
+        """分析融资融券（本地融资融券库，两市明细每日只下载一次）"""
         try:
-            import akshare as ak
-            
-            # 根据交易所选择接口
-            if code.startswith('6'):
-                # 上海
-                df = ak.stock_margin_detail_sse(date=datetime.now().strftime("%Y%m%d"))
-            else:
-                # 深圳
-                df = ak.stock_margin_detail_szse(date=datetime.now().strftime("%Y%m%d"))
-            
-            if df is None or df.empty:
+            store = get_margin_store()
+            if not await run_blocking(store.sync):
                 return self._get_default_margin()
             
-            # 筛选该股票
-            stock_data = df[df['标的证券代码'] == code] if '标的证券代码' in df.columns else pd.DataFrame()
-            
-            if stock_data.empty:
+            trend = store.trend(code)
+            if not trend.get("date"):
                 return self._get_default_margin()
             
-            latest = stock_data.iloc[0]
-            
-            # 解析融资余额
-            margin_balance = float(latest.get('融资余额', 0)) if latest.get('融资余额') else 0
-            
+            change_5d = trend["change_5d"]
             return {
-                "margin_balance": round(margin_balance, 2),
-                "short_balance": float(latest.get('融券余额', 0)) if latest.get('融券余额') else 0,
-                "margin_change": 0,
+                "margin_balance": trend["current"],
+                "short_balance": round(float(trend.get("short_balance") or 0), 2),
+                "margin_change": trend["change_1d"],
+                "margin_change_5d": change_5d,
+                "margin_change_20d": trend["change_20d"],
                 "leverage_ratio": None,
-                "signal": "数据获取成功"
+                "date": trend["date"],
+                "signal": "融资增加" if change_5d > 5 else "融资减少" if change_5d < -5 else "中性"
             }
             
         except Exception as e:
@@ -129,6 +129,11 @@ class ChiefAnalystAgent(BaseAgent):
             sec = outputs["sector"]
             scores["sector"] = self._signal_to_score(sec.signal, sec.confidence)
         
+        # 量价分析师：默认不参与加权，配置了 volume_price 权重（如回测寻优的结果）时才计入
+        if "volume_price" in outputs and "volume_price" in self.weights:
+            vp = outputs["volume_price"]
+            scores["volume_price"] = self._signal_to_score(vp.signal, vp.confidence)
+        
         # 多空辩论Agent
         if "bull" in outputs:
             bull = outputs["bull"]
@@ -3,9 +3,13 @@
 """
 import asyncio
 from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import pandas as pd
 from src.agents.base import BaseAgent, AgentOutput
+from src.data.frozen import freeze
+from src.data.price_store import get_price_store
+from src.utils.concurrency import run_blocking
+from src.utils.lazy import lazy_import
 
 
 class DataCollectionAgent(BaseAgent):
@@ -23,19 +27,22 @@ class DataCollectionAgent(BaseAgent):
             # 统一股票代码格式
             formatted_symbol = self._format_symbol(symbol)
             
-            # 获取各类数据
-            daily_data = await self._get_daily_data(formatted_symbol)
+            # 并发获取历史行情和个股信息
+            daily_data, info_df = await asyncio.gather(
+                self._get_daily_data(formatted_symbol),
+                self._get_individual_info(formatted_symbol)
+            )
             
             # 从历史数据提取最新价格信息
             price_data = self._extract_price_from_daily(daily_data)
-            basic_info = await self._get_basic_info(formatted_symbol, price_data)
+            basic_info = self._get_basic_info(info_df, price_data)
             
             data = {
                 "symbol": symbol,
                 "name": context.get("name", basic_info.get("name", "")),
                 "price_data": price_data,
                 "basic_info": basic_info,
-                "daily_data": daily_data,
+                "daily_data": freeze(daily_data),  # 各Agent共享，只读
                 "timestamp": datetime.now()
             }
             
@@ -76,53 +83,15 @@ class DataCollectionAgent(BaseAgent):
         return symbol
     
     async def _get_daily_data(self, symbol: str, days: int = 120) -> pd.DataFrame:
-        """获取历史日线数据 - 使用AKShare"""
+        """获取历史日线数据 - 本地价格库增量同步（AKShare前复权）"""
         try:
-            import akshare as ak
-            
-            # 使用stock_zh_a_hist接口获取个股历史数据（更稳定）
-            df = ak.stock_zh_a_hist(
-                symbol=symbol,
-                period="daily",
-                start_date=(datetime.now() - timedelta(days=days)).strftime("%Y%m%d"),
-                end_date=datetime.now().strftime("%Y%m%d"),
-                adjust="qfq"  # 前复权
-            )
+            # 只下载本地缺失的交易日，复权因子变化时价格库会自动重建
+            df = await run_blocking(get_price_store().sync, symbol, days)
             
             if df is None or df.empty:
                 self.log(f"⚠️ 未获取到 {symbol} 的历史数据")
                 return pd.DataFrame()
             
-            # 标准化列名（AKShare返回中文列名）
-            column_mapping = {
-                '日期': 'date',
-                '开盘': 'open',
-                '收盘': 'close',
-                '最高': 'high',
-                '最低': 'low',
-                '成交量': 'volume',
-                '成交额': 'turnover',
-                '振幅': 'amplitude',
-                '涨跌幅': 'pct_change',
-                '涨跌额': 'change_amount',
-                '换手率': 'turnover_rate',
-            }
-            
-            # 重命名列
-            for old_col, new_col in column_mapping.items():
-                if old_col in df.columns:
-                    df[new_col] = df[old_col]
-            
-            # 确保数值类型正确
-            numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'turnover', 'pct_change']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # 按日期排序
-            if 'date' in df.columns:
-                df = df.sort_values('date').reset_index(drop=True)
-            
             self.log(f"获取到 {symbol} 历史数据 {len(df)} 条")
             return df
             
@@ -156,14 +125,20 @@ class DataCollectionAgent(BaseAgent):
             self.log(f"⚠️ 提取价格信息失败: {e}")
             return self._get_default_price_data()
     
-    async def _get_basic_info(self, symbol: str, price_data: Dict) -> Dict[str, Any]:
-        """获取股票基本信息"""
+    async def _get_individual_info(self, symbol: str) -> Optional[pd.DataFrame]:
+        """获取个股信息表 - 使用AKShare"""
         try:
-            import akshare as ak
-            
-            # 尝试获取个股信息
+            ak = lazy_import("akshare")
+            return await run_blocking(ak.stock_individual_info_em, symbol=symbol)
+        except Exception as e:
+            self.log(f"获取个股信息失败: {e}")
+            return None
+    
+    def _get_basic_info(self, info_df: Optional[pd.DataFrame], price_data: Dict) -> Dict[str, Any]:
+        """解析股票基本信息"""
+        try:
+            # 尝试解析个股信息
             try:
-                info_df = ak.stock_individual_info_em(symbol=symbol)
                 if info_df is not None and not info_df.empty:
                     # 转换为字典
                     info_dict = dict(zip(info_df['item'], info_df['value']))
@@ -179,7 +154,7 @@ class DataCollectionAgent(BaseAgent):
                         "float_shares": float(info_dict.get('流通股', 0)) if info_dict.get('流通股') else 0,
                     }
             except Exception as e:
-                self.log(f"获取个股信息失败: {e}")
+                self.log(f"解析个股信息失败: {e}")
             
             # 回退：从price_data提取
             return {
@@ -1,9 +1,13 @@
 """
 情报分析Agent - 使用AKShare获取财经新闻和公告
 """
+import asyncio
 from typing import Dict, Any, List
 from datetime import datetime
 from src.agents.base import BaseAgent, AgentOutput
+from src.data.news_index import get_news_index
+from src.utils.concurrency import run_blocking
+from src.utils.lazy import lazy_import
 
 
 class IntelligenceAgent(BaseAgent):
@@ -21,14 +25,12 @@ class IntelligenceAgent(BaseAgent):
             name = context.get("name", symbol)
             code = symbol[2:] if symbol.startswith(('sh', 'sz', 'bj')) else symbol
             
-            # 搜索新闻
-            news = await self._search_news(name)
-            
-            # 搜索公告
-            announcements = await self._search_announcements(code)
-            
-            # 行业政策分析
-            policy = await self._analyze_policy(name)
+            # 并发搜索新闻、公告和行业政策
+            news, announcements, policy = await asyncio.gather(
+                self._search_news(name, code),
+                self._search_announcements(code),
+                self._analyze_policy(name)
+            )
             
             # 舆情情感分析
             sentiment = await self._analyze_sentiment(name, news)
@@ -65,41 +67,23 @@ class IntelligenceAgent(BaseAgent):
                 timestamp=datetime.now()
             )
     
-    async def _search_news(self, name: str, num: int = 5) -> List[Dict]:
-        """搜索个股新闻 - 使用AKShare"""
+    async def _search_news(self, name: str, code: str = "", num: int = 5) -> List[Dict]:
+        """搜索个股新闻 - 使用共享的新闻索引（AKShare新闻流按TTL拉取一次）"""
         try:
-            import akshare as ak
+            ak = lazy_import("akshare")
             
-            # 尝试获取财经新闻
+            # 按名称和代码在新闻索引中查找
             try:
-                df = ak.stock_news_em()
-                
-                if df is not None and not df.empty:
-                    # 筛选包含该股票名称的新闻
-                    if '内容' in df.columns and '标题' in df.columns:
-                        related_news = df[df['内容'].str.contains(name, na=False) | df['标题'].str.contains(name, na=False)]
-                    elif '标题' in df.columns:
-                        related_news = df[df['标题'].str.contains(name, na=False)]
-                    else:
-                        related_news = df.head(num)
-                    
-                    results = []
-                    for _, row in related_news.head(num).iterrows():
-                        results.append({
-                            "title": row.get('标题', ''),
-                            "summary": str(row.get('内容', ''))[:200] + "..." if len(str(row.get('内容', ''))) > 200 else str(row.get('内容', '')),
-                            "url": row.get('链接', ''),
-                            "source": row.get('来源', ''),
-                            "date": row.get('发布时间', ''),
-                        })
-                    
-                    return results
+                index = get_news_index()
+                index.watch(code or name, name)
+                if await run_blocking(index.refresh):
+                    return index.get(code or name, num)
             except Exception as e:
                 self.log(f"获取财经新闻失败: {e}")
             
             # 回退：使用stock_news_main_cx接口
             try:
-                df = ak.stock_news_main_cx()
+                df = await run_blocking(ak.stock_news_main_cx)
                 if df is not None and not df.empty:
                     results = []
                     for _, row in df.head(num).iterrows():
@@ -123,11 +107,11 @@ class IntelligenceAgent(BaseAgent):
     async def _search_announcements(self, code: str) -> List[Dict]:
         """搜索公告 - 使用巨潮资讯网数据"""
         try:
-            import akshare as ak
+            ak = lazy_import("akshare")
             
             # 尝试获取个股公告
             try:
-                df = ak.stock_notice_report(symbol=code)
+                df = await run_blocking(ak.stock_notice_report, symbol=code)
                 
                 if df is not None and not df.empty:
                     results = []
@@ -144,7 +128,7 @@ class IntelligenceAgent(BaseAgent):
             
             # 回退：使用stock_gsrl_em获取公司新闻
             try:
-                df = ak.stock_gsrl_em()
+                df = await run_blocking(ak.stock_gsrl_em)
                 if df is not None and not df.empty:
                     results = []
                     for _, row in df.head(5).iterrows():
@@ -170,8 +154,8 @@ class IntelligenceAgent(BaseAgent):
             # 获取行业信息
             industry = ""
             try:
-                import akshare as ak
-                df = ak.stock_individual_info_em(symbol=name)
+                ak = lazy_import("akshare")
+                df = await run_blocking(ak.stock_individual_info_em, symbol=name)
                 if df is not None and not df.empty:
                     info_dict = dict(zip(df['item'], df['value']))
                     industry = info_dict.get('行业', '')
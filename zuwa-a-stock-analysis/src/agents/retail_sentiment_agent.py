@@ -3,7 +3,10 @@
 """
 from typing import Dict, Any
 from datetime import datetime
+import pandas as pd
 from src.agents.base import BaseAgent, AgentOutput
+from src.data.margin_store import get_margin_store
+from src.utils.concurrency import run_blocking
 
 
 class RetailSentimentAgent(BaseAgent):
@@ -29,7 +32,7 @@ class RetailSentimentAgent(BaseAgent):
         
         # 收集情绪指标
         sentiment_data = {
-            "margin_balance": self._get_margin_balance(symbol),
+            "margin_balance": await self._get_margin_balance(symbol, context),
             "new_accounts": self._get_new_accounts(),
             "search_index": self._get_search_index(symbol),
             "forum_sentiment": self._get_forum_sentiment(symbol),
@@ -57,15 +60,45 @@ class RetailSentimentAgent(BaseAgent):
             timestamp=datetime.now()
         )
     
-    def _get_margin_balance(self, symbol: str) -> Dict:
-        """融资余额 - 散户加杠杆程度"""
+    async def _get_margin_balance(self, symbol: str, context: Dict[str, Any] = None) -> Dict:
+        """融资余额 - 散户加杠杆程度（与资金分析共用融资融券库）"""
+        default = {
+            "current": 0,           # 当前融资余额（万元）
+            "change_5d": 0,         # 5日变化（%）
+            "change_20d": 0,        # 20日变化（%）
+            "leverage_ratio": 0     # 融资买入占成交额比例（%）
+        }
+        try:
+            code = symbol[2:] if symbol.startswith(('sh', 'sz', 'bj')) else symbol
+            store = get_margin_store()
+            if not await run_blocking(store.sync):
+                return default
+            trend = store.trend(code)
+            if not trend.get("date"):
+                return default
+        except Exception as e:
+            self.log(f"获取融资余额失败: {e}")
+            return default
+        
         return {
-            "current": 0,           # 当前融资余额
-            "change_5d": 0,         # 5日变化
-            "change_20d": 0,        # 20日变化
-            "leverage_ratio": 0     # 融资买入占比
+            "current": trend["current"],
+            "change_5d": trend["change_5d"],
+            "change_20d": trend["change_20d"],
+            "leverage_ratio": self._leverage_ratio(trend, (context or {}).get("daily_data"))
         }
     
+    def _leverage_ratio(self, trend: Dict, daily_data: pd.DataFrame) -> float:
+        """融资买入额占当日成交额的比例（%）"""
+        if daily_data is None or daily_data.empty or not trend.get("margin_buy"):
+            return 0
+        if 'date' not in daily_data.columns or 'turnover' not in daily_data.columns:
+            return 0
+        same_day = daily_data[daily_data['date'] == trend["date"]]
+        if same_day.empty or not same_day['turnover'].iloc[-1]:
+            return 0
+        # 融资买入额单位万元，成交额单位元
+        return round(float(trend["margin_buy"]) * 1e4 / float(same_day['turnover'].iloc[-1]) * 100, 2)
+    
     def _get_new_accounts(self) -> Dict:
         """新增开户数 - 散户入场热情"""
         return {
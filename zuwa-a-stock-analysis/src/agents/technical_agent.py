@@ -4,8 +4,12 @@
 from typing import Dict, Any, List
 from datetime import datetime
 import pandas as pd
-import numpy as np
 from src.agents.base import BaseAgent, AgentOutput
+from src.analysis.feature_store import FeatureStore
+from src.analysis.pattern_recognition import PatternScanner
+
+# 技术分析Agent输出的K线形态（均线多头排列另按特征缓存判断）
+AGENT_PATTERNS = ("涨停",)
 
 
 class TechnicalAnalysisAgent(BaseAgent):
@@ -24,6 +28,7 @@ class TechnicalAnalysisAgent(BaseAgent):
         # 从context获取数据
         price_data = context.get("price_data", {})
         daily_data = context.get("daily_data", pd.DataFrame())
+        features = context.get("features") or FeatureStore(symbol)
         
         if daily_data.empty:
             return AgentOutput(
@@ -35,12 +40,15 @@ class TechnicalAnalysisAgent(BaseAgent):
                 timestamp=datetime.now()
             )
         
+        # 行情数据只读，派生指标统一从特征缓存获取
+        daily_data = self._with_close(daily_data)
+        
         # 计算技术指标
         analysis = {
-            "trend": self._analyze_trend(daily_data),
-            "momentum": self._analyze_momentum(daily_data),
+            "trend": self._analyze_trend(daily_data, features),
+            "momentum": self._analyze_momentum(daily_data, features),
             "support_resistance": self._find_support_resistance(daily_data),
-            "patterns": self._detect_patterns(daily_data),
+            "patterns": self._detect_patterns(daily_data, symbol, features),
         }
         
         # 综合评分
@@ -56,16 +64,17 @@ class TechnicalAnalysisAgent(BaseAgent):
             timestamp=datetime.now()
         )
     
-    def _analyze_trend(self, df: pd.DataFrame) -> Dict:
-        """分析趋势"""
-        # 确保close列存在
+    def _with_close(self, df: pd.DataFrame) -> pd.DataFrame:
+        """确保close列存在（不修改原数据，返回浅拷贝）"""
         if 'close' not in df.columns:
             # 尝试其他可能的列名
             for col in ['收盘', '收盘价', 'latest', 'current']:
                 if col in df.columns:
-                    df['close'] = df[col]
-                    break
-        
+                    return df.assign(close=df[col])
+        return df
+    
+    def _analyze_trend(self, df: pd.DataFrame, features: FeatureStore) -> Dict:
+        """分析趋势"""
         if 'close' not in df.columns or df.empty:
             return {
                 "short_term": "UNKNOWN",
@@ -75,22 +84,18 @@ class TechnicalAnalysisAgent(BaseAgent):
             }
         
         # 计算均线
-        df['sma5'] = df['close'].rolling(5, min_periods=1).mean()
-        df['sma10'] = df['close'].rolling(10, min_periods=1).mean()
-        df['sma20'] = df['close'].rolling(20, min_periods=1).mean()
-        df['sma60'] = df['close'].rolling(60, min_periods=1).mean()
-        
-        latest = df.iloc[-1]
+        sma = self._latest_sma(df, features)
+        close = df['close'].iloc[-1]
         
         trend = {
-            "short_term": "UP" if latest['close'] > latest['sma5'] else "DOWN",
-            "mid_term": "UP" if latest['close'] > latest['sma20'] else "DOWN",
-            "long_term": "UP" if latest['close'] > latest['sma60'] else "DOWN",
-            "ma_alignment": self._check_ma_alignment(df)
+            "short_term": "UP" if close > sma[5] else "DOWN",
+            "mid_term": "UP" if close > sma[20] else "DOWN",
+            "long_term": "UP" if close > sma[60] else "DOWN",
+            "ma_alignment": self._check_ma_alignment(df, features)
         }
         return trend
     
-    def _analyze_momentum(self, df: pd.DataFrame) -> Dict:
+    def _analyze_momentum(self, df: pd.DataFrame, features: FeatureStore) -> Dict:
         """分析动量指标"""
         if 'close' not in df.columns or len(df) < 14:
             return {
@@ -100,24 +105,13 @@ class TechnicalAnalysisAgent(BaseAgent):
                 "macd_signal": "中性"
             }
         
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(14, min_periods=1).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(14, min_periods=1).mean()
-        rs = gain / (loss + 1e-10)  # 避免除零
-        df['rsi'] = 100 - (100 / (1 + rs))
+        # RSI（分母加1e-10避免除零）
+        rsi_val = features.latest(df, "rsi", default=50.0, period=14, min_periods=1, eps=1e-10)
         
         # MACD
-        exp1 = df['close'].ewm(span=12, min_periods=1).mean()
-        exp2 = df['close'].ewm(span=26, min_periods=1).mean()
-        df['macd'] = exp1 - exp2
-        df['signal'] = df['macd'].ewm(span=9, min_periods=1).mean()
-        
-        latest = df.iloc[-1]
-        
-        rsi_val = latest['rsi'] if not pd.isna(latest['rsi']) else 50.0
-        macd_val = latest['macd'] if not pd.isna(latest['macd']) else 0.0
-        signal_val = latest['signal'] if not pd.isna(latest['signal']) else 0.0
+        macd = features.get(df, "macd", adjust=True, min_periods=1).iloc[-1]
+        macd_val = macd['macd'] if not pd.isna(macd['macd']) else 0.0
+        signal_val = macd['signal'] if not pd.isna(macd['signal']) else 0.0
         
         return {
             "rsi": float(rsi_val),
@@ -151,33 +145,31 @@ class TechnicalAnalysisAgent(BaseAgent):
             "position": float(position)
         }
     
-    def _detect_patterns(self, df: pd.DataFrame) -> List[str]:
-        """识别K线形态"""
-        patterns = []
-        
-        # 检查最近5天
-        recent = df.tail(5)
-        
-        # 涨停检测
-        if len(recent) > 0:
-            last = recent.iloc[-1]
-            if 'pct_change' in last and last['pct_change'] >= 9.9:
-                patterns.append("涨停")
+    def _detect_patterns(self, df: pd.DataFrame, symbol: str, features: FeatureStore) -> List[str]:
+        """
+        识别最新一根K线的形态：涨停（幅度按板块区分）与均线多头排列
+
+        只输出这两种形态（下游的多头Agent与摘要按此判断），其余形态见 PatternScanner
+        """
+        patterns = PatternScanner.from_frame(df, symbol).latest(patterns=AGENT_PATTERNS)
         
-        # 均线多头排列
         if len(df) > 60:
-            latest = df.iloc[-1]
-            if latest['sma5'] > latest['sma10'] > latest['sma20'] > latest['sma60']:
+            sma = self._latest_sma(df, features)
+            if sma[5] > sma[10] > sma[20] > sma[60]:
                 patterns.append("均线多头排列")
         
         return patterns
     
-    def _check_ma_alignment(self, df: pd.DataFrame) -> str:
+    def _latest_sma(self, df: pd.DataFrame, features: FeatureStore) -> Dict[int, float]:
+        """各周期均线的最新值（与其他Agent共享特征缓存）"""
+        return {p: features.latest(df, "sma", period=p, min_periods=1) for p in (5, 10, 20, 60)}
+    
+    def _check_ma_alignment(self, df: pd.DataFrame, features: FeatureStore) -> str:
         """检查均线排列"""
-        latest = df.iloc[-1]
-        if latest['sma5'] > latest['sma10'] > latest['sma20']:
+        sma = self._latest_sma(df, features)
+        if sma[5] > sma[10] > sma[20]:
             return "多头排列"
-        elif latest['sma5'] < latest['sma10'] < latest['sma20']:
+        elif sma[5] < sma[10] < sma[20]:
             return "空头排列"
         else:
             return "纠缠"
@@ -1,7 +1,16 @@
 """
 祖蛙系统 - 分析工具模块
 """
-from src.analysis.technical_indicators import TechnicalIndicators
-from src.analysis.pattern_recognition import PatternRecognition
+from src.utils.lazy import lazy_exports
 
-__all__ = ["TechnicalIndicators", "PatternRecognition"]
+_EXPORTS = {
+    "TechnicalIndicators": "src.analysis.technical_indicators",
+    "PanelIndicators": "src.analysis.technical_indicators",
+    "PatternRecognition": "src.analysis.pattern_recognition",
+    "PatternScanner": "src.analysis.pattern_recognition",
+    "IndicatorState": "src.analysis.streaming_indicators",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = ["TechnicalIndicators", "PanelIndicators", "PatternRecognition", "PatternScanner", "IndicatorState"]
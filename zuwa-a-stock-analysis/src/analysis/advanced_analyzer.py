@@ -7,35 +7,156 @@ from typing import Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 import os
 
+from src.analysis.feature_store import FeatureStore
+from src.data.fund_flow import latest_flow, parse_fund_flow, to_wan
+from src.utils.lazy import lazy_import
+
+# 量价信号（同 analyze_volume_price_relationship 的 signals 类型）
+VOLUME_PRICE_SIGNALS = ['放量上涨', '缩量上涨', '放量下跌', '缩量下跌', '量堆', '地量', '天量', '成交量突破']
+
+# 量价趋势组合（同 analyze_volume_price_relationship 的 divergence）
+DIVERGENCE_SIGNALS = ['顶背离', '底背离', '量价齐升', '量价齐跌']
+
+# 量价分析所需的最少K线数
+VOLUME_PRICE_MIN_BARS = 20
+
+
+def _shift(x: np.ndarray, periods: int) -> np.ndarray:
+    """按行后移 periods 行，前面补 NaN（不足 periods 行时全为 NaN）"""
+    out = np.full_like(x, np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+
+def _rolling_extreme(x: np.ndarray, window: int, func) -> np.ndarray:
+    """
+    滚动最小/最大值，跳过缺失值（同 rolling(window, min_periods=1).min()/max()）
+
+    func 为 np.fmin / np.fmax：按 1、2、4…倍增合并后移结果，只需 log2(window) 次整表运算
+    """
+    out = x.copy()
+    span = 1
+    while span * 2 <= window:
+        out = func(out, _shift(out, span))
+        span *= 2
+    if span < window:
+        out = func(out, _shift(out, window - span))
+    return out
+
+
+def _rolling_percentile(x: np.ndarray, window: int) -> np.ndarray:
+    """当前值在最近 window 个有效值中的百分位排名（同 rolling(window, min_periods=1).rank(pct=True)）"""
+    # 平均排名 = 小于当前值的个数 + (等于当前值的个数 + 1) / 2，逐个滞后期整表比较
+    # 计数不超过 window，用 int16 减少内存带宽
+    below = np.zeros(x.shape, dtype=np.int16)
+    equal = np.zeros(x.shape, dtype=np.int16)
+    for lag in range(1, min(window, len(x))):
+        current, past = x[lag:], x[:-lag]
+        below[lag:] += past < current
+        equal[lag:] += past == current
+    observed = np.cumsum(~np.isnan(x), axis=0)
+    valid = observed - _shift(observed.astype(float), window)
+    valid = np.where(np.isnan(valid), observed, valid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rank = below + (equal + 2) / 2
+        return np.where(np.isnan(x), np.nan, rank / valid)
+
+
+def _trend(x: np.ndarray, window: int = 20) -> np.ndarray:
+    """逐行的 _calculate_trend：窗口首尾相比涨超5%为 1，跌超5%为 -1，否则为 0"""
+    first = _shift(x, window - 1)
+    with np.errstate(invalid='ignore'):
+        return np.select([x > first * 1.05, x < first * 0.95], [1, -1], 0)
+
+
+def volume_price_panel(close: pd.DataFrame, volume: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    全部K线的量价信号与健康度（日期 × 股票面板，滚动窗口向量化计算）
+
+    第 t 行等于把日线截断到 t 日后调用 analyze_volume_price_relationship 的结果；
+    停牌日（成交量为 NaN）及不足 VOLUME_PRICE_MIN_BARS 根K线时信号为 False、健康度为 NaN，
+    含停牌日的均量窗口不产生放量/缩量信号
+
+    Returns:
+        {名称: 与 close 同形状的 DataFrame}，包括 VOLUME_PRICE_SIGNALS 与 DIVERGENCE_SIGNALS（bool）、
+        volume_ma5 / volume_ma20 / volume_ratio / volume_percentile / price_change、
+        price_trend / volume_trend（1 上升 / 0 持平 / -1 下降）与 health_score
+    """
+    from src.analysis.technical_indicators import PanelIndicators
+
+    # DataFrame 的数据按列存储，转为行连续数组，逐行后移比较时访问连续内存
+    price = np.ascontiguousarray(close.to_numpy(dtype=float))
+    vol = np.ascontiguousarray(volume.reindex(index=close.index, columns=close.columns).to_numpy(dtype=float))
+    observed = ~np.isnan(vol)
+    ready = observed & (np.cumsum(observed, axis=0) >= VOLUME_PRICE_MIN_BARS)
+
+    volume_ma5 = PanelIndicators.sma(vol, 5)
+    volume_ma20 = PanelIndicators.sma(vol, 20)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        price_change = price / _shift(price, 1) - 1
+        up, down = price_change > 0, price_change < 0
+        heavy, light = vol > volume_ma5 * 1.5, vol < volume_ma5 * 0.8
+        louder, quieter = vol > volume_ma5, vol < volume_ma5
+        price_trend, volume_trend = _trend(price), _trend(vol)
+        pile = np.minimum(np.minimum(vol, _shift(vol, 1)), _shift(vol, 2))
+
+        signals = {
+            '放量上涨': heavy & up,
+            '缩量上涨': light & up,
+            '放量下跌': heavy & down,
+            '缩量下跌': light & down,
+            '量堆': pile > volume_ma20 * 1.3,
+            '地量': vol <= _rolling_extreme(vol, 60, np.fmin) * 1.05,
+            '天量': vol >= _rolling_extreme(vol, 60, np.fmax) * 0.95,
+            '成交量突破': vol > volume_ma20 * 2,
+            '顶背离': (price_trend == 1) & (volume_trend == -1),
+            '底背离': (price_trend == -1) & (volume_trend == 1),
+            '量价齐升': (price_trend == 1) & (volume_trend == 1),
+            '量价齐跌': (price_trend == -1) & (volume_trend == -1),
+        }
+        # 同 _calculate_volume_health_score
+        health = np.clip(50.0 + 20 * (louder & up) + 10 * (quieter & down) - 20 * (louder & down), 0, 100)
+        values = {name: signal & ready for name, signal in signals.items()}
+        values.update({
+            'volume_ma5': volume_ma5,
+            'volume_ma20': volume_ma20,
+            'volume_ratio': np.where(volume_ma5 > 0, vol / volume_ma5, 0.0),
+            'volume_percentile': _rolling_percentile(vol, 60),
+            'price_change': price_change,
+            'price_trend': np.where(ready, price_trend, 0),
+            'volume_trend': np.where(ready, volume_trend, 0),
+            'health_score': np.where(ready, health, np.nan),
+        })
+    return {name: pd.DataFrame(array, index=close.index, columns=close.columns) for name, array in values.items()}
+
 
 class AdvancedAnalyzer:
     """高级分析器 - 量价关系与资金行为"""
     
     def __init__(self):
-        self.ak = None
         self.tushare_token = os.getenv("TUSHARE_TOKEN")
     
     def _get_akshare(self):
-        """延迟加载akshare"""
-        if self.ak is None:
-            import akshare as ak
-            self.ak = ak
-        return self.ak
+        """延迟加载akshare（每次经 lazy_import 取模块，录制/回放替换后仍生效）"""
+        return lazy_import("akshare")
     
     def _get_tushare(self):
         """延迟加载tushare"""
         if self.tushare_token:
-            import tushare as ts
-            return ts.pro_api(self.tushare_token)
+            return lazy_import("tushare").pro_api(self.tushare_token)
         return None
     
     # ============================================
     # 功能1: 历史成交量与股价对应关系分析
     # ============================================
-    def analyze_volume_price_relationship(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def analyze_volume_price_relationship(self, df: pd.DataFrame, features: FeatureStore = None) -> Dict[str, Any]:
         """
         分析成交量与股价的关系
         
+        参数:
+        - features: 可选，与其他Agent共享的特征缓存
+        
         返回:
         - 量价配合度
         - 量价背离信号
@@ -46,22 +167,21 @@ class AdvancedAnalyzer:
             return {"error": "数据不足"}
         
         try:
-            # 确保列名正确
+            # 确保列名正确（行情数据只读，补列时使用浅拷贝）
             if 'close' not in df.columns:
-                df['close'] = df['收盘'] if '收盘' in df.columns else df['close']
+                df = df.assign(close=df['收盘'] if '收盘' in df.columns else df['close'])
             if 'volume' not in df.columns:
-                df['volume'] = df['成交量'] if '成交量' in df.columns else df['volume']
+                df = df.assign(volume=df['成交量'] if '成交量' in df.columns else df['volume'])
             
-            # 计算成交量均线
-            df['volume_ma5'] = df['volume'].rolling(5).mean()
-            df['volume_ma20'] = df['volume'].rolling(20).mean()
+            features = features or FeatureStore()
             
-            # 计算价格变化
-            df['price_change'] = df['close'].pct_change()
-            df['volume_change'] = df['volume'].pct_change()
-            
-            # 量价配合度分析
-            latest = df.iloc[-1]
+            # 成交量均线与价格变化（派生指标保存在特征缓存中，不写回行情数据）
+            latest = {
+                "volume": df['volume'].iloc[-1],
+                "volume_ma5": features.latest(df, "sma", period=5, column='volume'),
+                "volume_ma20": features.latest(df, "sma", period=20, column='volume'),
+                "price_change": features.latest(df, "pct_change", column='close'),
+            }
             
             # 1. 放量上涨 / 缩量下跌 = 健康
             # 2. 缩量上涨 / 放量下跌 = 警惕
@@ -103,7 +223,7 @@ class AdvancedAnalyzer:
             
             # 新增：量堆检测（连续3天以上放量）
             recent_3d_volume = df.tail(3)
-            if all(v > df['volume_ma20'].iloc[-1] * 1.3 for v in recent_3d_volume['volume']):
+            if all(v > latest['volume_ma20'] * 1.3 for v in recent_3d_volume['volume']):
                 volume_price_signals.append({
                     "type": "量堆",
                     "strength": "强势",
@@ -167,12 +287,38 @@ class AdvancedAnalyzer:
                 "divergence": divergence,
                 "price_trend": price_trend,
                 "volume_trend": volume_trend,
-                "health_score": self._calculate_volume_health_score(df)
+                "health_score": self._calculate_volume_health_score(latest)
             }
             
         except Exception as e:
             return {"error": f"分析失败: {e}"}
     
+    def analyze_volume_price_series(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        逐K线的量价分析（analyze_volume_price_relationship 的滚动版）
+        
+        返回:
+        - 与 df 同索引的 DataFrame，每根K线一行，列见 volume_price_panel
+        """
+        if df is None or df.empty:
+            return pd.DataFrame()
+        close = df['close'] if 'close' in df.columns else df['收盘']
+        volume = df['volume'] if 'volume' in df.columns else df['成交量']
+        panel = volume_price_panel(close.to_frame(0), volume.to_frame(0))
+        return pd.DataFrame({name: frame[0] for name, frame in panel.items()}, index=df.index)
+    
+    def analyze_volume_price_panel(self, close: pd.DataFrame, volume: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        多只股票全部K线的量价分析
+        
+        参数:
+        - close / volume: 日期 × 股票 的收盘价与成交量（可由 PatternScanner 等面板构造）
+        
+        返回:
+        - {名称: 日期 × 股票 DataFrame}，列见 volume_price_panel
+        """
+        return volume_price_panel(close, volume)
+    
     # ============================================
     # 功能2: 历史股价与股东数量对应关系分析
     # ============================================
@@ -238,7 +384,7 @@ class AdvancedAnalyzer:
     # ============================================
     # 功能3: 历史股价与融资融券关系分析
     # ============================================
-    def analyze_price_margin_relationship(self, symbol: str) -> Dict[str, Any]:
+    def analyze_price_margin_relationship(self, symbol: str, daily_data: pd.DataFrame = None) -> Dict[str, Any]:
         """
         分析股价与融资融券余额的关系
         
@@ -246,64 +392,63 @@ class AdvancedAnalyzer:
         - 融资余额增加 + 股价上涨 = 杠杆资金推动，趋势强劲
         - 融资余额减少 + 股价下跌 = 杠杆资金撤离，风险释放
         - 融资余额增加 + 股价下跌 = 抄底资金入场，可能反弹
+        
+        Args:
+            symbol: 股票代码
+            daily_data: 可选，日线数据（用于计算同期股价变化）
         """
         try:
-            # 尝试使用Tushare获取融资融券数据
-            pro = self._get_tushare()
-            if pro is None:
-                return {"error": "未配置Tushare Token，无法获取融资融券数据"}
+            from src.data.margin_store import get_margin_store
             
             code = symbol[2:] if symbol.startswith(('sh', 'sz', 'bj')) else symbol
-            exchange = 'SH' if code.startswith('6') else 'SZ'
-            ts_code = f"{code}.{exchange}"
             
-            # 获取融资融券数据
-            try:
-                df = pro.margin_detail(ts_code=ts_code)
-                
-                if df is None or df.empty:
-                    return {"error": "Tushare返回空数据"}
-                
-                # 解析数据
-                df = df.sort_values('trade_date', ascending=False)
-                latest = df.iloc[0]
-                
-                margin_balance = float(latest.get('rzmre', 0))  # 融资余额
-                margin_buy = float(latest.get('rzmre', 0))      # 融资买入额
-                margin_repay = float(latest.get('rzche', 0))    # 融资偿还额
-                
-                short_balance = float(latest.get('rqmcl', 0))   # 融券余额
-                
-                # 计算5日变化
-                if len(df) > 5:
-                    prev = df.iloc[5]
-                    prev_margin = float(prev.get('rzmre', margin_balance))
-                    change_5d = ((margin_balance - prev_margin) / prev_margin * 100) if prev_margin else 0
-                else:
-                    change_5d = 0
-                
-                # 分析
-                analysis = []
-                if change_5d > 10:
-                    analysis.append("融资余额5日增加超10%，杠杆资金积极入场")
-                elif change_5d < -10:
-                    analysis.append("融资余额5日减少超10%，杠杆资金撤离")
-                
-                return {
-                    "margin_balance": round(margin_balance, 2),
-                    "short_balance": round(short_balance, 2),
-                    "margin_change_5d": round(change_5d, 2),
-                    "analysis": analysis,
-                    "signal": "融资增加" if change_5d > 5 else "融资减少" if change_5d < -5 else "中性",
-                    "data_source": "Tushare Pro"
-                }
-                
-            except Exception as e:
-                return {"error": f"Tushare获取融资融券数据失败: {e}"}
+            # 融资融券库（两市明细每日只下载一次）
+            store = get_margin_store()
+            if not store.sync():
+                return {"error": "无法获取融资融券数据"}
+            
+            trend = store.trend(code)
+            if not trend.get("date"):
+                return {"error": "该股票不是融资融券标的"}
+            
+            change_5d = trend["change_5d"]
+            price_change_5d = self._price_change(daily_data, 5)
+            
+            # 分析
+            analysis = []
+            if change_5d > 10:
+                analysis.append("融资余额5日增加超10%，杠杆资金积极入场")
+            elif change_5d < -10:
+                analysis.append("融资余额5日减少超10%，杠杆资金撤离")
+            if price_change_5d is not None and abs(change_5d) > 5:
+                if change_5d > 0 and price_change_5d > 0:
+                    analysis.append("融资增加+股价上涨：杠杆资金推动，趋势强劲")
+                elif change_5d < 0 and price_change_5d < 0:
+                    analysis.append("融资减少+股价下跌：杠杆资金撤离，风险释放")
+                elif change_5d > 0 and price_change_5d < 0:
+                    analysis.append("融资增加+股价下跌：抄底资金入场，可能反弹")
+            
+            return {
+                "margin_balance": trend["current"],
+                "short_balance": round(float(trend.get("short_balance") or 0), 2),
+                "margin_change_5d": change_5d,
+                "margin_change_20d": trend["change_20d"],
+                "price_change_5d": price_change_5d,
+                "analysis": analysis,
+                "signal": "融资增加" if change_5d > 5 else "融资减少" if change_5d < -5 else "中性",
+                "data_source": "沪深交易所融资融券明细"
+            }
                 
         except Exception as e:
             return {"error": f"分析失败: {e}"}
     
+    def _price_change(self, daily_data: pd.DataFrame, days: int):
+        """最近 days 个交易日的涨跌幅（%），数据不足时返回 None"""
+        if daily_data is None or 'close' not in daily_data.columns or len(daily_data) <= days:
+            return None
+        close = daily_data['close']
+        return round(float(close.iloc[-1] / close.iloc[-1 - days] - 1) * 100, 2)
+    
     # ============================================
     # 功能4: 当日主动买主动卖明细数据分析
     # ============================================
@@ -327,22 +472,20 @@ class AdvancedAnalyzer:
                 if df is None or df.empty:
                     return {"error": "无法获取资金流数据"}
                 
-                latest = df.iloc[0]
+                # 整表解析为元（按单位换算），取最新一日
+                latest = latest_flow(parse_fund_flow(df))
                 
-                # 解析主动买卖数据
-                def parse_value(val):
-                    if isinstance(val, str):
-                        val = val.replace('万', '').replace('亿', '').replace('%', '')
-                        try:
-                            return float(val)
-                        except:
-                            return 0
-                    return float(val) if val else 0
+                # 有流入/流出总额时按总额计算；否则用各档净额，净流入计入买方、净流出计入卖方
+                def side(kind: str, sizes: Tuple[str, ...]) -> float:
+                    gross = [latest.get(f"{size}_{kind}") for size in sizes]
+                    if any(v is not None for v in gross):
+                        return sum(v or 0 for v in gross)
+                    nets = [latest.get(f"{size}_net") or 0 for size in sizes]
+                    return sum(max(v, 0) if kind == "in" else max(-v, 0) for v in nets)
                 
-                # 主动买入 = 大单买入 + 超大单买入
-                active_buy = parse_value(latest.get('大单流入', 0)) + parse_value(latest.get('超大单流入', 0))
-                # 主动卖出 = 大单卖出 + 超大单卖出
-                active_sell = parse_value(latest.get('大单流出', 0)) + parse_value(latest.get('超大单流出', 0))
+                # 主动买入 = 大单买入 + 超大单买入；主动卖出 = 大单卖出 + 超大单卖出（万元）
+                active_buy = side("in", ("large", "super_large")) / 1e4
+                active_sell = side("out", ("large", "super_large")) / 1e4
                 
                 net_flow = active_buy - active_sell
                 total = active_buy + active_sell
@@ -351,8 +494,8 @@ class AdvancedAnalyzer:
                 sell_ratio = (active_sell / total * 100) if total > 0 else 50
                 
                 # 小单数据（散户）
-                small_buy = parse_value(latest.get('小单流入', 0))
-                small_sell = parse_value(latest.get('小单流出', 0))
+                small_buy = side("in", ("small",)) / 1e4
+                small_sell = side("out", ("small",)) / 1e4
                 
                 return {
                     "active_buy": round(active_buy, 2),
@@ -362,6 +505,9 @@ class AdvancedAnalyzer:
                     "sell_ratio": round(sell_ratio, 1),
                     "small_buy": round(small_buy, 2),
                     "small_sell": round(small_sell, 2),
+                    "main_net_5d": to_wan(latest.get("main_net_5d")),
+                    "main_net_10d": to_wan(latest.get("main_net_10d")),
+                    "main_net_20d": to_wan(latest.get("main_net_20d")),
                     "signal": "主动买入占优" if buy_ratio > 55 else "主动卖出占优" if sell_ratio > 55 else "买卖均衡",
                     "data_source": "AKShare"
                 }
@@ -390,12 +536,10 @@ class AdvancedAnalyzer:
         else:
             return "FLAT"
     
-    def _calculate_volume_health_score(self, df: pd.DataFrame) -> int:
-        """计算量价健康度评分"""
+    def _calculate_volume_health_score(self, latest: Dict[str, float]) -> int:
+        """计算量价健康度评分（latest 为最新一根K线的成交量、5日均量和涨跌幅）"""
         score = 50
         
-        latest = df.iloc[-1]
-        
         # 放量上涨加分
         if latest['volume'] > latest['volume_ma5'] and latest['price_change'] > 0:
             score += 20
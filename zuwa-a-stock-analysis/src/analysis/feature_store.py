@@ -0,0 +1,139 @@
+"""
+特征缓存 - 单次分析内按需计算并共享的技术特征
+
+以 (股票代码, 数据指纹, 特征名, 参数) 为键，首次请求时计算，之后各Agent直接复用
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 参与指纹计算的行情列（派生列不影响指纹）
+FINGERPRINT_COLUMNS = ['date', 'open', 'close', 'high', 'low', 'volume']
+
+
+def _sma(df: pd.DataFrame, period: int, column: str = 'close', min_periods: Optional[int] = None) -> pd.Series:
+    return df[column].rolling(period, min_periods=min_periods).mean()
+
+
+def _ema(df: pd.DataFrame, span: int, column: str = 'close', adjust: bool = False,
+         min_periods: int = 0) -> pd.Series:
+    return df[column].ewm(span=span, adjust=adjust, min_periods=min_periods).mean()
+
+
+def _macd(df: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9, column: str = 'close',
+          adjust: bool = False, min_periods: int = 0) -> pd.DataFrame:
+    ema = lambda s, span: s.ewm(span=span, adjust=adjust, min_periods=min_periods).mean()
+    macd_line = ema(df[column], fast) - ema(df[column], slow)
+    signal_line = ema(macd_line, signal)
+    return pd.DataFrame({"macd": macd_line, "signal": signal_line, "histogram": macd_line - signal_line})
+
+
+def _rsi(df: pd.DataFrame, period: int = 14, column: str = 'close', min_periods: Optional[int] = None,
+         eps: float = 0.0) -> pd.Series:
+    delta = df[column].diff()
+    gain = delta.where(delta > 0, 0).rolling(period, min_periods=min_periods).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(period, min_periods=min_periods).mean()
+    rs = gain / (loss + eps)
+    return 100 - (100 / (1 + rs))
+
+
+def _pct_change(df: pd.DataFrame, column: str = 'close') -> pd.Series:
+    return df[column].pct_change()
+
+
+# 特征名 -> 计算函数 func(df, **params)
+FEATURES: Dict[str, Callable[..., Any]] = {
+    "sma": _sma,
+    "ema": _ema,
+    "macd": _macd,
+    "rsi": _rsi,
+    "pct_change": _pct_change,
+}
+
+
+def register_feature(name: str, func: Callable[..., Any]) -> None:
+    """注册自定义特征 func(df, **params)"""
+    FEATURES[name] = func
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """根据行情列内容计算数据指纹"""
+    columns = [c for c in FINGERPRINT_COLUMNS if c in df.columns] or list(df.columns)
+    hashed = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    digest = hashlib.sha1(hashed.tobytes())
+    digest.update(",".join(columns).encode())
+    return digest.hexdigest()[:16]
+
+
+class FeatureStore:
+    """
+    单次分析内的特征缓存
+
+    保存在 context["features"] 中，所有Agent共用；同一份数据的同一特征只计算一次
+    """
+
+    def __init__(self, symbol: str = ""):
+        self.symbol = symbol
+        self._cache: Dict[Tuple, Any] = {}
+        # id(df) -> (df, 指纹)，持有引用保证 id 不被复用
+        self._fingerprints: Dict[int, Tuple[pd.DataFrame, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, df: pd.DataFrame) -> str:
+        """数据指纹，同一对象只计算一次"""
+        cached = self._fingerprints.get(id(df))
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        fp = frame_fingerprint(df)
+        with self._lock:
+            self._fingerprints[id(df)] = (df, fp)
+        return fp
+
+    def get(self, df: pd.DataFrame, name: str, **params) -> Any:
+        """
+        获取特征，未命中时计算并缓存
+
+        Args:
+            df: 行情数据
+            name: 特征名（见 FEATURES）
+            **params: 特征参数
+
+        Returns:
+            特征值（Series / DataFrame）
+        """
+        key = (self.symbol, self.fingerprint(df), name, tuple(sorted(params.items())))
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+
+        value = FEATURES[name](df, **params)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+            self._cache[key] = value
+        return value
+
+    def latest(self, df: pd.DataFrame, name: str, default: float = np.nan, **params) -> float:
+        """特征最后一个值（单列特征）"""
+        series = self.get(df, name, **params)
+        if series is None or len(series) == 0 or pd.isna(series.iloc[-1]):
+            return default
+        return float(series.iloc[-1])
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        return {"hits": self.hits, "misses": self.misses, "features": len(self._cache)}
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._cache.clear()
+            self._fingerprints.clear()
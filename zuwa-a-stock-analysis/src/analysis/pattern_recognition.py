@@ -1,43 +1,26 @@
 """
 形态识别
+
+PatternRecognition 判断单只股票最新一根K线的形态；
+PatternScanner 在 (日期 × 股票) 面板上向量化标记全部历史中每一次形态出现，
+供选股（"最近N个交易日出现过X形态的股票"）与形态信号回测使用
 """
 import pandas as pd
 import numpy as np
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.analysis.technical_indicators import PanelIndicators
 
 
 class PatternRecognition:
     """K线形态识别"""
     
     @staticmethod
-    def detect_patterns(df: pd.DataFrame) -> List[str]:
-        """检测K线形态"""
-        patterns = []
-        
+    def detect_patterns(df: pd.DataFrame, symbol: str = "") -> List[str]:
+        """检测最新一根K线的形态（由 PatternScanner 计算，symbol 用于判断涨跌停幅度）"""
         if len(df) < 5:
-            return patterns
-        
-        # 涨停检测
-        if PatternRecognition.is_limit_up(df):
-            patterns.append("涨停")
-        
-        # 跌停检测
-        if PatternRecognition.is_limit_down(df):
-            patterns.append("跌停")
-        
-        # 锤子线
-        if PatternRecognition.is_hammer(df):
-            patterns.append("锤子线")
-        
-        # 十字星
-        if PatternRecognition.is_doji(df):
-            patterns.append("十字星")
-        
-        # 多头排列
-        if PatternRecognition.is_bullish_alignment(df):
-            patterns.append("均线多头排列")
-        
-        return patterns
+            return []
+        return PatternScanner.from_frame(df, symbol).latest()
     
     @staticmethod
     def is_limit_up(df: pd.DataFrame, threshold: float = 9.9) -> bool:
@@ -91,3 +74,433 @@ class PatternRecognition:
             return (latest['sma5'] > latest['sma10'] > 
                     latest['sma20'] > latest['sma60'])
         return False
+
+
+# 涨跌停幅度（%）：按代码前缀区分板块，其余为主板；
+# 第三项为该幅度的生效日期，此前按主板幅度（None 表示板块设立起即适用）
+BOARD_LIMITS = (
+    (("688", "689"), 20.0, None),           # 科创板
+    (("300", "301"), 20.0, "2020-08-24"),   # 创业板（注册制改革后由10%放宽至20%）
+    (("8", "4", "92"), 30.0, None),         # 北交所
+)
+MAIN_BOARD_LIMIT = 10.0
+
+# 涨跌幅距涨跌停幅度在该范围内即视为涨跌停（价格按分取整，如主板 >= 9.9%）
+LIMIT_TOLERANCE = 0.1
+
+# 均线排列使用的周期
+ALIGNMENT_PERIODS = (5, 10, 20, 60)
+
+
+def _board(symbol: str) -> Tuple[float, Optional[str]]:
+    """股票所属板块的 (涨跌停幅度, 生效日期)"""
+    code = "".join(ch for ch in str(symbol) if ch.isdigit())[-6:]
+    for prefixes, pct, since in BOARD_LIMITS:
+        if code.startswith(prefixes):
+            return pct, since
+    return MAIN_BOARD_LIMIT, None
+
+
+def limit_pct(symbol: str, date=None) -> float:
+    """
+    股票的涨跌停幅度（%）
+
+    ST股票（5%）无法从代码判断，需通过 PatternScanner 的 limits 参数指定
+
+    Args:
+        symbol: 股票代码
+        date: 可选，交易日；早于板块幅度生效日期时按主板幅度（如2020-08-24前的创业板为10%），
+            缺省为现行幅度
+    """
+    pct, since = _board(symbol)
+    if date is not None and since is not None and pd.Timestamp(date) < pd.Timestamp(since):
+        return MAIN_BOARD_LIMIT
+    return pct
+
+
+def _limit_matrix(index: pd.Index, columns: pd.Index, limits: Dict[str, float]) -> np.ndarray:
+    """
+    各股票的涨跌停幅度：(股票数,) 向量；有股票在区间内切换过幅度时为 (日期数 × 股票数) 矩阵
+
+    limits 中指定的幅度在所有日期生效
+    """
+    boards = [(limits[c], None) if c in limits else _board(c) for c in columns]
+    current = np.array([pct for pct, _ in boards], dtype=float)
+    cutovers = {since for _, since in boards if since is not None}
+    if not cutovers or len(index) == 0:
+        return current
+
+    dates = pd.to_datetime(pd.Index(index).astype(str), errors='coerce')
+    matrix = None
+    for since in cutovers:
+        before = np.asarray(dates < pd.Timestamp(since))
+        if not before.any():
+            continue
+        if matrix is None:
+            matrix = np.tile(current, (len(index), 1))
+        cols = np.array([b[1] == since for b in boards])
+        matrix[np.ix_(before, cols)] = MAIN_BOARD_LIMIT
+    return current if matrix is None else matrix
+
+
+def _limit_up(s: "PatternScanner") -> np.ndarray:
+    return s.pct >= s.limits - LIMIT_TOLERANCE
+
+
+def _limit_down(s: "PatternScanner") -> np.ndarray:
+    return s.pct <= -(s.limits - LIMIT_TOLERANCE)
+
+
+def _one_price_limit_up(s: "PatternScanner") -> np.ndarray:
+    """开盘即封死涨停，全天只有一个价格"""
+    return _limit_up(s) & (s.high == s.low)
+
+
+def _hammer(s: "PatternScanner") -> np.ndarray:
+    """下影线长，上影线短，实体小（同 PatternRecognition.is_hammer）"""
+    return (s.lower_shadow > 2 * s.body) & (s.upper_shadow < s.body)
+
+
+def _shooting_star(s: "PatternScanner") -> np.ndarray:
+    """上影线长，下影线短，实体小"""
+    return (s.upper_shadow > 2 * s.body) & (s.lower_shadow < s.body)
+
+
+def _doji(s: "PatternScanner") -> np.ndarray:
+    """实体小于振幅的10%（同 PatternRecognition.is_doji）"""
+    return s.body < 0.1 * (s.high - s.low)
+
+
+def _bullish_engulfing(s: "PatternScanner") -> np.ndarray:
+    """前一日阴线，当日阳线实体完全覆盖前一日实体"""
+    prev_open, prev_close = s.prev(s.open), s.prev(s.close)
+    return (prev_close < prev_open) & (s.close > s.open) & (s.open <= prev_close) & (s.close >= prev_open)
+
+
+def _bearish_engulfing(s: "PatternScanner") -> np.ndarray:
+    """前一日阳线，当日阴线实体完全覆盖前一日实体"""
+    prev_open, prev_close = s.prev(s.open), s.prev(s.close)
+    return (prev_close > prev_open) & (s.close < s.open) & (s.open >= prev_close) & (s.close <= prev_open)
+
+
+def _bullish_alignment(s: "PatternScanner") -> np.ndarray:
+    sma = [s.sma(p) for p in ALIGNMENT_PERIODS]
+    return np.logical_and.reduce([fast > slow for fast, slow in zip(sma, sma[1:])])
+
+
+def _bearish_alignment(s: "PatternScanner") -> np.ndarray:
+    sma = [s.sma(p) for p in ALIGNMENT_PERIODS]
+    return np.logical_and.reduce([fast < slow for fast, slow in zip(sma, sma[1:])])
+
+
+# 形态名 -> 检测函数 func(scanner) -> (日期 × 股票) 布尔矩阵
+PATTERNS: Dict[str, Callable[["PatternScanner"], np.ndarray]] = {
+    "涨停": _limit_up,
+    "一字涨停": _one_price_limit_up,
+    "跌停": _limit_down,
+    "锤子线": _hammer,
+    "射击之星": _shooting_star,
+    "十字星": _doji,
+    "看涨吞没": _bullish_engulfing,
+    "看跌吞没": _bearish_engulfing,
+    "均线多头排列": _bullish_alignment,
+    "均线空头排列": _bearish_alignment,
+}
+
+
+# 依赖均线的形态（调用方已有均线缓存时可自行判断）
+ALIGNMENT_PATTERNS = ("均线多头排列", "均线空头排列")
+
+
+def register_pattern(name: str, func: Callable[["PatternScanner"], np.ndarray]) -> None:
+    """注册形态检测函数 func(scanner) -> 与价格矩阵同形状的布尔矩阵"""
+    PATTERNS[name] = func
+
+
+class PatternScanner:
+    """
+    多股票全历史K线形态扫描
+
+    输入为 (日期 × 股票) 价格矩阵，每个形态输出同形状的布尔矩阵（按需计算并缓存）。
+    第 t 行只用到第 t 日及以前的数据，可直接用于回测；停牌、未上市等缺失处为 False
+
+    Args:
+        open_, high, low, close: 价格矩阵，索引为升序日期，列为股票代码
+        pct_change: 涨跌幅矩阵（%），缺省或缺失处按前收盘价计算
+        limits: 股票代码 -> 涨跌停幅度（%），覆盖按代码前缀与日期判断的默认值（如ST股票为5）
+    """
+
+    def __init__(
+        self,
+        open_: pd.DataFrame,
+        high: pd.DataFrame,
+        low: pd.DataFrame,
+        close: pd.DataFrame,
+        pct_change: Optional[pd.DataFrame] = None,
+        limits: Optional[Dict[str, float]] = None
+    ):
+        self.index = close.index
+        self.columns = close.columns
+        align = lambda m: m.reindex(index=self.index, columns=self.columns).to_numpy(dtype=float)
+        self.open, self.high, self.low, self.close = align(open_), align(high), align(low), align(close)
+        self._pct_change = align(pct_change) if pct_change is not None else None
+        self.limits = _limit_matrix(self.index, self.columns, limits or {})
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._masks: Dict[str, np.ndarray] = {}
+
+    # ---------- 构造 ----------
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], limits: Optional[Dict[str, float]] = None) -> "PatternScanner":
+        """
+        由 {股票代码: 日线} 构造
+
+        日线为价格库的标准列（open/high/low/close/pct_change），日期取 date 列，没有时取索引
+        """
+        fields = ['open', 'high', 'low', 'close', 'pct_change']
+        frames = {
+            symbol: df if 'date' in df.columns else df.rename_axis('date').reset_index()
+            for symbol, df in frames.items() if df is not None and not df.empty
+        }
+        symbols = list(frames)
+        dates = set()
+        for df in frames.values():
+            dates.update(df['date'].to_numpy())
+        index = pd.Index(sorted(dates), name='date')
+
+        # 各股票按日期位置直接写入预分配的矩阵，避免长表 pivot
+        panel = {field: np.full((len(index), len(symbols)), np.nan) for field in fields}
+        for col, df in enumerate(frames.values()):
+            rows = index.get_indexer(df['date'].to_numpy())
+            for field in fields:
+                if field in df.columns:
+                    panel[field][rows, col] = df[field].to_numpy(dtype=float)
+        wrap = lambda values: pd.DataFrame(values, index=index, columns=pd.Index(symbols, dtype=object))
+        return cls(*(wrap(panel[field]) for field in fields), limits=limits)
+
+    @classmethod
+    def from_long(cls, data: pd.DataFrame, limits: Optional[Dict[str, float]] = None) -> "PatternScanner":
+        """由长表构造：列为 date, symbol 与价格库的标准列，每行一只股票的一根K线"""
+        fields = ['open', 'high', 'low', 'close', 'pct_change']
+        date_codes, dates = pd.factorize(data['date'], sort=True)
+        symbol_codes, symbols = pd.factorize(data['symbol'])
+        panel = {field: np.full((len(dates), len(symbols)), np.nan) for field in fields}
+        for field in fields:
+            if field in data.columns:
+                panel[field][date_codes, symbol_codes] = data[field].to_numpy(dtype=float)
+        index = pd.Index(dates, name='date')
+        wrap = lambda values: pd.DataFrame(values, index=index, columns=pd.Index(symbols, dtype=object))
+        return cls(*(wrap(panel[field]) for field in fields), limits=limits)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, symbol: str = "") -> "PatternScanner":
+        """单只股票的日线"""
+        return cls.from_frames({symbol: df})
+
+    @classmethod
+    def from_store(cls, symbols: Optional[Iterable[str]] = None, days: Optional[int] = None,
+                   store=None, limits: Optional[Dict[str, float]] = None) -> "PatternScanner":
+        """
+        由本地价格库构造（不访问网络）
+
+        Args:
+            symbols: 股票代码，默认价格库中的全部股票
+            days: 只取最近 days 个自然日
+        """
+        from src.data.price_store import get_price_store
+        store = store or get_price_store()
+        symbols = list(symbols) if symbols is not None else store.symbols()
+        return cls.from_frames({s: store.load(s, days) for s in symbols}, limits)
+
+    # ---------- 派生矩阵 ----------
+
+    def _derived(self, name: str, func: Callable[[], np.ndarray]) -> np.ndarray:
+        if name not in self._arrays:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self._arrays[name] = func()
+        return self._arrays[name]
+
+    @property
+    def body(self) -> np.ndarray:
+        """实体长度"""
+        return self._derived("body", lambda: np.abs(self.close - self.open))
+
+    @property
+    def upper_shadow(self) -> np.ndarray:
+        return self._derived("upper", lambda: self.high - np.fmax(self.open, self.close))
+
+    @property
+    def lower_shadow(self) -> np.ndarray:
+        return self._derived("lower", lambda: np.fmin(self.open, self.close) - self.low)
+
+    @property
+    def pct(self) -> np.ndarray:
+        """涨跌幅（%）：优先用数据源的涨跌幅，缺失处按最近一个有效收盘价计算"""
+        def compute():
+            prev_close = self.prev(self.filled_close)
+            pct = (self.close / prev_close - 1) * 100
+            if self._pct_change is None:
+                return pct
+            return np.where(np.isnan(self._pct_change), pct, self._pct_change)
+        return self._derived("pct", compute)
+
+    @property
+    def filled_close(self) -> np.ndarray:
+        """停牌日沿用前收盘价（上市前仍为 NaN）"""
+        return self._derived("filled_close", lambda: pd.DataFrame(self.close).ffill().to_numpy())
+
+    @staticmethod
+    def prev(values: np.ndarray) -> np.ndarray:
+        """前一行（第一行为 NaN）"""
+        out = np.full_like(values, np.nan)
+        out[1:] = values[:-1]
+        return out
+
+    def sma(self, period: int) -> np.ndarray:
+        """收盘价均线；停牌日按前收盘价计入窗口，避免停牌后长期无法形成均线"""
+        def compute():
+            sma = PanelIndicators.sma(self.filled_close, period)
+            sma[np.isnan(self.close)] = np.nan
+            return sma
+        return self._derived(f"sma{period}", compute)
+
+    # ---------- 形态矩阵 ----------
+
+    def mask(self, name: str) -> np.ndarray:
+        """形态的布尔矩阵（ndarray）"""
+        if name not in self._masks:
+            if name not in PATTERNS:
+                raise KeyError(f"未知的形态: {name}")
+            with np.errstate(invalid='ignore'):
+                self._masks[name] = np.asarray(PATTERNS[name](self), dtype=bool)
+        return self._masks[name]
+
+    def matrix(self, name: str) -> pd.DataFrame:
+        """形态的布尔矩阵（日期 × 股票）"""
+        return pd.DataFrame(self.mask(name), index=self.index, columns=self.columns)
+
+    def scan(self, patterns: Optional[Sequence[str]] = None) -> Dict[str, pd.DataFrame]:
+        """计算多个形态，默认全部已注册形态"""
+        return {name: self.matrix(name) for name in (patterns or PATTERNS)}
+
+    def within(self, name: str, days: int) -> pd.DataFrame:
+        """滚动矩阵：截至每个交易日的最近 days 个交易日内是否出现过该形态"""
+        return pd.DataFrame(self._counts(name, days) > 0, index=self.index, columns=self.columns)
+
+    def _counts(self, name: str, days: int) -> np.ndarray:
+        """截至每行的最近 days 行内该形态出现的次数"""
+        counts = np.cumsum(self.mask(name), axis=0, dtype=np.int32)
+        counts[days:] -= counts[:-days].copy()
+        return counts
+
+    def _row(self, as_of=None) -> int:
+        """as_of 当日或之前最近一个交易日的行号，默认最后一行"""
+        if as_of is None:
+            return len(self.index) - 1
+        key = pd.Timestamp(as_of) if isinstance(self.index, pd.DatetimeIndex) else str(as_of)[:10]
+        return int(self.index.searchsorted(key, side='right')) - 1
+
+    # ---------- 查询 ----------
+
+    def occurred(self, name: str, days: int = 5, as_of=None) -> List[str]:
+        """最近 days 个交易日（截至 as_of）内出现过该形态的股票"""
+        row = self._row(as_of)
+        if row < 0:
+            return []
+        window = self.mask(name)[max(row - days + 1, 0):row + 1]
+        return list(self.columns[window.any(axis=0)])
+
+    def find(
+        self,
+        patterns: Union[str, Sequence[str]],
+        days: int = 5,
+        as_of=None,
+        match: str = "any"
+    ) -> pd.DataFrame:
+        """
+        选股：最近 days 个交易日内出现过指定形态的股票
+
+        Args:
+            patterns: 形态名或形态列表
+            match: any 出现任一形态 / all 每个形态都出现过
+
+        Returns:
+            列为 symbol, patterns（出现过的形态）, last_date（最近一次出现的日期）, count（出现次数），
+            按最近出现日期、次数降序
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        columns = ['symbol', 'patterns', 'last_date', 'count']
+        row = self._row(as_of)
+        if row < 0 or not patterns:
+            return pd.DataFrame(columns=columns)
+
+        start = max(row - days + 1, 0)
+        windows = np.stack([self.mask(name)[start:row + 1] for name in patterns])   # 形态 × 日 × 股票
+        seen = windows.any(axis=1)                                                  # 形态 × 股票
+        selected = seen.all(axis=0) if match == "all" else seen.any(axis=0)
+        if not selected.any():
+            return pd.DataFrame(columns=columns)
+
+        hits = windows[:, :, selected].any(axis=0)                                  # 日 × 选中股票
+        last = hits.shape[0] - 1 - np.argmax(hits[::-1], axis=0)
+        result = pd.DataFrame({
+            'symbol': self.columns[selected],
+            'patterns': [[name for name, flag in zip(patterns, col) if flag] for col in seen[:, selected].T],
+            'last_date': self.index[start + last],
+            'count': windows[:, :, selected].sum(axis=(0, 1)),
+        })
+        return result.sort_values(['last_date', 'count'], ascending=False, kind='stable').reset_index(drop=True)
+
+    def latest(self, symbol: Optional[str] = None, as_of=None, patterns: Optional[Sequence[str]] = None) -> List[str]:
+        """某只股票（默认第一只）在最近一个交易日（截至 as_of）出现的形态，patterns 限定检查范围"""
+        if len(self.columns) == 0:
+            return []
+        col = 0 if symbol is None else self.columns.get_loc(symbol)
+        row = self._row(as_of)
+        if row < 0:
+            return []
+        return [name for name in (patterns or PATTERNS) if self.mask(name)[row, col]]
+
+    def events(self, patterns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """全部形态出现记录，列为 date, symbol, pattern"""
+        frames = []
+        for name in (patterns or PATTERNS):
+            rows, cols = np.nonzero(self.mask(name))
+            frames.append(pd.DataFrame({'date': self.index[rows], 'symbol': self.columns[cols], 'pattern': name}))
+        if not frames:
+            return pd.DataFrame(columns=['date', 'symbol', 'pattern'])
+        return pd.concat(frames, ignore_index=True).sort_values(['date', 'symbol'], kind='stable').reset_index(drop=True)
+
+    def event_returns(self, name: str, horizons: Optional[Sequence[int]] = None) -> pd.DataFrame:
+        """
+        形态信号回测：形态出现当日收盘买入、持有 h 个交易日的收益（%）统计
+
+        Returns:
+            索引为持有周期，列为 count, mean, median, win_rate,
+            baseline（全部股票-交易日的平均收益）, excess（mean - baseline）
+        """
+        if horizons is None:
+            from src.backtest.replay import DEFAULT_HORIZONS
+            horizons = DEFAULT_HORIZONS
+        mask = self.mask(name)
+        rows = []
+        for h in horizons:
+            fwd = np.full_like(self.close, np.nan)
+            if h < len(self.close):
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    fwd[:-h] = (self.close[h:] / self.close[:-h] - 1) * 100
+            valid = ~np.isnan(fwd)
+            sample = fwd[mask & valid]
+            baseline = float(fwd[valid].mean()) if valid.any() else np.nan
+            mean = float(sample.mean()) if len(sample) else np.nan
+            rows.append({
+                'horizon': h,
+                'count': len(sample),
+                'mean': mean,
+                'median': float(np.median(sample)) if len(sample) else np.nan,
+                'win_rate': float((sample > 0).mean() * 100) if len(sample) else np.nan,
+                'baseline': baseline,
+                'excess': mean - baseline,
+            })
+        return pd.DataFrame(rows).set_index('horizon')
@@ -0,0 +1,498 @@
+"""
+流式技术指标 - 每根新K线 O(1) 增量更新，状态可序列化落盘
+
+与 TechnicalIndicators 的批量计算保持一致（含缺失值处理）：
+EMA/MACD/KDJ 逐步复现 pandas ewm 递推，SMA/STD/最值按 rolling(window) 语义，
+在 window 内出现缺失值时输出 NaN
+"""
+import copy
+import json
+import math
+import os
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data.storage import cache_root
+
+NAN = float("nan")
+
+
+def _div(a: float, b: float) -> float:
+    """与 numpy 一致的除法：除零得到 inf / NaN 而不是抛异常"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(a) / np.float64(b))
+
+
+class StreamingEMA:
+    """
+    指数加权均值，与 pandas ewm(ignore_na=False) 的递推完全一致
+
+    支持 adjust=False（TechnicalIndicators.ema）与 adjust=True（pandas 默认）
+    """
+
+    def __init__(self, period: Optional[int] = None, alpha: Optional[float] = None,
+                 adjust: bool = False, min_periods: int = 0):
+        if alpha is None:
+            if not period:
+                raise ValueError("period 与 alpha 至少指定一个")
+            alpha = 2.0 / (period + 1)
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = max(int(min_periods), 1)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, x: float) -> float:
+        """输入一个新值，返回最新均值"""
+        x = float(x) if x is not None else NAN
+        observed = not math.isnan(x)
+        if math.isnan(self.weighted):
+            if observed:
+                self.weighted = x
+                self.nobs += 1
+        else:
+            self.old_wt *= 1.0 - self.alpha
+            if observed:
+                self.nobs += 1
+                new_wt = 1.0 if self.adjust else self.alpha
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + new_wt * x) / (self.old_wt + new_wt)
+                self.old_wt = self.old_wt + new_wt if self.adjust else 1.0
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "alpha": self.alpha, "adjust": self.adjust, "min_periods": self.min_periods,
+            "weighted": self.weighted, "old_wt": self.old_wt, "nobs": self.nobs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingEMA":
+        ema = cls(alpha=data["alpha"], adjust=data["adjust"], min_periods=data["min_periods"])
+        ema.weighted, ema.old_wt, ema.nobs = data["weighted"], data["old_wt"], data["nobs"]
+        return ema
+
+
+class StreamingWindow:
+    """
+    滚动窗口均值/标准差（SMA、布林带）
+
+    维护窗口内的平移累加和，每满一个窗口用原始值重算一次以抑制累积误差，
+    均摊后每根K线仍为 O(1)
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values: deque = deque(maxlen=period)
+        self.nan_count = 0
+        self._shift = NAN
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._since_resum = 0
+
+    def update(self, x: float) -> float:
+        """输入一个新值，返回最新均值"""
+        x = float(x) if x is not None else NAN
+        if len(self.values) == self.period:
+            self._remove(self.values[0])
+        self.values.append(x)
+        self._add(x)
+
+        self._since_resum += 1
+        if self._since_resum >= self.period:
+            self._resum()
+        return self.mean
+
+    def _add(self, x: float) -> None:
+        if math.isnan(x):
+            self.nan_count += 1
+            return
+        if math.isnan(self._shift):
+            self._shift = x
+        d = x - self._shift
+        self._sum += d
+        self._sumsq += d * d
+
+    def _remove(self, x: float) -> None:
+        if math.isnan(x):
+            self.nan_count -= 1
+            return
+        d = x - self._shift
+        self._sum -= d
+        self._sumsq -= d * d
+
+    def _resum(self) -> None:
+        valid = [v for v in self.values if not math.isnan(v)]
+        self._shift = valid[-1] if valid else NAN
+        self._sum = sum(v - self._shift for v in valid)
+        self._sumsq = sum((v - self._shift) ** 2 for v in valid)
+        self._since_resum = 0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.period and self.nan_count == 0
+
+    @property
+    def mean(self) -> float:
+        if not self.ready:
+            return NAN
+        return self._shift + self._sum / self.period
+
+    @property
+    def std(self) -> float:
+        """样本标准差（ddof=1，同 rolling().std()）"""
+        if not self.ready or self.period < 2:
+            return NAN
+        var = (self._sumsq - self._sum * self._sum / self.period) / (self.period - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"period": self.period, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingWindow":
+        window = cls(data["period"])
+        for v in data["values"]:
+            window.values.append(float(v))
+            window._add(float(v))
+        window._resum()
+        return window
+
+
+class StreamingExtreme:
+    """滚动最小值/最大值，单调队列实现"""
+
+    def __init__(self, period: int, mode: str = "min"):
+        if mode not in ("min", "max"):
+            raise ValueError(f"mode 必须为 min 或 max: {mode}")
+        self.period = period
+        self.mode = mode
+        self.count = 0
+        self.queue: deque = deque()  # (序号, 值)，值单调
+        self.nan_at: deque = deque()  # 窗口内缺失值的序号
+
+    def _dominated(self, old: float, new: float) -> bool:
+        return old >= new if self.mode == "min" else old <= new
+
+    def update(self, x: float) -> float:
+        """输入一个新值，返回窗口极值"""
+        x = float(x) if x is not None else NAN
+        i = self.count
+        self.count += 1
+
+        if math.isnan(x):
+            self.nan_at.append(i)
+        else:
+            while self.queue and self._dominated(self.queue[-1][1], x):
+                self.queue.pop()
+            self.queue.append((i, x))
+
+        expired = i - self.period
+        while self.queue and self.queue[0][0] <= expired:
+            self.queue.popleft()
+        while self.nan_at and self.nan_at[0] <= expired:
+            self.nan_at.popleft()
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.count < self.period or self.nan_at or not self.queue:
+            return NAN
+        return self.queue[0][1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "period": self.period, "mode": self.mode, "count": self.count,
+            "queue": [list(item) for item in self.queue], "nan_at": list(self.nan_at),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingExtreme":
+        extreme = cls(data["period"], data["mode"])
+        extreme.count = data["count"]
+        extreme.queue = deque((int(i), float(v)) for i, v in data["queue"])
+        extreme.nan_at = deque(int(i) for i in data["nan_at"])
+        return extreme
+
+
+class StreamingMACD:
+    """MACD，同 TechnicalIndicators.macd"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.macd = NAN
+
+    def update(self, x: float) -> Dict[str, float]:
+        self.macd = self.fast.update(x) - self.slow.update(x)
+        self.signal.update(self.macd)
+        return self.value
+
+    @property
+    def value(self) -> Dict[str, float]:
+        signal = self.signal.value
+        return {"macd": self.macd, "signal": signal, "histogram": self.macd - signal}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fast": self.fast.to_dict(), "slow": self.slow.to_dict(),
+            "signal": self.signal.to_dict(), "macd": self.macd,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingMACD":
+        macd = cls.__new__(cls)
+        macd.fast = StreamingEMA.from_dict(data["fast"])
+        macd.slow = StreamingEMA.from_dict(data["slow"])
+        macd.signal = StreamingEMA.from_dict(data["signal"])
+        macd.macd = data["macd"]
+        return macd
+
+
+class StreamingRSI:
+    """RSI，同 TechnicalIndicators.rsi（method 为 "sma" 或 "wilder"）"""
+
+    def __init__(self, period: int = 14, method: str = "sma"):
+        if method not in ("sma", "wilder"):
+            raise ValueError(f"不支持的RSI算法: {method}")
+        self.period = period
+        self.method = method
+        self.prev = NAN
+        if method == "wilder":
+            self.gain = StreamingEMA(alpha=1.0 / period, min_periods=period)
+            self.loss = StreamingEMA(alpha=1.0 / period, min_periods=period)
+        else:
+            self.gain = StreamingWindow(period)
+            self.loss = StreamingWindow(period)
+
+    def update(self, x: float) -> float:
+        x = float(x) if x is not None else NAN
+        delta = x - self.prev
+        self.prev = x
+        # 与 Series.where 一致：缺失的涨跌视为0
+        self.gain.update(delta if delta > 0 else 0.0)
+        self.loss.update(-delta if delta < 0 else 0.0)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        gain = self.gain.value if self.method == "wilder" else self.gain.mean
+        loss = self.loss.value if self.method == "wilder" else self.loss.mean
+        return 100 - _div(100, 1 + _div(gain, loss))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "period": self.period, "method": self.method, "prev": self.prev,
+            "gain": self.gain.to_dict(), "loss": self.loss.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingRSI":
+        rsi = cls(data["period"], data["method"])
+        state = StreamingEMA if rsi.method == "wilder" else StreamingWindow
+        rsi.prev = data["prev"]
+        rsi.gain = state.from_dict(data["gain"])
+        rsi.loss = state.from_dict(data["loss"])
+        return rsi
+
+
+class StreamingBollinger:
+    """布林带，同 TechnicalIndicators.bollinger_bands"""
+
+    def __init__(self, period: int = 20, std: int = 2):
+        self.window = StreamingWindow(period)
+        self.width = std
+
+    def update(self, x: float) -> Dict[str, float]:
+        self.window.update(x)
+        return self.value
+
+    @property
+    def value(self) -> Dict[str, float]:
+        middle, band = self.window.mean, self.window.std
+        return {"upper": middle + band * self.width, "middle": middle, "lower": middle - band * self.width}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"window": self.window.to_dict(), "std": self.width}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingBollinger":
+        boll = cls(data["window"]["period"], data["std"])
+        boll.window = StreamingWindow.from_dict(data["window"])
+        return boll
+
+
+class StreamingKDJ:
+    """KDJ，同 TechnicalIndicators.kdj"""
+
+    def __init__(self, n: int = 9, m1: int = 3, m2: int = 3):
+        self.n, self.m1, self.m2 = n, m1, m2
+        self.lowest = StreamingExtreme(n, "min")
+        self.highest = StreamingExtreme(n, "max")
+        self.k = StreamingEMA(alpha=1.0 / m1)
+        self.d = StreamingEMA(alpha=1.0 / m2)
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        lowest_low = self.lowest.update(low)
+        highest_high = self.highest.update(high)
+        rsv = _div(float(close) - lowest_low, highest_high - lowest_low) * 100
+        self.d.update(self.k.update(rsv))
+        return self.value
+
+    @property
+    def value(self) -> Dict[str, float]:
+        k, d = self.k.value, self.d.value
+        return {"k": k, "d": d, "j": 3 * k - 2 * d}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n": self.n, "m1": self.m1, "m2": self.m2,
+            "lowest": self.lowest.to_dict(), "highest": self.highest.to_dict(),
+            "k": self.k.to_dict(), "d": self.d.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingKDJ":
+        kdj = cls(data["n"], data["m1"], data["m2"])
+        kdj.lowest = StreamingExtreme.from_dict(data["lowest"])
+        kdj.highest = StreamingExtreme.from_dict(data["highest"])
+        kdj.k = StreamingEMA.from_dict(data["k"])
+        kdj.d = StreamingEMA.from_dict(data["d"])
+        return kdj
+
+
+class IndicatorState:
+    """
+    单只股票的全部流式指标
+
+    输出键名与 PanelIndicators.compute_all 一致；未提供最高/最低价时按收盘价计算KDJ
+    """
+
+    def __init__(self, symbol: str = "", sma_periods: Sequence[int] = (5, 10, 20, 60),
+                 rsi_method: str = "sma"):
+        self.symbol = symbol
+        self.last_date: Optional[str] = None
+        self.bars = 0
+        self.sma = {p: StreamingWindow(p) for p in sma_periods}
+        self.macd = StreamingMACD()
+        self.rsi = StreamingRSI(method=rsi_method)
+        self.boll = StreamingBollinger()
+        self.kdj = StreamingKDJ()
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None,
+               date: Optional[str] = None) -> Dict[str, float]:
+        """
+        追加一根已定型的K线
+
+        Returns:
+            最新指标值
+        """
+        for window in self.sma.values():
+            window.update(close)
+        self.macd.update(close)
+        self.rsi.update(close)
+        self.boll.update(close)
+        self.kdj.update(close if high is None else high, close if low is None else low, close)
+        self.bars += 1
+        if date is not None:
+            self.last_date = str(date)
+        return self.values()
+
+    def preview(self, close: float, high: Optional[float] = None, low: Optional[float] = None) -> Dict[str, float]:
+        """
+        用盘中未定型的K线试算指标，不改变状态
+
+        复制成本只与窗口长度有关，与历史长度无关
+        """
+        return copy.deepcopy(self).update(close, high, low)
+
+    def values(self) -> Dict[str, float]:
+        """当前指标值"""
+        macd, boll, kdj = self.macd.value, self.boll.value, self.kdj.value
+        result = {f"sma{p}": window.mean for p, window in self.sma.items()}
+        result.update({
+            "ema12": self.macd.fast.value,
+            "ema26": self.macd.slow.value,
+            "macd": macd["macd"],
+            "macd_signal": macd["signal"],
+            "macd_hist": macd["histogram"],
+            "rsi": self.rsi.value,
+            "boll_upper": boll["upper"],
+            "boll_middle": boll["middle"],
+            "boll_lower": boll["lower"],
+            "kdj_k": kdj["k"],
+            "kdj_d": kdj["d"],
+            "kdj_j": kdj["j"],
+        })
+        return result
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, symbol: str = "", **kwargs) -> "IndicatorState":
+        """
+        用历史日线初始化状态（PriceStore 的标准列：date/close/high/low）
+        """
+        state = cls(symbol, **kwargs)
+        highs = df['high'] if 'high' in df.columns else df['close']
+        lows = df['low'] if 'low' in df.columns else df['close']
+        dates = df['date'] if 'date' in df.columns else [None] * len(df)
+        for close, high, low, date in zip(df['close'], highs, lows, dates):
+            state.update(close, high, low, date)
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "last_date": self.last_date,
+            "bars": self.bars,
+            "sma": {str(p): window.to_dict() for p, window in self.sma.items()},
+            "macd": self.macd.to_dict(),
+            "rsi": self.rsi.to_dict(),
+            "boll": self.boll.to_dict(),
+            "kdj": self.kdj.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndicatorState":
+        state = cls(data["symbol"], sma_periods=())
+        state.last_date = data["last_date"]
+        state.bars = data["bars"]
+        state.sma = {int(p): StreamingWindow.from_dict(w) for p, w in data["sma"].items()}
+        state.macd = StreamingMACD.from_dict(data["macd"])
+        state.rsi = StreamingRSI.from_dict(data["rsi"])
+        state.boll = StreamingBollinger.from_dict(data["boll"])
+        state.kdj = StreamingKDJ.from_dict(data["kdj"])
+        return state
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        """原子写入JSON，默认 <缓存目录>/indicator_state/<代码>.json"""
+        path = Path(path) if path else state_path(self.symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IndicatorState"]:
+        """读取状态，文件不存在时返回 None"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def state_path(symbol: str) -> Path:
+    """某只股票指标状态的默认保存路径"""
+    return cache_root() / "indicator_state" / f"{symbol}.json"
@@ -3,11 +3,11 @@
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Union
 
 
 class TechnicalIndicators:
-    """技术指标计算类"""
+    """技术指标计算类（单只股票的Series；多股票面板见 PanelIndicators）"""
     
     @staticmethod
     def sma(data: pd.Series, period: int) -> pd.Series:
@@ -35,11 +35,22 @@ class TechnicalIndicators:
         }
     
     @staticmethod
-    def rsi(data: pd.Series, period: int = 14) -> pd.Series:
-        """RSI指标"""
+    def rsi(data: pd.Series, period: int = 14, method: str = "sma") -> pd.Series:
+        """
+        RSI指标
+
+        Args:
+            method: "sma" 涨跌幅简单平均；"wilder" Wilder平滑（alpha=1/period）
+        """
         delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        gain = delta.where(delta > 0, 0)
+        loss = -delta.where(delta < 0, 0)
+        if method == "wilder":
+            gain = gain.ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
+            loss = loss.ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
+        else:
+            gain = gain.rolling(window=period).mean()
+            loss = loss.rolling(window=period).mean()
         rs = gain / loss
         return 100 - (100 / (1 + rs))
     
@@ -70,3 +81,195 @@ class TechnicalIndicators:
         j = 3 * k - 2 * d
         
         return {"k": k, "d": d, "j": j}
+
+
+Matrix = Union[pd.DataFrame, np.ndarray]
+
+
+class PanelIndicators:
+    """
+    多股票面板指标计算
+
+    输入为 (日期 × 股票) 矩阵（DataFrame 或 ndarray），一次向量化计算整个股票池，
+    结果与 TechnicalIndicators 的单序列版本一致（含缺失值处理），
+    DataFrame 输入返回同索引同列的 DataFrame，ndarray 输入返回 ndarray
+    """
+
+    @staticmethod
+    def _values(data: Matrix) -> np.ndarray:
+        values = data.to_numpy(dtype=float) if isinstance(data, pd.DataFrame) else np.asarray(data, dtype=float)
+        return values.reshape(-1, 1) if values.ndim == 1 else values
+
+    @staticmethod
+    def _wrap(values: np.ndarray, like: Matrix) -> Matrix:
+        if isinstance(like, pd.DataFrame):
+            return pd.DataFrame(values, index=like.index, columns=like.columns)
+        return values
+
+    @staticmethod
+    def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+        """滚动均值，窗口内有缺失值时为 NaN（同 rolling(window).mean()）"""
+        out = np.full_like(x, np.nan)
+        if window > len(x):
+            return out
+        missing = np.isnan(x)
+        sums = np.cumsum(np.where(missing, 0.0, x), axis=0)
+        counts = np.cumsum(missing, axis=0)
+        window_sum = sums[window - 1:].copy()
+        window_sum[1:] -= sums[:-window]
+        window_missing = counts[window - 1:].copy()
+        window_missing[1:] -= counts[:-window]
+        out[window - 1:] = np.where(window_missing == 0, window_sum / window, np.nan)
+        return out
+
+    @staticmethod
+    def _rolling_reduce(x: np.ndarray, window: int, func: str, **kwargs) -> np.ndarray:
+        """滚动 std / min / max，窗口内有缺失值时为 NaN"""
+        out = np.full_like(x, np.nan)
+        if window > len(x):
+            return out
+        windows = np.lib.stride_tricks.sliding_window_view(x, window, axis=0)
+        out[window - 1:] = getattr(windows, func)(axis=-1, **kwargs)
+        return out
+
+    @staticmethod
+    def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+        """
+        指数加权均值，逐日递推、跨股票向量化
+
+        与 pandas ewm(adjust=False, ignore_na=False) 的递推完全一致
+        """
+        out = np.empty_like(x)
+        if len(x) == 0:
+            return out
+        weighted = x[0].copy()
+        old_wt = np.ones(x.shape[1])
+        out[0] = weighted
+        decay = 1.0 - alpha
+        for t in range(1, len(x)):
+            cur = x[t]
+            observed = ~np.isnan(cur)
+            started = ~np.isnan(weighted)
+            old_wt = np.where(started, old_wt * decay, old_wt)
+            update = started & observed & (weighted != cur)
+            blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+            weighted = np.where(update, blended, weighted)
+            old_wt = np.where(started & observed, 1.0, old_wt)
+            weighted = np.where(~started & observed, cur, weighted)
+            out[t] = weighted
+        return out
+
+    @staticmethod
+    def sma(data: Matrix, period: int) -> Matrix:
+        """简单移动平均"""
+        return PanelIndicators._wrap(PanelIndicators._rolling_mean(PanelIndicators._values(data), period), data)
+
+    @staticmethod
+    def ema(data: Matrix, period: int) -> Matrix:
+        """指数移动平均"""
+        return PanelIndicators._wrap(PanelIndicators._ewm(PanelIndicators._values(data), 2.0 / (period + 1)), data)
+
+    @staticmethod
+    def macd(data: Matrix, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict:
+        """MACD指标"""
+        x = PanelIndicators._values(data)
+        macd_line = PanelIndicators._ewm(x, 2.0 / (fast + 1)) - PanelIndicators._ewm(x, 2.0 / (slow + 1))
+        signal_line = PanelIndicators._ewm(macd_line, 2.0 / (signal + 1))
+        return {
+            "macd": PanelIndicators._wrap(macd_line, data),
+            "signal": PanelIndicators._wrap(signal_line, data),
+            "histogram": PanelIndicators._wrap(macd_line - signal_line, data)
+        }
+
+    @staticmethod
+    def rsi(data: Matrix, period: int = 14, method: str = "sma") -> Matrix:
+        """RSI指标，method 同 TechnicalIndicators.rsi"""
+        x = PanelIndicators._values(data)
+        delta = np.full_like(x, np.nan)
+        delta[1:] = x[1:] - x[:-1]
+        # 与 Series.where 一致：缺失的涨跌视为0
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        if method == "wilder":
+            gain = PanelIndicators._ewm(gain, 1.0 / period)
+            loss = PanelIndicators._ewm(loss, 1.0 / period)
+            gain[:period - 1] = np.nan
+            loss[:period - 1] = np.nan
+        else:
+            gain = PanelIndicators._rolling_mean(gain, period)
+            loss = PanelIndicators._rolling_mean(loss, period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = gain / loss
+            values = 100 - (100 / (1 + rs))
+        return PanelIndicators._wrap(values, data)
+
+    @staticmethod
+    def bollinger_bands(data: Matrix, period: int = 20, std: int = 2) -> Dict:
+        """布林带"""
+        x = PanelIndicators._values(data)
+        middle = PanelIndicators._rolling_mean(x, period)
+        band_std = PanelIndicators._rolling_reduce(x, period, "std", ddof=1)
+        return {
+            "upper": PanelIndicators._wrap(middle + band_std * std, data),
+            "middle": PanelIndicators._wrap(middle, data),
+            "lower": PanelIndicators._wrap(middle - band_std * std, data)
+        }
+
+    @staticmethod
+    def kdj(high: Matrix, low: Matrix, close: Matrix,
+            n: int = 9, m1: int = 3, m2: int = 3) -> Dict:
+        """KDJ指标"""
+        lowest_low = PanelIndicators._rolling_reduce(PanelIndicators._values(low), n, "min")
+        highest_high = PanelIndicators._rolling_reduce(PanelIndicators._values(high), n, "max")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsv = (PanelIndicators._values(close) - lowest_low) / (highest_high - lowest_low) * 100
+        k = PanelIndicators._ewm(rsv, 1.0 / m1)
+        d = PanelIndicators._ewm(k, 1.0 / m2)
+        return {
+            "k": PanelIndicators._wrap(k, close),
+            "d": PanelIndicators._wrap(d, close),
+            "j": PanelIndicators._wrap(3 * k - 2 * d, close)
+        }
+
+    @staticmethod
+    def compute_all(
+        close: Matrix,
+        high: Optional[Matrix] = None,
+        low: Optional[Matrix] = None,
+        sma_periods: Sequence[int] = (5, 10, 20, 60)
+    ) -> Dict[str, Matrix]:
+        """
+        一次计算全部指标
+
+        Args:
+            close: 收盘价矩阵 (日期 × 股票)
+            high: 最高价矩阵，缺省时不计算KDJ
+            low: 最低价矩阵，缺省时不计算KDJ
+            sma_periods: 均线周期
+
+        Returns:
+            指标名 -> 与输入对齐的矩阵
+        """
+        result = {f"sma{p}": PanelIndicators.sma(close, p) for p in sma_periods}
+        result["ema12"] = PanelIndicators.ema(close, 12)
+        result["ema26"] = PanelIndicators.ema(close, 26)
+
+        macd = PanelIndicators.macd(close)
+        result["macd"] = macd["macd"]
+        result["macd_signal"] = macd["signal"]
+        result["macd_hist"] = macd["histogram"]
+
+        result["rsi"] = PanelIndicators.rsi(close)
+
+        boll = PanelIndicators.bollinger_bands(close)
+        result["boll_upper"] = boll["upper"]
+        result["boll_middle"] = boll["middle"]
+        result["boll_lower"] = boll["lower"]
+
+        if high is not None and low is not None:
+            kdj = PanelIndicators.kdj(high, low, close)
+            result["kdj_k"] = kdj["k"]
+            result["kdj_d"] = kdj["d"]
+            result["kdj_j"] = kdj["j"]
+
+        return result
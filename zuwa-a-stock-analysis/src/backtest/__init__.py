@@ -0,0 +1,18 @@
+"""
+祖蛙系统 - 回测模块
+"""
+from src.utils.lazy import lazy_exports
+
+_EXPORTS = {
+    **dict.fromkeys(["BacktestEngine", "composite_scores", "ratings", "summarize"], "src.backtest.engine"),
+    **dict.fromkeys(["WeightOptimizer", "write_config"], "src.backtest.optimizer"),
+    **dict.fromkeys(["register_replay", "replay_symbol"], "src.backtest.replay"),
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = [
+    "BacktestEngine", "composite_scores", "ratings", "summarize",
+    "WeightOptimizer", "write_config",
+    "register_replay", "replay_symbol"
+]
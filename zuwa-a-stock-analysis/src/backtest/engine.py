@@ -0,0 +1,270 @@
+"""
+逐日滚动回测引擎 - 检验首席分析师综合评分与评级的预测能力
+
+1. 多进程读取本地价格库，按股票回放规则Agent，得到每只股票每个交易日的Agent评分
+2. 按首席分析师的权重与阈值向量化计算综合评分和评级
+3. 按评级统计前瞻收益（均值、中位数、胜率、相对当日全市场均值的超额收益）
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.agents.chief_agent import ChiefAnalystAgent
+from src.backtest.replay import AGENT_REPLAYS, DEFAULT_HORIZONS, replay_coverage, replay_symbol
+from src.data.price_store import PriceStore, get_price_store
+from src.data.storage import cache_root, read_frame, write_frame
+
+# 首席分析师对散户情绪（反向指标）的固定权重
+RETAIL_SENTIMENT_WEIGHT = 0.05
+
+# 评级（从高到低）
+RATINGS = ["STRONG_BUY", "BUY", "HOLD", "SELL", "STRONG_SELL"]
+
+# 评级 -> 中文名称（同 ChiefAnalystAgent._determine_rating）
+RATING_LABELS = {
+    "STRONG_BUY": "强烈推荐",
+    "BUY": "推荐买入",
+    "HOLD": "中性持有",
+    "SELL": "建议卖出",
+    "STRONG_SELL": "强烈卖出",
+}
+
+# 每个子进程任务回放的股票数
+DEFAULT_CHUNK_SIZE = 50
+
+
+def composite_scores(scores: pd.DataFrame, weights: Dict[str, float]) -> np.ndarray:
+    """
+    向量化的 ChiefAnalystAgent._calculate_composite_score
+
+    只对有评分（非 NaN）的Agent按权重加权平均；没有任何评分时为 50
+
+    Args:
+        scores: 每行一个股票日，列为Agent键
+        weights: Agent键 -> 权重
+    """
+    weights = {k: w for k, w in weights.items() if k in scores.columns}
+    if "retail_sentiment" in scores.columns:
+        weights["retail_sentiment"] = weights.get("retail_sentiment", 0) + RETAIL_SENTIMENT_WEIGHT
+    if not weights:
+        return np.full(len(scores), 50.0)
+
+    values = scores[list(weights)].to_numpy(dtype=float)
+    w = np.array(list(weights.values()), dtype=float)
+    present = ~np.isnan(values)
+    weighted = np.where(present, values, 0.0) @ w
+    total = present @ w
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, weighted / total, 50.0)
+
+
+def ratings(composite: np.ndarray, thresholds: Dict[str, float]) -> np.ndarray:
+    """向量化的 ChiefAnalystAgent._determine_rating，返回评级信号数组"""
+    composite = np.asarray(composite, dtype=float)
+    conditions = [composite >= thresholds[k] for k in ("strong_buy", "buy", "hold", "sell")]
+    return np.select(conditions, RATINGS[:4], default=RATINGS[4])
+
+
+def summarize(frame: pd.DataFrame, horizons: Sequence[int] = DEFAULT_HORIZONS, by_year: bool = False) -> pd.DataFrame:
+    """
+    按评级统计前瞻收益
+
+    Args:
+        frame: BacktestEngine.score 的返回值
+        horizons: 前瞻周期（交易日）
+        by_year: 是否再按年份分组（观察各年份是否稳定）
+
+    Returns:
+        每个评级一行：count、share（占比%）与各周期的 mean/median/hit（收益>0 的比例%）/excess
+    """
+    if frame.empty:
+        return pd.DataFrame()
+
+    data = {"rating": frame["rating"]}
+    for h in horizons:
+        col = f"fwd_{h}d"
+        data[col] = frame[col]
+        data[f"{col}_excess"] = frame[col] - frame.groupby("date")[col].transform("mean")
+        data[f"{col}_hit"] = (frame[col] > 0).astype(float).where(frame[col].notna()) * 100
+    keys = ["rating"]
+    if by_year:
+        data["year"] = frame["date"].str[:4]
+        keys = ["year", "rating"]
+    grouped = pd.DataFrame(data).groupby(keys, observed=True)
+
+    stats = {"count": grouped.size()}
+    for h in horizons:
+        col = f"fwd_{h}d"
+        stats[f"mean_{h}d"] = grouped[col].mean()
+        stats[f"median_{h}d"] = grouped[col].median()
+        stats[f"hit_{h}d"] = grouped[f"{col}_hit"].mean()
+        stats[f"excess_{h}d"] = grouped[f"{col}_excess"].mean()
+    summary = pd.DataFrame(stats)
+    totals = summary["count"].groupby(level="year").transform("sum") if by_year else len(frame)
+    summary.insert(1, "share", summary["count"] / totals * 100)
+
+    # 评级按从高到低排列
+    order = {r: i for i, r in enumerate(RATINGS)}
+    return summary.sort_index(key=lambda idx: idx.map(order) if idx.name == "rating" else idx).round(3)
+
+
+def _replay_chunk(
+    root: str,
+    symbols: List[str],
+    start: Optional[str],
+    end: Optional[str],
+    horizons: Sequence[int]
+) -> pd.DataFrame:
+    """子进程任务：从本地价格库读取一批股票并回放（不访问网络）"""
+    store = PriceStore(Path(root))
+    frames = [replay_symbol(s, store.load(s), start, end, horizons) for s in symbols]
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+class BacktestEngine:
+    """
+    首席分析师评分回测
+
+    回放的Agent见 AGENT_REPLAYS（部分回放的见 PARTIAL_REPLAYS）；缺少历史数据、无法回放的Agent
+    不参与加权，与首席分析师对缺失Agent的处理一致
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        horizons: Sequence[int] = DEFAULT_HORIZONS,
+        store: Optional[PriceStore] = None,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        """
+        Args:
+            weights: Agent权重，默认同 ChiefAnalystAgent
+            thresholds: 评级阈值，默认同 ChiefAnalystAgent
+            horizons: 前瞻收益周期（交易日）
+            store: 价格库，默认全局价格库
+            workers: 进程数，默认CPU核数；1 时在当前进程内执行
+            chunk_size: 每个进程任务的股票数
+        """
+        chief = ChiefAnalystAgent({k: v for k, v in (("weights", weights), ("thresholds", thresholds)) if v})
+        self.weights = dict(chief.weights)
+        self.thresholds = dict(chief.thresholds)
+        self.horizons = tuple(horizons)
+        self.store = store or get_price_store()
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.timing: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> "BacktestEngine":
+        """使用 agents.yaml 的 weights / thresholds 创建"""
+        return cls(config.get("weights"), config.get("thresholds"), **kwargs)
+
+    def replay(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        回放股票池内全部股票日的Agent评分与前瞻收益
+
+        Args:
+            symbols: 股票池，默认价格库中的全部股票
+            start: 起始日期 YYYY-MM-DD（之前的K线只用于指标预热）
+            end: 结束日期 YYYY-MM-DD
+
+        Returns:
+            列为 date、code、各Agent评分、fwd_{h}d 的DataFrame，按 (date, code) 排序
+        """
+        started = time.perf_counter()
+        symbols = list(symbols) if symbols is not None else self.store.symbols()
+        chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+        root = str(self.store.root)
+
+        if self.workers <= 1 or len(chunks) <= 1:
+            frames = [_replay_chunk(root, chunk, start, end, self.horizons) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+                futures = [pool.submit(_replay_chunk, root, chunk, start, end, self.horizons) for chunk in chunks]
+                frames = [f.result() for f in futures]
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            frame = pd.DataFrame(columns=["date", "code", *AGENT_REPLAYS, *(f"fwd_{h}d" for h in self.horizons)])
+        else:
+            frame = pd.concat(frames, ignore_index=True).sort_values(["date", "code"], kind="stable")
+        self.timing["replay"] = time.perf_counter() - started
+        return frame.reset_index(drop=True)
+
+    def _cache_key(self, symbols: Sequence[str], start: Optional[str], end: Optional[str]) -> str:
+        """回放结果的缓存键：股票池、价格文件修改时间、日期区间、前瞻周期与回放的Agent"""
+        wanted = set(symbols)
+        versions = sorted(
+            (p.name, p.stat().st_mtime_ns) for p in self.store.root.iterdir()
+            if p.name.split('.')[0] in wanted and not p.name.endswith('.tmp')
+        ) if self.store.root.exists() else []
+        payload = json.dumps([versions, start, end, self.horizons, sorted(AGENT_REPLAYS)])
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    def cached_replay(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        同 replay，结果按缓存键落盘；价格库与参数不变时直接读取，
+        供权重寻优等需要反复使用Agent评分的场景
+        """
+        symbols = list(symbols) if symbols is not None else self.store.symbols()
+        path = cache_root() / "backtest" / f"scores_{self._cache_key(symbols, start, end)}"
+        frame = read_frame(path)
+        if not frame.empty:
+            return frame
+
+        frame = self.replay(symbols, start, end)
+        if not frame.empty:
+            write_frame(frame, path)
+        return frame
+
+    def score(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """追加综合评分 composite 与评级 rating 列（不修改输入）"""
+        composite = composite_scores(frame, self.weights)
+        return frame.assign(composite=composite, rating=ratings(composite, self.thresholds))
+
+    def run(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        by_year: bool = False
+    ) -> Dict[str, Any]:
+        """
+        回放 + 评分 + 统计
+
+        Returns:
+            {"frame": 股票日明细, "summary": 按评级统计, "symbols", "rows", "timing",
+             "coverage": 参与回放与未回放的Agent（见 replay_coverage）}
+        """
+        frame = self.score(self.replay(symbols, start, end))
+        started = time.perf_counter()
+        summary = summarize(frame, self.horizons, by_year)
+        self.timing["summary"] = time.perf_counter() - started
+        return {
+            "frame": frame,
+            "summary": summary,
+            "symbols": int(frame["code"].nunique()) if not frame.empty else 0,
+            "rows": len(frame),
+            "timing": dict(self.timing),
+            "coverage": replay_coverage(self.weights),
+        }
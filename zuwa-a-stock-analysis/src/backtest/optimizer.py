@@ -0,0 +1,427 @@
+"""
+首席分析师权重与阈值寻优 - 在缓存的Agent评分上做随机/网格搜索
+
+Agent评分只回放一次（BacktestEngine.cached_replay），每组权重的综合评分是一次矩阵乘法，
+同一组权重下的各阈值组合共用综合评分；候选按权重分批交给进程池评估
+
+评估口径（前瞻 horizon 日收益）：
+- 多头 = 综合评分 >= buy（推荐买入及以上），空头 = 综合评分 < hold（建议卖出及以下）
+- 每日组合收益 = 多头均值 - 空头均值（无空头时减当日全市场均值，无多头时空仓为 0）
+- 夏普 = 日均收益 / 标准差 × sqrt(252 / horizon)；胜率 = 方向正确的股票日占比（%）
+- 交易日按时间顺序等分为若干段，逐段滚动：只用之前各段的表现挑选候选，在下一段上检验
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.agents.chief_agent import ChiefAnalystAgent
+from src.backtest.engine import RETAIL_SENTIMENT_WEIGHT
+
+# 阈值搜索网格
+DEFAULT_BUY_GRID = (50.0, 55.0, 60.0, 65.0, 70.0, 75.0)
+DEFAULT_HOLD_GRID = (25.0, 30.0, 35.0, 40.0, 45.0)
+
+# 候选至少需要覆盖的股票日比例，避免极少数样本的偶然高夏普
+DEFAULT_MIN_COVERAGE = 0.01
+
+# 进程内共享的评估数据（由 _init_worker 设置）
+_DATA: Dict[str, Any] = {}
+
+
+def random_weights(agents: Sequence[str], n: int, seed: int = 0) -> np.ndarray:
+    """在单纯形上均匀采样 n 组权重（Dirichlet(1)），返回 n × Agent数 的矩阵"""
+    rng = np.random.default_rng(seed)
+    return np.round(rng.dirichlet(np.ones(len(agents)), n), 3)
+
+
+def grid_weights(agents: Sequence[str], step: float = 0.1) -> np.ndarray:
+    """单纯形上步长为 step 的全部权重组合（各权重之和为 1）"""
+    units = int(round(1 / step))
+
+    def compositions(total: int, parts: int):
+        if parts == 1:
+            yield (total,)
+            return
+        for first in range(total + 1):
+            for rest in compositions(total - first, parts - 1):
+                yield (first,) + rest
+
+    return np.array(list(compositions(units, len(agents))), dtype=float) / units
+
+
+def threshold_pairs(
+    buy_grid: Sequence[float] = DEFAULT_BUY_GRID,
+    hold_grid: Sequence[float] = DEFAULT_HOLD_GRID
+) -> List[Tuple[float, float]]:
+    """(buy, hold) 阈值组合，要求 hold < buy"""
+    return [(b, h) for b in buy_grid for h in hold_grid if h < b]
+
+
+def walk_forward_folds(dates: np.ndarray, folds: int) -> np.ndarray:
+    """把升序交易日按时间顺序等分为 folds 段，返回每个交易日所属段号"""
+    return np.minimum(np.arange(len(dates)) * folds // max(len(dates), 1), folds - 1)
+
+
+def _init_worker(data: Dict[str, Any]) -> None:
+    _DATA.clear()
+    _DATA.update(data)
+
+
+def _evaluate_chunk(weights: np.ndarray, pairs: List[Tuple[float, float]]) -> np.ndarray:
+    """
+    评估一批权重 × 全部阈值组合
+
+    多头只取决于 buy、空头只取决于 hold：每组权重先按各阈值汇总出逐日的持仓数、收益和与
+    方向正确数，再在交易日粒度上组合出各 (buy, hold) 的结果
+
+    Returns:
+        形状 (权重数, 阈值组合数, 3, 段数)：[夏普, 胜率, 覆盖率] × 各段
+    """
+    values, present = _DATA["values"], _DATA["present"]
+    date_idx, fwd, fold_of_date = _DATA["date_idx"], _DATA["fwd"], _DATA["fold_of_date"]
+    n_dates, folds, annual = len(fold_of_date), _DATA["folds"], _DATA["annual"]
+    market = _DATA["market_mean"]
+    up, down = fwd > 0, fwd < 0
+    days = np.bincount(fold_of_date, minlength=folds)
+    fold_rows = np.bincount(fold_of_date[date_idx], minlength=folds)
+
+    def daily(mask: np.ndarray, correct: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """逐日的 持仓数、收益和、方向正确数"""
+        return (np.bincount(date_idx, weights=mask, minlength=n_dates),
+                np.bincount(date_idx, weights=np.where(mask, fwd, 0.0), minlength=n_dates),
+                np.bincount(date_idx, weights=mask & correct, minlength=n_dates))
+
+    by_fold = lambda per_date: np.bincount(fold_of_date, weights=per_date, minlength=folds)
+
+    result = np.full((len(weights), len(pairs), 3, folds), np.nan)
+    for i, w in enumerate(weights):
+        # 综合评分：只对有评分的Agent加权（同 ChiefAnalystAgent._calculate_composite_score）
+        weight_sum = present @ w
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = np.where(weight_sum > 0, (values @ w) / weight_sum, 50.0)
+        longs = {b: daily(score >= b, up) for b in {b for b, _ in pairs}}
+        shorts = {h: daily(score < h, down) for h in {h for _, h in pairs}}
+
+        for j, (buy, hold) in enumerate(pairs):
+            (n_long, sum_long, hit_long), (n_short, sum_short, hit_short) = longs[buy], shorts[hold]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                short_mean = np.where(n_short > 0, sum_short / n_short, market)
+                ret = np.where(n_long > 0, sum_long / n_long - short_mean, 0.0)
+                mean = by_fold(ret) / days
+                std = np.sqrt(np.maximum(by_fold(ret ** 2) / days - mean ** 2, 0) * days / np.maximum(days - 1, 1))
+                positions = by_fold(n_long + n_short)
+                result[i, j, 0] = np.where(std > 0, mean / std * annual, 0.0)
+                result[i, j, 1] = np.where(positions > 0, by_fold(hit_long + hit_short) / positions * 100, np.nan)
+                result[i, j, 2] = positions / fold_rows
+    return result
+
+
+class WeightOptimizer:
+    """
+    首席分析师权重与阈值寻优
+
+    输入 BacktestEngine.cached_replay 的Agent评分明细，只有其中出现的Agent参与寻优
+    """
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        weights: Optional[Dict[str, float]] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        horizon: int = 5,
+        folds: int = 5,
+        workers: Optional[int] = None,
+        objective: str = "sharpe",
+        min_coverage: float = DEFAULT_MIN_COVERAGE
+    ):
+        """
+        Args:
+            frame: Agent评分明细（列 date、各Agent评分、fwd_{horizon}d）
+            weights: 当前权重，默认同 ChiefAnalystAgent（作为对照候选，并保留未参与寻优的Agent权重）
+            thresholds: 当前阈值，默认同 ChiefAnalystAgent
+            horizon: 前瞻收益周期（交易日）
+            folds: 滚动检验的分段数
+            workers: 进程数，默认CPU核数；1 时在当前进程内执行
+            objective: 挑选候选的指标，"sharpe" 或 "hit"
+            min_coverage: 候选在每段至少覆盖的股票日比例
+        """
+        chief = ChiefAnalystAgent({k: v for k, v in (("weights", weights), ("thresholds", thresholds)) if v})
+        self.base_weights = dict(chief.weights)
+        self.base_thresholds = dict(chief.thresholds)
+        self.horizon = horizon
+        self.folds = folds
+        self.workers = workers or os.cpu_count() or 1
+        self.objective = objective
+        self.min_coverage = min_coverage
+
+        # 参与寻优的Agent；散户情绪在首席分析师中是固定权重，不参与寻优
+        self.agents = [k for k in self.base_weights if k in frame.columns]
+        self.fixed = {"retail_sentiment": RETAIL_SENTIMENT_WEIGHT} if "retail_sentiment" in frame.columns else {}
+        self._data = self._prepare(frame)
+
+    def _prepare(self, frame: pd.DataFrame) -> Dict[str, Any]:
+        column = f"fwd_{self.horizon}d"
+        frame = frame[frame[column].notna()]
+        dates, date_idx = np.unique(frame["date"].to_numpy(dtype=str), return_inverse=True)
+        values = frame[self.agents + list(self.fixed)].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        fwd = frame[column].to_numpy(dtype=float)
+
+        counts = np.bincount(date_idx, minlength=len(dates))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            market = np.bincount(date_idx, weights=fwd, minlength=len(dates)) / counts
+        return {
+            "values": np.where(present, values, 0.0),
+            "present": present.astype(float),
+            "date_idx": date_idx,
+            "fwd": fwd,
+            "market_mean": market,
+            "fold_of_date": walk_forward_folds(dates, self.folds),
+            "folds": self.folds,
+            "annual": np.sqrt(252 / self.horizon),
+            "dates": dates,
+        }
+
+    def _weight_matrix(self, candidates: np.ndarray) -> np.ndarray:
+        """候选权重后追加固定权重列"""
+        fixed = np.tile(list(self.fixed.values()), (len(candidates), 1))
+        return np.hstack([candidates, fixed]) if self.fixed else candidates
+
+    def evaluate(self, weights: np.ndarray, pairs: List[Tuple[float, float]]) -> np.ndarray:
+        """
+        评估权重 × 阈值组合（按权重分批并行）
+
+        Returns:
+            形状 (权重数, 阈值组合数, 3, 段数)，见 _evaluate_chunk
+        """
+        matrix = self._weight_matrix(np.asarray(weights, dtype=float))
+        if self.workers <= 1 or len(matrix) <= 1:
+            _init_worker(self._data)
+            return _evaluate_chunk(matrix, pairs)
+
+        chunks = np.array_split(matrix, min(self.workers * 4, len(matrix)))
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self._data,)) as pool:
+            parts = list(pool.map(_evaluate_chunk, chunks, [pairs] * len(chunks)))
+        return np.concatenate(parts)
+
+    def search(
+        self,
+        method: str = "random",
+        trials: int = 200,
+        step: float = 0.1,
+        buy_grid: Sequence[float] = DEFAULT_BUY_GRID,
+        hold_grid: Sequence[float] = DEFAULT_HOLD_GRID,
+        seed: int = 0,
+        tune_weights: bool = True
+    ) -> Dict[str, Any]:
+        """
+        搜索最优权重与阈值
+
+        只有一个Agent可回放时，各组权重归一化后是同一个综合评分，权重搜索没有意义，
+        此时须以 tune_weights=False 只搜索阈值（权重保持原值）
+
+        Args:
+            method: "random"（单纯形上随机采样 trials 组权重）或 "grid"（步长 step 的权重网格）
+            trials: 随机搜索的权重组数
+            step: 网格搜索的权重步长
+            buy_grid / hold_grid: 阈值网格（每组权重与全部阈值组合交叉评估）
+            seed: 随机种子
+            tune_weights: 是否搜索权重；False 时只搜索阈值
+
+        Returns:
+            {"best": 最优候选, "baseline": 当前配置, "walk_forward": 滚动检验结果, "table": 全部候选统计}
+
+        Raises:
+            ValueError: 没有可寻优的Agent或前瞻收益；搜索权重但可回放的Agent不足两个
+        """
+        if not self.agents or len(self._data["fwd"]) == 0:
+            raise ValueError("评分明细中没有可寻优的Agent或前瞻收益")
+        if tune_weights and len(self.agents) < 2:
+            raise ValueError(
+                f"只有 {len(self.agents)} 个Agent可回放（{', '.join(self.agents)}），无法寻优权重："
+                f"请先为更多Agent注册回放函数（register_replay），或只寻优阈值"
+            )
+
+        # 候选中包含当前配置（对照）
+        base = np.array([[self.base_weights.get(k, 0.0) for k in self.agents]])
+        if not tune_weights:
+            sampled = base
+        elif method == "random":
+            sampled = random_weights(self.agents, trials, seed)
+        else:
+            sampled = grid_weights(self.agents, step)
+        weights = np.unique(np.vstack([base, sampled]), axis=0)
+        weights = weights[weights.sum(axis=1) > 0]
+        base_pair = (float(self.base_thresholds["buy"]), float(self.base_thresholds["hold"]))
+        pairs = sorted(set(threshold_pairs(buy_grid, hold_grid)) | {base_pair})
+
+        metrics = self.evaluate(weights, pairs)
+        table = self._table(weights, pairs, metrics)
+        walk_forward = self._walk_forward(table, metrics.reshape(-1, 3, self.folds))
+
+        baseline = table[(table[self.agents] == base[0]).all(axis=1)
+                         & (table["buy"] == base_pair[0]) & (table["hold"] == base_pair[1])]
+        return {
+            "best": self._candidate(table.iloc[0]),
+            "baseline": self._candidate(baseline.iloc[0]) if not baseline.empty else None,
+            "walk_forward": walk_forward,
+            "table": table,
+        }
+
+    def _table(self, weights: np.ndarray, pairs: List[Tuple[float, float]], metrics: np.ndarray) -> pd.DataFrame:
+        """每个候选一行：权重、阈值、全段平均的夏普/胜率/覆盖率与是否满足覆盖率"""
+        rows = []
+        for i, w in enumerate(weights):
+            for j, (buy, hold) in enumerate(pairs):
+                sharpe, hit, coverage = metrics[i, j]
+                rows.append([*w, buy, hold, np.nanmean(sharpe), np.nanmean(hit), np.nanmean(coverage),
+                             bool(np.all(coverage >= self.min_coverage))])
+        table = pd.DataFrame(rows, columns=[*self.agents, "buy", "hold", "sharpe", "hit", "coverage", "valid"])
+        table["candidate"] = np.arange(len(table))
+        return table.sort_values(["valid", self.objective], ascending=False, kind="stable").reset_index(drop=True)
+
+    def _walk_forward(self, table: pd.DataFrame, metrics: np.ndarray) -> Dict[str, Any]:
+        """逐段滚动：以之前各段的平均指标挑选候选，记录其在下一段的表现"""
+        objective = metrics[:, 0 if self.objective == "sharpe" else 1]
+        valid = np.all(metrics[:, 2] >= self.min_coverage, axis=1)
+        rank = np.where(valid[:, None], np.nan_to_num(objective, nan=-np.inf), -np.inf)
+
+        dates = self._data["dates"]
+        fold_of_date = self._data["fold_of_date"]
+        steps = []
+        for k in range(1, self.folds):
+            pick = int(np.argmax(rank[:, :k].mean(axis=1)))
+            test_dates = dates[fold_of_date == k]
+            picked = table[table["candidate"] == pick].iloc[0]
+            steps.append({
+                "fold": k,
+                "start": str(test_dates[0]) if len(test_dates) else None,
+                "end": str(test_dates[-1]) if len(test_dates) else None,
+                "weights": {a: float(picked[a]) for a in self.agents},
+                "buy": float(picked["buy"]),
+                "hold": float(picked["hold"]),
+                "sharpe": float(metrics[pick, 0, k]),
+                "hit": float(metrics[pick, 1, k]),
+            })
+        return {
+            "steps": steps,
+            "sharpe": float(np.nanmean([s["sharpe"] for s in steps])) if steps else np.nan,
+            "hit": float(np.nanmean([s["hit"] for s in steps])) if steps else np.nan,
+        }
+
+    def _candidate(self, row: pd.Series) -> Dict[str, Any]:
+        """表格行 -> 完整的权重/阈值配置（未参与寻优的Agent与其余阈值保持原值）"""
+        # 按当前权重中参与寻优的Agent的总和缩放，保持未回放Agent的权重占比不变
+        weights = dict(self.base_weights)
+        searched = np.array([float(row[k]) for k in self.agents])
+        scale = sum(self.base_weights[k] for k in self.agents) / searched.sum()
+        weights.update({k: round(float(v * scale), 3) for k, v in zip(self.agents, searched)})
+        thresholds = dict(self.base_thresholds)
+        thresholds["buy"], thresholds["hold"] = float(row["buy"]), float(row["hold"])
+        thresholds["strong_buy"] = max(thresholds["strong_buy"], thresholds["buy"])
+        thresholds["sell"] = min(thresholds["sell"], thresholds["hold"])
+        return {
+            "weights": weights,
+            "thresholds": thresholds,
+            "agents": list(self.agents),
+            "sharpe": round(float(row["sharpe"]), 3),
+            "hit": round(float(row["hit"]), 2),
+            "coverage": round(float(row["coverage"]), 4),
+        }
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_format_value(v) for v in value) + "]"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def _same_value(text: str, value: float) -> bool:
+    """配置中的原值与新值是否相等（相等时保留原写法）"""
+    try:
+        return float(text) == float(value)
+    except ValueError:
+        return False
+
+
+def write_config(
+    path: str,
+    weights: Dict[str, float],
+    thresholds: Dict[str, float],
+    optimization: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    把权重与阈值写回 agents.yaml 格式的配置文件
+
+    文件已存在时只替换 weights / thresholds 两节中对应键的取值，保留其余内容与注释；
+    文件不存在时新建只含这两节的配置。空的节不写入
+
+    Args:
+        optimization: 可选，寻优记录（如 {"agents": [参与寻优的Agent], "horizon": 5}），
+            写入紧随 thresholds 的 optimization 节：阈值是在这些Agent的综合评分上寻优的，
+            运行时综合评分包含全部Agent，分布不同
+    """
+    path = Path(path)
+    sections = {"weights": dict(weights), "thresholds": dict(thresholds)}
+    if optimization:
+        sections["optimization"] = dict(optimization)
+    sections = {name: values for name, values in sections.items() if values}
+    if not path.exists():
+        lines = []
+        for name, values in sections.items():
+            lines.append(f"{name}:")
+            lines.extend(f"  {k}: {_format_value(v)}" for k, v in values.items())
+            lines.append("")
+        path.write_text("\n".join(lines), encoding="utf-8")
+        return
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    names = list(sections)
+    missing = [n for n in names if not any(re.match(rf"^{n}:", line) for line in lines)]
+    out: List[str] = []
+    section: Optional[str] = None
+    pending: Dict[str, Any] = {}
+    entry = re.compile(r"^(\s+)([\w]+):(\s*)([^#\n]*?)(\s*#.*)?$")
+
+    def section_lines(name: str) -> List[str]:
+        return [f"{name}:", *(f"  {k}: {_format_value(v)}" for k, v in sections[name].items())]
+
+    def close(name: str) -> None:
+        # 节末尾的空行与顶格注释属于下一节：本节原来没有的键、以及文件中没有的后续节放在它们之前
+        trailing = []
+        while out and (not out[-1].strip() or out[-1].startswith("#")):
+            trailing.insert(0, out.pop())
+        out.extend(f"  {k}: {_format_value(v)}" for k, v in pending.items())
+        pending.clear()
+        for following in names[names.index(name) + 1:]:
+            if following not in missing:
+                break
+            missing.remove(following)
+            out.extend(["", *section_lines(following)])
+        out.extend(trailing)
+
+    for line in lines:
+        top = re.match(r"^([\w]+):", line)
+        if top:
+            if section:
+                close(section)
+            section = top.group(1) if top.group(1) in sections else None
+            pending = dict(sections[section]) if section else {}
+        elif section:
+            m = entry.match(line)
+            if m and m.group(2) in pending:
+                value = pending.pop(m.group(2))
+                if not _same_value(m.group(4), value):
+                    line = f"{m.group(1)}{m.group(2)}:{m.group(3) or ' '}{_format_value(value)}{m.group(5) or ''}"
+        out.append(line)
+    if section:
+        close(section)
+    for name in missing:
+        out.extend(["", *section_lines(name)])
+    path.write_text("\n".join(out) + "\n", encoding="utf-8")
@@ -0,0 +1,213 @@
+"""
+规则Agent历史回放 - 对一只股票的全部历史K线逐日计算Agent评分（无LLM）
+
+每个回放函数输入完整日线，输出与之对齐的首席分析师口径评分序列（0-100）；
+指标只用当日及以前的数据，第 t 日的评分等于把数据截断到 t 日后运行Agent的结果
+"""
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.feature_store import FeatureStore
+
+# 技术分析Agent计算动量指标所需的最少K线数
+TECHNICAL_MIN_BARS = 14
+
+# 默认的前瞻收益周期（交易日）
+DEFAULT_HORIZONS = (1, 5, 20)
+
+
+def signal_scores(agent_scores: pd.Series) -> pd.Series:
+    """
+    Agent评分 -> 首席分析师口径评分
+
+    等价于 BaseAgent._format_signal 得到信号、置信度 |score-50|*2，
+    再经 ChiefAnalystAgent._signal_to_score 转换：信号为中性时为 50，否则等于原评分
+    """
+    directional = (agent_scores >= 60) | (agent_scores <= 40)
+    return agent_scores.where(directional, 50.0)
+
+
+def _technical_state(df: pd.DataFrame, features: FeatureStore) -> Dict[str, np.ndarray]:
+    """
+    逐日的 TechnicalAnalysisAgent 趋势与动量判断（布尔数组，与 df 逐行对齐）
+
+    与Agent使用相同的特征参数（均线 min_periods=1，RSI/MACD 同 FeatureStore 调用），
+    不足 TECHNICAL_MIN_BARS 根K线时动量部分按中性处理
+    """
+    close = df['close'].to_numpy(dtype=float)
+    sma = {p: features.get(df, "sma", period=p, min_periods=1).to_numpy() for p in (5, 10, 20, 60)}
+
+    # 动量：K线数不足时Agent直接返回中性动量
+    ready = np.arange(len(df)) >= TECHNICAL_MIN_BARS - 1
+    rsi = features.get(df, "rsi", period=14, min_periods=1, eps=1e-10).fillna(50.0).to_numpy()
+    macd = features.get(df, "macd", adjust=True, min_periods=1)
+    line, signal = macd['macd'].fillna(0.0).to_numpy(), macd['signal'].fillna(0.0).to_numpy()
+
+    return {
+        "short_up": close > sma[5],
+        "mid_up": close > sma[20],
+        "bull_alignment": (sma[5] > sma[10]) & (sma[10] > sma[20]),
+        "bear_alignment": (sma[5] < sma[10]) & (sma[10] < sma[20]),
+        "oversold": ready & (rsi < 30),
+        "overbought": ready & (rsi > 70),
+        "golden_cross": ready & (line > signal),
+        "death_cross": ready & (line < signal),
+    }
+
+
+def technical_scores(df: pd.DataFrame, features: Optional[FeatureStore] = None) -> pd.Series:
+    """
+    逐日回放 TechnicalAnalysisAgent._calculate_score
+
+    Returns:
+        首席分析师口径的技术评分，索引与 df 一致
+    """
+    state = _technical_state(df, features or FeatureStore())
+    score = 50.0 + 10.0 * state["short_up"] + 10.0 * state["mid_up"] + 10.0 * state["bull_alignment"]
+    score += 15.0 * state["oversold"] - 15.0 * state["overbought"]
+    score += 10.0 * state["golden_cross"] - 10.0 * state["death_cross"]
+    return signal_scores(pd.Series(np.clip(score, 0, 100), index=df.index))
+
+
+def volume_price_scores(df: pd.DataFrame, features: Optional[FeatureStore] = None) -> pd.Series:
+    """
+    逐日回放量价分析师（analyze_volume_price_relationship 的健康度）
+
+    健康度 >60 看多、<40 看空，置信度 |健康度-50|*2，经 _signal_to_score 后等于健康度，
+    中性时为 50；不足 VOLUME_PRICE_MIN_BARS 根K线或没有成交量时量价分析师无输出，为 NaN
+    """
+    from src.analysis.advanced_analyzer import AdvancedAnalyzer
+
+    if 'volume' not in df.columns and '成交量' not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    health = AdvancedAnalyzer().analyze_volume_price_series(df)['health_score']
+    return health.where((health > 60) | (health < 40) | health.isna(), 50.0)
+
+
+def _debate_confidence(weights: np.ndarray, has_case: np.ndarray) -> np.ndarray:
+    """同 _calculate_bullish_confidence / _calculate_bearish_confidence（无LLM）：理由权重之和 -> 信心度"""
+    return np.where(has_case, np.minimum(95, np.minimum(85, 40 + weights * 100) + 10), 30.0)
+
+
+def bull_view_scores(df: pd.DataFrame, features: Optional[FeatureStore] = None) -> pd.Series:
+    """
+    逐日回放多头分析师的技术面理由（首席分析师口径：多头信心度）
+
+    只回放能由日线得出的技术面理由（趋势、均线排列、RSI、MACD、涨停，涨停幅度按板块区分）；
+    资金面、基本面、催化剂与LLM分析需要历史外部数据，按没有这些理由处理
+    """
+    from src.analysis.pattern_recognition import PatternScanner
+
+    features = features or FeatureStore()
+    state = _technical_state(df, features)
+    scanner = PatternScanner.from_frame(df, features.symbol)
+    limit_up = scanner.mask("涨停")[scanner.index.get_indexer(df['date'].to_numpy()), 0]
+    cases = [(0.15, state["short_up"]), (0.20, state["bull_alignment"]), (0.15, state["oversold"]),
+             (0.15, state["golden_cross"]), (0.25, limit_up)]
+    weights = sum(w * c for w, c in cases)
+    has_case = np.any([c for _, c in cases], axis=0)
+    return pd.Series(_debate_confidence(weights, has_case), index=df.index)
+
+
+def bear_view_scores(df: pd.DataFrame, features: Optional[FeatureStore] = None) -> pd.Series:
+    """
+    逐日回放空头分析师的技术面理由（首席分析师口径：100 - 空头信心度）
+
+    只回放技术面理由（趋势、均线排列、RSI、MACD、接近20日压力位）；
+    资金面、基本面与风险事件需要历史外部数据，按没有这些理由处理
+    """
+    features = features or FeatureStore()
+    state = _technical_state(df, features)
+
+    # 同 _find_support_resistance：最近20根K线的最低价/最高价
+    low = df['low'] if 'low' in df.columns else df['close']
+    high = df['high'] if 'high' in df.columns else df['close']
+    support = low.astype(float).rolling(20, min_periods=1).min().to_numpy()
+    resistance = high.astype(float).rolling(20, min_periods=1).max().to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        position = np.where(resistance != support, (close - support) / (resistance - support + 1e-10), 0.5)
+
+    cases = [(0.15, ~state["short_up"]), (0.20, state["bear_alignment"]), (0.15, state["overbought"]),
+             (0.15, state["death_cross"]), (0.15, position > 0.9)]
+    weights = sum(w * c for w, c in cases)
+    has_case = np.any([c for _, c in cases], axis=0)
+    return pd.Series(100 - _debate_confidence(weights, has_case), index=df.index)
+
+
+# Agent键（同 ChiefAnalystAgent.weights）-> 回放函数 func(df, features)
+AGENT_REPLAYS: Dict[str, Callable[..., pd.Series]] = {
+    "technical": technical_scores,
+    "volume_price": volume_price_scores,
+    "bull_view": bull_view_scores,
+    "bear_view": bear_view_scores,
+}
+
+# 只能部分回放的Agent -> 回放中缺少的部分（回测与寻优报告中注明）
+PARTIAL_REPLAYS: Dict[str, str] = {
+    "bull_view": "只含技术面理由，不含资金面/基本面/催化剂与LLM",
+    "bear_view": "只含技术面理由，不含资金面/基本面/风险事件",
+}
+
+
+def replay_coverage(weights: Dict[str, float]) -> Dict[str, List[str]]:
+    """
+    哪些Agent参与回放
+
+    Returns:
+        {"replayed": 有权重且已回放, "partial": 其中只能部分回放的,
+         "missing": 有权重但无法回放（不参与加权）, "unweighted": 已回放但权重为0}
+    """
+    weighted = [k for k, w in weights.items() if w]
+    return {
+        "replayed": [k for k in weighted if k in AGENT_REPLAYS],
+        "partial": [k for k in weighted if k in PARTIAL_REPLAYS and k in AGENT_REPLAYS],
+        "missing": [k for k in weighted if k not in AGENT_REPLAYS],
+        "unweighted": [k for k in AGENT_REPLAYS if k not in weighted],
+    }
+
+
+def register_replay(name: str, func: Callable[..., pd.Series]) -> None:
+    """注册Agent回放函数 func(df, features) -> 首席分析师口径评分序列"""
+    AGENT_REPLAYS[name] = func
+
+
+def forward_returns(close: pd.Series, horizons: Sequence[int] = DEFAULT_HORIZONS) -> Dict[str, pd.Series]:
+    """以当日收盘价买入、持有 h 个交易日的收益率（%），末尾不足 h 日为 NaN"""
+    return {f"fwd_{h}d": (close.shift(-h) / close - 1) * 100 for h in horizons}
+
+
+def replay_symbol(
+    code: str,
+    df: pd.DataFrame,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    horizons: Sequence[int] = DEFAULT_HORIZONS
+) -> pd.DataFrame:
+    """
+    回放一只股票的全部已注册Agent
+
+    指标在完整历史上计算（start 之前的K线只用于预热），结果截取 [start, end]
+
+    Returns:
+        列为 date、code、各Agent评分、fwd_{h}d 的DataFrame
+    """
+    if df is None or df.empty or 'close' not in df.columns:
+        return pd.DataFrame()
+
+    df = df.reset_index(drop=True)
+    features = FeatureStore(code)
+    out = pd.DataFrame({"date": df['date'].astype(str), "code": code})
+    for name, func in AGENT_REPLAYS.items():
+        out[name] = func(df, features).to_numpy(dtype=float)
+    for name, values in forward_returns(df['close'].astype(float), horizons).items():
+        out[name] = values.to_numpy()
+
+    mask = np.ones(len(out), dtype=bool)
+    if start:
+        mask &= (out['date'] >= start).to_numpy()
+    if end:
+        mask &= (out['date'] <= end).to_numpy()
+    return out[mask].reset_index(drop=True)
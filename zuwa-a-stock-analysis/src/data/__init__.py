@@ -1,6 +1,30 @@
 """
 数据源模块
 """
-from src.data.data_client import TushareClient, AKShareClient, DataManager
+from src.utils.lazy import lazy_exports
 
-__all__ = ["TushareClient", "AKShareClient", "DataManager"]
+_EXPORTS = {
+    **dict.fromkeys(["TushareClient", "AKShareClient", "DataManager"], "src.data.data_client"),
+    **dict.fromkeys(["DragonTigerStore", "get_dragon_tiger_store"], "src.data.dragon_tiger"),
+    **dict.fromkeys(["ReadOnlyFrame", "freeze"], "src.data.frozen"),
+    **dict.fromkeys(["HedgedFetcher", "LatencyHistogram", "get_daily_fetcher"], "src.data.hedged"),
+    **dict.fromkeys(["MarginStore", "get_margin_store"], "src.data.margin_store"),
+    **dict.fromkeys(["MarketSnapshot", "get_market_snapshot"], "src.data.market_snapshot"),
+    **dict.fromkeys(["NewsIndex", "get_news_index"], "src.data.news_index"),
+    **dict.fromkeys(["PriceStore", "get_price_store"], "src.data.price_store"),
+    **dict.fromkeys(["ResultStore", "get_result_store"], "src.data.result_store"),
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = [
+    "TushareClient", "AKShareClient", "DataManager",
+    "DragonTigerStore", "get_dragon_tiger_store",
+    "ReadOnlyFrame", "freeze",
+    "HedgedFetcher", "LatencyHistogram", "get_daily_fetcher",
+    "MarginStore", "get_margin_store",
+    "MarketSnapshot", "get_market_snapshot",
+    "NewsIndex", "get_news_index",
+    "PriceStore", "get_price_store",
+    "ResultStore", "get_result_store"
+]
@@ -0,0 +1,187 @@
+"""
+按交易日存储的全市场数据表 - 龙虎榜、融资融券等每日只更新一次的数据
+
+每个交易日一个文件，缺失的交易日才下载；内存中按股票代码建立索引
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.data.storage import frame_exists, read_frame, write_frame
+from src.utils.concurrency import data_source
+from src.utils.trade_calendar import last_complete_trading_day, recent_trading_days
+
+# 下载失败或结果为空（可能尚未公布，也可能是接口故障）的交易日不落盘，间隔该秒数后再试
+EMPTY_RETRY_SECONDS = 600
+
+# 每次同步最多下载的交易日数（从最近的交易日往前补），其余留给之后的同步
+DEFAULT_MAX_BACKFILL_DAYS = 10
+
+
+class DailyMarketStore(ABC):
+    """
+    全市场日表本地库（子类实现 _fetch_days）
+
+    - 同步时只下载历史窗口内缺失的交易日，按日落盘；每次最多补 max_backfill_days 个交易日
+    - 下载时不持有索引锁：同一时间只有一个线程下载，已有索引的调用方不等待，直接使用现有数据
+    - 结果为空的交易日不落盘，稍后重试
+    - 内存中维护 代码 -> 记录列表（按日期从新到旧）的索引
+    """
+
+    # 标准列（须包含 date、code）
+    COLUMNS: List[str] = ['date', 'code']
+    # 每次同步最多下载的交易日数
+    max_backfill_days: int = DEFAULT_MAX_BACKFILL_DAYS
+
+    def __init__(self, root: Path, history_days: int):
+        """
+        Args:
+            root: 存储目录
+            history_days: 同步与索引的历史长度（自然日）
+        """
+        self.root = Path(root)
+        self.history_days = history_days
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        self._loaded: List[date] = []
+        self._loaded_version = 0
+        self._written = 0
+        self._empty_checked: Dict[date, float] = {}
+        self._lock = threading.Lock()
+        self._download_lock = threading.Lock()
+        self.requests = 0
+
+    def _path(self, day: date) -> Path:
+        return self.root / day.strftime("%Y%m%d")
+
+    def _window(self, now: Optional[datetime]) -> List[date]:
+        """历史长度内的已收盘交易日"""
+        complete = last_complete_trading_day(now)
+        start = complete - timedelta(days=self.history_days)
+        return [d for d in recent_trading_days(self.history_days, now) if d > start]
+
+    @abstractmethod
+    def _fetch_days(self, days: List[date]) -> Dict[date, Optional[pd.DataFrame]]:
+        """
+        下载若干交易日的数据
+
+        Returns:
+            交易日 -> 标准列数据；下载失败的交易日为 None（不落盘）
+        """
+
+    @data_source("akshare")
+    def sync(self, now: Optional[datetime] = None) -> bool:
+        """
+        下载缺失交易日的数据并重建索引；窗口内数据齐全时不访问网络
+
+        每次最多下载 max_backfill_days 个交易日（最近的优先），其余在之后的同步中补齐；
+        其他线程正在下载时，已有索引则直接返回，不等待下载完成
+
+        Args:
+            now: 当前时间（测试用）
+
+        Returns:
+            是否有可用数据
+        """
+        days = self._window(now)
+        if not days:
+            return False
+
+        if self._download_lock.acquire(blocking=False):
+            try:
+                missing = self._missing(days)
+                if missing:
+                    self._download(missing[-self.max_backfill_days:])
+            finally:
+                self._download_lock.release()
+        elif not self._index:
+            # 首次同步时其他线程正在下载：等它完成后使用其结果
+            with self._download_lock:
+                pass
+
+        with self._lock:
+            if self._loaded != days or self._loaded_version != self._written:
+                self._build_index(days)
+            return bool(self._index)
+
+    def _missing(self, days: List[date]) -> List[date]:
+        """尚未落盘、且不在重试间隔内的交易日"""
+        return [d for d in days if not frame_exists(self._path(d)) and self._should_retry(d)]
+
+    def _should_retry(self, day: date) -> bool:
+        checked = self._empty_checked.get(day)
+        return checked is None or time.monotonic() - checked >= EMPTY_RETRY_SECONDS
+
+    def _download(self, missing: List[date]) -> None:
+        try:
+            frames = self._fetch_days(missing)
+        except Exception as e:
+            print(f"下载{type(self).__name__}数据失败: {e}")
+            frames = {}
+
+        for day in missing:
+            rows = frames.get(day)
+            if rows is None or rows.empty:
+                # 下载失败、尚未公布或接口返回空表：不当作"当日无数据"落盘，稍后再试
+                self._empty_checked[day] = time.monotonic()
+                continue
+            write_frame(rows, self._path(day))
+            self._written += 1
+
+    def _build_index(self, days: List[date]) -> None:
+        index: Dict[str, List[Dict[str, Any]]] = {}
+        for day in days:
+            df = read_frame(self._path(day))
+            if df.empty:
+                continue
+            for record in df.to_dict('records'):
+                index.setdefault(record['code'], []).append(record)
+        for records in index.values():
+            records.sort(key=lambda r: r['date'], reverse=True)
+        self._index = index
+        self._loaded = days
+        self._loaded_version = self._written
+
+    def lookup(self, code: str, days: Optional[int] = None, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        某只股票近期的记录（不访问网络，需先 sync）
+
+        Args:
+            code: 6位股票代码
+            days: 只返回最近 days 个自然日（含当天），默认 history_days
+            now: 当前时间（测试用）
+
+        Returns:
+            记录列表，按日期从新到旧
+        """
+        records = self._index.get(str(code), [])
+        start = ((now or datetime.now()).date() - timedelta(days=days or self.history_days)).isoformat()
+        return [dict(r) for r in records if r['date'] > start]
+
+    def latest(self, code: str) -> Dict[str, Any]:
+        """某只股票最近一条记录，没有时返回空字典"""
+        records = self._index.get(str(code))
+        return dict(records[0]) if records else {}
+
+    def series(self, code: str, days: Optional[int] = None, now: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        某只股票近期的时间序列
+
+        Returns:
+            列为 COLUMNS、按日期升序的DataFrame
+        """
+        records = self.lookup(code, days, now)
+        return pd.DataFrame(list(reversed(records)), columns=self.COLUMNS)
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计"""
+        return {
+            "days": len(self._loaded),
+            "symbols": len(self._index),
+            "records": sum(len(r) for r in self._index.values()),
+            "requests": self.requests,
+        }
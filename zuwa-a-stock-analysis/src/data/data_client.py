@@ -2,9 +2,14 @@
 数据源模块 - 封装Tushare和AKShare
 """
 import os
+from datetime import datetime, timedelta
 import pandas as pd
 from typing import Optional, Dict
 
+from src.data.hedged import get_daily_fetcher
+from src.data.market_snapshot import get_market_snapshot
+from src.utils.lazy import lazy_import
+
 
 class TushareClient:
     """Tushare数据客户端"""
@@ -15,7 +20,7 @@ class TushareClient:
         
         if self.token:
             try:
-                import tushare as ts
+                ts = lazy_import("tushare")
                 self.pro = ts.pro_api(self.token)
             except Exception as e:
                 print(f"Tushare初始化失败: {e}")
@@ -35,6 +40,20 @@ class TushareClient:
             print(f"获取数据失败: {e}")
             return pd.DataFrame()
     
+    def get_adjusted_daily(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """获取前复权日线（按复权因子等比复权，与AKShare前复权口径不同；用于对冲请求）"""
+        if not self.pro:
+            return pd.DataFrame()
+        
+        ts = lazy_import("tushare")
+        return ts.pro_bar(
+            ts_code=self._to_ts_code(symbol),
+            adj="qfq",
+            start_date=start_date,
+            end_date=end_date,
+            api=self.pro
+        )
+    
     def get_stock_basic(self, symbol: str) -> Dict:
         """获取股票基本信息"""
         if not self.pro:
@@ -65,22 +84,18 @@ class AKShareClient:
     def __init__(self):
         self.ak = None
         try:
-            import akshare as ak
+            ak = lazy_import("akshare")
             self.ak = ak
         except Exception as e:
             print(f"AKShare初始化失败: {e}")
     
     def get_realtime_data(self, symbol: str) -> Dict:
-        """获取实时行情"""
+        """获取实时行情（来自共享的全市场快照）"""
         if not self.ak:
             return {}
         
         try:
-            df = self.ak.stock_zh_a_spot_em()
-            row = df[df['代码'] == symbol]
-            if not row.empty:
-                return row.iloc[0].to_dict()
-            return {}
+            return get_market_snapshot().get(symbol)
         except Exception as e:
             print(f"获取实时数据失败: {e}")
             return {}
@@ -105,13 +120,25 @@ class DataManager:
         self.tushare = TushareClient()
         self.akshare = AKShareClient()
     
+    def get_daily_data(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        获取前复权日线（AKShare / Tushare 对冲请求，先返回者胜出）
+        
+        Returns:
+            列为 PRICE_COLUMNS 的DataFrame
+        """
+        end_date = end_date or datetime.now().strftime("%Y%m%d")
+        start_date = start_date or (datetime.now() - timedelta(days=365)).strftime("%Y%m%d")
+        df, _ = get_daily_fetcher().fetch(symbol, start_date, end_date)
+        return df
+    
     def get_full_data(self, symbol: str) -> Dict:
         """获取完整数据"""
         data = {
             "symbol": symbol,
             "basic_info": self.tushare.get_stock_basic(symbol),
             "realtime": self.akshare.get_realtime_data(symbol),
-            "daily": self.tushare.get_daily_data(symbol),
+            "daily": self.get_daily_data(symbol),
             "capital_flow": self.akshare.get_capital_flow(symbol)
         }
         return data
@@ -0,0 +1,120 @@
+"""
+龙虎榜本地库 - 按交易日同步全市场龙虎榜，按股票代码索引
+
+龙虎榜是全市场数据，每个交易日只变化一次：每天只下载一次并落盘，
+个股查询"近N天是否上榜、净买额多少"直接查内存索引
+"""
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.data.daily_market import DailyMarketStore
+from src.data.storage import cache_root
+from src.utils.lazy import lazy_import
+
+# 默认保留的历史长度（自然日）
+DEFAULT_LHB_DAYS = 30
+
+LHB_COLUMNS = ['date', 'code', 'name', 'net_amount', 'buy_amount', 'sell_amount', 'reason']
+
+# AKShare 龙虎榜列名 -> 标准列名（兼容不同接口的列名）
+AKSHARE_LHB_COLUMNS = {
+    '上榜日': 'date', '日期': 'date',
+    '代码': 'code', '股票代码': 'code',
+    '名称': 'name', '股票名称': 'name',
+    '龙虎榜净买额': 'net_amount', '净买额': 'net_amount',
+    '龙虎榜买入额': 'buy_amount', '买入额': 'buy_amount',
+    '龙虎榜卖出额': 'sell_amount', '卖出额': 'sell_amount',
+    '上榜原因': 'reason', '解读': 'reason',
+}
+
+
+def normalize_lhb(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    把AKShare龙虎榜明细转换为标准列
+
+    金额单位由元换算为万元；同一股票同日因多个原因上榜时合并为一行
+
+    Returns:
+        列为 LHB_COLUMNS 的DataFrame，date 为 YYYY-MM-DD 字符串
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=LHB_COLUMNS)
+
+    out = pd.DataFrame(index=df.index)
+    for old, new in AKSHARE_LHB_COLUMNS.items():
+        if old in df.columns and new not in out.columns:
+            out[new] = df[old]
+    for col in LHB_COLUMNS:
+        if col not in out.columns:
+            out[col] = None if col in ('name', 'reason') else float('nan')
+
+    out['date'] = out['date'].astype(str).str[:10]
+    out['code'] = out['code'].astype(str).str.zfill(6)
+    for col in ('net_amount', 'buy_amount', 'sell_amount'):
+        out[col] = pd.to_numeric(out[col], errors='coerce') / 1e4
+    out['reason'] = out['reason'].fillna('').astype(str)
+
+    return (out.groupby(['date', 'code'], sort=True)
+            .agg(name=('name', 'first'), net_amount=('net_amount', 'first'),
+                 buy_amount=('buy_amount', 'first'), sell_amount=('sell_amount', 'first'),
+                 reason=('reason', lambda s: "；".join(dict.fromkeys(r for r in s if r))))
+            .reset_index()[LHB_COLUMNS])
+
+
+def _fetch_akshare_lhb(start_date: str, end_date: str) -> pd.DataFrame:
+    """使用AKShare下载区间内的龙虎榜明细（日期格式 YYYYMMDD）"""
+    ak = lazy_import("akshare")
+    return ak.stock_lhb_detail_em(start_date=start_date, end_date=end_date)
+
+
+class DragonTigerStore(DailyMarketStore):
+    """
+    龙虎榜本地库
+
+    - 每个交易日一个文件；同步时一次下载所有缺失的交易日，再按日拆分落盘
+    - 内存中维护 代码 -> 上榜记录 的索引，查询为O(1)；金额单位万元
+    """
+
+    COLUMNS = LHB_COLUMNS
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        history_days: int = DEFAULT_LHB_DAYS,
+        fetcher: Optional[Callable[[str, str], pd.DataFrame]] = None
+    ):
+        """
+        Args:
+            root: 存储目录，默认 <缓存目录>/lhb
+            history_days: 同步与索引的历史长度（自然日）
+            fetcher: 下载函数 fetcher(start_date, end_date)，日期格式 YYYYMMDD
+        """
+        super().__init__(Path(root) if root else cache_root() / "lhb", history_days)
+        self._fetcher = fetcher or _fetch_akshare_lhb
+
+    def _fetch_days(self, days: List[date]) -> Dict[date, Optional[pd.DataFrame]]:
+        # 接口支持区间查询：一次下载后按日拆分
+        df = normalize_lhb(self._fetcher(days[0].strftime("%Y%m%d"), days[-1].strftime("%Y%m%d")))
+        self.requests += 1
+        return {day: df[df['date'] == day.isoformat()] for day in days}
+
+
+# 全局龙虎榜库实例
+_dragon_tiger_store = None
+
+def get_dragon_tiger_store(history_days: Optional[int] = None) -> DragonTigerStore:
+    """
+    获取全局龙虎榜库实例
+
+    Args:
+        history_days: 可选，更新历史长度（自然日）
+    """
+    global _dragon_tiger_store
+    if _dragon_tiger_store is None:
+        _dragon_tiger_store = DragonTigerStore(history_days=history_days or DEFAULT_LHB_DAYS)
+    elif history_days:
+        _dragon_tiger_store.history_days = history_days
+    return _dragon_tiger_store
@@ -0,0 +1,95 @@
+"""
+只读行情数据 - 分析上下文中共享的日线DataFrame
+
+各Agent并发读取同一份数据；派生指标放在特征缓存（FeatureStore）中，不写回原表
+"""
+import pandas as pd
+
+_READ_ONLY_MESSAGE = "行情数据为只读，派生指标请通过 context['features'] 获取"
+
+
+class _ReadOnlyIndexer:
+    """包装 loc / iloc / at / iat，允许读取、禁止赋值"""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    def __call__(self, axis=None):
+        return _ReadOnlyIndexer(self._indexer(axis))
+
+
+class ReadOnlyFrame(pd.DataFrame):
+    """
+    禁止修改的DataFrame
+
+    赋值列、insert、loc/iloc 赋值和 inplace 操作会抛出 TypeError；
+    切片、计算等派生结果为普通 DataFrame，可以自由修改（写时复制，不影响原表）
+    """
+
+    _metadata = []
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def __setitem__(self, key, value):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    def __setattr__(self, name, value):
+        # df.close = ... 形式的列赋值，以及替换索引/列名
+        if '_mgr' in self.__dict__ and (name in ('index', 'columns') or
+                                        (not name.startswith('_') and name in self.columns)):
+            raise TypeError(_READ_ONLY_MESSAGE)
+        super().__setattr__(name, value)
+
+    def __delitem__(self, key):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    def insert(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    def pop(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    def update(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    def _update_inplace(self, *args, **kwargs):
+        # 所有 inplace=True 操作最终都经过这里
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+
+def freeze(df: pd.DataFrame) -> ReadOnlyFrame:
+    """
+    把DataFrame包装为只读（不复制数据）
+
+    Args:
+        df: 行情数据，None 时返回空表
+    """
+    if isinstance(df, ReadOnlyFrame):
+        return df
+    if df is None:
+        df = pd.DataFrame()
+    return ReadOnlyFrame(df)
@@ -0,0 +1,145 @@
+"""
+资金流向解析 - 把个股资金流表整列转换为以元为单位的数值
+
+ak.stock_individual_fund_flow 的金额列可能是数值（元），也可能是带"万"/"亿"单位的字符串；
+按单位换算后统一为元，并用滚动求和计算N日净流入
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 中文金额单位 -> 倍数
+UNIT_MULTIPLIERS = {'亿': 1e8, '万': 1e4}
+
+# 默认的净流入统计窗口（交易日）
+DEFAULT_FLOW_WINDOWS = (5, 10, 20)
+
+# 资金流列名 -> 标准列名
+FUND_FLOW_COLUMNS = {
+    '日期': 'date',
+    '收盘价': 'close',
+    '涨跌幅': 'pct_change',
+    '主力净流入-净额': 'main_net',
+    '主力净流入-净占比': 'main_net_pct',
+    '超大单净流入-净额': 'super_large_net',
+    '超大单净流入-净占比': 'super_large_net_pct',
+    '大单净流入-净额': 'large_net',
+    '大单净流入-净占比': 'large_net_pct',
+    '中单净流入-净额': 'medium_net',
+    '中单净流入-净占比': 'medium_net_pct',
+    '小单净流入-净额': 'small_net',
+    '小单净流入-净占比': 'small_net_pct',
+    # 部分数据源提供的流入/流出总额
+    '超大单流入': 'super_large_in',
+    '超大单流出': 'super_large_out',
+    '大单流入': 'large_in',
+    '大单流出': 'large_out',
+    '小单流入': 'small_in',
+    '小单流出': 'small_out',
+}
+
+_NUMBER_PATTERN = r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(亿|万)?'
+
+
+def parse_amount(values: pd.Series) -> pd.Series:
+    """
+    整列解析金额为元
+
+    "1.5亿" -> 1.5e8，"-3200万" -> -3.2e7，数值原样保留；无法解析的为 NaN
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+
+    text = values.astype(str).str.replace(',', '', regex=False)
+    parts = text.str.extract(_NUMBER_PATTERN)
+    number = pd.to_numeric(parts[0], errors='coerce')
+    multiplier = parts[1].map(UNIT_MULTIPLIERS).fillna(1.0)
+    return (number * multiplier).astype(float)
+
+
+def parse_percent(values: pd.Series) -> pd.Series:
+    """整列解析百分比（"3.2%" -> 3.2）"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    return pd.to_numeric(values.astype(str).str.rstrip('%').str.strip(), errors='coerce').astype(float)
+
+
+def parse_fund_flow(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    把个股资金流表转换为标准列
+
+    金额列单位为元，占比和涨跌幅单位为 %；没有"主力净流入"列时按
+    (超大单 + 大单) 的净额或流入减流出计算
+
+    Returns:
+        按日期升序的DataFrame，date 为 YYYY-MM-DD 字符串
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=['date', 'main_net'])
+
+    out = pd.DataFrame(index=df.index)
+    for old, new in FUND_FLOW_COLUMNS.items():
+        if old not in df.columns:
+            continue
+        if new == 'date':
+            out[new] = df[old].astype(str).str[:10]
+        elif new.endswith('_pct') or new == 'pct_change':
+            out[new] = parse_percent(df[old])
+        elif new == 'close':
+            out[new] = pd.to_numeric(df[old], errors='coerce').astype(float)
+        else:
+            out[new] = parse_amount(df[old])
+
+    for size in ('super_large', 'large', 'small'):
+        if f'{size}_net' not in out.columns and f'{size}_in' in out.columns and f'{size}_out' in out.columns:
+            out[f'{size}_net'] = out[f'{size}_in'] - out[f'{size}_out']
+    if 'main_net' not in out.columns:
+        parts = [out[c] for c in ('super_large_net', 'large_net') if c in out.columns]
+        out['main_net'] = sum(p.fillna(0) for p in parts) if parts else np.nan
+
+    if 'date' in out.columns:
+        out = out.sort_values('date', kind='stable')
+    return out.reset_index(drop=True)
+
+
+def add_flow_windows(
+    flow: pd.DataFrame,
+    windows: Sequence[int] = DEFAULT_FLOW_WINDOWS,
+    column: str = 'main_net'
+) -> pd.DataFrame:
+    """
+    追加N日净流入滚动求和列（如 main_net_5d），数据不足N日时为 NaN
+
+    Args:
+        flow: parse_fund_flow 的返回值（按日期升序）
+        windows: 窗口长度（交易日）
+        column: 求和的列
+    """
+    if flow.empty or column not in flow.columns:
+        return flow
+    return flow.assign(**{
+        f'{column}_{w}d': flow[column].rolling(w, min_periods=w).sum() for w in windows
+    })
+
+
+def latest_flow(flow: pd.DataFrame, windows: Sequence[int] = DEFAULT_FLOW_WINDOWS) -> Dict[str, Optional[float]]:
+    """
+    最新一日的资金流与N日净流入（单位元）
+
+    Returns:
+        {"date", "main_net", "main_net_pct", "main_net_5d", ...}，缺失值为 None
+    """
+    if flow.empty:
+        return {}
+    flow = add_flow_windows(flow, windows)
+    row = flow.iloc[-1]
+    return {
+        key: (None if pd.isna(value) else (value if key == 'date' else float(value)))
+        for key, value in row.items()
+    }
+
+
+def to_wan(value: Optional[float], digits: int = 2) -> Optional[float]:
+    """元 -> 万元（None 原样返回）"""
+    return None if value is None else round(value / 1e4, digits)
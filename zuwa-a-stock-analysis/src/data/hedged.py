@@ -0,0 +1,346 @@
+"""
+对冲请求 - 多数据源竞速获取日线
+
+先请求主数据源，超过其历史延迟的指定分位数仍未返回时再请求备用数据源，
+取先返回的有效结果；两种数据源的结果统一转换为 PRICE_COLUMNS 列
+"""
+import bisect
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.price_store import PRICE_COLUMNS, NUMERIC_COLUMNS, _fetch_akshare_daily, normalize_akshare_daily
+from src.utils.concurrency import source_slot
+from src.utils.tracing import annotate
+
+# 默认参数，与 config/agents.yaml 中 data_sources.daily_hedge 一致
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_HEDGE_DELAY = 2.0
+DEFAULT_MIN_HEDGE_DELAY = 0.2
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_HEDGE_WORKERS = 8
+
+# 延迟直方图桶上界（秒）：10ms ~ 120s，按对数均匀划分
+LATENCY_BUCKETS = [round(0.01 * 10 ** (i / 8), 4) for i in range(33)] + [math.inf]
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图（线程安全）"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """记录一次耗时"""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[min(index, len(self.counts) - 1)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        延迟分位数（取所在桶的上界）
+
+        Args:
+            p: 百分位，0-100
+
+        Returns:
+            秒数，尚无样本时返回 None
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            target = max(1, math.ceil(self.count * p / 100))
+            seen = 0
+            for bound, n in zip(self.buckets, self.counts):
+                seen += n
+                if seen >= target:
+                    return bound if math.isfinite(bound) else self.buckets[-2]
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """统计摘要"""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+def _valid(df: Any) -> bool:
+    return isinstance(df, pd.DataFrame) and not df.empty
+
+
+class HedgedFetcher:
+    """
+    对冲请求执行器
+
+    - 按顺序启动数据源：第 i 个数据源在 i 倍对冲延迟后启动，前面的都已失败时立即启动
+    - 对冲延迟 = 主数据源延迟的 percentile 分位数（样本不足时用 default_delay）
+    - 返回第一个非空结果；落后的请求不中断，成功返回后仍计入延迟统计（失败不计入）
+    - 每个请求占用所属数据源的在途名额（source_slot），对冲线程池中的请求同样受上限约束
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[Tuple[str, Callable[..., pd.DataFrame]]],
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        default_delay: float = DEFAULT_HEDGE_DELAY,
+        min_delay: float = DEFAULT_MIN_HEDGE_DELAY,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        max_workers: int = DEFAULT_HEDGE_WORKERS
+    ):
+        """
+        Args:
+            sources: [(数据源名称, 获取函数)]，按优先级排列；获取函数返回已标准化的DataFrame
+            percentile: 以主数据源延迟的该分位数作为对冲延迟（0-100）
+            default_delay: 样本不足时的对冲延迟（秒）
+            min_delay: 对冲延迟下限（秒）
+            min_samples: 使用分位数前至少需要的样本数
+            max_workers: 对冲线程池大小（与共享线程池分开，避免嵌套提交时互相等待）
+        """
+        self.sources = list(sources)
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self.latency: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name, _ in self.sources}
+        self.wins: Dict[str, int] = {name: 0 for name, _ in self.sources}
+        self.errors: Dict[str, int] = {name: 0 for name, _ in self.sources}
+        self.hedges = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def configure(self, **options) -> None:
+        """更新参数（None 值忽略）"""
+        for name, value in options.items():
+            if value is not None:
+                setattr(self, name, value)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="zuwa-hedge"
+                    )
+        return self._executor
+
+    def hedge_delay(self) -> float:
+        """启动下一个数据源前的等待时间（秒）"""
+        if not self.sources:
+            return self.default_delay
+        histogram = self.latency[self.sources[0][0]]
+        if histogram.count < self.min_samples:
+            return max(self.min_delay, self.default_delay)
+        return max(self.min_delay, histogram.percentile(self.percentile))
+
+    def _call(self, index: int, args: tuple, kwargs: dict) -> Optional[pd.DataFrame]:
+        """
+        调用一个数据源；只有返回有效数据的调用计入延迟统计（快速失败会压低对冲延迟）
+
+        请求期间占用该数据源的在途名额（configure_source_limits），落后的请求返回前也不释放；
+        延迟从拿到名额后开始计时，不含排队时间
+        """
+        name, func = self.sources[index]
+        with source_slot(name):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    self.errors[name] += 1
+                print(f"[{name}] 获取数据失败: {e}")
+                return None
+            elapsed = time.perf_counter() - start
+        if _valid(result):
+            self.latency[name].record(elapsed)
+        return result
+
+    def fetch_from(self, name: str, *args, **kwargs) -> pd.DataFrame:
+        """
+        只向指定数据源请求（不对冲），用于必须与已有数据同一口径的增量下载
+
+        Returns:
+            数据，失败或返回空表时为空表
+        """
+        index = next(i for i, (source, _) in enumerate(self.sources) if source == name)
+        result = self._call(index, args, kwargs)
+        if not _valid(result):
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+        with self._lock:
+            self.wins[name] += 1
+        annotate(winner=name, hedged=False)
+        return result
+
+    def fetch(self, *args, **kwargs) -> Tuple[pd.DataFrame, Optional[str]]:
+        """
+        对冲获取
+
+        Returns:
+            (数据, 数据源名称)；全部失败时返回 (空表, None)
+        """
+        if not self.sources:
+            return pd.DataFrame(columns=PRICE_COLUMNS), None
+
+        pool = self._pool()
+        delay = self.hedge_delay()
+        start = time.monotonic()
+        running: Dict[Any, int] = {}
+        launched: List[int] = []
+
+        def launch() -> None:
+            index = len(launched)
+            launched.append(index)
+            running[pool.submit(self._call, index, args, kwargs)] = index
+
+        launch()
+        while running or len(launched) < len(self.sources):
+            if not running:
+                # 已启动的都失败了，立即启动下一个
+                launch()
+                continue
+
+            timeout = None
+            if len(launched) < len(self.sources):
+                timeout = max(0.0, start + delay * len(launched) - time.monotonic())
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = running.pop(future)
+                result = future.result()
+                if _valid(result):
+                    name = self.sources[index][0]
+                    with self._lock:
+                        self.wins[name] += 1
+                    # 记录在当前 span（如价格库同步）上：实际返回数据的数据源
+                    annotate(winner=name, hedged=len(launched) > 1)
+                    return result, name
+
+            if not done and len(launched) < len(self.sources):
+                # 超过对冲延迟仍未返回，启动备用数据源
+                with self._lock:
+                    self.hedges += 1
+                launch()
+
+        return pd.DataFrame(columns=PRICE_COLUMNS), None
+
+    def stats(self) -> Dict[str, Any]:
+        """各数据源的延迟、胜出与失败次数"""
+        return {
+            "hedge_delay": round(self.hedge_delay(), 4),
+            "hedges": self.hedges,
+            "sources": {
+                name: {**self.latency[name].to_dict(), "wins": self.wins[name], "errors": self.errors[name]}
+                for name, _ in self.sources
+            },
+        }
+
+
+def normalize_tushare_daily(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    把 Tushare 日线（daily / pro_bar）转换为标准列
+
+    vol 单位为手（与AKShare一致），amount 单位为千元，换算为元；
+    Tushare 日线不含换手率，该列为 NaN
+
+    Returns:
+        列为 PRICE_COLUMNS、按日期升序的DataFrame，date 为 YYYY-MM-DD 字符串
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+
+    column = lambda name: pd.to_numeric(df[name], errors='coerce') if name in df.columns \
+        else pd.Series(np.nan, index=df.index)
+    trade_date = df['trade_date'].astype(str).str.replace('-', '').str[:8]
+    high, low, pre_close = column('high'), column('low'), column('pre_close')
+
+    out = pd.DataFrame({
+        'date': trade_date.str[:4] + '-' + trade_date.str[4:6] + '-' + trade_date.str[6:8],
+        'open': column('open'),
+        'close': column('close'),
+        'high': high,
+        'low': low,
+        'volume': column('vol'),
+        'turnover': column('amount') * 1000,
+        'amplitude': ((high - low) / pre_close * 100).round(2),
+        'pct_change': column('pct_chg'),
+        'change_amount': column('change'),
+        'turnover_rate': np.nan,
+    })
+    for col in NUMERIC_COLUMNS:
+        out[col] = out[col].astype(float)
+
+    return out[PRICE_COLUMNS].sort_values('date').drop_duplicates('date', keep='last').reset_index(drop=True)
+
+
+_tushare_client = None
+
+def _fetch_tushare_daily(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """使用Tushare下载前复权日线（未配置 TUSHARE_TOKEN 时返回空表）"""
+    global _tushare_client
+    if _tushare_client is None:
+        from src.data.data_client import TushareClient
+        _tushare_client = TushareClient()
+    return _tushare_client.get_adjusted_daily(symbol, start_date, end_date)
+
+
+# 日线数据源：名称 -> 返回标准列的获取函数
+DAILY_SOURCES: Dict[str, Callable[[str, str, str], pd.DataFrame]] = {
+    "akshare": lambda symbol, start, end: normalize_akshare_daily(_fetch_akshare_daily(symbol, start, end)),
+    "tushare": lambda symbol, start, end: normalize_tushare_daily(_fetch_tushare_daily(symbol, start, end)),
+}
+
+
+# 全局日线对冲实例
+_daily_fetcher = None
+
+def get_daily_fetcher(sources: Optional[List[str]] = None, **options) -> HedgedFetcher:
+    """
+    获取全局日线对冲执行器
+
+    Args:
+        sources: 可选，数据源优先级，如 ["akshare", "tushare"]（重新创建执行器）
+        **options: 可选，更新 percentile / default_delay / min_delay / min_samples
+    """
+    global _daily_fetcher
+    if _daily_fetcher is None or sources:
+        names = [s for s in (sources or ["akshare", "tushare"]) if s in DAILY_SOURCES]
+        _daily_fetcher = HedgedFetcher([(name, DAILY_SOURCES[name]) for name in names])
+    if options:
+        _daily_fetcher.configure(**options)
+    return _daily_fetcher
+
+
+def fetch_daily(symbol: str, start_date: str, end_date: str, source: Optional[str] = None) -> pd.DataFrame:
+    """
+    对冲获取前复权日线（标准列），日期格式 YYYYMMDD
+
+    各数据源的前复权口径不同（AKShare 从价格中扣除分红，Tushare 按复权因子等比缩放），
+    结果的 attrs["source"] 记录实际数据源
+
+    Args:
+        source: 可选，只从该数据源获取（未配置该数据源时仍对冲获取）
+    """
+    fetcher = get_daily_fetcher()
+    if source in fetcher.latency:
+        df = fetcher.fetch_from(source, symbol, start_date, end_date)
+    else:
+        df, source = fetcher.fetch(symbol, start_date, end_date)
+    if source is not None and not df.empty:
+        df.attrs["source"] = source
+    return df
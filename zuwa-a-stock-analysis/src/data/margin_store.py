@@ -0,0 +1,173 @@
+"""
+融资融券本地库 - 按交易日同步沪深两市融资融券明细，按股票代码索引
+
+两市明细表每天只下载一次并落盘；资金分析、散户情绪和高级分析共用，
+既可查询单日数据，也可取N日序列计算趋势
+"""
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.daily_market import DailyMarketStore
+from src.data.storage import cache_root
+from src.utils.lazy import lazy_import
+
+# 默认保留的历史长度（自然日），覆盖20个交易日的变化率
+DEFAULT_MARGIN_DAYS = 35
+
+MARGIN_COLUMNS = ['date', 'code', 'name', 'margin_balance', 'margin_buy', 'margin_repay',
+                  'short_volume', 'short_balance', 'total_balance']
+
+# 交易所明细列名 -> 标准列名（上交所：标的证券代码；深交所：证券代码）
+AKSHARE_MARGIN_COLUMNS = {
+    '标的证券代码': 'code', '证券代码': 'code',
+    '标的证券简称': 'name', '证券简称': 'name',
+    '融资余额': 'margin_balance',
+    '融资买入额': 'margin_buy',
+    '融资偿还额': 'margin_repay',
+    '融券余量': 'short_volume',
+    '融券余额': 'short_balance',
+    '融资融券余额': 'total_balance',
+}
+
+# 金额列（元，换算为万元）
+AMOUNT_COLUMNS = ['margin_balance', 'margin_buy', 'margin_repay', 'short_balance', 'total_balance']
+
+
+def normalize_margin(df: pd.DataFrame, day: date) -> pd.DataFrame:
+    """
+    把交易所融资融券明细转换为标准列
+
+    金额单位由元换算为万元；上交所明细没有融券余额和两融余额，
+    两融余额缺失时按 融资余额 + 融券余额 补齐
+
+    Returns:
+        列为 MARGIN_COLUMNS 的DataFrame，date 为 YYYY-MM-DD 字符串
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=MARGIN_COLUMNS)
+
+    out = pd.DataFrame(index=df.index)
+    for old, new in AKSHARE_MARGIN_COLUMNS.items():
+        if old in df.columns and new not in out.columns:
+            out[new] = df[old]
+    if 'code' not in out.columns:
+        return pd.DataFrame(columns=MARGIN_COLUMNS)
+    for col in MARGIN_COLUMNS:
+        if col not in out.columns:
+            out[col] = None if col == 'name' else np.nan
+
+    out['date'] = day.isoformat()
+    out['code'] = out['code'].astype(str).str.zfill(6)
+    for col in MARGIN_COLUMNS[3:]:
+        out[col] = pd.to_numeric(out[col], errors='coerce').astype(float)
+    out[AMOUNT_COLUMNS] = out[AMOUNT_COLUMNS] / 1e4
+    out['total_balance'] = out['total_balance'].fillna(out['margin_balance'] + out['short_balance'].fillna(0))
+
+    return out[MARGIN_COLUMNS].drop_duplicates('code').reset_index(drop=True)
+
+
+def _fetch_akshare_margin(day: str) -> List[pd.DataFrame]:
+    """使用AKShare下载某日沪深两市融资融券明细（日期格式 YYYYMMDD）"""
+    ak = lazy_import("akshare")
+    return [ak.stock_margin_detail_sse(date=day), ak.stock_margin_detail_szse(date=day)]
+
+
+def margin_trend(series: pd.DataFrame, column: str = 'margin_balance') -> Dict[str, Any]:
+    """
+    融资余额变化
+
+    Args:
+        series: MarginStore.series 的返回值（按日期升序）
+
+    Returns:
+        最新值、1日变化（万元）、5日/20日变化率（%），数据不足时变化为 0
+    """
+    values = series[column].dropna().to_numpy() if not series.empty else np.array([])
+    if len(values) == 0:
+        return {"current": 0, "change_1d": 0, "change_5d": 0, "change_20d": 0}
+
+    def pct(n: int) -> float:
+        if len(values) <= n or not values[-1 - n]:
+            return 0
+        return round((values[-1] / values[-1 - n] - 1) * 100, 2)
+
+    return {
+        "current": round(float(values[-1]), 2),
+        "change_1d": round(float(values[-1] - values[-2]), 2) if len(values) > 1 else 0,
+        "change_5d": pct(5),
+        "change_20d": pct(20),
+    }
+
+
+class MarginStore(DailyMarketStore):
+    """
+    融资融券本地库
+
+    - 每个交易日一个文件（两市合并）；交易所于次一交易日公布，未公布时稍后重试
+    - 内存中维护 代码 -> 每日记录 的索引；金额单位万元
+    """
+
+    COLUMNS = MARGIN_COLUMNS
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        history_days: int = DEFAULT_MARGIN_DAYS,
+        fetcher: Optional[Callable[[str], List[pd.DataFrame]]] = None
+    ):
+        """
+        Args:
+            root: 存储目录，默认 <缓存目录>/margin
+            history_days: 同步与索引的历史长度（自然日）
+            fetcher: 下载函数 fetcher(date) -> [上交所明细, 深交所明细]，日期格式 YYYYMMDD
+        """
+        super().__init__(Path(root) if root else cache_root() / "margin", history_days)
+        self._fetcher = fetcher or _fetch_akshare_margin
+
+    def _fetch_days(self, days: List[date]) -> Dict[date, Optional[pd.DataFrame]]:
+        # 交易所接口按日查询：逐日下载；出错时停止，未下载的交易日下次同步再试
+        frames: Dict[date, Optional[pd.DataFrame]] = {}
+        for day in days:
+            try:
+                tables = self._fetcher(day.strftime("%Y%m%d"))
+            except Exception as e:
+                print(f"下载融资融券明细失败 {day}: {e}")
+                break
+            self.requests += 1
+            parts = [normalize_margin(t, day) for t in tables if t is not None and not t.empty]
+            frames[day] = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=MARGIN_COLUMNS)
+        return frames
+
+    def trend(self, code: str, days: Optional[int] = None) -> Dict[str, Any]:
+        """某只股票的融资余额变化（见 margin_trend），附最新一日明细"""
+        series = self.series(code, days)
+        result = margin_trend(series)
+        latest = series.iloc[-1].to_dict() if not series.empty else {}
+        result.update({
+            "date": latest.get("date"),
+            "margin_buy": latest.get("margin_buy"),
+            "short_balance": latest.get("short_balance"),
+        })
+        return result
+
+
+# 全局融资融券库实例
+_margin_store = None
+
+def get_margin_store(history_days: Optional[int] = None) -> MarginStore:
+    """
+    获取全局融资融券库实例
+
+    Args:
+        history_days: 可选，更新历史长度（自然日）
+    """
+    global _margin_store
+    if _margin_store is None:
+        _margin_store = MarginStore(history_days=history_days or DEFAULT_MARGIN_DAYS)
+    elif history_days:
+        _margin_store.history_days = history_days
+    return _margin_store
@@ -0,0 +1,170 @@
+"""
+全市场行情快照 - 进程内共享，按TTL缓存，按代码索引
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.concurrency import data_source
+from src.utils.tracing import annotate
+from src.utils.lazy import lazy_import
+
+# 默认快照有效期（秒）
+DEFAULT_SPOT_TTL = 60
+# 下载失败或返回空表后，这段时间内不再重试（秒），沿用旧快照或返回空结果
+FAILURE_RETRY_SECONDS = 10
+
+
+class MarketSnapshot:
+    """
+    全市场A股实时行情快照
+
+    每个TTL周期只调用一次 ak.stock_zh_a_spot_em()，
+    以列式数组保存整张表，并按"代码"建立索引，单只股票查询为O(1)
+    """
+
+    def __init__(self, ttl: float = DEFAULT_SPOT_TTL, fetcher: Optional[Callable[[], pd.DataFrame]] = None):
+        """
+        Args:
+            ttl: 快照有效期（秒）
+            fetcher: 获取全市场行情的函数，默认使用AKShare
+        """
+        self.ttl = ttl
+        self._fetcher = fetcher or self._fetch_akshare
+        self._columns: Dict[str, np.ndarray] = {}
+        self._index: Dict[str, int] = {}
+        self._fetched_at = 0.0
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.fetch_count = 0
+
+    @staticmethod
+    def _fetch_akshare() -> pd.DataFrame:
+        """使用AKShare获取全市场实时行情"""
+        ak = lazy_import("akshare")
+        return ak.stock_zh_a_spot_em()
+
+    def is_fresh(self) -> bool:
+        """快照是否仍在有效期内"""
+        return bool(self._index) and (time.monotonic() - self._fetched_at) < self.ttl
+
+    def _recently_failed(self) -> bool:
+        """上次下载失败是否仍在退避期内"""
+        return self._failed_at is not None and (time.monotonic() - self._failed_at) < FAILURE_RETRY_SECONDS
+
+    @data_source("akshare")
+    def refresh(self, force: bool = False) -> bool:
+        """
+        刷新快照，并发调用时只有一个线程真正下载
+
+        下载异常或返回空表时不抛出，沿用已过期的旧快照（没有则视为不可用），
+        并在 FAILURE_RETRY_SECONDS 内不再重试，避免故障期间每次查询都下载全市场
+
+        Returns:
+            是否拿到了可用快照
+        """
+        if not force and self.is_fresh():
+            annotate(cache="hit")
+            return True
+        if not force and self._recently_failed():
+            annotate(cache="stale")
+            return bool(self._index)
+
+        with self._lock:
+            if not force and self.is_fresh():
+                annotate(cache="hit")
+                return True
+            if not force and self._recently_failed():
+                annotate(cache="stale")
+                return bool(self._index)
+
+            annotate(cache="miss")
+            self.fetch_count += 1
+            try:
+                df = self._fetcher()
+            except Exception as e:
+                print(f"获取全市场行情失败: {e}")
+                df = None
+            if df is None or df.empty or '代码' not in df.columns:
+                self._failed_at = time.monotonic()
+                return bool(self._index)
+
+            codes = df['代码'].astype(str).to_numpy()
+            self._columns = {col: df[col].to_numpy() for col in df.columns}
+            self._index = {code: i for i, code in enumerate(codes)}
+            self._fetched_at = time.monotonic()
+            self._failed_at = None
+            return True
+
+    @data_source("akshare")
+    def get(self, code: str) -> Dict[str, Any]:
+        """
+        获取单只股票的行情
+
+        Args:
+            code: 6位股票代码
+
+        Returns:
+            行情字典，未找到时返回空字典
+        """
+        if not self.refresh():
+            return {}
+
+        i = self._index.get(str(code))
+        if i is None:
+            return {}
+        return {col: _to_python(values[i]) for col, values in self._columns.items()}
+
+    @data_source("akshare")
+    def get_many(self, codes: Iterable[str]) -> pd.DataFrame:
+        """批量获取多只股票的行情，按传入顺序返回"""
+        if not self.refresh():
+            return pd.DataFrame()
+
+        rows = [self._index[c] for c in map(str, codes) if c in self._index]
+        return pd.DataFrame({col: values[rows] for col, values in self._columns.items()})
+
+    def column(self, name: str) -> np.ndarray:
+        """获取整列数据（与 codes 顺序一致）"""
+        if not self.refresh():
+            return np.array([])
+        return self._columns.get(name, np.array([]))
+
+    @property
+    def codes(self) -> List[str]:
+        """快照中的全部股票代码"""
+        self.refresh()
+        return list(self._index)
+
+    @data_source("akshare")
+    def to_frame(self) -> pd.DataFrame:
+        """以DataFrame形式返回整个快照"""
+        if not self.refresh():
+            return pd.DataFrame()
+        return pd.DataFrame(self._columns)
+
+
+def _to_python(value: Any) -> Any:
+    """numpy标量转换为Python原生类型"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# 全局快照实例
+_market_snapshot = None
+
+def get_market_snapshot(ttl: Optional[float] = None) -> MarketSnapshot:
+    """
+    获取全局行情快照实例
+
+    Args:
+        ttl: 可选，更新快照有效期（秒）
+    """
+    global _market_snapshot
+    if _market_snapshot is None:
+        _market_snapshot = MarketSnapshot(ttl if ttl is not None else DEFAULT_SPOT_TTL)
+    elif ttl is not None:
+        _market_snapshot.ttl = ttl
+    return _market_snapshot
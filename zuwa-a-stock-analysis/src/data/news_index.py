@@ -0,0 +1,275 @@
+"""
+财经新闻索引 - 进程内共享，按TTL增量拉取，按股票索引
+
+新闻流每个TTL周期只下载一次；所有关注股票的名称和代码构成一个 Aho-Corasick 自动机，
+每条新闻只扫描一遍即可得到它提及的全部股票
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from src.utils.concurrency import data_source
+from src.utils.lazy import lazy_import
+
+# 默认新闻流有效期（秒）与保留的新闻条数
+DEFAULT_NEWS_TTL = 300
+DEFAULT_MAX_NEWS = 5000
+
+# 名称短于该长度时不作为匹配词（避免单字误匹配）
+MIN_PATTERN_LENGTH = 2
+
+
+class AhoCorasick:
+    """多模式字符串匹配自动机，一次扫描找出文本中出现的全部模式"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._keys: List[Set[str]] = [set()]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+        self._built = True
+
+    def __len__(self) -> int:
+        return sum(1 for keys in self._keys if keys)
+
+    def add(self, pattern: str, key: str) -> None:
+        """添加模式，匹配时返回 key"""
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._keys.append(set())
+            node = nxt
+        self._keys[node].add(key)
+        self._built = False
+
+    def build(self) -> None:
+        """计算失败指针（添加模式后首次匹配时自动调用）"""
+        self._fail = [0] * len(self._goto)
+        self._out = [set(keys) for keys in self._keys]
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] |= self._out[self._fail[nxt]]
+                queue.append(nxt)
+        self._built = True
+
+    def find(self, text: str) -> Set[str]:
+        """文本中出现的全部模式对应的 key"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[str] = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+def _format_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    content = str(row.get('内容', '') or '')
+    return {
+        "title": row.get('标题', ''),
+        "summary": content[:200] + "..." if len(content) > 200 else content,
+        "url": row.get('链接', ''),
+        "source": row.get('来源', ''),
+        "date": str(row.get('发布时间', '')),
+    }
+
+
+class NewsIndex:
+    """
+    按股票索引的新闻流
+
+    - 每个TTL周期只调用一次 ak.stock_news_em()，只为新出现的新闻建立索引
+    - 关注股票（名称 + 代码）在自动机中匹配，新增关注时只对已有新闻补扫新模式
+    - get(代码) 直接返回该股票的新闻列表
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_NEWS_TTL,
+        fetcher: Optional[Callable[[], pd.DataFrame]] = None,
+        max_items: int = DEFAULT_MAX_NEWS
+    ):
+        """
+        Args:
+            ttl: 新闻流有效期（秒）
+            fetcher: 获取新闻流的函数，默认使用AKShare
+            max_items: 最多保留的新闻条数，超出时淘汰最早的
+        """
+        self.ttl = ttl
+        self.max_items = max_items
+        self._fetcher = fetcher or self._fetch_akshare
+        self._automaton = AhoCorasick()
+        self._patterns: Dict[str, Set[str]] = {}
+        # 新闻序号 -> 新闻；股票代码 -> 新闻序号列表
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._texts: Dict[int, str] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self._seen: Dict[Tuple[str, str], int] = {}
+        self._next_id = 0
+        self._fetched_at = 0.0
+        self._lock = threading.RLock()
+        self.fetch_count = 0
+        self.scanned = 0
+
+    @staticmethod
+    def _fetch_akshare() -> pd.DataFrame:
+        """使用AKShare获取财经新闻"""
+        ak = lazy_import("akshare")
+        return ak.stock_news_em()
+
+    def is_fresh(self) -> bool:
+        """新闻流是否仍在有效期内"""
+        return self.fetch_count > 0 and (time.monotonic() - self._fetched_at) < self.ttl
+
+    def watch(self, code: str, name: str = "") -> None:
+        """关注一只股票（名称和代码都作为匹配词）"""
+        self.watch_many([(code, name)])
+
+    def watch_many(self, symbols: Iterable[Tuple[str, str]]) -> None:
+        """
+        批量关注股票
+
+        Args:
+            symbols: [(股票代码, 股票名称), ...]
+        """
+        symbols = [(str(code), name) for code, name in symbols]
+        with self._lock:
+            added = AhoCorasick()
+            for code, name in symbols:
+                known = self._patterns.setdefault(code, set())
+                for pattern in {code, str(name or "").strip()}:
+                    if len(pattern) < MIN_PATTERN_LENGTH or pattern in known:
+                        continue
+                    known.add(pattern)
+                    self._automaton.add(pattern, code)
+                    added.add(pattern, code)
+                self._postings.setdefault(code, [])
+
+            # 已索引的新闻只补扫新增的匹配词
+            if len(added) and self._items:
+                for item_id, text in self._texts.items():
+                    for code in added.find(text):
+                        if item_id not in self._postings[code]:
+                            self._postings[code].append(item_id)
+                for code in {code for code, _ in symbols}:
+                    self._postings[code].sort()
+
+    @data_source("akshare")
+    def refresh(self, force: bool = False) -> bool:
+        """
+        拉取新闻流并为新出现的新闻建立索引，并发调用时只有一个线程真正下载
+
+        Returns:
+            是否有可用的新闻
+        """
+        if not force and self.is_fresh():
+            return bool(self._items)
+
+        with self._lock:
+            if not force and self.is_fresh():
+                return bool(self._items)
+
+            df = self._fetcher()
+            self.fetch_count += 1
+            self._fetched_at = time.monotonic()
+            if df is None or df.empty or '标题' not in df.columns:
+                return bool(self._items)
+
+            self.add_items(df.to_dict('records'))
+            return bool(self._items)
+
+    def add_items(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        增量加入新闻（已存在的按 标题+发布时间 去重）
+
+        Returns:
+            新加入的条数
+        """
+        added = 0
+        with self._lock:
+            # 新闻流按时间倒序，倒过来加入使序号随时间递增
+            for row in reversed(list(rows)):
+                key = (str(row.get('标题', '')), str(row.get('发布时间', '')))
+                if key in self._seen:
+                    continue
+                item_id = self._next_id
+                self._next_id += 1
+                self._seen[key] = item_id
+                self._items[item_id] = _format_item(row)
+                text = f"{row.get('标题', '')}\n{row.get('内容', '') or ''}"
+                self._texts[item_id] = text
+                for code in self._automaton.find(text):
+                    self._postings[code].append(item_id)
+                added += 1
+            self.scanned += added
+            self._trim()
+        return added
+
+    def _trim(self) -> None:
+        excess = len(self._items) - self.max_items
+        if excess <= 0:
+            return
+        cutoff = sorted(self._items)[excess]
+        for item_id in [i for i in self._items if i < cutoff]:
+            item = self._items.pop(item_id)
+            self._texts.pop(item_id, None)
+            self._seen.pop((str(item['title']), item['date']), None)
+        for code, ids in self._postings.items():
+            self._postings[code] = [i for i in ids if i >= cutoff]
+
+    def get(self, code: str, num: int = 5) -> List[Dict[str, Any]]:
+        """
+        获取某只股票的最新新闻（需先 watch）
+
+        Args:
+            code: 6位股票代码
+            num: 最多返回的条数
+        """
+        ids = self._postings.get(str(code), [])
+        return [dict(self._items[i]) for i in reversed(ids[-num:]) if i in self._items]
+
+    def stats(self) -> Dict[str, int]:
+        """索引统计"""
+        return {
+            "items": len(self._items),
+            "symbols": len(self._patterns),
+            "fetches": self.fetch_count,
+            "scanned": self.scanned,
+        }
+
+
+# 全局新闻索引实例
+_news_index = None
+
+def get_news_index(ttl: Optional[float] = None) -> NewsIndex:
+    """
+    获取全局新闻索引实例
+
+    Args:
+        ttl: 可选，更新新闻流有效期（秒）
+    """
+    global _news_index
+    if _news_index is None:
+        _news_index = NewsIndex(ttl if ttl is not None else DEFAULT_NEWS_TTL)
+    elif ttl is not None:
+        _news_index.ttl = ttl
+    return _news_index
@@ -0,0 +1,278 @@
+"""
+本地日线价格库 - 按股票分文件存储前复权日线，增量同步
+"""
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.storage import cache_root, delete_frame, frame_exists, read_frame, write_frame
+from src.utils.concurrency import data_source
+from src.utils.lazy import lazy_import
+from src.utils.tracing import annotate
+from src.utils.trade_calendar import is_trading_session, last_complete_trading_day
+
+# AKShare日线中文列名 -> 标准列名
+AKSHARE_DAILY_COLUMNS = {
+    '日期': 'date',
+    '开盘': 'open',
+    '收盘': 'close',
+    '最高': 'high',
+    '最低': 'low',
+    '成交量': 'volume',
+    '成交额': 'turnover',
+    '振幅': 'amplitude',
+    '涨跌幅': 'pct_change',
+    '涨跌额': 'change_amount',
+    '换手率': 'turnover_rate',
+}
+
+PRICE_COLUMNS = list(AKSHARE_DAILY_COLUMNS.values())
+NUMERIC_COLUMNS = [c for c in PRICE_COLUMNS if c != 'date']
+
+# 首次同步时下载的历史长度（自然日）
+DEFAULT_HISTORY_DAYS = 750
+
+# 复权因子变化检测的相对容差
+ADJUST_TOLERANCE = 1e-4
+
+
+def normalize_akshare_daily(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    把 ak.stock_zh_a_hist 的返回值转换为标准列（已是标准列时只做类型整理）
+
+    Returns:
+        列为 PRICE_COLUMNS、按日期升序的DataFrame，date 为 YYYY-MM-DD 字符串
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+
+    # 已是标准列（如对冲请求的结果）时原样取用
+    out = pd.DataFrame({
+        new: df[old] if old in df.columns else df[new]
+        for old, new in AKSHARE_DAILY_COLUMNS.items() if old in df.columns or new in df.columns
+    })
+    for col in PRICE_COLUMNS:
+        if col not in out.columns:
+            out[col] = np.nan
+    out['date'] = out['date'].astype(str).str[:10]
+    for col in NUMERIC_COLUMNS:
+        out[col] = pd.to_numeric(out[col], errors='coerce')
+
+    return out[PRICE_COLUMNS].sort_values('date').drop_duplicates('date', keep='last').reset_index(drop=True)
+
+
+def _fetch_akshare_daily(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """使用AKShare下载前复权日线"""
+    ak = lazy_import("akshare")
+    return ak.stock_zh_a_hist(
+        symbol=symbol,
+        period="daily",
+        start_date=start_date,
+        end_date=end_date,
+        adjust="qfq"
+    )
+
+
+def _fetch_hedged_daily(symbol: str, start_date: str, end_date: str, source: Optional[str] = None) -> pd.DataFrame:
+    """AKShare / Tushare 对冲下载前复权日线，attrs["source"] 为实际数据源"""
+    from src.data.hedged import fetch_daily
+    return fetch_daily(symbol, start_date, end_date, source=source)
+
+
+class PriceStore:
+    """
+    本地日线价格库
+
+    - 每只股票一个文件（Arrow IPC，内存映射读取；无 pyarrow 时为 pickle）
+    - 每次同步只下载最后一根已存K线之后的数据，并用重叠的那根K线校验复权因子
+    - 复权因子变化（除权除息）时自动整段重建
+    - 各数据源的前复权口径不同：文件的 attrs["source"] 记录数据源，增量只向同一数据源请求，
+      该数据源不再可用时整段改用新数据源重建，不同口径的K线不会拼接在一起
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        history_days: int = DEFAULT_HISTORY_DAYS,
+        fetcher: Optional[Callable[[str, str, str], pd.DataFrame]] = None
+    ):
+        """
+        Args:
+            root: 存储目录，默认 <缓存目录>/prices
+            history_days: 首次同步或重建时下载的历史长度（自然日）
+            fetcher: 下载函数 fetcher(symbol, start_date, end_date[, source])，日期格式 YYYYMMDD，
+                返回值的 attrs["source"] 为数据源；已有数据记录了数据源时以 source 参数指定只向该数据源请求；
+                默认对冲请求 AKShare 与 Tushare
+        """
+        self.root = Path(root) if root else cache_root() / "prices"
+        self.history_days = history_days
+        self._fetcher = fetcher or _fetch_hedged_daily
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.rows_downloaded = 0
+        self.requests = 0
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / symbol
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _download(self, symbol: str, start: datetime, end: datetime, source: Optional[str] = None) -> pd.DataFrame:
+        args = (symbol, start.strftime("%Y%m%d"), end.strftime("%Y%m%d"))
+        raw = self._fetcher(*args, source=source) if source else self._fetcher(*args)
+        df = normalize_akshare_daily(raw)
+        if raw is not None and raw.attrs.get("source"):
+            df.attrs["source"] = raw.attrs["source"]
+        self.requests += 1
+        self.rows_downloaded += len(df)
+        return df
+
+    def symbols(self) -> List[str]:
+        """已入库的股票代码"""
+        if not self.root.exists():
+            return []
+        return sorted({p.name.split('.')[0] for p in self.root.iterdir() if not p.name.endswith('.tmp')})
+
+    def load(self, symbol: str, days: Optional[int] = None) -> pd.DataFrame:
+        """
+        读取本地数据（不访问网络）
+
+        Args:
+            symbol: 6位股票代码
+            days: 只返回最近 days 个自然日
+        """
+        df = read_frame(self._path(symbol))
+        if df.empty or days is None:
+            return df
+        start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        return df[df['date'] >= start].reset_index(drop=True)
+
+    def last_date(self, symbol: str) -> Optional[str]:
+        """本地最后一根K线的日期"""
+        df = read_frame(self._path(symbol))
+        return None if df.empty else str(df['date'].iloc[-1])
+
+    def is_fresh(self, symbol: str, now: Optional[datetime] = None) -> bool:
+        """本地数据是否已覆盖最近一个已收盘交易日"""
+        last = self.last_date(symbol)
+        return last is not None and last >= last_complete_trading_day(now).isoformat()
+
+    @data_source("akshare")
+    def sync(self, symbol: str, days: Optional[int] = None, now: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        增量同步并返回数据
+
+        已收盘的K线写入本地；盘中未定型的当日K线只出现在返回值中，不落盘
+
+        Args:
+            symbol: 6位股票代码
+            days: 只返回最近 days 个自然日
+            now: 当前时间（测试用）
+        """
+        now = now or datetime.now()
+        complete_day = last_complete_trading_day(now).isoformat()
+
+        with self._lock(symbol):
+            stored = read_frame(self._path(symbol))
+            if stored.empty:
+                annotate(cache="miss")
+                return self._slice(self._rebuild(symbol, now, complete_day), days, now)
+
+            # 已覆盖最近收盘日，且不在盘中：无需访问网络
+            last = str(stored['date'].iloc[-1])
+            if last >= complete_day and not is_trading_session(now):
+                annotate(cache="hit")
+                return self._slice(stored, days, now)
+            annotate(cache="miss")
+
+            # 从最后一根已存K线开始向同一数据源下载，用重叠部分校验复权因子
+            source = stored.attrs.get("source")
+            fresh = self._download(symbol, datetime.strptime(last, "%Y-%m-%d"), now, source)
+            if fresh.empty:
+                return self._slice(stored, days, now)
+            if fresh.attrs.get("source") != source:
+                # 原数据源已不可用（或旧文件未记录数据源）：口径不同，不能拼接
+                rebuilt = self._rebuild(symbol, now, complete_day)
+                return self._slice(stored if rebuilt.empty else rebuilt, days, now)
+
+            overlap = fresh[fresh['date'] == last]
+            if not overlap.empty and not self._same_adjustment(stored.iloc[-1], overlap.iloc[0]):
+                return self._slice(self._rebuild(symbol, now, complete_day), days, now)
+
+            new_rows = fresh[fresh['date'] > last]
+            complete = new_rows[new_rows['date'] <= complete_day]
+            merged = pd.concat([stored, complete], ignore_index=True) if not complete.empty else stored
+            if not complete.empty:
+                # 旧版 pandas 的 concat 不传递 attrs，显式记录数据源
+                merged.attrs["source"] = source
+                write_frame(merged, self._path(symbol))
+
+            # 盘中K线只返回不落盘
+            pending = new_rows[new_rows['date'] > complete_day]
+            if not pending.empty:
+                merged = pd.concat([merged, pending], ignore_index=True)
+                merged.attrs["source"] = source
+            return self._slice(merged, days, now)
+
+    @data_source("akshare")
+    def repair(self, symbol: str, now: Optional[datetime] = None) -> pd.DataFrame:
+        """整段重新下载（复权因子变化或数据损坏时使用）"""
+        now = now or datetime.now()
+        with self._lock(symbol):
+            return self._rebuild(symbol, now, last_complete_trading_day(now).isoformat())
+
+    def remove(self, symbol: str) -> None:
+        """删除某只股票的本地数据"""
+        delete_frame(self._path(symbol))
+
+    def has(self, symbol: str) -> bool:
+        """本地是否已有该股票"""
+        return frame_exists(self._path(symbol))
+
+    def _rebuild(self, symbol: str, now: datetime, complete_day: str) -> pd.DataFrame:
+        df = self._download(symbol, now - timedelta(days=self.history_days), now)
+        if df.empty:
+            return df
+        complete = df[df['date'] <= complete_day]
+        if not complete.empty:
+            complete.attrs["source"] = df.attrs.get("source")
+            write_frame(complete, self._path(symbol))
+        return df
+
+    @staticmethod
+    def _same_adjustment(stored_row: pd.Series, fresh_row: pd.Series) -> bool:
+        """同一交易日的前复权收盘价一致，说明复权因子未变"""
+        old, new = float(stored_row['close']), float(fresh_row['close'])
+        return abs(old - new) <= ADJUST_TOLERANCE * max(abs(old), abs(new), 1e-12)
+
+    @staticmethod
+    def _slice(df: pd.DataFrame, days: Optional[int], now: datetime) -> pd.DataFrame:
+        if df.empty or days is None:
+            return df
+        start = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+        return df[df['date'] >= start].reset_index(drop=True)
+
+
+# 全局价格库实例
+_price_store = None
+
+def get_price_store(root: Optional[str] = None, history_days: Optional[int] = None) -> PriceStore:
+    """
+    获取全局价格库实例
+
+    Args:
+        root: 可选，存储目录（仅首次创建时生效）
+        history_days: 可选，更新首次同步的历史长度
+    """
+    global _price_store
+    if _price_store is None:
+        _price_store = PriceStore(root, history_days or DEFAULT_HISTORY_DAYS)
+    elif history_days:
+        _price_store.history_days = history_days
+    return _price_store
@@ -0,0 +1,383 @@
+"""
+分析结果库 - 按 (股票代码, 交易日, 配置指纹) 保存完整分析结果
+
+SQLite（WAL模式）单文件数据库，保存首席决策与各Agent输出：
+- 同一交易日、同一配置重复分析时直接返回已保存的结果
+- 索引支持"每只股票最新结果"、"评级较前一交易日的变化"、"按综合评分取前N名"
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.data.storage import cache_root
+from src.utils.helpers import DateTimeEncoder
+from src.utils.trade_calendar import (
+    DAILY_DATA_READY, is_trading_session, last_complete_trading_day, previous_trading_day
+)
+
+# 影响分析结论的配置节，配置指纹只由这些节计算
+ANALYSIS_CONFIG_SECTIONS = ("agents", "weights", "thresholds")
+
+# 盘中结果的有效期（秒）
+DEFAULT_INTRADAY_TTL = 1800
+
+# 结果格式变化时递增，旧结果随之失效
+RESULT_SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    symbol TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    name TEXT,
+    created REAL NOT NULL,
+    composite REAL,
+    rating TEXT,
+    signal TEXT,
+    confidence REAL,
+    summary TEXT,
+    result TEXT NOT NULL,
+    PRIMARY KEY (symbol, trade_date, config_hash)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_analyses_day_score
+    ON analyses (trade_date, config_hash, composite DESC);
+
+CREATE TABLE IF NOT EXISTS agent_outputs (
+    symbol TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    agent_name TEXT,
+    signal TEXT,
+    confidence REAL,
+    summary TEXT,
+    timestamp TEXT,
+    details TEXT,
+    PRIMARY KEY (symbol, trade_date, config_hash, agent)
+) WITHOUT ROWID;
+"""
+
+# 列表查询返回的列
+SUMMARY_COLUMNS = ["symbol", "name", "trade_date", "config_hash", "composite", "rating", "signal",
+                   "confidence", "created"]
+
+
+def config_hash(config: Optional[Dict[str, Any]], sections: Iterable[str] = ANALYSIS_CONFIG_SECTIONS) -> str:
+    """
+    计算配置指纹
+
+    只取影响分析结论的配置节（Agent参数、权重、阈值），
+    线程数、缓存有效期等运行参数变化不影响已保存的结果
+    """
+    config = config or {}
+    payload = json.dumps([RESULT_SCHEMA_VERSION, {key: config.get(key) for key in sections}],
+                         ensure_ascii=False, sort_keys=True, cls=DateTimeEncoder)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def result_window(
+    now: Optional[datetime] = None,
+    intraday_ttl: float = DEFAULT_INTRADAY_TTL
+) -> Tuple[date, Optional[float], Optional[float]]:
+    """
+    当前分析结果归属的交易日及有效条件
+
+    盘中结果归属当天，行情仍在变化，只在 intraday_ttl 内有效；
+    其余时间归属最近一个已收盘交易日，只认日线落地之后保存的结果
+
+    Returns:
+        (trade_date, max_age, not_before)，对应 ResultStore.get 的参数
+    """
+    now = now or datetime.now()
+    if is_trading_session(now):
+        return now.date(), intraday_ttl, None
+    day = last_complete_trading_day(now)
+    return day, None, datetime.combine(day, DAILY_DATA_READY).timestamp()
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, cls=DateTimeEncoder)
+
+
+class ResultStore:
+    """
+    分析结果库
+
+    每个线程使用独立连接；WAL模式下读写互不阻塞，
+    批量分析时多个线程同时写入由 busy_timeout 排队
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: 数据库文件，默认 <缓存目录>/results.db
+        """
+        self.path = Path(path) if path else cache_root() / "results.db"
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 连接 ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn: sqlite3.Connection):
+        """显式事务：BEGIN IMMEDIATE 先取写锁，避免并发升级锁时死锁"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # ---------- 读写 ----------
+
+    def put(self, result: Dict[str, Any], trade_date: date, config: str) -> None:
+        """
+        保存一次分析结果（失败结果不保存），同一键重复写入时覆盖
+
+        Args:
+            result: analyze_stock 返回结果
+            trade_date: 分析所用数据的交易日
+            config: 配置指纹
+        """
+        if "error" in result:
+            return
+
+        day = str(trade_date)[:10]
+        decision = result.get("final_decision", {})
+        details = decision.get("details", {})
+        outputs = result.get("agent_outputs", {})
+        # 首席决策中的Agent输出与 agent_outputs 重复，只在明细表保存一份
+        body = {k: v for k, v in result.items() if k != "agent_outputs"}
+        body["final_decision"] = {**decision, "details": {k: v for k, v in details.items() if k != "agent_outputs"}}
+
+        conn = self._connect()
+        with self._transaction(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (result["symbol"], day, config, result.get("name", ""), time.time(),
+                 details.get("composite_score"), details.get("rating"), decision.get("signal"),
+                 decision.get("confidence"), decision.get("summary"), _dumps(body))
+            )
+            conn.execute("DELETE FROM agent_outputs WHERE symbol = ? AND trade_date = ? AND config_hash = ?",
+                         (result["symbol"], day, config))
+            conn.executemany(
+                "INSERT INTO agent_outputs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(result["symbol"], day, config, key, output.get("agent_name"), output.get("signal"),
+                  output.get("confidence"), output.get("summary"), output.get("timestamp"),
+                  _dumps(output.get("details", {})))
+                 for key, output in outputs.items()]
+            )
+
+    def get(
+        self,
+        symbol: str,
+        trade_date: date,
+        config: str,
+        max_age: Optional[float] = None,
+        not_before: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        读取已保存的完整分析结果
+
+        Args:
+            max_age: 可选，结果保存时间超过该秒数视为过期（盘中行情仍在变化时使用）
+            not_before: 可选，早于该时间戳保存的结果视为过期（收盘前的盘中结果）
+
+        Returns:
+            与 analyze_stock 返回格式相同的结果，未命中时返回 None
+        """
+        day = str(trade_date)[:10]
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT created, result FROM analyses WHERE symbol = ? AND trade_date = ? AND config_hash = ?",
+            (symbol, day, config)
+        ).fetchone()
+        if (row is None
+                or (max_age is not None and time.time() - row["created"] > max_age)
+                or (not_before is not None and row["created"] < not_before)):
+            self.misses += 1
+            return None
+
+        result = json.loads(row["result"])
+        outputs = {}
+        for output in conn.execute(
+            "SELECT * FROM agent_outputs WHERE symbol = ? AND trade_date = ? AND config_hash = ?",
+            (symbol, day, config)
+        ):
+            outputs[output["agent"]] = {
+                "agent_name": output["agent_name"],
+                "signal": output["signal"],
+                "confidence": output["confidence"],
+                "summary": output["summary"],
+                "details": json.loads(output["details"]),
+                "timestamp": output["timestamp"],
+            }
+        result["agent_outputs"] = outputs
+        result["final_decision"]["details"]["agent_outputs"] = outputs
+        self.hits += 1
+        return result
+
+    # ---------- 查询 ----------
+
+    def _frame(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        rows = self._connect().execute(sql, params).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        return pd.DataFrame([dict(row) for row in rows])
+
+    def latest(self, symbols: Optional[Iterable[str]] = None, config: Optional[str] = None) -> pd.DataFrame:
+        """
+        每只股票最近一个交易日的结果
+
+        Args:
+            symbols: 可选，限定股票代码
+            config: 可选，限定配置指纹；不限定时同一交易日取最后保存的一条
+        """
+        where, params = [], []
+        if config:
+            where.append("config_hash = ?")
+            params.append(config)
+        if symbols is not None:
+            symbols = list(symbols)
+            where.append(f"symbol IN ({','.join('?' * len(symbols))})")
+            params.extend(symbols)
+        columns = ", ".join(SUMMARY_COLUMNS)
+        return self._frame(
+            f"SELECT {columns} FROM ("
+            f"  SELECT {columns}, ROW_NUMBER() OVER ("
+            f"    PARTITION BY symbol ORDER BY trade_date DESC, created DESC) AS rn"
+            f"  FROM analyses {'WHERE ' + ' AND '.join(where) if where else ''}"
+            f") WHERE rn = 1 ORDER BY symbol",
+            tuple(params)
+        )
+
+    def top(self, n: int = 20, trade_date: Optional[date] = None, config: Optional[str] = None) -> pd.DataFrame:
+        """
+        某交易日综合评分最高的前N只股票
+
+        Args:
+            trade_date: 交易日，默认库中最新的交易日
+            config: 可选，限定配置指纹
+        """
+        day = str(trade_date)[:10] if trade_date else self.latest_trade_date(config)
+        if day is None:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        sql = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM analyses WHERE trade_date = ?"
+        params = [day]
+        if config:
+            sql += " AND config_hash = ?"
+            params.append(config)
+        return self._frame(sql + " ORDER BY composite DESC LIMIT ?", (*params, int(n)))
+
+    def rating_changes(
+        self,
+        trade_date: Optional[date] = None,
+        since: Optional[date] = None,
+        config: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        评级发生变化的股票（同一配置下对比两个交易日）
+
+        Args:
+            trade_date: 交易日，默认库中最新的交易日
+            since: 对比的交易日，默认 trade_date 的前一交易日
+            config: 可选，限定配置指纹
+
+        Returns:
+            列为 symbol、name、config_hash、previous_rating、rating、previous_composite、composite、change
+        """
+        day = str(trade_date)[:10] if trade_date else self.latest_trade_date(config)
+        columns = ["symbol", "name", "config_hash", "previous_rating", "rating",
+                   "previous_composite", "composite", "change"]
+        if day is None:
+            return pd.DataFrame(columns=columns)
+        if since is None:
+            since = previous_trading_day(date.fromisoformat(day))
+
+        sql = (
+            "SELECT t.symbol, t.name, t.config_hash, p.rating AS previous_rating, t.rating, "
+            "p.composite AS previous_composite, t.composite, t.composite - p.composite AS change "
+            "FROM analyses t JOIN analyses p "
+            "ON p.trade_date = ? AND p.symbol = t.symbol AND p.config_hash = t.config_hash "
+            "WHERE t.trade_date = ? AND t.rating != p.rating"
+        )
+        params = [str(since)[:10], day]
+        if config:
+            sql += " AND t.config_hash = ?"
+            params.append(config)
+        rows = self._connect().execute(sql + " ORDER BY change DESC", tuple(params)).fetchall()
+        return pd.DataFrame([dict(row) for row in rows], columns=columns)
+
+    def latest_trade_date(self, config: Optional[str] = None) -> Optional[str]:
+        """库中最新的交易日"""
+        sql, params = "SELECT MAX(trade_date) FROM analyses", ()
+        if config:
+            sql, params = sql + " WHERE config_hash = ?", (config,)
+        return self._connect().execute(sql, params).fetchone()[0]
+
+    def history(self, symbol: str, config: Optional[str] = None, limit: int = 60) -> pd.DataFrame:
+        """单只股票的历史结果，按交易日降序"""
+        sql = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM analyses WHERE symbol = ?"
+        params: List[Any] = [symbol]
+        if config:
+            sql += " AND config_hash = ?"
+            params.append(config)
+        return self._frame(sql + " ORDER BY trade_date DESC, created DESC LIMIT ?", (*params, int(limit)))
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# 全局结果库实例
+_result_store = None
+
+def get_result_store(path: Optional[Path] = None) -> ResultStore:
+    """
+    获取全局分析结果库实例
+
+    Args:
+        path: 可选，数据库文件；与当前实例不同时重新打开
+    """
+    global _result_store
+    if _result_store is None or (path and Path(path) != _result_store.path):
+        _result_store = ResultStore(path)
+    return _result_store
@@ -0,0 +1,127 @@
+"""
+本地数据存储 - DataFrame 落盘与读取
+
+优先使用 Arrow IPC (Feather v2) 格式并以内存映射方式读取；
+未安装 pyarrow 时回退为 pickle。DataFrame.attrs（如日线的数据源）随数据一起保存
+"""
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+# 默认缓存目录：<项目根目录>/data/cache，可用环境变量 ZUWA_CACHE_DIR 覆盖
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache"
+
+ARROW_SUFFIX = ".arrow"
+PICKLE_SUFFIX = ".pkl"
+
+# Arrow 文件中保存 DataFrame.attrs 的 schema 元数据键（pickle 自带 attrs）
+ATTRS_METADATA_KEY = b"zuwa.attrs"
+
+
+def cache_root() -> Path:
+    """获取缓存根目录"""
+    return Path(os.getenv("ZUWA_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow.feather  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def frame_exists(base: Path) -> bool:
+    """判断数据文件是否存在（不含扩展名的路径）"""
+    return _existing_path(base) is not None
+
+
+def _with_suffix(base: Path, suffix: str) -> Path:
+    """追加扩展名（代码中可能含有"."，不能用 Path.with_suffix）"""
+    return base.parent / (base.name + suffix)
+
+
+def _existing_path(base: Path) -> Optional[Path]:
+    for suffix in (ARROW_SUFFIX, PICKLE_SUFFIX):
+        path = _with_suffix(base, suffix)
+        if path.exists():
+            return path
+    return None
+
+
+def write_frame(df: pd.DataFrame, base: Path) -> Path:
+    """
+    原子写入DataFrame
+
+    Args:
+        df: 待写入数据
+        base: 不含扩展名的目标路径
+
+    Returns:
+        实际写入的文件路径
+    """
+    base = Path(base)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    df = df.reset_index(drop=True)
+
+    if _has_pyarrow():
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        path = _with_suffix(base, ARROW_SUFFIX)
+        tmp = path.with_name(path.name + ".tmp")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if df.attrs:
+            metadata = dict(table.schema.metadata or {})
+            metadata[ATTRS_METADATA_KEY] = json.dumps(df.attrs, ensure_ascii=False, default=str).encode("utf-8")
+            table = table.replace_schema_metadata(metadata)
+        feather.write_feather(table, tmp, compression="uncompressed")
+    else:
+        path = _with_suffix(base, PICKLE_SUFFIX)
+        tmp = path.with_name(path.name + ".tmp")
+        df.to_pickle(tmp)
+
+    os.replace(tmp, path)
+
+    # 切换格式后清理旧文件，避免读到过期数据
+    for suffix in (ARROW_SUFFIX, PICKLE_SUFFIX):
+        stale = _with_suffix(base, suffix)
+        if stale != path and stale.exists():
+            stale.unlink()
+    return path
+
+
+def read_frame(base: Path) -> pd.DataFrame:
+    """
+    读取DataFrame，Arrow文件以内存映射方式打开
+
+    Args:
+        base: 不含扩展名的路径
+
+    Returns:
+        数据，文件不存在时返回空DataFrame
+    """
+    path = _existing_path(Path(base))
+    if path is None:
+        return pd.DataFrame()
+
+    if path.suffix == ARROW_SUFFIX:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=True)
+        df = table.to_pandas(split_blocks=True)
+        attrs = (table.schema.metadata or {}).get(ATTRS_METADATA_KEY)
+        if attrs:
+            df.attrs.update(json.loads(attrs))
+        return df
+
+    return pd.read_pickle(path)
+
+
+def delete_frame(base: Path) -> None:
+    """删除数据文件"""
+    for suffix in (ARROW_SUFFIX, PICKLE_SUFFIX):
+        path = _with_suffix(Path(base), suffix)
+        if path.exists():
+            path.unlink()
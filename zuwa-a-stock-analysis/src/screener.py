@@ -0,0 +1,433 @@
+"""
+全市场选股 - 行情快照 + 本地日线 + 向量化指标，按条件筛选并排序
+
+两段式漏斗的第一段：几秒内从全部A股中筛出候选，再把排名靠前的股票交给
+ZuwaStockAnalyzer 做完整的多Agent分析（python main.py --screen --analyze-top N）
+
+筛选条件为 pandas 表达式（DataFrame.query 语法，如 "rsi < 30 and volume_ratio > 2"），
+可用字段见 FIELDS。只用到快照字段的条件在读取日线之前执行，需要读盘的股票随之减少
+"""
+import ast
+import asyncio
+import hashlib
+import json
+import time
+import warnings
+from datetime import datetime, time as dtime
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.advanced_analyzer import VOLUME_PRICE_SIGNALS, volume_price_panel
+from src.analysis.pattern_recognition import PATTERNS, PatternScanner
+from src.analysis.technical_indicators import PanelIndicators
+from src.data.storage import cache_root, read_frame, write_frame
+from src.utils.concurrency import data_source, run_blocking
+from src.utils.trade_calendar import is_trading_day, previous_trading_day
+
+# 快照列 -> 字段名
+SPOT_COLUMNS = {
+    '代码': 'symbol',
+    '名称': 'name',
+    '最新价': 'price',
+    '涨跌幅': 'pct_change',
+    '量比': 'volume_ratio',
+    '换手率': 'turnover_rate',
+    '成交额': 'amount',
+    '成交量': 'volume',
+    '总市值': 'market_cap',
+    '流通市值': 'float_cap',
+    '市盈率-动态': 'pe',
+    '今开': 'open',
+    '最高': 'high',
+    '最低': 'low',
+}
+
+# 可用于筛选与排序的字段
+FIELDS = {
+    'symbol': "股票代码",
+    'name': "股票名称",
+    'st': "是否ST/*ST",
+    'price': "最新价",
+    'pct_change': "当日涨跌幅(%)",
+    'volume_ratio': "量比",
+    'turnover_rate': "换手率(%)",
+    'amount': "成交额(元)",
+    'market_cap': "总市值(元)",
+    'float_cap': "流通市值(元)",
+    'pe': "市盈率(动态)",
+    'bars': "本地日线根数",
+    'rsi': "RSI(14)",
+    'sma5': "5日均线", 'sma10': "10日均线", 'sma20': "20日均线", 'sma60': "60日均线",
+    'ma_bull': "均线多头排列(5>10>20>60)",
+    'ma_bear': "均线空头排列(5<10<20<60)",
+    'macd_hist': "MACD柱",
+    'ret_5d': "5日涨跌幅(%)",
+    'ret_20d': "20日涨跌幅(%)",
+    'tech_score': "技术评分(0-100，同技术分析Agent的规则)",
+    'vp_health': "量价健康度(0-100，同量价分析师)",
+    'volume_percentile': "成交量在近60日中的百分位(0-1)",
+}
+
+# 不需要日线的字段
+SNAPSHOT_FIELDS = {'symbol', 'name', 'st', 'price', 'pct_change', 'volume_ratio', 'turnover_rate',
+                   'amount', 'market_cap', 'float_cap', 'pe'}
+
+# 选股用到的日线列
+HISTORY_COLUMNS = ['open', 'high', 'low', 'close', 'pct_change', 'volume']
+
+# 读取的日线长度（自然日），需覆盖60日均线
+DEFAULT_HISTORY_DAYS = 150
+
+# 技术评分中动量部分所需的最少K线数（同 TECHNICAL_MIN_BARS）
+MOMENTUM_MIN_BARS = 14
+
+# 开盘集合竞价开始后，快照为当日行情
+SESSION_OPEN = dtime(9, 15)
+
+
+def filter_fields(expr: str) -> Set[str]:
+    """
+    筛选条件中引用的字段
+
+    Raises:
+        ValueError: 表达式语法错误或引用了未知字段
+    """
+    try:
+        tree = ast.parse(expr, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"筛选条件语法错误: {expr} ({e.msg})")
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    unknown = names - set(FIELDS)
+    if unknown:
+        raise ValueError(f"筛选条件中有未知字段: {', '.join(sorted(unknown))}（可用字段: {', '.join(FIELDS)}）")
+    return names
+
+
+def spot_day(now: datetime) -> str:
+    """快照行情所属的交易日（开盘前为上一交易日）"""
+    today = now.date()
+    if is_trading_day(today) and now.time() >= SESSION_OPEN:
+        return today.isoformat()
+    return previous_trading_day(today).isoformat()
+
+
+def own_rows(values: np.ndarray, observed: np.ndarray) -> np.ndarray:
+    """
+    把每列的有效K线按原顺序移到末尾，前面补 NaN
+
+    日期 × 股票面板中停牌日为空行；移动后每只股票只保留自身的K线，最后一行即最新一根，
+    在此之上计算的指标与逐只计算一致（不会把停牌日计入窗口或沿用前收盘价）
+    """
+    order = np.argsort(observed, axis=0, kind='stable')
+    kept = np.take_along_axis(observed, order, axis=0)
+    return np.where(kept, np.take_along_axis(values, order, axis=0), np.nan)
+
+
+def technical_score(close: pd.DataFrame) -> np.ndarray:
+    """
+    最新一根K线的技术评分（向量化版 TechnicalAnalysisAgent._calculate_score）
+
+    close 为 own_rows 得到的面板（每列一只股票、末行为最新一根）；
+    均线、RSI、MACD 的参数同 TechnicalAnalysisAgent 调用 FeatureStore 的参数，没有日线的股票为 NaN
+    """
+    values = close.to_numpy(dtype=float)
+    observed = ~np.isnan(values)
+    bars = observed.sum(axis=0)
+    last = values[-1]
+    # 均线与RSI只需最新值：min_periods=1 的滚动均值即最近窗口内有效值的均值
+    window_mean = lambda x, period: np.nanmean(x[-period:], axis=0)
+
+    with warnings.catch_warnings(), np.errstate(invalid='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        sma = {p: window_mean(values, p) for p in (5, 10, 20)}
+        # 同 Series.where：第一根K线的涨跌视为0；补齐的空行保持 NaN，不计入窗口
+        delta = np.diff(values, axis=0, prepend=np.nan)
+        delta = np.where(np.isnan(delta) & observed, 0.0, delta)
+        gain = window_mean(np.maximum(delta, 0.0), 14)
+        loss = window_mean(np.maximum(-delta, 0.0), 14)
+        rsi = np.nan_to_num(100 - 100 / (1 + gain / (loss + 1e-10)), nan=50.0)
+
+    ema = lambda data, span: data.ewm(span=span, adjust=True, min_periods=1).mean()
+    macd = ema(close, 12) - ema(close, 26)
+    macd_line, macd_signal = macd.iloc[-1].fillna(0.0).to_numpy(), ema(macd, 9).iloc[-1].fillna(0.0).to_numpy()
+
+    with np.errstate(invalid='ignore'):
+        score = 50.0 + 10.0 * (last > sma[5]) + 10.0 * (last > sma[20])
+        score += 10.0 * ((sma[5] > sma[10]) & (sma[10] > sma[20]))
+        ready = bars >= MOMENTUM_MIN_BARS
+        score += 15.0 * (ready & (rsi < 30)) - 15.0 * (ready & (rsi > 70))
+        score += 10.0 * (ready & (macd_line > macd_signal)) - 10.0 * (ready & (macd_line < macd_signal))
+    return np.where(bars > 0, np.clip(score, 0, 100), np.nan)
+
+
+class Screener:
+    """
+    全市场选股器
+
+    Args:
+        snapshot: 行情快照，默认全局 MarketSnapshot
+        store: 本地价格库，默认全局 PriceStore
+        history_days: 读取的日线长度（自然日）
+    """
+
+    def __init__(self, snapshot=None, store=None, history_days: int = DEFAULT_HISTORY_DAYS):
+        if snapshot is None:
+            from src.data.market_snapshot import get_market_snapshot
+            snapshot = get_market_snapshot()
+        if store is None:
+            from src.data.price_store import get_price_store
+            store = get_price_store()
+        self.snapshot = snapshot
+        self.store = store
+        self.history_days = history_days
+
+    @data_source("akshare")
+    def spot_table(self) -> pd.DataFrame:
+        """全市场快照（英文字段名），剔除停牌（无最新价）的股票"""
+        raw = self.snapshot.to_frame()
+        if raw.empty:
+            return pd.DataFrame(columns=list(SNAPSHOT_FIELDS))
+        table = pd.DataFrame({new: raw[old] for old, new in SPOT_COLUMNS.items() if old in raw.columns})
+        table['symbol'] = table['symbol'].astype(str)
+        table['name'] = table['name'].astype(str) if 'name' in table.columns else ""
+        for col in SPOT_COLUMNS.values():
+            if col in ('symbol', 'name'):
+                continue
+            table[col] = pd.to_numeric(table[col], errors='coerce') if col in table.columns else np.nan
+        table['st'] = table['name'].str.upper().str.contains('ST', regex=False)
+        return table[table['price'] > 0].reset_index(drop=True)
+
+    def _cache_key(self, symbols: Sequence[str], today: str) -> str:
+        """日线长表的缓存键：价格文件修改时间、读取长度与日期（读取窗口随日期移动）"""
+        wanted = set(symbols)
+        versions = sorted(
+            (p.name, p.stat().st_mtime_ns) for p in self.store.root.iterdir()
+            if p.name.split('.')[0] in wanted and not p.name.endswith('.tmp')
+        ) if self.store.root.exists() else []
+        payload = json.dumps([versions, self.history_days, today, HISTORY_COLUMNS])
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    @data_source("local")
+    def history(self, now: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        价格库中全部股票最近 history_days 天的日线长表
+
+        列为 date, symbol 与 HISTORY_COLUMNS；按价格文件修改时间缓存为单个文件，
+        价格库不变时每次选股只读一个文件，不必逐只读取数千个日线文件
+        """
+        symbols = self.store.symbols()
+        today = (now or datetime.now()).date().isoformat()
+        cache_dir = cache_root() / "screener"
+        path = cache_dir / f"history_{self._cache_key(symbols, today)}"
+        frame = read_frame(path)
+        if not frame.empty:
+            return frame
+
+        parts = []
+        for symbol in symbols:
+            df = self.store.load(symbol, self.history_days)
+            if not df.empty:
+                parts.append(df[['date', *HISTORY_COLUMNS]].assign(symbol=symbol))
+        if not parts:
+            return pd.DataFrame(columns=['date', 'symbol', *HISTORY_COLUMNS])
+        frame = pd.concat(parts, ignore_index=True)
+        write_frame(frame, path)
+        # 只保留最新的缓存
+        for stale in cache_dir.glob("history_*"):
+            if not stale.name.startswith(path.name):
+                stale.unlink(missing_ok=True)
+        return frame
+
+    async def sync(self, symbols: Sequence[str]) -> int:
+        """增量同步这些股票的日线到最新交易日（访问网络），返回成功的股票数"""
+        async def one(symbol: str) -> bool:
+            try:
+                return not (await run_blocking(self.store.sync, symbol, self.history_days)).empty
+            except Exception as e:
+                print(f"⚠️ 同步 {symbol} 日线失败: {e}")
+                return False
+
+        return sum(await asyncio.gather(*(one(s) for s in symbols)))
+
+    def indicators(
+        self,
+        spot: pd.DataFrame,
+        history: pd.DataFrame,
+        patterns: Sequence[str] = (),
+        pattern_days: int = 5,
+        now: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        在快照表上追加日线指标列
+
+        快照所属交易日尚未写入本地日线时，以快照的最新价补上这一根K线，
+        盘中筛选时指标反映实时价格；指标只用每只股票自身的K线（停牌日不补），与逐只分析一致
+        """
+        table = spot.reset_index(drop=True).copy()
+        day = spot_day(now or datetime.now())
+        history = history[history['symbol'].isin(set(table['symbol']))]
+        last_dates = history.groupby('symbol', sort=False)['date'].max().astype(str)
+        stale = table[table['symbol'].map(last_dates).fillna(day).astype(str) < day]
+        if not stale.empty:
+            bars = pd.DataFrame({
+                'date': day, 'symbol': stale['symbol'],
+                'open': stale['open'].where(stale['open'] > 0, stale['price']),
+                'high': stale['high'].where(stale['high'] > 0, stale['price']),
+                'low': stale['low'].where(stale['low'] > 0, stale['price']),
+                'close': stale['price'],
+                'pct_change': stale['pct_change'],
+                'volume': stale['volume'],
+            })
+            history = pd.concat([history.astype({'date': str}), bars], ignore_index=True)
+
+        scanner = PatternScanner.from_long(history)
+        n = len(table)
+        columns = {name: np.full(n, np.nan) for name in
+                   ('bars', 'rsi', 'sma5', 'sma10', 'sma20', 'sma60', 'macd_hist', 'ret_5d', 'ret_20d', 'tech_score',
+                    'vp_health', 'volume_percentile')}
+        ma_bull = np.zeros(n, dtype=bool)
+        ma_bear = np.zeros(n, dtype=bool)
+        matched: List[List[str]] = [[] for _ in range(n)]
+        vp_signals: List[List[str]] = [[] for _ in range(n)]
+
+        if len(scanner.columns):
+            observed = ~np.isnan(scanner.close)
+            # 每只股票最后一根有效K线所在的行（K线形态在日期对齐的面板上判断）
+            last = len(scanner.index) - 1 - np.argmax(observed[::-1], axis=0)
+            cols = np.arange(len(scanner.columns))
+
+            # 指标在每只股票自身的K线上计算，末行为最新一根
+            close_rows = own_rows(scanner.close, observed)
+            volume = history.pivot(index='date', columns='symbol', values='volume')
+            volume_rows = own_rows(volume.reindex(index=scanner.index, columns=scanner.columns).to_numpy(dtype=float),
+                                   observed)
+            latest = lambda values, lag=0: values[-1 - lag] if len(values) > lag else np.full(len(cols), np.nan)
+
+            bars = observed.sum(axis=0).astype(float)
+            close = latest(close_rows)
+            sma = {p: latest(PanelIndicators.sma(close_rows, p)) for p in (5, 10, 20, 60)}
+            # 与逐只计算一致：K线不足 14 根时 RSI(14) 为 NaN
+            rsi = np.where(bars >= 14, latest(PanelIndicators.rsi(close_rows, 14)), np.nan)
+            macd = PanelIndicators.macd(close_rows)
+            macd_line, macd_signal = latest(macd['macd']), latest(macd['signal'])
+            frame = lambda values: pd.DataFrame(values, columns=scanner.columns)
+            vp = volume_price_panel(frame(close_rows), frame(volume_rows))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ret_5d = (close / latest(close_rows, 5) - 1) * 100
+                ret_20d = (close / latest(close_rows, 20) - 1) * 100
+
+            rows = table['symbol'].map({s: i for i, s in enumerate(scanner.columns)})
+            has = rows.notna().to_numpy()
+            at = rows[has].astype(int).to_numpy()
+            values = {
+                'bars': bars, 'rsi': rsi, 'sma5': sma[5], 'sma10': sma[10], 'sma20': sma[20], 'sma60': sma[60],
+                'macd_hist': macd_line - macd_signal, 'ret_5d': ret_5d, 'ret_20d': ret_20d,
+                'tech_score': technical_score(frame(close_rows)),
+                'vp_health': latest(vp['health_score'].to_numpy()),
+                'volume_percentile': latest(vp['volume_percentile'].to_numpy()),
+            }
+            for name, array in values.items():
+                columns[name][has] = array[at]
+            with np.errstate(invalid='ignore'):
+                ma_bull[has] = ((sma[5] > sma[10]) & (sma[10] > sma[20]) & (sma[20] > sma[60]))[at]
+                ma_bear[has] = ((sma[5] < sma[10]) & (sma[10] < sma[20]) & (sma[20] < sma[60]))[at]
+
+            # 最新一根K线触发的量价信号
+            positions = np.flatnonzero(has)
+            for name in VOLUME_PRICE_SIGNALS:
+                fired = latest(vp[name].to_numpy(dtype=float)) == 1
+                for i in positions[fired[at]]:
+                    vp_signals[i].append(name)
+
+            for name in patterns:
+                seen = scanner.within(name, pattern_days).to_numpy()[last, cols]
+                for i, j in zip(np.flatnonzero(has), at):
+                    if seen[j]:
+                        matched[i].append(name)
+
+        for name, array in columns.items():
+            table[name] = array
+        table['bars'] = table['bars'].fillna(0).astype(int)
+        table['ma_bull'] = ma_bull
+        table['ma_bear'] = ma_bear
+        table['vp_signals'] = vp_signals
+        if patterns:
+            table['patterns'] = matched
+        return table
+
+    async def run(
+        self,
+        filters: Sequence[str] = (),
+        sort: str = 'tech_score',
+        ascending: bool = False,
+        top: Optional[int] = None,
+        patterns: Sequence[str] = (),
+        pattern_days: int = 5,
+        sync: bool = False,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        执行选股
+
+        Args:
+            filters: 筛选条件（pandas 表达式），全部满足才入选
+            sort: 排序字段
+            ascending: 升序排序
+            top: 只返回前 top 只
+            patterns: K线形态（见 PATTERNS），最近 pattern_days 个交易日内出现任一形态才入选
+            sync: 先同步通过快照条件的股票的日线（访问网络）
+
+        Returns:
+            {"table": 排序后的候选表, "stages": [(阶段, 剩余股票数)], "timing": 各阶段耗时}
+
+        Raises:
+            ValueError: 筛选条件、排序字段或K线形态无效
+        """
+        if sort not in FIELDS:
+            raise ValueError(f"未知的排序字段: {sort}（可用字段: {', '.join(FIELDS)}）")
+        unknown = [name for name in patterns if name not in PATTERNS]
+        if unknown:
+            raise ValueError(f"未知的K线形态: {', '.join(unknown)}（可用形态: {', '.join(PATTERNS)}）")
+        spot_filters, history_filters = [], []
+        for expr in filters:
+            (spot_filters if filter_fields(expr) <= SNAPSHOT_FIELDS else history_filters).append(expr)
+
+        timing = {}
+        stages = []
+        started = time.perf_counter()
+        table = await run_blocking(self.spot_table)
+        timing['snapshot'] = time.perf_counter() - started
+        stages.append(("全市场", len(table)))
+
+        # 只依赖快照的条件先执行，减少读盘
+        for expr in spot_filters:
+            table = table.query(expr)
+        if spot_filters:
+            stages.append(("快照条件", len(table)))
+
+        started = time.perf_counter()
+        if sync:
+            await self.sync(list(table['symbol']))
+        history = await run_blocking(self.history, now)
+        timing['history'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        table = self.indicators(table, history, patterns, pattern_days, now)
+        timing['indicators'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for expr in history_filters:
+            table = table.query(expr)
+        if history_filters:
+            stages.append(("日线条件", len(table)))
+        if patterns:
+            table = table[table['patterns'].map(bool)]
+            stages.append(("K线形态", len(table)))
+
+        table = table.sort_values(sort, ascending=ascending, na_position='last', kind='stable')
+        if top:
+            table = table.head(top)
+        timing['filter'] = time.perf_counter() - started
+        return {"table": table.reset_index(drop=True), "stages": stages, "timing": timing}
@@ -0,0 +1,206 @@
+"""
+分析会话 - 供Web界面使用的后台分析任务与结果缓存
+
+- 单只股票/自选股的完整分析在后台线程中执行，界面轮询进度
+- 各Agent的输出按 (股票代码, 交易日) 缓存，界面重跑时直接复用
+- 调整权重/阈值只重新计算首席分析师的综合评分与评级，不重新采集数据或调用LLM
+"""
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.agents.chief_agent import ChiefAnalystAgent
+from src.backtest.engine import RATING_LABELS, composite_scores, ratings
+from src.utils.trade_calendar import last_complete_trading_day
+
+# 分析结果缓存有效期（秒）；盘中行情变化后需要重新分析
+DEFAULT_RESULT_TTL = 1800
+
+
+@dataclass
+class AnalysisJob:
+    """后台分析任务"""
+    job_id: str
+    symbols: List[Tuple[str, str]]
+    status: str = "pending"          # pending / running / done / error
+    progress: float = 0.0            # 0-1
+    message: str = ""
+    done: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("pending", "running")
+
+
+class AnalysisSession:
+    """
+    Web界面的分析会话（Streamlit 中用 st.cache_resource 在重跑之间共享）
+
+    Args:
+        analyzer_factory: 创建 ZuwaStockAnalyzer 的函数（首次分析时调用）
+        ttl: 分析结果缓存有效期（秒）
+    """
+
+    def __init__(self, analyzer_factory: Callable[[], Any], ttl: float = DEFAULT_RESULT_TTL):
+        self._factory = analyzer_factory
+        self._analyzer = None
+        self.ttl = ttl
+        self._results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def analyzer(self):
+        with self._lock:
+            if self._analyzer is None:
+                self._analyzer = self._factory()
+            return self._analyzer
+
+    def default_weights(self) -> Dict[str, float]:
+        """当前配置的首席分析师权重"""
+        return dict(self.analyzer.agents["chief"].weights)
+
+    def default_thresholds(self) -> Dict[str, float]:
+        """当前配置的首席分析师评级阈值"""
+        return dict(self.analyzer.agents["chief"].thresholds)
+
+    # ---------- 结果缓存 ----------
+
+    @staticmethod
+    def _key(symbol: str, now: Optional[datetime] = None) -> Tuple[str, str]:
+        return symbol, last_complete_trading_day(now).isoformat()
+
+    def get(self, symbol: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """缓存中的分析结果，不存在或已过期时返回 None"""
+        with self._lock:
+            entry = self._results.get(self._key(symbol, now))
+        if entry is None or time.time() - entry["cached_at"] > self.ttl:
+            return None
+        return entry["result"]
+
+    def put(self, result: Dict[str, Any], now: Optional[datetime] = None) -> None:
+        """写入分析结果（失败结果不缓存）"""
+        if "error" in result:
+            return
+        with self._lock:
+            self._results[self._key(result["symbol"], now)] = {"result": result, "cached_at": time.time()}
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """清除某只股票（默认全部）的缓存结果"""
+        with self._lock:
+            if symbol is None:
+                self._results.clear()
+            else:
+                self._results = {k: v for k, v in self._results.items() if k[0] != symbol}
+
+    # ---------- 后台任务 ----------
+
+    def job(self, job_id: str) -> Optional[AnalysisJob]:
+        """查询任务"""
+        return self._jobs.get(job_id)
+
+    def submit(self, symbols: Sequence[Tuple[str, str]], refresh: bool = False) -> AnalysisJob:
+        """
+        提交后台分析任务（已有缓存结果的股票直接跳过）
+
+        Args:
+            symbols: [(股票代码, 股票名称), ...]；单只股票时按完整流程逐步报告进度
+            refresh: 忽略缓存（含分析结果库），重新分析
+        """
+        symbols = [(s.strip(), n) for s, n in symbols if s and s.strip()]
+        if refresh:
+            for symbol, _ in symbols:
+                self.invalidate(symbol)
+        job = AnalysisJob(job_id=uuid.uuid4().hex[:8], symbols=symbols)
+        self._jobs[job.job_id] = job
+
+        pending = [(s, n) for s, n in symbols if self.get(s) is None]
+        job.done = len(symbols) - len(pending)
+        if not pending:
+            self._finish(job)
+            return job
+
+        thread = threading.Thread(target=self._run, args=(job, pending, refresh), name=f"zuwa-session-{job.job_id}", daemon=True)
+        thread.start()
+        return job
+
+    def _run(self, job: AnalysisJob, pending: List[Tuple[str, str]], refresh: bool) -> None:
+        job.status = "running"
+        try:
+            asyncio.run(self._analyze(job, pending, refresh))
+        except Exception as e:
+            job.errors["_"] = str(e)
+            job.message = f"分析失败: {e}"
+        self._finish(job)
+
+    async def _analyze(self, job: AnalysisJob, pending: List[Tuple[str, str]], refresh: bool) -> None:
+        analyzer = self.analyzer
+        total = len(job.symbols)
+
+        if len(pending) == 1:
+            symbol, name = pending[0]
+
+            def progress(label: str, fraction: float):
+                job.message = f"{symbol} {label}"
+                job.progress = (job.done + fraction) / total
+
+            result = await analyzer.analyze_stock(symbol, name, verbose=False, progress=progress, refresh=refresh)
+            self._record(job, result)
+            return
+
+        async for result in analyzer.analyze_batch(pending, refresh=refresh):
+            self._record(job, result)
+
+    def _record(self, job: AnalysisJob, result: Dict[str, Any]) -> None:
+        if "error" in result:
+            job.errors[result["symbol"]] = result["error"]
+        self.put(result)
+        job.done += 1
+        job.progress = job.done / len(job.symbols)
+        job.message = f"已完成 {job.done}/{len(job.symbols)}: {result['symbol']}"
+
+    def _finish(self, job: AnalysisJob) -> None:
+        job.progress = 1.0
+        job.finished = time.time()
+        job.status = "error" if job.errors and len(job.errors) >= len(job.symbols) else "done"
+
+    # ---------- 重新评分 ----------
+
+    def rescore(
+        self,
+        symbols: Sequence[str],
+        weights: Dict[str, float],
+        thresholds: Optional[Dict[str, float]] = None
+    ) -> pd.DataFrame:
+        """
+        按新的权重/阈值重新计算缓存结果的综合评分与评级（不访问数据源和LLM）
+
+        Returns:
+            每只已缓存股票一行：symbol、name、各Agent评分、composite、signal、rating，按 composite 降序
+        """
+        thresholds = {**ChiefAnalystAgent({}).thresholds, **(thresholds or {})}
+        rows = []
+        for symbol in symbols:
+            result = self.get(symbol)
+            if result is None:
+                continue
+            scores = result["final_decision"]["details"].get("individual_scores", {})
+            rows.append({"symbol": symbol, "name": result.get("name", ""), **scores})
+        if not rows:
+            return pd.DataFrame(columns=["symbol", "name", "composite", "signal", "rating"])
+
+        table = pd.DataFrame(rows)
+        composite = composite_scores(table, weights)
+        table["composite"] = composite.round(2)
+        table["signal"] = ratings(composite, thresholds)
+        table["rating"] = table["signal"].map(RATING_LABELS)
+        return table.sort_values("composite", ascending=False, kind="stable").reset_index(drop=True)
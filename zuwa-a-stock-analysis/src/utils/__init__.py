@@ -1,6 +1,19 @@
 """
 工具模块
 """
-from src.utils.helpers import DateTimeEncoder, format_number, format_percent, get_signal_emoji
+from src.utils.lazy import lazy_exports
 
-__all__ = ["DateTimeEncoder", "format_number", "format_percent", "get_signal_emoji"]
+_EXPORTS = {
+    **dict.fromkeys(["DateTimeEncoder", "format_number", "format_percent", "get_signal_emoji"], "src.utils.helpers"),
+    **dict.fromkeys(["configure_executor", "configure_source_limits", "get_executor", "run_blocking"],
+                    "src.utils.concurrency"),
+    **dict.fromkeys(["lazy_import", "lazy_exports"], "src.utils.lazy"),
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = [
+    "DateTimeEncoder", "format_number", "format_percent", "get_signal_emoji",
+    "configure_executor", "configure_source_limits", "get_executor", "run_blocking",
+    "lazy_import", "lazy_exports"
+]
@@ -0,0 +1,340 @@
+"""
+录制/回放 - 把一次运行中 AKShare、Tushare 与 LLM 的全部响应保存到磁盘，之后离线回放
+
+录制时在 sys.modules 中用代理替换 akshare / tushare 模块（各处都在调用时经
+lazy_import 从 sys.modules 取模块，所以代理对全部调用生效），并包装 LLMScheduler.complete；
+回放时不需要安装 akshare / tushare，也不访问网络。
+
+磁带目录结构：
+    index.jsonl          每行一次调用：路径、参数键、类型、耗时、载荷文件
+    payloads/<id>.pkl    响应数据（pickle）
+
+参数键中的日期（YYYYMMDD / YYYY-MM-DD）统一替换为 <date>，
+换一天回放时按"今天"计算的日期参数仍能匹配到录制时的响应
+"""
+import itertools
+import json
+import pickle
+import re
+import sys
+import threading
+import time
+import types
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# 被代理的第三方数据模块
+CASSETTE_MODULES = ("akshare", "tushare")
+
+# LLM 调用在磁带中的路径
+LLM_PATH = "llm.complete"
+
+_DATE_PATTERN = re.compile(r"(?<!\d)(?:19|20)\d{2}-?\d{2}-?\d{2}(?!\d)")
+
+
+class CassetteMiss(RuntimeError):
+    """回放时磁带中没有对应的响应"""
+
+
+class CassetteReplayError(RuntimeError):
+    """回放录制时抛出的异常"""
+
+
+def call_key(path: str, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> str:
+    """调用的参数键：路径 + 参数，日期替换为 <date>"""
+    payload = json.dumps([path, list(args), sorted((kwargs or {}).items())], ensure_ascii=False, default=str)
+    return _DATE_PATTERN.sub("<date>", payload)
+
+
+def _is_data(value: Any) -> bool:
+    """是否为可保存的响应数据（否则视为客户端之类的对象，回放时返回代理）"""
+    if value is None or isinstance(value, (str, bytes, int, float, bool, list, tuple, dict)):
+        return True
+    module = type(value).__module__ or ""
+    return module.split(".")[0] in ("pandas", "numpy")
+
+
+class Cassette:
+    """
+    一盘磁带
+
+    Args:
+        root: 磁带目录
+        mode: "record" 录制 / "replay" 回放
+        latency: 回放时按录制耗时的该倍数等待（0 不等待，1 还原真实延迟）
+    """
+
+    def __init__(self, root, mode: str = "replay", latency: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"未知的磁带模式: {mode}")
+        self.root = Path(root)
+        self.mode = mode
+        self.latency = latency
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._defaults: Dict[str, Dict[str, Any]] = {}
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._payloads: Dict[int, bytes] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.missed_paths: Dict[str, int] = defaultdict(int)
+        if mode == "replay":
+            self._load()
+        else:
+            (self.root / "payloads").mkdir(parents=True, exist_ok=True)
+
+    # ---------- 磁带文件 ----------
+
+    def _load(self) -> None:
+        index = self.root / "index.jsonl"
+        if not index.exists():
+            raise FileNotFoundError(f"磁带不存在: {index}")
+        last_id = 0
+        with open(index, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                last_id = max(last_id, entry["id"])
+                if entry.get("default"):
+                    self._defaults[entry["path"]] = entry
+                else:
+                    self._entries[entry["key"]].append(entry)
+        self._ids = itertools.count(last_id + 1)
+
+    def _payload(self, entry: Dict[str, Any]) -> Any:
+        data = self._payloads.get(entry["id"])
+        if data is None:
+            data = (self.root / "payloads" / f"{entry['id']}.pkl").read_bytes()
+            self._payloads[entry["id"]] = data
+        # 每次回放都反序列化一份，调用方修改返回值不影响下一次
+        return pickle.loads(data)
+
+    def add(
+        self,
+        path: str,
+        value: Any = None,
+        args: tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        kind: str = "value",
+        elapsed: float = 0.0,
+        error: Optional[str] = None,
+        default: bool = False
+    ) -> None:
+        """
+        写入一条响应（录制时自动调用；也可用于手工构造测试磁带）
+
+        Args:
+            kind: value 数据 / object 返回客户端对象 / error 抛出异常
+            default: 作为该路径的默认响应，参数键匹配不到时使用
+        """
+        entry = {
+            "id": next(self._ids),
+            "path": path,
+            "key": call_key(path, args, kwargs) if kind != "object" else path,
+            "kind": kind,
+            "elapsed": round(elapsed, 4),
+        }
+        if error is not None:
+            entry["error"] = error
+        if default:
+            entry["default"] = True
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL) if kind == "value" else None
+
+        with self._lock:
+            if data is not None:
+                (self.root / "payloads").mkdir(parents=True, exist_ok=True)
+                (self.root / "payloads" / f"{entry['id']}.pkl").write_bytes(data)
+                self._payloads[entry["id"]] = data
+            with open(self.root / "index.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if default:
+                self._defaults[path] = entry
+            else:
+                self._entries[entry["key"]].append(entry)
+            self.recorded += 1
+
+    # ---------- 录制与回放 ----------
+
+    def call(self, path: str, func, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """录制模式下执行真实调用并保存响应，回放模式下返回保存的响应"""
+        if self.mode == "replay":
+            return self.replay(path, args, kwargs)
+
+        started = time.perf_counter()
+        try:
+            value = func(*args, **kwargs)
+        except Exception as e:
+            self.add(path, args=args, kwargs=kwargs, kind="error",
+                     elapsed=time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+            raise
+        elapsed = time.perf_counter() - started
+        if _is_data(value):
+            self.add(path, value, args, kwargs, elapsed=elapsed)
+            return value
+        self.add(path, kind="object", elapsed=elapsed)
+        return _RecordingProxy(self, value, f"{path}()")
+
+    def replay(self, path: str, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        回放一次调用
+
+        匹配顺序：参数键（同一键录制多次时依次返回，最后一次重复使用）-> 返回对象的调用 -> 路径默认响应
+
+        Raises:
+            CassetteMiss: 磁带中没有该调用
+            CassetteReplayError: 录制时该调用抛出了异常
+        """
+        key = call_key(path, args, kwargs)
+        with self._lock:
+            entries = self._entries.get(key) or self._entries.get(path)
+            if entries:
+                index = min(self._cursor[key], len(entries) - 1)
+                self._cursor[key] += 1
+                entry = entries[index]
+            else:
+                entry = self._defaults.get(path)
+            if entry is None:
+                self.misses += 1
+                self.missed_paths[path] += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            raise CassetteMiss(f"磁带中没有该调用: {key}")
+
+        if self.latency and entry.get("elapsed"):
+            time.sleep(entry["elapsed"] * self.latency)
+        if entry["kind"] == "error":
+            raise CassetteReplayError(entry.get("error", "录制时调用失败"))
+        if entry["kind"] == "object":
+            return _ReplayProxy(self, f"{path}()")
+        return self._payload(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """回放命中统计"""
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+            "missed_paths": dict(self.missed_paths),
+        }
+
+    # ---------- 安装 ----------
+
+    @contextmanager
+    def use(self) -> Iterator["Cassette"]:
+        """在 with 块内替换 akshare / tushare 模块与 LLM 调用"""
+        from src.utils import llm_helper
+        from src.utils.llm_cache import get_llm_cache
+        from src.utils.llm_scheduler import LLMScheduler
+
+        saved_modules = {name: sys.modules.get(name) for name in CASSETTE_MODULES}
+        saved_complete = LLMScheduler.complete
+        saved_client = llm_helper.get_openai_client
+        llm_cache = get_llm_cache()
+        saved_ttl = llm_cache.ttl
+        cassette = self
+
+        for name in CASSETTE_MODULES:
+            if self.mode == "replay":
+                sys.modules[name] = _ReplayModule(self, name)
+                continue
+            try:
+                real = __import__(name)
+            except ImportError:
+                continue
+            sys.modules[name] = _RecordingModule(self, real, name)
+
+        async def complete(scheduler, client, model, messages, temperature=1.0, max_tokens=2000, stream=None):
+            args = (model, messages, temperature)
+            if cassette.mode == "replay":
+                return cassette.replay(LLM_PATH, args)
+            started = time.perf_counter()
+            content = await saved_complete(scheduler, client, model, messages, temperature, max_tokens, stream)
+            cassette.add(LLM_PATH, content, args, elapsed=time.perf_counter() - started)
+            return content
+
+        LLMScheduler.complete = complete
+        if self.mode == "replay":
+            # 回放不创建真实客户端（也就不需要API Key）
+            llm_helper.get_openai_client = lambda api_key, base_url: None
+        else:
+            # 录制时绕过LLM响应缓存，保证每次调用都落到磁带里
+            llm_cache.ttl = 0
+        try:
+            yield self
+        finally:
+            LLMScheduler.complete = saved_complete
+            llm_helper.get_openai_client = saved_client
+            llm_cache.ttl = saved_ttl
+            for name, module in saved_modules.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+
+
+def _callable(cassette: Cassette, path: str, module: str, func=None):
+    """磁带包装的函数，保留 __module__ 以便按数据源限流"""
+    def call(*args, **kwargs):
+        return cassette.call(path, func, args, kwargs)
+    name = path.rsplit(".", 1)[-1]
+    call.__name__ = call.__qualname__ = name
+    call.__module__ = module
+    return call
+
+
+class _RecordingProxy:
+    """录制模式：转发到真实对象，可调用属性经磁带执行"""
+
+    def __init__(self, cassette: Cassette, target: Any, path: str):
+        self._cassette = cassette
+        self._target = target
+        self._path = path
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._target, name)
+        if not callable(value):
+            return value
+        return _callable(self._cassette, f"{self._path}.{name}", self._path.split(".")[0], value)
+
+
+class _RecordingModule(types.ModuleType, _RecordingProxy):
+    """录制模式下替换的模块"""
+
+    def __init__(self, cassette: Cassette, target: types.ModuleType, name: str):
+        types.ModuleType.__init__(self, name)
+        _RecordingProxy.__init__(self, cassette, target, name)
+
+    def __getattr__(self, name: str) -> Any:
+        return _RecordingProxy.__getattr__(self, name)
+
+
+class _ReplayProxy:
+    """回放模式：任何属性都是从磁带读取响应的函数"""
+
+    def __init__(self, cassette: Cassette, path: str):
+        self._cassette = cassette
+        self._path = path
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        path = f"{self._path}.{name}"
+        return _callable(self._cassette, path, self._path.split(".")[0])
+
+
+class _ReplayModule(types.ModuleType, _ReplayProxy):
+    """回放模式下替换的模块"""
+
+    def __init__(self, cassette: Cassette, name: str):
+        types.ModuleType.__init__(self, name)
+        _ReplayProxy.__init__(self, cassette, name)
+
+    def __getattr__(self, name: str) -> Any:
+        return _ReplayProxy.__getattr__(self, name)
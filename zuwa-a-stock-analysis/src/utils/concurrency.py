@@ -0,0 +1,187 @@
+"""
+并发执行模块 - 把阻塞的数据接口调用放到有界线程池中执行
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.utils import tracing
+
+# 默认线程数，与 config/agents.yaml 中 system.max_workers 一致
+DEFAULT_MAX_WORKERS = 5
+
+_executor: Optional[ThreadPoolExecutor] = None
+_max_workers = DEFAULT_MAX_WORKERS
+_lock = threading.Lock()
+
+# 各数据源同时在途的请求上限，如 {"akshare": 4, "tushare": 2}
+_source_limits: Dict[str, int] = {}
+# 仓库自身的顶层模块：其中的函数不能按模块名推断数据源，必须用 @data_source 标记
+LOCAL_MODULES = ("src", "main", "__main__")
+# 每个事件循环各自持有一组信号量
+_source_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+# 线程级信号量：真正发起请求的线程（共享线程池与对冲请求线程池）共用，跨事件循环生效
+_source_thread_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+
+def configure_executor(max_workers: int) -> None:
+    """
+    设置线程池大小
+
+    已创建的线程池会被关闭并在下次使用时按新大小重建
+    """
+    global _executor, _max_workers
+    max_workers = max(1, int(max_workers or DEFAULT_MAX_WORKERS))
+    with _lock:
+        if _executor is not None and max_workers != _max_workers:
+            _executor.shutdown(wait=False)
+            _executor = None
+        _max_workers = max_workers
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """获取进程内共享的线程池"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_max_workers,
+                    thread_name_prefix="zuwa-io"
+                )
+    return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """关闭线程池"""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def configure_source_limits(limits: Dict[str, int]) -> None:
+    """
+    设置各数据源同时在途的请求上限
+
+    Args:
+        limits: 数据源名称 -> 上限，数据源名称为函数所在的顶层模块名
+    """
+    _source_limits.clear()
+    _source_limits.update({k: int(v) for k, v in limits.items() if v})
+    _source_semaphores.clear()
+    _source_thread_semaphores.clear()
+    _source_thread_semaphores.update({k: threading.BoundedSemaphore(v) for k, v in _source_limits.items()})
+
+
+def source_slot(source: str):
+    """
+    在当前线程占用某数据源的一个在途名额（上下文管理器），未设置上限时不限制
+
+    供不经过 run_blocking、自行在其他线程池中请求数据源的代码使用（如对冲请求），
+    请求未返回前名额一直占用，与 run_blocking 直接调用的数据接口共用同一上限
+    """
+    semaphore = _source_thread_semaphores.get(source)
+    return semaphore if semaphore is not None else contextlib.nullcontext()
+
+
+def data_source(name: str) -> Callable:
+    """
+    装饰器：标记函数实际访问的数据源
+
+    用于封装了数据源调用的本地函数（如价格库同步），使其计入该数据源的在途上限；
+    只读本地文件、不访问网络的函数标记为 "local"。被标记的函数只在事件循环中排队，
+    其内部真正发起的请求需自行用 source_slot 占用名额（避免与外层重复占用而互相等待）
+    """
+    def decorator(func: Callable) -> Callable:
+        func.__data_source__ = name
+        return func
+    return decorator
+
+
+def get_source_name(func: Callable[..., Any]) -> str:
+    """
+    根据函数所在模块推断数据源名称（akshare / tushare ...）
+
+    Raises:
+        ValueError: 仓库内的函数未用 @data_source 标记（否则会绕过各数据源的在途上限）
+    """
+    marked = getattr(func, "__data_source__", None)
+    if marked:
+        return marked
+    target = getattr(func, "func", func)  # functools.partial
+    target = getattr(target, "__func__", target)  # 绑定方法
+    module = (getattr(target, "__module__", None) or "").split(".")[0]
+    if module in LOCAL_MODULES:
+        raise ValueError(f"{_call_name(func)} 未标记数据源，请用 @data_source(...) 标记")
+    return module
+
+
+def _get_source_semaphore(source: str) -> Optional[asyncio.Semaphore]:
+    """获取当前事件循环中某数据源的信号量"""
+    limit = _source_limits.get(source)
+    if not limit:
+        return None
+    loop = asyncio.get_running_loop()
+    semaphores = _source_semaphores.setdefault(loop, {})
+    if source not in semaphores:
+        semaphores[source] = asyncio.Semaphore(limit)
+    return semaphores[source]
+
+
+def _call_name(func: Callable[..., Any]) -> str:
+    """函数名称（用于追踪）"""
+    target = getattr(func, "func", func)
+    return getattr(target, "__qualname__", None) or getattr(target, "__name__", None) or repr(target)
+
+
+def _in_source_slot(source: str, call: Callable[[], Any]) -> Any:
+    with source_slot(source):
+        return call()
+
+
+def _traced_call(source: str, name: str, call: Callable[[], Any], submitted: float) -> Any:
+    """在工作线程中执行并记录一个 data 类别的 span（含排队时间与返回数据大小）"""
+    queued = time.perf_counter() - submitted
+    with tracing.span(f"{source}.{name}", cat="data", source=source, queued=round(queued, 4)) as span:
+        result = call()
+        span.set(bytes=tracing.payload_bytes(result))
+        return result
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    在线程池中执行阻塞函数（如 akshare / tushare 接口）
+
+    若为该函数所属数据源设置了在途上限，超出上限的调用会在事件循环中排队，
+    不会占用线程池中的线程；直接调用的数据接口（未用 @data_source 标记）在工作线程中
+    还会占用 source_slot 名额，与对冲请求等其他线程池中的请求合计不超过上限。
+    调用方的 contextvars（LLM用量统计、追踪 span）会复制到工作线程中
+
+    Args:
+        func: 阻塞函数
+        *args, **kwargs: 传给函数的参数
+
+    Returns:
+        函数返回值，异常原样抛出
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    source = get_source_name(func)
+    if not getattr(func, "__data_source__", None):
+        call = functools.partial(_in_source_slot, source, call)
+    if tracing.enabled():
+        call = functools.partial(_traced_call, source, _call_name(func), call, time.perf_counter())
+    call = functools.partial(contextvars.copy_context().run, call)
+    semaphore = _get_source_semaphore(source)
+    if semaphore is None:
+        return await loop.run_in_executor(get_executor(), call)
+    async with semaphore:
+        return await loop.run_in_executor(get_executor(), call)
@@ -7,12 +7,18 @@ from typing import Any
 
 
 class DateTimeEncoder(json.JSONEncoder):
-    """JSON编码器，支持datetime类型"""
+    """JSON编码器，支持datetime和numpy标量类型"""
     def default(self, obj: Any) -> Any:
         if isinstance(obj, datetime):
             return obj.isoformat()
         if isinstance(obj, date):
             return obj.isoformat()
+        # numpy标量（np.int64 / np.float64 等）
+        if hasattr(obj, "item") and callable(obj.item):
+            try:
+                return obj.item()
+            except (TypeError, ValueError):
+                pass
         return super().default(obj)
 
 
@@ -0,0 +1,66 @@
+"""
+延迟导入 - 重型依赖（akshare / tushare / openai / pandas 等）与包内导出的统一入口
+
+命令行每次冷启动都要导入全部依赖，仅 akshare 就需要数秒；这里把导入推迟到第一次使用：
+- lazy_import(name)：重型第三方模块的唯一访问入口，首次调用时导入，之后直接取 sys.modules
+  中的模块（录制/回放替换 sys.modules 中的 akshare / tushare 后立即生效，不能另存引用）
+- lazy_exports(package, exports)：包的 __init__ 按名称注册导出，访问时才导入所在子模块
+"""
+import importlib
+import sys
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Tuple
+
+# 重型依赖 -> 安装提示
+HEAVY_MODULES = {
+    "akshare": "pip install akshare",
+    "tushare": "pip install tushare",
+    "openai": "pip install openai",
+    "pandas": "pip install pandas",
+    "numpy": "pip install numpy",
+    "yaml": "pip install pyyaml",
+}
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    取得模块，未导入时才导入
+
+    Raises:
+        ImportError: 模块未安装（附安装提示）
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        hint = HEAVY_MODULES.get(name.split('.')[0])
+        if hint is None:
+            raise
+        raise ImportError(f"缺少依赖 {name}（{hint}）: {e}") from e
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    包级延迟导出（PEP 562），用法：
+
+        _EXPORTS = {"PriceStore": "src.data.price_store", ...}
+        __getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+    Args:
+        package: 包名（__name__）
+        exports: 导出名 -> 所在模块
+    """
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name]), name)
+        # 写回包的命名空间，之后的访问不再经过 __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
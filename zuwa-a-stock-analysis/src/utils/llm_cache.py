@@ -0,0 +1,211 @@
+"""
+LLM响应缓存 - 按内容寻址的本地磁盘缓存
+
+键为 sha256(模型, 消息, 温度, 最大Token数, 接口地址)，过期（TTL）或总大小超限时按最久未使用淘汰
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 默认缓存有效期（秒）与总大小上限（字节）
+DEFAULT_LLM_CACHE_TTL = 24 * 3600
+DEFAULT_LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+
+def cache_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: float,
+    max_tokens: Optional[int] = None,
+    base_url: str = ""
+) -> str:
+    """
+    计算缓存键
+
+    同名模型可能由不同接口提供，max_tokens 较小时响应可能被截断，二者都计入键
+    """
+    payload = json.dumps(
+        [model, messages, float(temperature), max_tokens, base_url.rstrip("/")],
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    LLM响应磁盘缓存
+
+    每条响应一个JSON文件（<目录>/<键前2位>/<键>.json），原子写入；
+    命中时更新文件修改时间，淘汰时优先删除最久未使用的条目
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        ttl: float = DEFAULT_LLM_CACHE_TTL,
+        max_bytes: int = DEFAULT_LLM_CACHE_MAX_BYTES
+    ):
+        """
+        Args:
+            root: 缓存目录，默认 <缓存目录>/llm
+            ttl: 有效期（秒），0 表示不缓存
+            max_bytes: 缓存总大小上限
+        """
+        if root is None:
+            from src.data.storage import cache_root
+            root = cache_root() / "llm"
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        max_tokens: Optional[int] = None,
+        base_url: str = ""
+    ) -> Optional[str]:
+        """
+        读取缓存
+
+        Returns:
+            响应文本，未命中或已过期时返回 None
+        """
+        if self.ttl <= 0:
+            return None
+
+        path = self._path(cache_key(model, messages, temperature, max_tokens, base_url))
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        os.utime(path)
+        self.hits += 1
+        return entry.get("content")
+
+    def put(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        content: str,
+        max_tokens: Optional[int] = None,
+        base_url: str = ""
+    ) -> None:
+        """写入缓存，超出大小上限时淘汰旧条目"""
+        if self.ttl <= 0 or content is None:
+            return
+
+        path = self._path(cache_key(model, messages, temperature, max_tokens, base_url))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({
+            "model": model,
+            "temperature": temperature,
+            "created": time.time(),
+            "content": content,
+        }, ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            size = self._current_size()
+            old = path.stat().st_size if path.exists() else 0
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self._size = size - old + len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> List[Path]:
+        if not self.root.exists():
+            return []
+        return list(self.root.glob("*/*.json"))
+
+    def _current_size(self) -> int:
+        # 首次写入时统计一次，之后增量维护
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self._entries())
+        return self._size
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def _evict(self) -> None:
+        """删除过期条目，仍超限时按修改时间从旧到新删除，直到降到上限的90%"""
+        entries = []
+        now = time.time()
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for mtime, size, path in sorted(entries):
+            if total <= target and now - mtime <= self.ttl:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for path in self._entries():
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._current_size()}
+
+
+# 全局缓存实例
+_llm_cache = None
+
+def get_llm_cache(ttl: Optional[float] = None, max_bytes: Optional[int] = None) -> LLMCache:
+    """
+    获取全局LLM缓存实例
+
+    Args:
+        ttl: 可选，更新有效期（秒）
+        max_bytes: 可选，更新大小上限
+    """
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMCache()
+    if ttl is not None:
+        _llm_cache.ttl = ttl
+    if max_bytes is not None:
+        _llm_cache.max_bytes = max_bytes
+    return _llm_cache
@@ -1,18 +1,64 @@
 """
 LLM分析模块 - 为各Agent提供智能分析能力
 """
+import asyncio
 import os
+import threading
+import weakref
 from typing import Dict, Any, Optional
 import json
 
+from src.utils.llm_cache import LLMCache, get_llm_cache
+from src.utils.llm_scheduler import LLMScheduler, get_llm_scheduler, json_end
+from src.utils.lazy import lazy_import
+from src.utils.tracing import payload_bytes, span
+
+DEFAULT_BASE_URL = "https://api.moonshot.cn/v1"
+
+# 进程内共享的客户端：每个事件循环一个（httpx连接池绑定在创建它的事件循环上）
+_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_clients_pid = os.getpid()
+_clients_lock = threading.Lock()
+
+
+def get_openai_client(api_key: Optional[str], base_url: str):
+    """
+    获取长连接的 AsyncOpenAI 客户端
+
+    同一进程、同一事件循环、同一 (api_key, base_url) 复用一个客户端及其连接池；
+    fork 出的子进程会重新创建
+    """
+    global _clients, _clients_pid
+    AsyncOpenAI = lazy_import("openai").AsyncOpenAI
+    
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients = weakref.WeakKeyDictionary()
+            _clients_pid = os.getpid()
+        pool = _clients.setdefault(loop, {})
+        key = (api_key, base_url)
+        if key not in pool:
+            pool[key] = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        return pool[key]
+
 
 class LLMAnalyzer:
     """LLM分析器 - 使用Moonshot/Kimi进行智能分析"""
     
-    def __init__(self, model: str = "moonshot/kimi-k2.5"):
+    def __init__(
+        self,
+        model: str = "moonshot/kimi-k2.5",
+        cache: Optional[LLMCache] = None,
+        scheduler: Optional[LLMScheduler] = None
+    ):
         self.model = model
         self.api_key = os.getenv("MOONSHOT_API_KEY")
-        self.base_url = "https://api.moonshot.cn/v1"
+        self.base_url = os.getenv("MOONSHOT_BASE_URL") or DEFAULT_BASE_URL
+        self.cache = cache or get_llm_cache()
+        self.scheduler = scheduler or get_llm_scheduler()
+        self.temperature = 1.0
+        self.max_tokens = 2000
     
     async def analyze_stock(
         self,
@@ -31,40 +77,45 @@ class LLMAnalyzer:
             analysis_type: 分析类型 (comprehensive/technical/fundamental/sentiment)
         """
         try:
-            from openai import AsyncOpenAI
-            
-            client = AsyncOpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url
-            )
-            
             # 构建提示
             prompt = self._build_prompt(symbol, name, context, analysis_type)
+            messages = [
+                {"role": "system", "content": "你是一位专业的股票分析师，擅长A股市场分析。请提供客观、专业的分析意见。"},
+                {"role": "user", "content": prompt}
+            ]
+            model = self.model.split("/")[-1]
             
-            response = await client.chat.completions.create(
-                model="kimi-k2.5",
-                messages=[
-                    {"role": "system", "content": "你是一位专业的股票分析师，擅长A股市场分析。请提供客观、专业的分析意见。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=1.0,
-                max_tokens=2000
-            )
+            with span(f"llm.{analysis_type}", cat="llm", symbol=symbol, model=model) as trace:
+                # 相同接口、模型、提示、温度和最大Token数直接复用缓存结果
+                content = self.cache.get(model, messages, self.temperature, self.max_tokens, self.base_url)
+                trace.set(cache="miss" if content is None else "hit")
+                if content is None:
+                    # 经调度器发送：在途上限、超时重试、Token计量
+                    content = await self.scheduler.complete(
+                        get_openai_client(self.api_key, self.base_url),
+                        model=model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens
+                    )
+                    self.cache.put(model, messages, self.temperature, content, self.max_tokens, self.base_url)
+                trace.set(bytes=payload_bytes(content))
             
-            content = response.choices[0].message.content
+            # 尝试解析JSON（允许前后有说明文字或代码块标记）
+            start, end = content.find("{"), json_end(content)
+            if start >= 0 and end > 0:
+                try:
+                    return json.loads(content[start:end])
+                except ValueError:
+                    pass
             
-            # 尝试解析JSON
-            try:
-                result = json.loads(content)
-                return result
-            except:
-                # 如果不是JSON，包装成标准格式
-                return {
-                    "analysis": content,
-                    "signal": "NEUTRAL",
-                    "confidence": 50,
-                    "raw_response": content
-                }
+            # 如果不是JSON，包装成标准格式
+            return {
+                "analysis": content,
+                "signal": "NEUTRAL",
+                "confidence": 50,
+                "raw_response": content
+            }
                 
         except Exception as e:
             print(f"LLM分析失败: {e}")
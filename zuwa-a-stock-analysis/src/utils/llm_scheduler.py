@@ -0,0 +1,298 @@
+"""
+LLM请求调度 - 在途上限、超时、带抖动的重试、Token计量与预算，可选流式输出
+
+所有Agent的LLM调用都经过 LLMAnalyzer -> LLMScheduler
+"""
+import asyncio
+import contextvars
+import random
+import weakref
+from typing import Any, Dict, List, Optional
+
+# 默认参数，与 config/agents.yaml 中 llm 段一致
+DEFAULT_LLM_MAX_INFLIGHT = 4
+DEFAULT_LLM_TIMEOUT = 60.0
+DEFAULT_LLM_RETRIES = 2
+DEFAULT_LLM_BACKOFF = 1.0
+
+# 可重试的HTTP状态码
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError"}
+
+USAGE_FIELDS = ("requests", "prompt_tokens", "completion_tokens", "retries", "timeouts", "early_stops")
+
+# 当前分析任务的用量统计（analyze_stock 内开启，随 asyncio 任务传递）
+_usage_scope: contextvars.ContextVar = contextvars.ContextVar("llm_usage_scope", default=None)
+
+
+class LLMBudgetExceeded(RuntimeError):
+    """本次运行的Token预算已用完"""
+
+
+def new_usage() -> Dict[str, int]:
+    """空的用量统计"""
+    return {field: 0 for field in USAGE_FIELDS}
+
+
+def start_usage_scope() -> Dict[str, int]:
+    """
+    为当前任务开启独立的用量统计
+
+    在 analyze_stock 开头调用，之后同一任务（含其 gather 出的子任务）中的LLM调用都会计入返回的字典
+    """
+    usage = new_usage()
+    _usage_scope.set(usage)
+    return usage
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算Token数（接口未返回 usage 时使用；中文约每2字1个Token）"""
+    return max(1, len(text or "") // 2)
+
+
+class JsonScanner:
+    """增量扫描文本，找到第一个JSON对象的结束位置（流式输出时逐段喂入）"""
+
+    def __init__(self):
+        self.pos = 0
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> int:
+        """
+        Returns:
+            对象已闭合时返回其在全部已喂入文本中的结束位置（不含），否则 -1
+        """
+        for ch in chunk:
+            self.pos += 1
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+            elif self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    return self.pos
+        return -1
+
+
+def json_end(text: str) -> int:
+    """第一个JSON对象的结束位置（不含），尚未闭合时返回 -1"""
+    return JsonScanner().feed(text)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if getattr(error, "status_code", None) in RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+class LLMScheduler:
+    """
+    LLM请求调度器
+
+    - 同时在途的请求数不超过 max_inflight（每个事件循环各自一个信号量）
+    - 每次尝试有独立的超时；超时、限流、5xx、连接错误按指数退避加随机抖动重试
+    - 统计请求数与Token用量，超过 token_budget 后拒绝新请求
+    - stream=True 时流式接收，JSON对象闭合后立即结束
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = DEFAULT_LLM_MAX_INFLIGHT,
+        timeout: float = DEFAULT_LLM_TIMEOUT,
+        retries: int = DEFAULT_LLM_RETRIES,
+        backoff: float = DEFAULT_LLM_BACKOFF,
+        token_budget: int = 0,
+        stream: bool = False
+    ):
+        """
+        Args:
+            max_inflight: 同时在途的请求上限
+            timeout: 单次请求超时（秒）
+            retries: 失败后的最多重试次数
+            backoff: 重试退避基数（秒），第 n 次重试前等待 backoff * 2^(n-1) * U(0.5, 1.5)
+            token_budget: 本次运行的Token预算，0 表示不限制
+            stream: 默认是否流式接收
+        """
+        self.max_inflight = max_inflight
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.token_budget = token_budget
+        self.stream = stream
+        self.usage = new_usage()
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(max(1, self.max_inflight))
+        return semaphore
+
+    def configure(self, **options) -> None:
+        """更新参数（None 值忽略）"""
+        for name, value in options.items():
+            if value is not None:
+                setattr(self, name, value)
+        if options.get("max_inflight") is not None:
+            self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def tokens_used(self) -> int:
+        return self.usage["prompt_tokens"] + self.usage["completion_tokens"]
+
+    def reset_usage(self) -> None:
+        """开始新一轮运行时清零用量"""
+        self.usage = new_usage()
+
+    def _record(self, **counts) -> None:
+        scope = _usage_scope.get()
+        for target in (self.usage, scope):
+            if target is None:
+                continue
+            for name, value in counts.items():
+                target[name] += value
+
+    async def complete(
+        self,
+        client,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float = 1.0,
+        max_tokens: int = 2000,
+        stream: Optional[bool] = None
+    ) -> str:
+        """
+        发送一次对话补全请求
+
+        Args:
+            client: AsyncOpenAI 兼容客户端
+            stream: 是否流式接收（JSON闭合即停止），默认取 self.stream
+
+        Returns:
+            响应文本
+
+        Raises:
+            LLMBudgetExceeded: Token预算已用完
+            其他异常: 重试耗尽后抛出最后一次的异常
+        """
+        if self.token_budget and self.tokens_used >= self.token_budget:
+            raise LLMBudgetExceeded(f"LLM Token预算已用完: {self.tokens_used}/{self.token_budget}")
+
+        stream = self.stream if stream is None else stream
+        attempt = 0
+        while True:
+            try:
+                # 退避等待期间不占用在途名额
+                async with self._semaphore():
+                    call = self._stream(client, model, messages, temperature, max_tokens) if stream \
+                        else self._request(client, model, messages, temperature, max_tokens)
+                    return await asyncio.wait_for(call, self.timeout)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self._record(timeouts=1)
+                if attempt >= self.retries or not _is_retryable(e):
+                    raise
+                attempt += 1
+                self._record(retries=1)
+                await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+    async def _request(self, client, model, messages, temperature, max_tokens) -> str:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        content = response.choices[0].message.content or ""
+        usage = getattr(response, "usage", None)
+        self._record(
+            requests=1,
+            prompt_tokens=getattr(usage, "prompt_tokens", None) or estimate_tokens(_joined(messages)),
+            completion_tokens=getattr(usage, "completion_tokens", None) or estimate_tokens(content)
+        )
+        return content
+
+    async def _stream(self, client, model, messages, temperature, max_tokens) -> str:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        parts: List[str] = []
+        scanner = JsonScanner()
+        usage = None
+        early_stop = False
+        try:
+            async for chunk in response:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                consumed = scanner.pos
+                end = scanner.feed(delta)
+                if end > 0:
+                    # JSON对象已闭合，后续内容不再需要
+                    parts.append(delta[:end - consumed])
+                    early_stop = True
+                    break
+                parts.append(delta)
+        finally:
+            # 提前结束或超时取消时关闭连接
+            close = getattr(response, "close", None)
+            if close is not None:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+
+        text = "".join(parts)
+        self._record(
+            requests=1,
+            early_stops=int(early_stop),
+            prompt_tokens=getattr(usage, "prompt_tokens", None) or estimate_tokens(_joined(messages)),
+            completion_tokens=getattr(usage, "completion_tokens", None) or estimate_tokens(text)
+        )
+        return text
+
+
+def _joined(messages: List[Dict[str, Any]]) -> str:
+    return "".join(str(m.get("content", "")) for m in messages)
+
+
+# 全局调度器实例
+_llm_scheduler = None
+
+def get_llm_scheduler(**options) -> LLMScheduler:
+    """
+    获取全局LLM调度器实例
+
+    Args:
+        **options: 可选，更新 max_inflight / timeout / retries / backoff / token_budget / stream
+    """
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        _llm_scheduler = LLMScheduler()
+    if options:
+        _llm_scheduler.configure(**options)
+    return _llm_scheduler
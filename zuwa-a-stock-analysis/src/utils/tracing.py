@@ -0,0 +1,287 @@
+"""
+链路追踪 - 记录各Agent、数据源调用与LLM调用的耗时，导出 Chrome Trace 与汇总表
+
+默认关闭：未开启时 span() 返回共享的空上下文，traced 包装只多一次全局变量判断。
+当前 span 保存在 contextvar 中，随 asyncio 子任务和 run_blocking 的线程池调用传递，
+因此线程里的数据源调用能挂到发起它的Agent下面
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 汇总表的列
+SUMMARY_COLUMNS = ["cat", "name", "count", "wall", "wall_mean", "wall_max", "cpu", "bytes", "hits", "misses"]
+
+
+@dataclass
+class Span:
+    """一次被追踪的调用"""
+    id: int
+    name: str
+    cat: str
+    start: float                      # time.perf_counter()
+    lane: int                         # Chrome Trace 中的 tid：asyncio 任务或线程
+    parent: Optional[int] = None
+    wall: float = 0.0                 # 秒
+    cpu: float = 0.0                  # 执行线程的CPU时间（秒）；异步span含同线程其他任务
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """收集一次运行中的全部 span"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lanes: Dict[Tuple[str, int], Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+
+    def lane(self) -> int:
+        """当前 asyncio 任务（不在事件循环中时为当前线程）对应的泳道编号"""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is not None:
+            key, label = ("task", id(task)), task.get_name()
+        else:
+            thread = threading.current_thread()
+            key, label = ("thread", thread.ident), thread.name
+        with self._lock:
+            if key not in self._lanes:
+                self._lanes[key] = (len(self._lanes) + 1, label)
+            return self._lanes[key][0]
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> "pd.DataFrame":
+        """
+        按 (类别, 名称) 汇总
+
+        Returns:
+            列为 SUMMARY_COLUMNS 的DataFrame，按总耗时降序；时间单位为秒
+        """
+        import pandas as pd
+
+        with self._lock:
+            spans = list(self.spans)
+        if not spans:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+        frame = pd.DataFrame({
+            "cat": [s.cat for s in spans],
+            "name": [s.name for s in spans],
+            "wall": [s.wall for s in spans],
+            "cpu": [s.cpu for s in spans],
+            "bytes": [s.attrs.get("bytes") or 0 for s in spans],
+            "hits": [s.attrs.get("cache") == "hit" for s in spans],
+            "misses": [s.attrs.get("cache") == "miss" for s in spans],
+        })
+        table = frame.groupby(["cat", "name"], sort=False).agg(
+            count=("wall", "size"),
+            wall=("wall", "sum"),
+            wall_mean=("wall", "mean"),
+            wall_max=("wall", "max"),
+            cpu=("cpu", "sum"),
+            bytes=("bytes", "sum"),
+            hits=("hits", "sum"),
+            misses=("misses", "sum"),
+        ).reset_index()
+        return table.sort_values("wall", ascending=False, kind="stable").reset_index(drop=True)[SUMMARY_COLUMNS]
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Chrome Trace Event 格式（chrome://tracing 或 ui.perfetto.dev 打开）"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+            lanes = list(self._lanes.values())
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": label}}
+            for tid, label in lanes
+        ]
+        for s in sorted(spans, key=lambda s: s.start):
+            args = {k: v for k, v in s.attrs.items() if v is not None}
+            args["cpu_ms"] = round(s.cpu * 1000, 3)
+            if s.parent is not None:
+                args["parent"] = s.parent
+            events.append({
+                "name": s.name, "cat": s.cat, "ph": "X", "pid": pid, "tid": s.lane,
+                "ts": round((s.start - self.origin) * 1e6, 1), "dur": round(s.wall * 1e6, 1),
+                "id": s.id, "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path) -> Path:
+        """导出 Chrome Trace JSON"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False, default=str)
+        return path
+
+
+# 当前运行的追踪器，None 表示关闭
+_tracer: Optional[Tracer] = None
+# 当前所在的 span
+_current: contextvars.ContextVar = contextvars.ContextVar("zuwa_trace_span", default=None)
+
+
+class _ActiveSpan:
+    """开启追踪时 span() 返回的上下文"""
+
+    __slots__ = ("tracer", "span", "token", "cpu_start")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        parent = _current.get()
+        self.span = Span(
+            id=tracer.next_id(), name=name, cat=cat, start=0.0, lane=tracer.lane(),
+            parent=parent.id if parent is not None else None, attrs=attrs
+        )
+
+    def set(self, **attrs) -> None:
+        """补充属性（bytes、cache="hit"/"miss" 等）"""
+        self.span.attrs.update(attrs)
+
+    def __enter__(self) -> "_ActiveSpan":
+        self.token = _current.set(self.span)
+        self.cpu_start = time.thread_time()
+        self.span.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.span.wall = time.perf_counter() - self.span.start
+        self.span.cpu = time.thread_time() - self.cpu_start
+        _current.reset(self.token)
+        if exc_type is not None:
+            self.span.attrs["error"] = exc_type.__name__
+        self.tracer.record(self.span)
+        return False
+
+
+class _NoopSpan:
+    """关闭追踪时共享的空上下文"""
+
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def enabled() -> bool:
+    """是否正在追踪"""
+    return _tracer is not None
+
+
+def span(name: str, cat: str = "", **attrs):
+    """
+    追踪一段代码
+
+    用法：
+        with span("stock_zh_a_hist", cat="data", source="akshare") as s:
+            df = ...
+            s.set(bytes=payload_bytes(df))
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_SPAN
+    return _ActiveSpan(tracer, name, cat, attrs)
+
+
+def annotate(**attrs) -> None:
+    """给当前 span 补充属性（如缓存命中），未追踪时不做任何事"""
+    if _tracer is None:
+        return
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def traced(name: Optional[str] = None, cat: str = "") -> Callable:
+    """
+    装饰器：追踪函数调用（同步/异步均可）
+
+    Args:
+        name: span 名称，默认函数的 __qualname__
+        cat: 类别
+    """
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with span(label, cat):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(label, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def payload_bytes(value: Any) -> Optional[int]:
+    """
+    返回数据的大小（字节）：DataFrame 按列数组估算，文本按UTF-8编码
+
+    数据源接口不暴露网络字节数，以返回数据的大小近似下载量
+    """
+    if value is None:
+        return None
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(index=False, deep=False).sum())
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return None
+
+
+def start_tracing() -> Tracer:
+    """开启追踪，返回新的追踪器"""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    """关闭追踪，返回已收集数据的追踪器"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    """当前追踪器，未开启时返回 None"""
+    return _tracer
@@ -0,0 +1,100 @@
+"""
+交易日历 - 判断A股交易日与最近一个已收盘交易日
+
+优先使用AKShare交易日历（本地缓存），不可用时按周一至周五近似
+"""
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Set
+
+from src.utils.lazy import lazy_import
+
+# 日线数据落地时间（收盘15:00后留出数据源更新时间）
+DAILY_DATA_READY = time(15, 30)
+
+_trade_days: Optional[Set[date]] = None
+_trade_day_range: Optional[tuple] = None
+_lock = threading.Lock()
+
+
+def _load_trade_days() -> Set[date]:
+    """加载交易日集合：本地缓存 -> AKShare -> 空集合（回退到工作日近似）"""
+    global _trade_days, _trade_day_range
+    if _trade_days is not None:
+        return _trade_days
+
+    with _lock:
+        if _trade_days is not None:
+            return _trade_days
+
+        from src.data.storage import cache_root, read_frame, write_frame
+        base = cache_root() / "trade_calendar"
+        days: Set[date] = set()
+
+        try:
+            df = read_frame(base)
+            if not df.empty:
+                days = set(_to_dates(df["trade_date"]))
+            # 缓存不覆盖今天时重新下载
+            if not days or max(days) < date.today():
+                ak = lazy_import("akshare")
+                df = ak.tool_trade_date_hist_sina()
+                if df is not None and not df.empty:
+                    write_frame(df[["trade_date"]].astype(str), base)
+                    days = set(_to_dates(df["trade_date"]))
+        except Exception as e:
+            print(f"⚠️ 交易日历获取失败，按工作日近似: {e}")
+
+        _trade_day_range = (min(days), max(days)) if days else None
+        _trade_days = days
+        return _trade_days
+
+
+def _to_dates(values) -> List[date]:
+    """把日期列转换为 date 列表"""
+    return [datetime.strptime(str(v)[:10], "%Y-%m-%d").date() for v in values]
+
+
+def is_trading_day(day: date) -> bool:
+    """是否为交易日"""
+    days = _load_trade_days()
+    if _trade_day_range and _trade_day_range[0] <= day <= _trade_day_range[1]:
+        return day in days
+    return day.weekday() < 5
+
+
+def previous_trading_day(day: date) -> date:
+    """严格早于 day 的最近一个交易日"""
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def last_complete_trading_day(now: Optional[datetime] = None) -> date:
+    """
+    最近一个日线已经落地的交易日
+
+    交易日 15:30 之前当日K线尚未定型，返回前一交易日
+    """
+    now = now or datetime.now()
+    today = now.date()
+    if is_trading_day(today) and now.time() >= DAILY_DATA_READY:
+        return today
+    return previous_trading_day(today)
+
+
+def is_trading_session(now: Optional[datetime] = None) -> bool:
+    """当前是否处于交易日的盘中（日线尚未定型）"""
+    now = now or datetime.now()
+    return is_trading_day(now.date()) and time(9, 15) <= now.time() < DAILY_DATA_READY
+
+
+def recent_trading_days(n: int, now: Optional[datetime] = None) -> List[date]:
+    """最近 n 个已收盘交易日，按时间升序"""
+    day = last_complete_trading_day(now)
+    days = [day]
+    while len(days) < n:
+        day = previous_trading_day(day)
+        days.append(day)
+    return list(reversed(days))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+祖蛙回测引擎测试 - Agent回放一致性、综合评分/评级与多进程回放（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.agents.base import AgentOutput
+from src.agents.bear_agent import BearAnalystAgent
+from src.agents.bull_agent import BullAnalystAgent
+from src.agents.chief_agent import ChiefAnalystAgent
+from src.agents.technical_agent import TechnicalAnalysisAgent
+from src.analysis.advanced_analyzer import AdvancedAnalyzer
+from src.backtest import BacktestEngine, composite_scores, ratings, replay_symbol, summarize
+from src.backtest.replay import replay_coverage
+from src.data.price_store import PriceStore
+from src.data.storage import write_frame
+
+
+def make_daily(days: int = 160, seed: int = 0) -> pd.DataFrame:
+    """随机游走的标准列日线"""
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.03, days)))
+    dates = pd.bdate_range("2025-01-01", periods=days)
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "open": close, "close": close, "high": close * 1.01, "low": close * 0.99,
+        "volume": rng.integers(1000, 5000, days).astype(float),
+        "pct_change": np.r_[0, np.diff(close) / close[:-1] * 100],
+    })
+
+
+def test_technical_replay_matches_agent():
+    df = make_daily()
+    replay = replay_symbol("600519", df)
+    agent = TechnicalAnalysisAgent({})
+    chief = ChiefAnalystAgent({})
+
+    # 每个交易日的回放评分等于截断到当日后运行Agent的结果
+    for t in (0, 5, 12, 13, 30, 61, 100, 159):
+        output = asyncio.run(agent.analyze("600519", {"daily_data": df.iloc[:t + 1]}))
+        expected = chief._signal_to_score(output.signal, output.confidence)
+        assert abs(replay["technical"].iloc[t] - expected) < 1e-9, t
+
+    # 前瞻收益
+    assert abs(replay["fwd_5d"].iloc[0] - (df["close"].iloc[5] / df["close"].iloc[0] - 1) * 100) < 1e-9
+    assert replay["fwd_20d"].iloc[-20:].isna().all()
+
+
+def test_volume_price_and_debate_replays_match_agents():
+    df = make_daily()
+    replay = replay_symbol("600519", df)
+    technical = TechnicalAnalysisAgent({})
+    bull, bear = BullAnalystAgent({"use_llm": False}), BearAnalystAgent({})
+    chief = ChiefAnalystAgent({"weights": {**ChiefAnalystAgent({}).weights, "volume_price": 0.1}})
+
+    for t in (0, 5, 18, 19, 30, 61, 100, 159):
+        data = df.iloc[:t + 1]
+        tech = asyncio.run(technical.analyze("600519", {"daily_data": data}))
+        context = {"technical_analysis": tech.details}
+        outputs = {
+            "bull": asyncio.run(bull.analyze("600519", context)),
+            "bear": asyncio.run(bear.analyze("600519", context)),
+        }
+        # 与 main.py 的量价分析师一致：不足20根K线时没有输出
+        vp = AdvancedAnalyzer().analyze_volume_price_relationship(data)
+        if "error" in vp:
+            assert np.isnan(replay["volume_price"].iloc[t]), t
+        else:
+            health = vp["health_score"]
+            outputs["volume_price"] = AgentOutput(
+                agent_name="量价分析师",
+                signal="BULLISH" if health > 60 else "BEARISH" if health < 40 else "NEUTRAL",
+                confidence=abs(health - 50) * 2, summary="", details=vp, timestamp=None
+            )
+        expected = chief._extract_scores(outputs)
+        for key in ("bull_view", "bear_view", "volume_price"):
+            if key in expected:
+                assert abs(replay[key].iloc[t] - expected[key]) < 1e-9, (key, t)
+
+
+def test_replay_coverage():
+    coverage = replay_coverage(ChiefAnalystAgent({}).weights)
+    assert {"technical", "bull_view", "bear_view"} <= set(coverage["replayed"])
+    assert coverage["partial"] == ["bull_view", "bear_view"]
+    assert "capital" in coverage["missing"] and "volume_price" in coverage["unweighted"]
+
+    # 未配置 volume_price 权重时首席分析师不计入量价分析师
+    output = AgentOutput(agent_name="量价分析师", signal="BULLISH", confidence=40, summary="", details={}, timestamp=None)
+    assert "volume_price" not in ChiefAnalystAgent({})._extract_scores({"volume_price": output})
+
+
+def test_composite_and_rating_match_chief():
+    chief = ChiefAnalystAgent({})
+    rng = np.random.default_rng(1)
+    scores = pd.DataFrame(rng.uniform(0, 100, (200, 4)), columns=["technical", "capital", "sector", "retail_sentiment"])
+    scores = scores.mask(rng.random(scores.shape) < 0.3)
+
+    composite = composite_scores(scores, chief.weights)
+    labels = ratings(composite, chief.thresholds)
+    for i in range(len(scores)):
+        row = {k: v for k, v in scores.iloc[i].items() if not pd.isna(v)}
+        expected = chief._calculate_composite_score(row)
+        assert abs(composite[i] - expected) < 1e-9
+        assert labels[i] == chief._determine_rating(expected)["signal"]
+
+
+def test_engine_parallel_replay(tmp_path):
+    store = PriceStore(tmp_path)
+    for i in range(6):
+        write_frame(make_daily(seed=i), tmp_path / f"{600000 + i}")
+
+    engine = BacktestEngine(store=store, workers=2, chunk_size=2)
+    result = engine.run(start="2025-03-01")
+    frame = result["frame"]
+
+    assert result["symbols"] == 6
+    assert frame["date"].min() >= "2025-03-01"
+    assert set(frame["rating"]) <= {"STRONG_BUY", "BUY", "HOLD", "SELL", "STRONG_SELL"}
+
+    # 多进程与单进程结果一致；start 之前的K线只用于预热
+    serial = BacktestEngine(store=store, workers=1).run(start="2025-03-01")["frame"]
+    pd.testing.assert_frame_equal(frame, serial)
+    full = replay_symbol("600000", store.load("600000"))
+    assert np.allclose(full[full["date"] >= "2025-03-01"]["technical"], frame[frame["code"] == "600000"]["technical"])
+
+    # 统计：各评级样本数之和等于股票日总数
+    summary = result["summary"]
+    assert summary["count"].sum() == len(frame)
+    assert abs(summary["share"].sum() - 100) < 1e-6
+    by_year = summarize(frame, by_year=True)
+    assert by_year["count"].sum() == len(frame)
+
+
+def test_no_lookahead():
+    df = make_daily()
+    base = replay_symbol("600519", df)
+
+    # 修改未来K线不影响历史评分
+    changed = df.copy()
+    changed.loc[100:, "close"] *= 1.5
+    replay = replay_symbol("600519", changed)
+    assert np.array_equal(base["technical"].iloc[:100], replay["technical"].iloc[:100])
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_technical_replay_matches_agent()
+    test_volume_price_and_debate_replays_match_agents()
+    test_replay_coverage()
+    test_composite_and_rating_match_chief()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_engine_parallel_replay(Path(tmp))
+    test_no_lookahead()
+    print("✅ 回测引擎测试通过")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+祖蛙录制/回放测试 - 用内存中的假 akshare / tushare 模块录制，再离线回放（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+import json
+import types
+
+import pandas as pd
+
+from src.utils.cassette import LLM_PATH, Cassette, CassetteMiss, CassetteReplayError, call_key
+from src.utils.concurrency import get_source_name, run_blocking
+from src.utils.llm_cache import LLMCache
+from src.utils.llm_helper import LLMAnalyzer
+
+
+def fake_akshare(calls: list) -> types.ModuleType:
+    """假 akshare：记录调用次数，返回带参数的日线"""
+    module = types.ModuleType("akshare")
+
+    def stock_zh_a_hist(symbol, period="daily", start_date="", end_date="", adjust=""):
+        calls.append(symbol)
+        return pd.DataFrame({"日期": [end_date], "收盘": [float(len(calls))], "代码": [symbol]})
+
+    def stock_news_em(symbol):
+        raise ConnectionError("接口超时")
+
+    module.stock_zh_a_hist = stock_zh_a_hist
+    module.stock_news_em = stock_news_em
+    return module
+
+
+def fake_tushare() -> types.ModuleType:
+    """假 tushare：pro_api() 返回客户端对象"""
+    module = types.ModuleType("tushare")
+
+    class Pro:
+        def daily(self, ts_code):
+            return pd.DataFrame({"ts_code": [ts_code], "close": [10.0]})
+
+    module.pro_api = lambda token=None: Pro()
+    return module
+
+
+def test_record_then_replay(tmp_path):
+    calls = []
+    saved = {name: sys.modules.get(name) for name in ("akshare", "tushare")}
+    sys.modules["akshare"] = fake_akshare(calls)
+    sys.modules["tushare"] = fake_tushare()
+    try:
+        cassette = Cassette(tmp_path, "record")
+        with cassette.use():
+            import akshare as ak
+            import tushare as ts
+            first = ak.stock_zh_a_hist(symbol="600519", start_date="20240101", end_date="20241231")
+            second = ak.stock_zh_a_hist(symbol="600519", start_date="20240101", end_date="20241231")
+            try:
+                ak.stock_news_em(symbol="600519")
+            except ConnectionError:
+                pass
+            pro = ts.pro_api("token")
+            daily = pro.daily(ts_code="600519.SH")
+            # 代理保留 __module__，数据源限流仍能识别
+            assert get_source_name(ak.stock_zh_a_hist) == "akshare"
+        assert sys.modules["akshare"] is not None and not hasattr(sys.modules["akshare"], "_cassette")
+        assert cassette.stats()["recorded"] == 5
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+    assert calls == ["600519", "600519"]
+
+    # 回放：不需要安装 akshare / tushare，日期参数换成今天仍能匹配
+    replay = Cassette(tmp_path, "replay")
+    with replay.use():
+        import akshare as ak
+        import tushare as ts
+        a = ak.stock_zh_a_hist(symbol="600519", start_date="20250101", end_date="2025-06-30")
+        b = asyncio.run(run_blocking(ak.stock_zh_a_hist, symbol="600519", start_date="20250101", end_date="20250630"))
+        c = ak.stock_zh_a_hist(symbol="600519", start_date="20250101", end_date="20250630")
+        pd.testing.assert_frame_equal(a, first)
+        pd.testing.assert_frame_equal(b, second)
+        # 同一键录制了两次，之后重复最后一次
+        pd.testing.assert_frame_equal(c, second)
+        try:
+            ak.stock_news_em(symbol="600519")
+            assert False, "应回放录制时的异常"
+        except CassetteReplayError as e:
+            assert "ConnectionError" in str(e)
+        pd.testing.assert_frame_equal(ts.pro_api("token").daily(ts_code="600519.SH"), daily)
+        try:
+            ak.stock_zh_a_hist(symbol="000001", start_date="20250101", end_date="20250630")
+            assert False, "未录制的调用应报错"
+        except CassetteMiss:
+            pass
+    assert replay.stats()["misses"] == 1
+    assert replay.stats()["missed_paths"] == {"akshare.stock_zh_a_hist": 1}
+    assert len(calls) == 2
+
+
+def test_defaults_and_date_masking(tmp_path):
+    assert call_key("a.f", ("20240102",), {"d": "2024-01-02"}) == call_key("a.f", ("20991231",), {"d": "2099-12-31"})
+    assert call_key("a.f", ("600519",)) != call_key("a.f", ("000001",))
+
+    cassette = Cassette(tmp_path, "record")
+    cassette.add("akshare.stock_zh_a_spot_em", pd.DataFrame({"代码": ["600519"]}), default=True)
+    cassette.add("akshare.stock_individual_info_em", pd.DataFrame({"item": ["行业"], "value": ["白酒"]}),
+                 kwargs={"symbol": "600519"})
+
+    replay = Cassette(tmp_path, "replay")
+    spot = replay.replay("akshare.stock_zh_a_spot_em")
+    spot.loc[0, "代码"] = "changed"
+    # 每次回放都是新副本
+    assert replay.replay("akshare.stock_zh_a_spot_em", kwargs={"any": 1}).loc[0, "代码"] == "600519"
+    assert replay.replay("akshare.stock_individual_info_em", kwargs={"symbol": "600519"}).loc[0, "value"] == "白酒"
+    assert replay.stats()["hits"] == 3 and replay.stats()["misses"] == 0
+
+
+def test_llm_replay(tmp_path):
+    cassette = Cassette(tmp_path / "cassette", "record")
+    cassette.add(LLM_PATH, json.dumps({"signal": "BEARISH", "confidence": 66}), default=True)
+
+    replay = Cassette(tmp_path / "cassette", "replay")
+    with replay.use():
+        llm = LLMAnalyzer(cache=LLMCache(root=tmp_path / "llm"))
+        llm.api_key = "test"
+        result = asyncio.run(llm.analyze_stock("600519", "贵州茅台", {}, "technical"))
+    assert result["signal"] == "BEARISH" and result["confidence"] == 66
+    assert replay.stats()["hits"] == 1
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_record_then_replay(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_defaults_and_date_masking(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_llm_replay(Path(tmp))
+    print("✅ 录制/回放测试通过")
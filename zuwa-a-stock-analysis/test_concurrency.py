@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+祖蛙并发执行测试 - 线程池大小与并发加速（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+import threading
+import time
+
+from src.utils.concurrency import configure_executor, configure_source_limits, data_source, get_source_name, run_blocking
+
+
+@data_source("test_source")
+def _slow_call(delay: float, active: list, peak: list, lock: threading.Lock) -> float:
+    """模拟阻塞的数据接口"""
+    with lock:
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+    time.sleep(delay)
+    with lock:
+        active[0] -= 1
+    return delay
+
+
+def test_run_blocking_is_bounded_and_concurrent():
+    """4个阻塞调用在2线程池中应并发执行且不超过2个同时运行"""
+    configure_executor(2)
+    active, peak, lock = [0], [0], threading.Lock()
+    
+    async def fan_out():
+        return await asyncio.gather(*(
+            run_blocking(_slow_call, 0.1, active, peak, lock) for _ in range(4)
+        ))
+    
+    start = time.perf_counter()
+    results = asyncio.run(fan_out())
+    elapsed = time.perf_counter() - start
+    
+    print(f"   4个调用耗时 {elapsed:.2f}s, 峰值并发 {peak[0]}")
+    assert results == [0.1] * 4
+    assert peak[0] == 2
+    assert elapsed < 0.35  # 串行需要0.4s
+
+
+def test_run_blocking_propagates_errors():
+    """阻塞函数的异常应原样抛出"""
+    @data_source("local")
+    def boom():
+        raise ValueError("接口异常")
+    
+    async def call():
+        await run_blocking(boom)
+    
+    try:
+        asyncio.run(call())
+    except ValueError as e:
+        assert "接口异常" in str(e)
+    else:
+        raise AssertionError("异常未抛出")
+
+
+def test_source_limit_caps_inflight_calls():
+    """按数据源限制在途请求数，线程池更大时也只允许1个同时运行"""
+    configure_executor(4)
+    configure_source_limits({"test_source": 1})
+    active, peak, lock = [0], [0], threading.Lock()
+    
+    async def fan_out():
+        return await asyncio.gather(*(
+            run_blocking(_slow_call, 0.02, active, peak, lock) for _ in range(4)
+        ))
+    
+    try:
+        asyncio.run(fan_out())
+    finally:
+        configure_source_limits({})
+    
+    assert peak[0] == 1
+
+
+def test_direct_calls_share_thread_level_limit():
+    """直接调用的数据接口与其他线程池中占用 source_slot 的请求共用同一上限"""
+    from src.utils.concurrency import source_slot
+    configure_source_limits({"time": 1})
+    held = threading.Event()
+
+    def other_pool_request():
+        with source_slot("time"):
+            held.set()
+            time.sleep(0.2)
+
+    try:
+        worker = threading.Thread(target=other_pool_request)
+        worker.start()
+        held.wait()
+        start = time.perf_counter()
+        asyncio.run(run_blocking(time.sleep, 0))
+        waited = time.perf_counter() - start
+        worker.join()
+    finally:
+        configure_source_limits({})
+
+    assert waited >= 0.15
+
+
+def test_unmarked_local_callable_is_rejected():
+    """仓库内未标记数据源的函数应报错，而不是归入名为 src 的数据源"""
+    from src.data.market_snapshot import MarketSnapshot
+    from src.screener import Screener
+    assert get_source_name(MarketSnapshot(fetcher=lambda: None).get) == "akshare"
+    assert get_source_name(Screener.history) == "local"
+    from src.utils.lazy import lazy_import
+    try:
+        asyncio.run(run_blocking(lazy_import, "json"))
+    except ValueError as e:
+        assert "data_source" in str(e)
+    else:
+        raise AssertionError("未标记的函数应报错")
+
+
+if __name__ == "__main__":
+    test_run_blocking_is_bounded_and_concurrent()
+    test_run_blocking_propagates_errors()
+    test_source_limit_caps_inflight_calls()
+    test_direct_calls_share_thread_level_limit()
+    test_unmarked_local_callable_is_rejected()
+    print("✅ 并发执行测试通过")
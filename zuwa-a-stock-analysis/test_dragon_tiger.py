@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+祖蛙龙虎榜库测试 - 按交易日同步、落盘与代码索引（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime
+
+import pandas as pd
+
+from src.data.dragon_tiger import DragonTigerStore, normalize_lhb
+
+
+class FakeLhb:
+    """模拟 ak.stock_lhb_detail_em：按区间返回每个工作日的榜单"""
+
+    def __init__(self, publish_last: bool = True):
+        self.calls = []
+        self.publish_last = publish_last
+
+    def __call__(self, start_date: str, end_date: str) -> pd.DataFrame:
+        self.calls.append((start_date, end_date))
+        rows = []
+        days = list(pd.bdate_range(start_date, end_date))
+        if not self.publish_last:
+            days = days[:-1]
+        for i, day in enumerate(days):
+            rows.append({"代码": "600519", "名称": "贵州茅台", "上榜日": day.date(),
+                         "龙虎榜净买额": 1e7 if i % 2 == 0 else -5e6, "上榜原因": "日涨幅偏离值达7%"})
+            rows.append({"代码": "600519", "名称": "贵州茅台", "上榜日": day.date(),
+                         "龙虎榜净买额": 1e7 if i % 2 == 0 else -5e6, "上榜原因": "日换手率达20%"})
+            if day.day % 5 == 0:
+                rows.append({"代码": "1", "名称": "平安银行", "上榜日": day.date(),
+                             "龙虎榜净买额": 2e6, "上榜原因": "连续三日涨幅偏离"})
+        return pd.DataFrame(rows)
+
+
+def test_normalize_merges_reasons_and_converts_units():
+    df = normalize_lhb(FakeLhb()("20260302", "20260303"))
+    maotai = df[df["code"] == "600519"]
+
+    assert len(maotai) == 2
+    assert maotai["net_amount"].iloc[0] == 1000.0
+    assert maotai["reason"].iloc[0] == "日涨幅偏离值达7%；日换手率达20%"
+    assert list(df["date"].unique()) == ["2026-03-02", "2026-03-03"]
+
+
+def test_sync_downloads_each_day_once(tmp_path):
+    fake = FakeLhb()
+    store = DragonTigerStore(tmp_path, history_days=14, fetcher=fake)
+
+    # 首次同步：一次下载整个窗口
+    wed = datetime(2026, 3, 4, 18, 0)
+    assert store.sync(now=wed)
+    assert len(fake.calls) == 1
+    records = store.lookup("600519", days=14, now=wed)
+    assert records[0]["date"] == "2026-03-04"
+    assert abs(records[0]["net_amount"]) in (1000.0, 500.0)
+    assert store.lookup("000001", now=wed)[0]["name"] == "平安银行"
+    assert store.lookup("300750", now=wed) == []
+
+    # 同一天重复同步：不访问网络
+    store.sync(now=wed)
+    assert len(fake.calls) == 1
+
+    # 两天后只下载新增的交易日；新实例从磁盘恢复索引
+    fri = datetime(2026, 3, 6, 18, 0)
+    fresh = DragonTigerStore(tmp_path, history_days=14, fetcher=fake)
+    fresh.sync(now=fri)
+    assert fake.calls[-1] == ("20260305", "20260306")
+    assert [r["date"] for r in fresh.lookup("600519", days=3, now=fri)] == ["2026-03-06", "2026-03-05", "2026-03-04"]
+
+
+def test_unpublished_latest_day_is_retried(tmp_path):
+    fake = FakeLhb(publish_last=False)
+    store = DragonTigerStore(tmp_path, history_days=7, fetcher=fake)
+
+    wed = datetime(2026, 3, 4, 16, 0)
+    store.sync(now=wed)
+    assert store.lookup("600519", now=wed)[0]["date"] == "2026-03-03"
+
+    # 最近交易日的空榜单不落盘，过了重试间隔后再下载
+    store._empty_checked.clear()
+    fake.publish_last = True
+    store.sync(now=wed)
+    assert fake.calls[-1] == ("20260304", "20260304")
+    assert store.lookup("600519", now=wed)[0]["date"] == "2026-03-04"
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_normalize_merges_reasons_and_converts_units()
+    for test in (test_sync_downloads_each_day_once, test_unpublished_latest_day_is_retried):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ 龙虎榜库测试通过")
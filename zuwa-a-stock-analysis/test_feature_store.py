@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+祖蛙特征缓存测试 - 惰性计算、命中统计与Agent共享（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.agents.technical_agent import TechnicalAnalysisAgent
+from src.analysis.advanced_analyzer import AdvancedAnalyzer
+from src.analysis.feature_store import FeatureStore, frame_fingerprint
+
+
+def make_daily(n: int = 120, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        "date": pd.bdate_range("2026-01-01", periods=n).strftime("%Y-%m-%d"),
+        "close": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "volume": rng.integers(1_000, 5_000, n).astype(float),
+    })
+
+
+def test_lazy_cache_and_stats():
+    """同一特征只计算一次，参数不同则分别缓存"""
+    df = make_daily()
+    features = FeatureStore("000001")
+    
+    first = features.get(df, "sma", period=5)
+    second = features.get(df, "sma", period=5)
+    assert first is second
+    features.get(df, "sma", period=5, min_periods=1)
+    
+    assert features.stats() == {"hits": 1, "misses": 2, "features": 2}
+    pd.testing.assert_series_equal(first, df["close"].rolling(5).mean())
+
+
+def test_fingerprint_ignores_derived_columns():
+    """新增派生列不改变指纹，行情数据变化则指纹不同"""
+    df = make_daily()
+    fp = frame_fingerprint(df)
+    df["sma5"] = 1.0
+    assert frame_fingerprint(df) == fp
+    
+    changed = df.copy()
+    changed.loc[changed.index[-1], "close"] += 0.01
+    assert frame_fingerprint(changed) != fp
+
+
+def test_agents_share_features():
+    """技术分析Agent与量价分析共用缓存，结果与原内联计算一致"""
+    df = make_daily()
+    features = FeatureStore("000001")
+    context = {"daily_data": df, "features": features}
+    
+    result = asyncio.run(TechnicalAnalysisAgent({}).analyze("000001", context))
+    
+    close = df["close"]
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14, min_periods=1).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14, min_periods=1).mean()
+    rsi = 100 - (100 / (1 + gain / (loss + 1e-10)))
+    assert np.isclose(result.details["momentum"]["rsi"], rsi.iloc[-1])
+    
+    # 均线在趋势、排列、形态三处复用
+    assert features.hits >= 8
+    
+    misses = features.misses
+    vp = AdvancedAnalyzer().analyze_volume_price_relationship(df, features)
+    assert "error" not in vp
+    assert vp["volume_ma5"] == int(df["volume"].rolling(5).mean().iloc[-1])
+    assert features.misses == misses + 3
+
+
+if __name__ == "__main__":
+    test_lazy_cache_and_stats()
+    test_fingerprint_ignores_derived_columns()
+    test_agents_share_features()
+    print("✅ 特征缓存测试通过")
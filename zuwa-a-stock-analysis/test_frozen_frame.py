@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+祖蛙只读行情测试 - 禁止修改共享日线、Agent不再写回派生列（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents.technical_agent import TechnicalAnalysisAgent
+from src.analysis.advanced_analyzer import AdvancedAnalyzer
+from src.analysis.feature_store import FeatureStore
+from src.data.frozen import ReadOnlyFrame, freeze
+
+
+def make_daily(n: int = 80) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        "date": pd.bdate_range("2026-01-01", periods=n).strftime("%Y-%m-%d"),
+        "close": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "volume": rng.integers(1_000, 5_000, n).astype(float),
+    })
+
+
+def test_writes_are_rejected():
+    """列赋值、loc赋值、inplace操作均被拒绝，原数据不变"""
+    df = freeze(make_daily())
+    original = df.copy()
+    
+    writes = [
+        lambda: df.__setitem__("sma5", 1.0),
+        lambda: df.loc.__setitem__((0, "close"), 0.0),
+        lambda: df.iloc.__setitem__((0, 1), 0.0),
+        lambda: df.insert(0, "x", 1),
+        lambda: df.fillna(0, inplace=True),
+        lambda: df.drop(columns="close", inplace=True),
+        lambda: setattr(df, "close", 0.0),
+    ]
+    for write in writes:
+        with pytest.raises(TypeError):
+            write()
+    pd.testing.assert_frame_equal(pd.DataFrame(df), original)
+
+
+def test_derived_frames_are_mutable():
+    """切片和计算结果是普通DataFrame，修改不影响只读原表"""
+    df = freeze(make_daily())
+    assert freeze(df) is df
+    
+    tail = df.tail(5)
+    assert type(tail) is pd.DataFrame
+    tail["close"] = 0.0
+    assert df["close"].iloc[-1] != 0.0
+    assert df.loc[0, "close"] == df.iloc[0]["close"]
+
+
+def test_agents_do_not_mutate_context_frame():
+    """技术分析Agent与量价分析只读访问行情，派生指标进入特征缓存"""
+    df = freeze(make_daily())
+    columns = list(df.columns)
+    features = FeatureStore("000001")
+    context = {"daily_data": df, "features": features}
+    
+    result = asyncio.run(TechnicalAnalysisAgent({}).analyze("000001", context))
+    vp = AdvancedAnalyzer().analyze_volume_price_relationship(df, features)
+    
+    assert result.details["trend"]["ma_alignment"] in ("多头排列", "空头排列", "纠缠")
+    assert "error" not in vp
+    assert isinstance(df, ReadOnlyFrame)
+    assert list(df.columns) == columns
+    assert features.stats()["features"] >= 8
+
+
+if __name__ == "__main__":
+    test_writes_are_rejected()
+    test_derived_frames_are_mutable()
+    test_agents_do_not_mutate_context_frame()
+    print("✅ 只读行情测试通过")
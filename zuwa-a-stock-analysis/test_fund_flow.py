@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+祖蛙资金流解析测试 - 单位换算、排序与N日滚动净流入（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+
+from src.data.fund_flow import add_flow_windows, latest_flow, parse_amount, parse_fund_flow, to_wan
+
+
+def test_parse_amount_applies_units():
+    values = pd.Series(["1.5亿", "-3200万", "12,345.6", "0.5万", "-", None, "2e3"])
+    parsed = parse_amount(values)
+
+    assert parsed[0] == 1.5e8
+    assert parsed[1] == -3.2e7
+    assert parsed[2] == 12345.6
+    assert parsed[3] == 5000.0
+    assert np.isnan(parsed[4]) and np.isnan(parsed[5])
+    assert parsed[6] == 2000.0
+
+    numeric = pd.Series([1, 2, 3])
+    assert parse_amount(numeric).dtype == float
+
+
+def _flow(days: int, descending: bool = False) -> pd.DataFrame:
+    """模拟 ak.stock_individual_fund_flow：主力每日净流入 1亿、-5000万 交替"""
+    dates = pd.bdate_range("2026-01-05", periods=days).strftime("%Y-%m-%d")
+    df = pd.DataFrame({
+        "日期": dates,
+        "收盘价": np.linspace(10, 12, days),
+        "涨跌幅": ["1.2%"] * days,
+        "主力净流入-净额": ["1亿" if i % 2 == 0 else "-5000万" for i in range(days)],
+        "主力净流入-净占比": ["5.5%"] * days,
+        "大单净流入-净额": ["3000万"] * days,
+        "小单净流入-净额": ["-2000万"] * days,
+    })
+    return df.iloc[::-1] if descending else df
+
+
+def test_parse_fund_flow_sorts_and_converts():
+    flow = parse_fund_flow(_flow(6, descending=True))
+
+    assert flow["date"].is_monotonic_increasing
+    assert flow["main_net"].iloc[0] == 1e8
+    assert flow["main_net"].iloc[1] == -5e7
+    assert flow["main_net_pct"].iloc[0] == 5.5
+    assert flow["pct_change"].iloc[0] == 1.2
+
+
+def test_rolling_windows_match_loop():
+    flow = add_flow_windows(parse_fund_flow(_flow(30)))
+    values = flow["main_net"].to_numpy()
+
+    for w in (5, 10, 20):
+        expected = [values[i + 1 - w:i + 1].sum() if i + 1 >= w else np.nan for i in range(len(values))]
+        np.testing.assert_allclose(flow[f"main_net_{w}d"].to_numpy(), expected)
+
+    latest = latest_flow(parse_fund_flow(_flow(30)))
+    assert latest["date"] == flow["date"].iloc[-1]
+    assert to_wan(latest["main_net_20d"]) == 50000.0   # 10 × 1亿 - 10 × 5000万
+    assert to_wan(latest["main_net"]) == -5000.0
+
+
+def test_short_history_and_gross_columns():
+    latest = latest_flow(parse_fund_flow(_flow(3)))
+    assert latest["main_net_5d"] is None
+
+    # 只有流入/流出总额时计算主力净额
+    gross = pd.DataFrame({
+        "日期": ["2026-03-04"], "大单流入": ["2亿"], "大单流出": ["1.5亿"],
+        "超大单流入": ["8000万"], "超大单流出": ["1亿"],
+    })
+    assert latest_flow(parse_fund_flow(gross))["main_net"] == 3e7
+
+
+if __name__ == "__main__":
+    test_parse_amount_applies_units()
+    test_parse_fund_flow_sorts_and_converts()
+    test_rolling_windows_match_loop()
+    test_short_history_and_gross_columns()
+    print("✅ 资金流解析测试通过")
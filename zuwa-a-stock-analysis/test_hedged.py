@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+祖蛙对冲请求测试 - 备用数据源竞速、失败切换、延迟直方图与Tushare列转换（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.data.hedged import HedgedFetcher, LatencyHistogram, normalize_tushare_daily
+from src.data.price_store import PRICE_COLUMNS, normalize_akshare_daily
+from src.utils import tracing
+from src.utils.concurrency import configure_source_limits
+
+
+def frame(tag: str) -> pd.DataFrame:
+    return pd.DataFrame({"date": ["2026-03-04"], "close": [10.0], "source": [tag]})
+
+
+def slow(tag: str, seconds: float):
+    def fetch(*args):
+        time.sleep(seconds)
+        return frame(tag)
+    return fetch
+
+
+def failing(*args):
+    raise ConnectionError("timeout")
+
+
+def test_secondary_wins_when_primary_is_slow():
+    fetcher = HedgedFetcher([("akshare", slow("akshare", 1.0)), ("tushare", slow("tushare", 0.05))],
+                            default_delay=0.1, min_delay=0.0)
+
+    start = time.perf_counter()
+    df, source = fetcher.fetch("600519")
+    elapsed = time.perf_counter() - start
+
+    assert source == "tushare"
+    assert df["source"].iloc[0] == "tushare"
+    assert elapsed < 0.5
+    assert fetcher.hedges == 1
+
+
+def test_primary_only_when_fast():
+    secondary_calls = []
+
+    def secondary(*args):
+        secondary_calls.append(args)
+        return frame("tushare")
+
+    fetcher = HedgedFetcher([("akshare", slow("akshare", 0.01)), ("tushare", secondary)],
+                            default_delay=0.5)
+    df, source = fetcher.fetch("600519")
+
+    assert source == "akshare"
+    assert secondary_calls == []
+    assert fetcher.hedges == 0
+
+
+def test_failure_falls_back_immediately():
+    fetcher = HedgedFetcher([("akshare", failing), ("tushare", slow("tushare", 0.01))],
+                            default_delay=5.0)
+
+    start = time.perf_counter()
+    df, source = fetcher.fetch("600519")
+
+    assert source == "tushare"
+    assert time.perf_counter() - start < 1.0
+    assert fetcher.errors["akshare"] == 1
+
+
+def test_failures_are_not_recorded_as_latency():
+    """快速失败不计入延迟直方图，否则会压低对冲延迟"""
+    fetcher = HedgedFetcher([("akshare", failing), ("tushare", slow("tushare", 0.01))])
+    for _ in range(3):
+        fetcher.fetch("600519")
+    assert fetcher.latency["akshare"].count == 0
+    assert fetcher.latency["tushare"].count == 3
+
+    # 指定数据源：不对冲，失败时返回空表
+    assert fetcher.fetch_from("akshare", "600519").empty
+    assert fetcher.fetch_from("tushare", "600519")["source"].iloc[0] == "tushare"
+    assert fetcher.hedges == 0 and fetcher.wins["tushare"] == 4
+
+
+def test_fetch_daily_records_source():
+    """日线结果记录实际数据源；指定的数据源未配置时仍对冲获取"""
+    from src.data import hedged
+    saved = hedged._daily_fetcher
+    hedged._daily_fetcher = HedgedFetcher([("akshare", failing), ("tushare", slow("tushare", 0.01))])
+    try:
+        assert hedged.fetch_daily("600519", "20260301", "20260304").attrs["source"] == "tushare"
+        assert hedged.fetch_daily("600519", "20260301", "20260304", source="akshare").empty
+        assert hedged.fetch_daily("600519", "20260301", "20260304", source="baostock").attrs["source"] == "tushare"
+    finally:
+        hedged._daily_fetcher = saved
+
+
+def test_source_limits_apply_to_hedged_requests():
+    """对冲线程池中的请求受各数据源在途上限约束（落后的请求返回前仍占用名额），span 记录胜出的数据源"""
+    active, peak, lock = {}, {}, threading.Lock()
+
+    def tracked(tag: str, seconds: float):
+        def fetch(*args):
+            with lock:
+                active[tag] = active.get(tag, 0) + 1
+                peak[tag] = max(peak.get(tag, 0), active[tag])
+            time.sleep(seconds)
+            with lock:
+                active[tag] -= 1
+            return frame(tag)
+        return fetch
+
+    fetcher = HedgedFetcher([("akshare", tracked("akshare", 0.2)), ("tushare", tracked("tushare", 0.02))],
+                            default_delay=0.01, min_delay=0.0)
+
+    def sync(symbol):
+        with tracing.span("PriceStore.sync", cat="data", symbol=symbol):
+            return fetcher.fetch(symbol)[1]
+
+    configure_source_limits({"akshare": 2, "tushare": 1})
+    tracer = tracing.start_tracing()
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            winners = list(pool.map(sync, [f"60000{i}" for i in range(6)]))
+        fetcher._pool().shutdown(wait=True)
+    finally:
+        tracing.stop_tracing()
+        configure_source_limits({})
+
+    assert peak == {"akshare": 2, "tushare": 1}
+    spans = [s for s in tracer.spans if s.name == "PriceStore.sync"]
+    assert [s.attrs["winner"] for s in spans] and all(s.attrs["winner"] in ("akshare", "tushare") for s in spans)
+    assert sorted(s.attrs["winner"] for s in spans) == sorted(winners)
+    assert any(s.attrs["hedged"] for s in spans)
+
+
+def test_empty_result_is_not_a_win():
+    fetcher = HedgedFetcher([("akshare", lambda *a: pd.DataFrame()), ("tushare", lambda *a: pd.DataFrame())])
+    df, source = fetcher.fetch("600519")
+
+    assert source is None
+    assert df.empty
+    assert list(df.columns) == PRICE_COLUMNS
+
+
+def test_hedge_delay_follows_primary_percentile():
+    fetcher = HedgedFetcher([("akshare", lambda *a: frame("akshare"))],
+                            percentile=90, default_delay=2.0, min_delay=0.0, min_samples=10)
+    assert fetcher.hedge_delay() == 2.0
+
+    histogram = fetcher.latency["akshare"]
+    for _ in range(9):
+        histogram.record(0.1)
+    histogram.record(8.0)
+    # 90分位落在0.1s所在的桶
+    assert 0.1 <= fetcher.hedge_delay() < 0.2
+
+    for _ in range(5):
+        histogram.record(8.0)
+    assert fetcher.hedge_delay() >= 8.0
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    for seconds in (0.02, 0.05, 0.5, 5.0, 500.0):
+        histogram.record(seconds)
+
+    summary = histogram.to_dict()
+    assert summary["count"] == 5
+    assert 0.5 <= summary["p50"] < 0.6
+    assert summary["p99"] == histogram.buckets[-2]
+
+
+def test_normalize_tushare_matches_akshare_layout():
+    tushare = pd.DataFrame({
+        "ts_code": ["600519.SH", "600519.SH"],
+        "trade_date": ["20260304", "20260303"],
+        "open": [10.0, 9.8], "high": [10.5, 10.0], "low": [9.9, 9.7], "close": [10.2, 9.9],
+        "pre_close": [9.9, 9.8], "change": [0.3, 0.1], "pct_chg": [3.03, 1.02],
+        "vol": [1200.0, 1000.0], "amount": [1224.0, 990.0],
+    })
+    akshare = pd.DataFrame({
+        "日期": ["2026-03-03", "2026-03-04"],
+        "开盘": [9.8, 10.0], "收盘": [9.9, 10.2], "最高": [10.0, 10.5], "最低": [9.7, 9.9],
+        "成交量": [1000, 1200], "成交额": [990000.0, 1224000.0], "振幅": [3.06, 6.06],
+        "涨跌幅": [1.02, 3.03], "涨跌额": [0.1, 0.3], "换手率": [0.1, 0.12],
+    })
+
+    ts_df = normalize_tushare_daily(tushare)
+    ak_df = normalize_akshare_daily(akshare)
+
+    assert list(ts_df.columns) == PRICE_COLUMNS
+    assert list(ts_df["date"]) == list(ak_df["date"])
+    cols = ["open", "close", "high", "low", "volume", "turnover", "amplitude", "pct_change", "change_amount"]
+    pd.testing.assert_frame_equal(ts_df[cols], ak_df[cols], check_dtype=False, atol=0.01)
+
+    # 标准列再次规范化保持不变（价格库可直接使用对冲结果）
+    pd.testing.assert_frame_equal(normalize_akshare_daily(ts_df), ts_df)
+
+
+if __name__ == "__main__":
+    test_secondary_wins_when_primary_is_slow()
+    test_primary_only_when_fast()
+    test_failure_falls_back_immediately()
+    test_failures_are_not_recorded_as_latency()
+    test_fetch_daily_records_source()
+    test_source_limits_apply_to_hedged_requests()
+    test_empty_result_is_not_a_win()
+    test_hedge_delay_follows_primary_percentile()
+    test_latency_histogram()
+    test_normalize_tushare_matches_akshare_layout()
+    print("✅ 对冲请求测试通过")
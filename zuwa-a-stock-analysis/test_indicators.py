@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+祖蛙技术指标测试 - 面板向量化计算与单序列计算一致（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.technical_indicators import PanelIndicators, TechnicalIndicators
+
+
+def make_panel(days: int = 120, symbols: int = 6, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, symbols)), axis=0))
+    spread = np.abs(rng.normal(0, 0.01, (days, symbols)))
+    columns = [f"00000{i}" for i in range(symbols)]
+    close = pd.DataFrame(close, columns=columns)
+    high = close * (1 + spread)
+    low = close * (1 - spread)
+    # 停牌缺口与上市较晚的股票
+    close.iloc[30:33, 1] = np.nan
+    high.iloc[30:33, 1] = np.nan
+    low.iloc[30:33, 1] = np.nan
+    close.iloc[:40, 2] = np.nan
+    high.iloc[:40, 2] = np.nan
+    low.iloc[:40, 2] = np.nan
+    return close, high, low
+
+
+def test_panel_matches_per_series():
+    """面板结果与逐只 TechnicalIndicators 结果一致（含缺失值）"""
+    close, high, low = make_panel()
+    panel = PanelIndicators.compute_all(close, high, low)
+    
+    for symbol in close.columns:
+        c, h, l = close[symbol], high[symbol], low[symbol]
+        macd = TechnicalIndicators.macd(c)
+        boll = TechnicalIndicators.bollinger_bands(c)
+        kdj = TechnicalIndicators.kdj(h, l, c)
+        expected = {
+            "sma5": TechnicalIndicators.sma(c, 5),
+            "sma20": TechnicalIndicators.sma(c, 20),
+            "sma60": TechnicalIndicators.sma(c, 60),
+            "ema12": TechnicalIndicators.ema(c, 12),
+            "macd": macd["macd"],
+            "macd_signal": macd["signal"],
+            "macd_hist": macd["histogram"],
+            "rsi": TechnicalIndicators.rsi(c),
+            "boll_upper": boll["upper"],
+            "boll_lower": boll["lower"],
+            "kdj_k": kdj["k"],
+            "kdj_d": kdj["d"],
+            "kdj_j": kdj["j"],
+        }
+        for name, series in expected.items():
+            np.testing.assert_allclose(
+                panel[name][symbol].to_numpy(), series.to_numpy(),
+                rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=f"{symbol} {name}"
+            )
+
+
+def test_panel_accepts_ndarray():
+    """传入 ndarray 时返回 ndarray，形状与输入一致"""
+    close, high, low = make_panel(days=80)
+    result = PanelIndicators.compute_all(close.to_numpy(), high.to_numpy(), low.to_numpy())
+    assert isinstance(result["rsi"], np.ndarray)
+    assert result["kdj_k"].shape == close.shape
+    
+    frame_result = PanelIndicators.compute_all(close, high, low)
+    np.testing.assert_allclose(result["macd"], frame_result["macd"].to_numpy(), equal_nan=True)
+
+
+def test_close_only():
+    """只有收盘价时不计算KDJ"""
+    close, _, _ = make_panel(days=60)
+    result = PanelIndicators.compute_all(close)
+    assert "kdj_k" not in result
+    assert "boll_middle" in result
+
+
+def test_empty_panel():
+    """没有K线（0行）时返回同形状的空结果，不报错"""
+    close, high, low = make_panel(days=60)
+    empty = close.iloc[:0]
+    result = PanelIndicators.compute_all(empty, high.iloc[:0], low.iloc[:0])
+    assert all(frame.shape == empty.shape for frame in result.values())
+    assert PanelIndicators.ema(np.empty((0, 3)), 12).shape == (0, 3)
+    assert PanelIndicators.macd(np.empty((0, 3)))["signal"].shape == (0, 3)
+
+
+if __name__ == "__main__":
+    test_panel_matches_per_series()
+    test_panel_accepts_ndarray()
+    test_close_only()
+    test_empty_panel()
+    print("✅ 技术指标测试通过")
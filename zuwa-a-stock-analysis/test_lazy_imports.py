@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+祖蛙延迟导入测试 - 入口模块不加载重型依赖、包导出按需导入、lazy_import 经 sys.modules 取模块（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import subprocess
+import types
+
+from src.utils import lazy
+from src.utils.lazy import lazy_import
+
+
+def loaded_after(code: str) -> set:
+    """在新解释器中执行 code 后已导入的模块"""
+    proc = subprocess.run(
+        [sys.executable, "-c", f"import sys; {code}; print('\\n'.join(sys.modules))"],
+        capture_output=True, text=True, check=True
+    )
+    return set(proc.stdout.split())
+
+
+def test_entry_points_stay_light():
+    modules = loaded_after("import main")
+    assert not modules & {"pandas", "numpy", "yaml", "dotenv", "akshare", "openai"}
+    assert not any(name.startswith("src.agents.") for name in modules)
+
+    # 包导出按需导入：只加载用到的 Agent 模块
+    modules = loaded_after("from src.agents import AgentOutput")
+    assert "src.agents.base" in modules and "src.agents.chief_agent" not in modules
+    modules = loaded_after("import src; src.ChiefAnalystAgent")
+    assert "src.agents.chief_agent" in modules and "src.agents.data_agent" not in modules
+
+
+def test_package_exports():
+    import src
+    import src.agents
+    from src.agents.chief_agent import ChiefAnalystAgent
+    assert src.agents.ChiefAnalystAgent is ChiefAnalystAgent
+    assert src.ChiefAnalystAgent is ChiefAnalystAgent
+    assert "ChiefAnalystAgent" in dir(src.agents) and "PriceStore" in src.__all__
+    namespace = {}
+    exec("from src.backtest import *", namespace)
+    assert {"BacktestEngine", "WeightOptimizer", "replay_symbol"} <= set(namespace)
+    try:
+        src.agents.MissingAgent
+        assert False, "未注册的名称应报 AttributeError"
+    except AttributeError:
+        pass
+
+
+def test_lazy_import_follows_sys_modules():
+    saved = sys.modules.get("akshare")
+    fake = types.ModuleType("akshare")
+    sys.modules["akshare"] = fake
+    try:
+        assert lazy_import("akshare") is fake
+    finally:
+        if saved is None:
+            sys.modules.pop("akshare")
+        else:
+            sys.modules["akshare"] = saved
+
+    lazy.HEAVY_MODULES["zuwa_missing_dependency"] = "pip install zuwa-missing"
+    try:
+        lazy_import("zuwa_missing_dependency")
+        assert False, "未安装的依赖应报 ImportError"
+    except ImportError as e:
+        assert "pip install zuwa-missing" in str(e)
+    finally:
+        del lazy.HEAVY_MODULES["zuwa_missing_dependency"]
+
+
+if __name__ == "__main__":
+    test_entry_points_stay_light()
+    test_package_exports()
+    test_lazy_import_follows_sys_modules()
+    print("✅ 延迟导入测试通过")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+祖蛙LLM缓存测试 - 磁盘缓存的TTL/容量淘汰，以及本地假OpenAI服务下的缓存与连接复用（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from src.utils.llm_cache import LLMCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "分析 600519"}]
+
+
+def test_cache_roundtrip_and_key():
+    """相同模型/消息/温度/最大Token数/接口地址命中，任一不同则未命中"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(Path(tmp))
+        assert cache.get("kimi", MESSAGES, 0.3) is None
+        cache.put("kimi", MESSAGES, 0.3, '{"signal": "BUY"}')
+        
+        assert cache.get("kimi", MESSAGES, 0.3) == '{"signal": "BUY"}'
+        assert cache.get("kimi", MESSAGES, 0.7) is None
+        assert cache.get("other", MESSAGES, 0.3) is None
+        assert cache.get("kimi", [{"role": "user", "content": "分析 000001"}], 0.3) is None
+        assert cache.hits == 1 and cache.misses == 4
+
+        cache.put("kimi", MESSAGES, 0.3, "截断的响应", max_tokens=50, base_url="https://a.example/v1")
+        assert cache.get("kimi", MESSAGES, 0.3, 50, "https://a.example/v1") == "截断的响应"
+        assert cache.get("kimi", MESSAGES, 0.3, 2000, "https://a.example/v1") is None
+        assert cache.get("kimi", MESSAGES, 0.3, 50, "https://b.example/v1") is None
+        assert cache.get("kimi", MESSAGES, 0.3) == '{"signal": "BUY"}'
+    
+    assert cache_key("kimi", MESSAGES, 1) == cache_key("kimi", MESSAGES, 1.0)
+
+
+def test_ttl_expiry():
+    """过期条目不返回并被删除"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(Path(tmp), ttl=0.05)
+        cache.put("kimi", MESSAGES, 1.0, "old")
+        time.sleep(0.1)
+        assert cache.get("kimi", MESSAGES, 1.0) is None
+        assert cache.stats()["bytes"] == 0
+
+
+def test_size_eviction_keeps_recent():
+    """超过容量上限时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(Path(tmp), max_bytes=2000)
+        for i in range(5):
+            cache.put("kimi", [{"role": "user", "content": str(i)}], 1.0, "x" * 300)
+            path = cache._path(cache_key("kimi", [{"role": "user", "content": str(i)}], 1.0))
+            os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+        
+        # 访问最早的条目，使其变为最近使用
+        assert cache.get("kimi", [{"role": "user", "content": "0"}], 1.0) is not None
+        for i in range(5, 8):
+            cache.put("kimi", [{"role": "user", "content": str(i)}], 1.0, "x" * 300)
+        
+        assert cache.stats()["bytes"] <= 2000
+        assert cache.get("kimi", [{"role": "user", "content": "0"}], 1.0) is not None
+        assert cache.get("kimi", [{"role": "user", "content": "1"}], 1.0) is None
+        assert cache.get("kimi", [{"role": "user", "content": "7"}], 1.0) is not None
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """OpenAI兼容的 /chat/completions 接口"""
+    
+    requests = []
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOpenAI.requests.append((body, self.client_address))
+        content = json.dumps({"signal": "BUY", "confidence": 80, "reasoning": "测试"})
+        payload = json.dumps({
+            "id": "fake", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, *args):
+        pass
+
+
+def test_analyzer_against_fake_server(monkeypatch):
+    """第二次相同请求走缓存；同一事件循环复用同一个客户端"""
+    pytest.importorskip("openai")
+    from src.utils.llm_helper import LLMAnalyzer, get_openai_client
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("MOONSHOT_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setenv("MOONSHOT_API_KEY", "test")
+    FakeOpenAI.requests.clear()
+    
+    async def run(analyzer):
+        context = {"price_data": {"current": 100}}
+        first = await analyzer.analyze_stock("600519", "贵州茅台", context)
+        second = await analyzer.analyze_stock("600519", "贵州茅台", context)
+        third = await analyzer.analyze_stock("000001", "平安银行", context)
+        same_client = get_openai_client("test", analyzer.base_url) is get_openai_client("test", analyzer.base_url)
+        return first, second, third, same_client
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = LLMAnalyzer(cache=LLMCache(Path(tmp)))
+            first, second, third, same_client = asyncio.run(run(analyzer))
+    finally:
+        server.shutdown()
+    
+    assert first == second and first["signal"] == "BUY"
+    assert third["signal"] == "BUY"
+    assert len(FakeOpenAI.requests) == 2
+    assert FakeOpenAI.requests[0][0]["model"] == "kimi-k2.5"
+    assert analyzer.cache.hits == 1
+    assert same_client
+
+
+if __name__ == "__main__":
+    test_cache_roundtrip_and_key()
+    test_ttl_expiry()
+    test_size_eviction_keeps_recent()
+    print("✅ LLM缓存测试通过")
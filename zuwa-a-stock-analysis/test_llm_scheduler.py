@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+祖蛙LLM调度测试 - 在途上限、超时重试、Token预算与流式提前结束（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.llm_scheduler import (
+    LLMBudgetExceeded, LLMScheduler, json_end, start_usage_scope
+)
+
+MESSAGES = [{"role": "user", "content": "分析"}]
+
+
+class FakeCompletions:
+    """按脚本返回响应的 chat.completions：每次调用依次取 behaviors 中的一项"""
+    
+    def __init__(self, behaviors=None, delay=0.0, chunks=None):
+        self.behaviors = list(behaviors or [])
+        self.delay = delay
+        self.chunks = chunks or []
+        self.calls = 0
+        self.inflight = 0
+        self.max_inflight = 0
+        self.streamed = 0
+    
+    async def create(self, stream=False, **kwargs):
+        self.calls += 1
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            behavior = self.behaviors.pop(0) if self.behaviors else "ok"
+            if behavior == "hang":
+                await asyncio.sleep(10)
+            if isinstance(behavior, Exception):
+                raise behavior
+            await asyncio.sleep(self.delay)
+        finally:
+            self.inflight -= 1
+        if stream:
+            return self._stream()
+        message = SimpleNamespace(content='{"signal": "BUY"}')
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+    
+    async def _stream(self):
+        for text in self.chunks:
+            self.streamed += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+
+
+def make_client(**kwargs):
+    completions = FakeCompletions(**kwargs)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions)), completions
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_max_inflight():
+    """同时在途请求不超过上限"""
+    client, completions = make_client(delay=0.02)
+    scheduler = LLMScheduler(max_inflight=3)
+    
+    async def run():
+        await asyncio.gather(*(scheduler.complete(client, "m", MESSAGES) for _ in range(10)))
+    
+    asyncio.run(run())
+    assert completions.calls == 10
+    assert completions.max_inflight == 3
+    assert scheduler.usage["requests"] == 10
+    assert scheduler.tokens_used == 1200
+
+
+def test_timeout_and_retry():
+    """挂起的请求超时后重试；不可重试的错误直接抛出"""
+    client, completions = make_client(behaviors=["hang", RateLimited(), "ok"])
+    scheduler = LLMScheduler(timeout=0.05, retries=2, backoff=0.001)
+    
+    content = asyncio.run(scheduler.complete(client, "m", MESSAGES))
+    assert content == '{"signal": "BUY"}'
+    assert completions.calls == 3
+    assert scheduler.usage["timeouts"] == 1 and scheduler.usage["retries"] == 2
+    
+    client, completions = make_client(behaviors=[ValueError("bad request")])
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.complete(client, "m", MESSAGES))
+    assert completions.calls == 1
+    
+    client, completions = make_client(behaviors=["hang"] * 5)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scheduler.complete(client, "m", MESSAGES))
+    assert completions.calls == 3
+
+
+def test_token_budget_and_usage_scope():
+    """超出预算拒绝新请求；用量同时计入当前任务的统计"""
+    client, _ = make_client()
+    scheduler = LLMScheduler(token_budget=200)
+    
+    async def run():
+        usage = start_usage_scope()
+        await scheduler.complete(client, "m", MESSAGES)
+        await scheduler.complete(client, "m", MESSAGES)
+        with pytest.raises(LLMBudgetExceeded):
+            await scheduler.complete(client, "m", MESSAGES)
+        return usage
+    
+    usage = asyncio.run(run())
+    assert usage["requests"] == 2 and usage["prompt_tokens"] == 200
+    
+    scheduler.reset_usage()
+    assert asyncio.run(scheduler.complete(client, "m", MESSAGES))
+
+
+def test_stream_stops_when_json_closes():
+    """流式接收在JSON对象闭合后立即结束，剩余分片不再读取"""
+    chunks = ['好的：\n```json\n{"signal": ', '"BUY", "reason": "站上{均线}"', '}\n```', "以上分析仅供参考", "……"]
+    client, completions = make_client(chunks=chunks)
+    scheduler = LLMScheduler(stream=True)
+    
+    content = asyncio.run(scheduler.complete(client, "m", MESSAGES))
+    assert content.endswith('"站上{均线}"}')
+    assert completions.streamed == 3
+    assert scheduler.usage["early_stops"] == 1
+
+
+def test_json_end():
+    assert json_end('x {"a": {"b": "}"}} y') == len('x {"a": {"b": "}"}}')
+    assert json_end('{"a": 1') == -1
+    assert json_end("no json") == -1
+
+
+if __name__ == "__main__":
+    test_max_inflight()
+    test_timeout_and_retry()
+    test_token_budget_and_usage_scope()
+    test_stream_stops_when_json_closes()
+    test_json_end()
+    print("✅ LLM调度测试通过")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+祖蛙融资融券库测试 - 两市明细合并、按日同步与N日序列（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from src.data.margin_store import MarginStore, margin_trend, normalize_margin
+
+
+class FakeMargin:
+    """模拟 ak.stock_margin_detail_sse / szse：融资余额每个交易日增长1%"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, day: str):
+        self.calls.append(day)
+        n = len(pd.bdate_range("2026-01-01", day))
+        balance = 1e9 * 1.01 ** n
+        sse = pd.DataFrame({
+            "信用交易日期": [day], "标的证券代码": ["600519"], "标的证券简称": ["贵州茅台"],
+            "融资余额": [balance], "融资买入额": [5e7], "融资偿还额": [4e7],
+            "融券余量": [1000], "融券卖出量": [10], "融券偿还量": [5],
+        })
+        szse = pd.DataFrame({
+            "证券代码": ["000001"], "证券简称": ["平安银行"], "融资买入额": [3e7],
+            "融资余额": [2e9], "融券卖出量": [0], "融券余量": [500], "融券余额": [5e6],
+            "融资融券余额": [2.005e9],
+        })
+        return [sse, szse]
+
+
+def test_normalize_both_exchanges():
+    sse, szse = FakeMargin()("20260304")
+    day = datetime(2026, 3, 4).date()
+    a, b = normalize_margin(sse, day), normalize_margin(szse, day)
+
+    assert a["code"].iloc[0] == "600519" and b["code"].iloc[0] == "000001"
+    assert b["margin_balance"].iloc[0] == 200000.0
+    assert b["short_balance"].iloc[0] == 500.0
+    # 上交所没有两融余额，按融资余额补齐
+    assert a["total_balance"].iloc[0] == a["margin_balance"].iloc[0]
+    assert list(a.columns) == list(b.columns)
+
+
+def test_sync_once_per_day_and_series(tmp_path):
+    fake = FakeMargin()
+    store = MarginStore(tmp_path, history_days=35, fetcher=fake)
+
+    wed = datetime(2026, 3, 4, 18, 0)
+    assert store.sync(now=wed)
+    # 每次同步最多补10个交易日，最近的优先
+    assert fake.calls == [d.strftime("%Y%m%d") for d in pd.bdate_range(end="2026-03-04", periods=10)]
+    store.sync(now=wed)
+    store.sync(now=wed)
+    first = len(fake.calls)
+    assert first == 25   # 35个自然日内的工作日
+
+    store.sync(now=wed)
+    assert len(fake.calls) == first
+
+    series = store.series("600519", now=wed)
+    assert series["date"].is_monotonic_increasing
+    assert series["date"].iloc[-1] == "2026-03-04"
+
+    trend = margin_trend(series)
+    assert abs(trend["change_5d"] - (1.01 ** 5 - 1) * 100) < 0.01
+    assert abs(trend["change_20d"] - (1.01 ** 20 - 1) * 100) < 0.01
+    assert trend["change_1d"] > 0
+
+    assert store.latest("000001")["name"] == "平安银行"
+    assert store.latest("300750") == {}
+
+    # 次日只下载新增的一天
+    thu = datetime(2026, 3, 5, 18, 0)
+    MarginStore(tmp_path, history_days=35, fetcher=fake).sync(now=thu)
+    assert fake.calls[-1] == "20260305"
+    assert len(fake.calls) == first + 1
+
+
+def test_failed_day_is_not_persisted(tmp_path):
+    calls = []
+
+    def flaky(day):
+        calls.append(day)
+        if day == "20260303" and calls.count(day) == 1:
+            raise ConnectionError("timeout")
+        return FakeMargin()(day)
+
+    store = MarginStore(tmp_path, history_days=7, fetcher=flaky)
+    wed = datetime(2026, 3, 4, 18, 0)
+    store.sync(now=wed)
+    assert "2026-03-03" not in list(store.series("600519", now=wed)["date"])
+
+    # 出错的交易日及其后未下载的交易日在重试间隔后补齐
+    store._empty_checked.clear()
+    store.sync(now=wed)
+    assert calls[-2:] == ["20260303", "20260304"]
+    assert list(store.series("600519", now=wed)["date"])[-2:] == ["2026-03-03", "2026-03-04"]
+
+
+def test_empty_day_is_not_persisted_and_sync_does_not_block(tmp_path):
+    fake = FakeMargin()
+    store = MarginStore(tmp_path, history_days=7, fetcher=lambda day: [] if day == "20260302" else fake(day))
+    wed = datetime(2026, 3, 4, 18, 0)
+    store.sync(now=wed)
+    # 非最近交易日返回空表也可能是接口故障：不落盘，稍后重试
+    assert "2026-03-02" not in list(store.series("600519", now=wed)["date"])
+    assert not (tmp_path / "20260302.pkl").exists() and not (tmp_path / "20260302.arrow").exists()
+
+    # 下载不持有索引锁：其他线程下载时，已有索引的调用方立即返回
+    started, release = threading.Event(), threading.Event()
+
+    def slow(day):
+        started.set()
+        release.wait(5)
+        return fake(day)
+
+    store._fetcher = slow
+    store._empty_checked.clear()
+    downloader = threading.Thread(target=store.sync, kwargs={"now": wed})
+    downloader.start()
+    assert started.wait(5)
+    begin = time.perf_counter()
+    assert store.sync(now=wed)
+    assert store.latest("600519")["date"] == "2026-03-04"
+    assert time.perf_counter() - begin < 1.0
+    release.set()
+    downloader.join()
+    assert "2026-03-02" in list(store.series("600519", now=wed)["date"])
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_normalize_both_exchanges()
+    for test in (test_sync_once_per_day_and_series, test_failed_day_is_not_persisted,
+                 test_empty_day_is_not_persisted_and_sync_does_not_block):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ 融资融券库测试通过")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+祖蛙行情快照测试 - TTL缓存与代码索引（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.data.market_snapshot import MarketSnapshot
+
+
+def _fake_spot() -> pd.DataFrame:
+    """模拟 ak.stock_zh_a_spot_em() 返回的全市场表"""
+    time.sleep(0.05)
+    return pd.DataFrame({
+        "代码": ["600519", "000001", "300750"],
+        "名称": ["贵州茅台", "平安银行", "宁德时代"],
+        "最新价": [1500.0, 10.5, 180.2],
+        "涨跌幅": [1.2, -0.5, 3.3],
+    })
+
+
+def test_snapshot_fetches_once_per_ttl():
+    """多线程并发查询时TTL内只下载一次"""
+    snapshot = MarketSnapshot(ttl=60, fetcher=_fake_spot)
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        rows = list(pool.map(snapshot.get, ["600519", "000001", "300750"] * 10))
+    
+    assert snapshot.fetch_count == 1
+    assert rows[0]["名称"] == "贵州茅台"
+    assert rows[1]["最新价"] == 10.5
+    assert isinstance(rows[2]["涨跌幅"], float)
+    assert snapshot.get("999999") == {}
+    
+    batch = snapshot.get_many(["300750", "600519"])
+    assert list(batch["代码"]) == ["300750", "600519"]
+
+
+def test_snapshot_refreshes_after_ttl():
+    """过期后重新下载"""
+    snapshot = MarketSnapshot(ttl=0.01, fetcher=_fake_spot)
+    snapshot.get("600519")
+    time.sleep(0.02)
+    snapshot.get("600519")
+    assert snapshot.fetch_count == 2
+
+
+def test_snapshot_failure_is_cached_briefly():
+    """下载异常不抛出；退避期内不再下载，沿用旧快照"""
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) > 1:
+            raise ConnectionError("行情接口超时")
+        return _fake_spot()
+
+    snapshot = MarketSnapshot(ttl=0.01, fetcher=flaky)
+    assert snapshot.get("600519")["名称"] == "贵州茅台"
+    time.sleep(0.02)
+    # 过期后下载失败：沿用旧快照，退避期内不再重试
+    for _ in range(5):
+        assert snapshot.get("000001")["最新价"] == 10.5
+    assert snapshot.fetch_count == 2
+
+    empty = MarketSnapshot(ttl=60, fetcher=lambda: pd.DataFrame())
+    assert [empty.get("600519") for _ in range(3)] == [{}] * 3
+    assert empty.get_many(["600519"]).empty
+    assert empty.fetch_count == 1
+
+
+if __name__ == "__main__":
+    test_snapshot_fetches_once_per_ttl()
+    test_snapshot_refreshes_after_ttl()
+    test_snapshot_failure_is_cached_briefly()
+    print("✅ 行情快照测试通过")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+祖蛙新闻索引测试 - Aho-Corasick多模式匹配、TTL拉取与增量索引（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import random
+
+import pandas as pd
+
+from src.data.news_index import AhoCorasick, NewsIndex
+
+
+def _feed(rows):
+    """模拟 ak.stock_news_em() 返回的新闻流（按时间倒序）"""
+    return pd.DataFrame([
+        {"标题": title, "内容": content, "发布时间": date, "来源": "东方财富", "链接": f"http://news/{i}"}
+        for i, (title, content, date) in enumerate(rows)
+    ])
+
+
+class FakeFeed:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return _feed(self.rows)
+
+
+def test_automaton_matches_overlapping_patterns():
+    automaton = AhoCorasick()
+    for pattern, key in [("茅台", "a"), ("贵州茅台", "b"), ("州茅", "c"), ("平安银行", "d"), ("600519", "e")]:
+        automaton.add(pattern, key)
+
+    assert automaton.find("贵州茅台(600519)发布公告") == {"a", "b", "c", "e"}
+    assert automaton.find("平安银行与平安保险") == {"d"}
+    assert automaton.find("无关新闻") == set()
+
+
+def test_automaton_agrees_with_substring_search():
+    rng = random.Random(7)
+    alphabet = "甲乙丙丁ab"
+    patterns = {"".join(rng.choice(alphabet) for _ in range(rng.randint(2, 4))) for _ in range(40)}
+    automaton = AhoCorasick()
+    for p in patterns:
+        automaton.add(p, p)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert automaton.find(text) == {p for p in patterns if p in text}
+
+
+def test_index_fetches_once_and_indexes_by_symbol():
+    feed = FakeFeed([
+        ("贵州茅台发布年报", "营收增长", "2026-03-05 10:00:00"),
+        ("白酒板块走强", "600519 涨超3%，平安银行小幅下跌", "2026-03-05 09:30:00"),
+        ("大盘收评", "沪指小幅上涨", "2026-03-04 15:00:00"),
+    ])
+    index = NewsIndex(ttl=300, fetcher=feed)
+    index.watch_many([("600519", "贵州茅台"), ("000001", "平安银行"), ("300750", "宁德时代")])
+
+    assert index.refresh()
+    assert index.refresh()
+    assert feed.calls == 1
+
+    maotai = index.get("600519")
+    assert [n["title"] for n in maotai] == ["贵州茅台发布年报", "白酒板块走强"]
+    assert [n["title"] for n in index.get("000001")] == ["白酒板块走强"]
+    assert index.get("300750") == []
+    assert index.get("600519", num=1)[0]["date"] == "2026-03-05 10:00:00"
+
+
+def test_incremental_refresh_and_late_watch():
+    rows = [("贵州茅台发布年报", "", "2026-03-05 10:00:00")]
+    feed = FakeFeed(rows)
+    index = NewsIndex(ttl=0, fetcher=feed)
+    index.watch("600519", "贵州茅台")
+    index.refresh()
+
+    # 新闻流新增一条，旧的不重复索引
+    feed.rows = [("宁德时代签订大单", "贵州茅台亦有提及", "2026-03-05 11:00:00")] + rows
+    index.refresh()
+    assert index.scanned == 2
+    assert [n["title"] for n in index.get("600519")] == ["宁德时代签订大单", "贵州茅台发布年报"]
+
+    # 后关注的股票补扫已有新闻
+    index.watch("300750", "宁德时代")
+    assert [n["title"] for n in index.get("300750")] == ["宁德时代签订大单"]
+
+
+def test_max_items_evicts_oldest():
+    index = NewsIndex(fetcher=lambda: None, max_items=2)
+    index.watch("600519", "贵州茅台")
+    index.add_items([
+        {"标题": f"贵州茅台第{i}条", "发布时间": f"2026-03-05 1{i}:00:00"} for i in (3, 2, 1)
+    ])
+
+    assert index.stats()["items"] == 2
+    assert [n["title"] for n in index.get("600519")] == ["贵州茅台第3条", "贵州茅台第2条"]
+
+
+if __name__ == "__main__":
+    test_automaton_matches_overlapping_patterns()
+    test_automaton_agrees_with_substring_search()
+    test_index_fetches_once_and_indexes_by_symbol()
+    test_incremental_refresh_and_late_watch()
+    test_max_items_evicts_oldest()
+    print("✅ 新闻索引测试通过")
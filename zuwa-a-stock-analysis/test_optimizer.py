@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+祖蛙权重寻优测试 - 候选评估口径、滚动检验、配置写回与评分缓存（离线）
+"""
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.backtest import BacktestEngine, WeightOptimizer, composite_scores, write_config
+from src.data.price_store import PriceStore
+from src.data.storage import write_frame
+
+
+def make_daily(days: int = 120, seed: int = 0) -> pd.DataFrame:
+    """随机游走的标准列日线"""
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.03, days)))
+    return pd.DataFrame({"date": pd.bdate_range("2025-01-01", periods=days).strftime("%Y-%m-%d"),
+                         "open": close, "close": close, "high": close, "low": close})
+
+
+def make_scores(days: int = 200, symbols: int = 60, seed: int = 0) -> pd.DataFrame:
+    """资金评分预测前瞻收益、技术评分为噪声的股票日明细"""
+    rng = np.random.default_rng(seed)
+    dates = np.repeat(pd.bdate_range("2024-01-01", periods=days).strftime("%Y-%m-%d"), symbols)
+    capital = rng.uniform(0, 100, days * symbols)
+    technical = rng.uniform(0, 100, days * symbols)
+    fwd = (capital - 50) * 0.05 + rng.normal(0, 1, days * symbols)
+    return pd.DataFrame({"date": dates, "code": np.tile(np.arange(symbols), days).astype(str),
+                         "technical": technical, "capital": capital, "fwd_5d": fwd})
+
+
+def test_candidate_metrics_match_direct_calculation():
+    frame = make_scores(days=50, symbols=30)
+    optimizer = WeightOptimizer(frame, folds=2, workers=1)
+    weights = np.array([[0.3, 0.7]])
+    metrics = optimizer.evaluate(weights, [(60.0, 40.0)])[0, 0]
+
+    # 逐日直接计算：多头(>=60)均值 - 空头(<40)均值
+    score = composite_scores(frame, {"technical": 0.3, "capital": 0.7})
+    data = frame.assign(score=score)
+    dates = sorted(data["date"].unique())
+    first = data[data["date"].isin(dates[:25])]
+    daily = first.groupby("date").apply(
+        lambda g: g.loc[g.score >= 60, "fwd_5d"].mean() - g.loc[g.score < 40, "fwd_5d"].mean())
+    sharpe = daily.mean() / daily.std() * np.sqrt(252 / 5)
+    picked = first[(first.score >= 60) | (first.score < 40)]
+    hit = (((picked.score >= 60) & (picked.fwd_5d > 0)) | ((picked.score < 40) & (picked.fwd_5d < 0))).mean() * 100
+
+    assert abs(metrics[0, 0] - sharpe) < 1e-9
+    assert abs(metrics[1, 0] - hit) < 1e-9
+    assert abs(metrics[2, 0] - len(picked) / len(first)) < 1e-12
+
+
+def test_search_prefers_predictive_agent():
+    frame = make_scores()
+    optimizer = WeightOptimizer(frame, workers=1)
+    result = optimizer.search("grid", step=0.25)
+
+    best = result["best"]
+    assert best["weights"]["capital"] > best["weights"]["technical"]
+    assert best["sharpe"] >= result["baseline"]["sharpe"]
+    # 未参与寻优的Agent权重不变，参与寻优的权重总和保持
+    assert best["weights"]["sector"] == 0.15
+    assert abs(best["weights"]["capital"] + best["weights"]["technical"] - 0.45) < 1e-3
+
+    walk_forward = result["walk_forward"]
+    assert len(walk_forward["steps"]) == 4
+    assert walk_forward["sharpe"] > 0 and walk_forward["hit"] > 50
+
+    # 多进程结果一致
+    parallel = WeightOptimizer(frame, workers=2).search("grid", step=0.25)
+    pd.testing.assert_frame_equal(result["table"], parallel["table"])
+
+
+def test_single_replayable_agent_tunes_thresholds_only():
+    frame = make_scores().drop(columns=["capital"])
+    optimizer = WeightOptimizer(frame, workers=1)
+    try:
+        optimizer.search("random")
+        assert False, "只有一个可回放Agent时不应搜索权重"
+    except ValueError as e:
+        assert "technical" in str(e)
+
+    result = optimizer.search(tune_weights=False)
+    assert result["best"]["weights"] == result["baseline"]["weights"] == optimizer.base_weights
+    assert result["best"]["agents"] == ["technical"]
+    assert len(result["table"]) == len(set(result["table"][["buy", "hold"]].itertuples(index=False)))
+
+
+def test_write_config_keeps_comments(tmp_path):
+    path = tmp_path / "agents.yaml"
+    path.write_text(
+        "system:\n  name: zuwa\n\n"
+        "# 权重配置\nweights:\n  technical: 0.20   # 技术面\n  capital: 0.25\n\n"
+        "thresholds:\n  strong_buy: 80      # 强烈推荐\n  buy: 60\n  hold: 40\n"
+        "  sentiment_greed: 70\n\ndata_sources:\n  akshare:\n    buy: 1\n",
+        encoding="utf-8")
+
+    write_config(path, {"technical": 0.1, "capital": 0.4, "sector": 0.15}, {"strong_buy": 80, "buy": 65.0, "hold": 35.0})
+    text = path.read_text(encoding="utf-8")
+    config = yaml.safe_load(text)
+
+    assert config["weights"] == {"technical": 0.1, "capital": 0.4, "sector": 0.15}
+    assert config["thresholds"]["buy"] == 65 and config["thresholds"]["hold"] == 35
+    assert config["thresholds"]["sentiment_greed"] == 70
+    assert config["data_sources"]["akshare"]["buy"] == 1
+    assert "technical: 0.1   # 技术面" in text and "# 强烈推荐" in text
+
+    # 寻优记录写在 thresholds 之后；空的节不改动，顶格注释仍属于下一节
+    path.write_text(text.replace("data_sources:", "# 数据源\ndata_sources:"), encoding="utf-8")
+    write_config(path, {}, {"buy": 70.0, "sell": 15}, {"agents": ["technical"], "horizon": 5})
+    text = path.read_text(encoding="utf-8")
+    config = yaml.safe_load(text)
+    assert config["weights"] == {"technical": 0.1, "capital": 0.4, "sector": 0.15}
+    assert config["thresholds"]["buy"] == 70 and config["thresholds"]["sell"] == 15
+    assert config["optimization"] == {"agents": ["technical"], "horizon": 5}
+    assert list(config) == ["system", "weights", "thresholds", "optimization", "data_sources"]
+    assert "  sell: 15\n\noptimization:\n  agents: [technical]\n  horizon: 5\n\n# 数据源\ndata_sources:" in text
+
+    # 新文件只包含两节
+    fresh = tmp_path / "best.yaml"
+    write_config(fresh, {"technical": 1.0}, {"buy": 60})
+    assert yaml.safe_load(fresh.read_text(encoding="utf-8")) == {"weights": {"technical": 1.0}, "thresholds": {"buy": 60}}
+
+
+def test_cached_replay_reuses_scores(tmp_path, monkeypatch):
+    monkeypatch.setenv("ZUWA_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "prices"
+    for i in range(3):
+        write_frame(make_daily(seed=i), root / f"{600000 + i}")
+    engine = BacktestEngine(store=PriceStore(root), workers=1)
+
+    first = engine.cached_replay()
+    calls = []
+    engine.replay = lambda *args: calls.append(args) or first
+    pd.testing.assert_frame_equal(engine.cached_replay(), first)
+    assert calls == []
+
+    # 价格数据更新后重新回放
+    write_frame(make_daily(seed=9), root / "600000")
+    engine.cached_replay()
+    assert len(calls) == 1
+
+
+def test_optimize_falls_back_to_thresholds_only(tmp_path, monkeypatch):
+    import main
+
+    # 只有技术分析可回放：权重寻优退回只寻优阈值，写回时不改写权重
+    frame = make_scores().drop(columns=["capital"])
+    monkeypatch.setattr(BacktestEngine, "cached_replay", lambda self, **kwargs: frame)
+    path = tmp_path / "agents.yaml"
+    path.write_text("weights:\n  technical: 0.5\n  capital: 0.5\n"
+                    "thresholds:\n  strong_buy: 80\n  buy: 60\n  hold: 40\n  sell: 20\n", encoding="utf-8")
+    analyzer = SimpleNamespace(config=yaml.safe_load(path.read_text(encoding="utf-8")))
+    args = SimpleNamespace(workers=1, start=None, end=None, search="random", trials=10,
+                           thresholds_only=False, write_config=str(path))
+
+    result = main.run_optimize(analyzer, args)
+    assert result["best"]["agents"] == ["technical"]
+    assert yaml.safe_load(path.read_text(encoding="utf-8"))["weights"] == {"technical": 0.5, "capital": 0.5}
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_candidate_metrics_match_direct_calculation()
+    test_search_prefers_predictive_agent()
+    test_single_replayable_agent_tunes_thresholds_only()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_write_config_keeps_comments(Path(tmp))
+    print("✅ 权重寻优测试通过")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+祖蛙形态扫描测试 - 面板形态矩阵与逐根K线判断一致、板块涨跌停、选股查询（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+
+from src.agents.technical_agent import TechnicalAnalysisAgent
+from src.analysis.feature_store import FeatureStore
+from src.analysis.pattern_recognition import PatternRecognition, PatternScanner, limit_pct
+
+
+def make_frames(days: int = 160, seed: int = 3):
+    """三只股票：主板、创业板、带停牌缺口的主板"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=days).strftime("%Y-%m-%d")
+    frames = {}
+    for symbol in ("600000", "300750", "000001"):
+        close = 20 * np.exp(np.cumsum(rng.normal(0, 0.04, days)))
+        open_ = close * (1 + rng.normal(0, 0.02, days))
+        frames[symbol] = pd.DataFrame({
+            "date": dates,
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, days)),
+            "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, days)),
+            "close": close,
+        })
+    frames["000001"] = frames["000001"].drop(index=range(70, 75)).reset_index(drop=True)
+    # 主板涨停与一字涨停、创业板涨幅 12%（未涨停）
+    main = frames["600000"]
+    main.loc[100, ["open", "high", "low", "close"]] = main.loc[99, "close"] * 1.1
+    main.loc[120, "close"] = main.loc[119, "close"] * 1.1
+    main.loc[120, "high"] = max(main.loc[120, "high"], main.loc[120, "close"])
+    gem = frames["300750"]
+    gem.loc[130, "close"] = gem.loc[129, "close"] * 1.12
+    gem.loc[130, "high"] = max(gem.loc[130, "high"], gem.loc[130, "close"])
+    return frames
+
+
+def reference(df: pd.DataFrame, row: int) -> dict:
+    """逐根K线的直接判断（截至 row 的历史）"""
+    bar, prev = df.iloc[row], df.iloc[row - 1] if row > 0 else None
+    body = abs(bar.close - bar.open)
+    upper = bar.high - max(bar.open, bar.close)
+    lower = min(bar.open, bar.close) - bar.low
+    sma = {p: df.close.iloc[max(row - p + 1, 0):row + 1].mean() if row >= p - 1 else np.nan for p in (5, 10, 20, 60)}
+    return {
+        "锤子线": lower > 2 * body and upper < body,
+        "十字星": body < 0.1 * (bar.high - bar.low),
+        "看涨吞没": prev is not None and prev.close < prev.open and bar.close > bar.open
+                    and bar.open <= prev.close and bar.close >= prev.open,
+        "均线多头排列": sma[5] > sma[10] > sma[20] > sma[60],
+    }
+
+
+def test_matrices_match_per_bar():
+    frames = make_frames()
+    scanner = PatternScanner.from_frames(frames)
+    assert list(scanner.columns) == list(frames)
+    assert len(scanner.index) == 160
+
+    for symbol in ("600000", "300750"):
+        df = frames[symbol]
+        for name in ("锤子线", "十字星", "看涨吞没", "均线多头排列"):
+            column = scanner.matrix(name)[symbol].to_numpy()
+            expected = np.array([reference(df, row)[name] for row in range(len(df))])
+            assert (column == expected).all(), (symbol, name)
+
+    # 停牌日全部为 False，最新一根K线的形态与单只股票判断一致
+    gap = scanner.index[70:75]
+    assert not any(scanner.matrix(name).loc[gap, "000001"].any() for name in ("锤子线", "十字星", "看涨吞没"))
+    for symbol, df in frames.items():
+        assert scanner.latest(symbol) == PatternRecognition.detect_patterns(df, symbol)
+
+
+def test_board_limits_and_queries():
+    frames = make_frames()
+    assert limit_pct("600000") == 10 and limit_pct("sz300750") == 20 and limit_pct("830799") == 30
+    scanner = PatternScanner.from_frames(frames)
+    limit_up = scanner.matrix("涨停")
+    dates = scanner.index
+    assert limit_up.loc[dates[100], "600000"] and limit_up.loc[dates[120], "600000"]
+    assert scanner.matrix("一字涨停").loc[dates[100], "600000"]
+    assert not scanner.matrix("一字涨停").loc[dates[120], "600000"]
+    assert not limit_up.loc[dates[130], "300750"]
+    # ST股票按5%判断
+    st = PatternScanner.from_frames(frames, limits={"300750": 5.0})
+    assert st.matrix("涨停").loc[dates[130], "300750"]
+
+    assert "600000" in scanner.occurred("涨停", days=5, as_of=dates[122])
+    assert "600000" not in scanner.occurred("涨停", days=2, as_of=dates[123])
+    found = scanner.find(["涨停", "一字涨停"], days=25, as_of=dates[120])
+    row = found[found["symbol"] == "600000"].iloc[0]
+    assert row["last_date"] == dates[120] and row["patterns"] == ["涨停", "一字涨停"]
+    assert row["count"] == limit_up.loc[dates[96]:dates[120], "600000"].sum() + 1
+    assert scanner.find(["涨停", "一字涨停"], days=25, as_of=dates[110], match="all")["symbol"].tolist() == ["600000"]
+
+    # 滚动矩阵与逐日查询一致
+    within = scanner.within("涨停", 5)
+    for day in dates[95:130]:
+        assert sorted(within.columns[within.loc[day]]) == sorted(scanner.occurred("涨停", 5, as_of=day))
+
+    events = scanner.events(["涨停"])
+    assert len(events) == int(limit_up.to_numpy().sum())
+    stats = scanner.event_returns("涨停", horizons=(1, 5))
+    assert list(stats.index) == [1, 5] and stats.loc[1, "count"] == len(events)
+
+
+def test_chinext_limit_depends_on_date():
+    """创业板2020-08-24起为20%，此前与主板同为10%"""
+    assert limit_pct("300750", "2019-06-04") == 10 and limit_pct("300750", "2020-08-24") == 20
+    assert limit_pct("688001", "2019-07-22") == 20 and limit_pct("600000", "2021-01-04") == 10
+
+    dates = ["2019-06-03", "2019-06-04", "2020-08-21", "2020-08-24", "2020-08-25"]
+    close = np.array([10.0, 11.0, 12.1, 14.52, 15.972])   # 各日均涨10%或20%
+    df = pd.DataFrame({"date": dates, "open": close, "high": close, "low": close, "close": close,
+                       "pct_change": [np.nan, 10.0, 10.0, 20.0, 10.0]})
+    scanner = PatternScanner.from_frames({"300750": df, "600000": df})
+    limit_up = scanner.matrix("涨停")
+    assert limit_up["300750"].tolist() == [False, True, True, True, False]
+    assert limit_up["600000"].tolist() == [False, True, True, True, True]
+    assert scanner.latest("300750", as_of="2019-06-04") == ["涨停", "一字涨停"]
+    # 指定的幅度在所有日期生效
+    st = PatternScanner.from_frames({"300750": df}, limits={"300750": 5.0})
+    assert st.matrix("涨停")["300750"].tolist() == [False, True, True, True, True]
+
+
+def test_agent_reports_limit_up_and_bull_alignment_only():
+    """技术分析Agent只输出涨停与均线多头排列，其余形态（锤子线、空头排列等）不输出"""
+    agent = TechnicalAnalysisAgent({})
+    df = make_frames()["600000"]
+    scanner = PatternScanner.from_frame(df, "600000")
+    others = 0
+    for row in range(40, len(df)):
+        patterns = agent._detect_patterns(df.iloc[:row + 1], "600000", FeatureStore("600000"))
+        expected = ["涨停"] if scanner.matrix("涨停")["600000"].iloc[row] else []
+        if row >= 60 and reference(df, row)["均线多头排列"]:
+            expected.append("均线多头排列")
+        assert patterns == expected, row
+        others += len(scanner.latest(as_of=df["date"].iloc[row])) > len(expected)
+    assert agent._detect_patterns(df.iloc[:121], "600000", FeatureStore("600000"))[0] == "涨停"
+    # 同期出现过其他形态，但不在Agent输出中
+    assert others > 0
+
+
+if __name__ == "__main__":
+    test_matrices_match_per_bar()
+    test_board_limits_and_queries()
+    test_chinext_limit_depends_on_date()
+    test_agent_reports_limit_up_and_bull_alignment_only()
+    print("✅ 形态扫描测试通过")
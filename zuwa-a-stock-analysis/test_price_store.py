@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+祖蛙价格库测试 - 增量同步、新鲜度与复权修复（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pandas as pd
+
+from src.data.price_store import PriceStore
+
+
+class FakeHist:
+    """模拟 ak.stock_zh_a_hist：工作日K线，收盘价可整体乘以复权因子"""
+    
+    def __init__(self):
+        self.factor = 1.0
+        self.calls = []
+    
+    def __call__(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        self.calls.append((start_date, end_date))
+        days = pd.bdate_range(start_date, end_date)
+        base = pd.Timestamp("2026-01-01")
+        closes = [(10.0 + (d - base).days * 0.01) * self.factor for d in days]
+        return pd.DataFrame({
+            "日期": [d.date() for d in days],
+            "开盘": closes, "收盘": closes, "最高": closes, "最低": closes,
+            "成交量": [1000] * len(days), "涨跌幅": [0.1] * len(days),
+        })
+
+
+def test_incremental_sync_downloads_only_missing_days(tmp_path):
+    fake = FakeHist()
+    store = PriceStore(tmp_path, history_days=60, fetcher=fake)
+    
+    # 周三收盘后首次同步：整段下载
+    wed = datetime(2026, 3, 4, 16, 0)
+    df = store.sync("600519", now=wed)
+    assert df["date"].iloc[-1] == "2026-03-04"
+    assert store.is_fresh("600519", now=wed)
+    full_rows = store.rows_downloaded
+    
+    # 同一天再次同步：不访问网络
+    store.sync("600519", now=wed)
+    assert len(fake.calls) == 1
+    
+    # 周五收盘后：只下载周三(重叠校验)~周五
+    fri = datetime(2026, 3, 6, 16, 0)
+    df = store.sync("600519", now=fri)
+    assert fake.calls[-1][0] == "20260304"
+    assert store.rows_downloaded - full_rows == 3
+    assert list(df["date"].tail(3)) == ["2026-03-04", "2026-03-05", "2026-03-06"]
+    assert df["date"].is_unique
+    
+    # 返回窗口
+    recent = store.sync("600519", days=10, now=fri)
+    assert recent["date"].iloc[0] >= "2026-02-24"
+
+
+def test_intraday_bar_is_returned_but_not_persisted(tmp_path):
+    fake = FakeHist()
+    store = PriceStore(tmp_path, history_days=30, fetcher=fake)
+    store.sync("000001", now=datetime(2026, 3, 4, 16, 0))
+    
+    df = store.sync("000001", now=datetime(2026, 3, 5, 10, 30))
+    assert df["date"].iloc[-1] == "2026-03-05"
+    assert store.last_date("000001") == "2026-03-04"
+
+
+def test_adjustment_change_triggers_rebuild(tmp_path):
+    fake = FakeHist()
+    store = PriceStore(tmp_path, history_days=30, fetcher=fake)
+    store.sync("600000", now=datetime(2026, 3, 4, 16, 0))
+    
+    # 除权：前复权价格整体变化
+    fake.factor = 0.5
+    df = store.sync("600000", now=datetime(2026, 3, 5, 16, 0))
+    stored = store.load("600000")
+    
+    assert len(fake.calls) == 3  # 首次 + 增量(发现不一致) + 重建
+    assert stored["close"].iloc[0] == df["close"].iloc[0]
+    assert abs(stored["close"].iloc[-1] - df["close"].iloc[-1]) < 1e-9
+    assert stored["date"].iloc[-1] == "2026-03-05"
+
+
+class SourcedHist(FakeHist):
+    """带数据源的下载函数：各数据源前复权口径不同，不可用的数据源换用其他数据源"""
+
+    FACTORS = {"akshare": 1.0, "tushare": 0.97}
+
+    def __init__(self):
+        super().__init__()
+        self.available = ["akshare", "tushare"]
+        self.sources = []
+
+    def __call__(self, symbol: str, start_date: str, end_date: str, source=None) -> pd.DataFrame:
+        self.sources.append(source)
+        used = source if source in self.available else self.available[0]
+        self.factor = self.FACTORS[used]
+        df = super().__call__(symbol, start_date, end_date)
+        df.attrs["source"] = used
+        return df
+
+
+def test_incremental_sync_stays_on_one_source(tmp_path):
+    fake = SourcedHist()
+    store = PriceStore(tmp_path, history_days=30, fetcher=fake)
+    store.sync("600519", now=datetime(2026, 3, 4, 16, 0))
+    assert store.load("600519").attrs["source"] == "akshare"
+
+    # 增量只向原数据源请求
+    df = store.sync("600519", now=datetime(2026, 3, 5, 16, 0))
+    assert fake.sources == [None, "akshare"]
+    assert df.attrs["source"] == "akshare" and df["date"].iloc[-1] == "2026-03-05"
+
+    # 原数据源不可用：换用的数据源口径不同，整段重建而不是拼接
+    fake.available = ["tushare"]
+    df = store.sync("600519", now=datetime(2026, 3, 6, 16, 0))
+    stored = store.load("600519")
+    assert fake.sources[-2:] == ["akshare", None]
+    assert stored.attrs["source"] == "tushare"
+    assert stored["date"].iloc[-1] == "2026-03-06"
+    expected = [(10.0 + (pd.Timestamp(d) - pd.Timestamp("2026-01-01")).days * 0.01) * 0.97 for d in stored["date"]]
+    assert abs(stored["close"] - expected).max() < 1e-9
+
+
+def test_source_survives_concat_without_attrs(tmp_path):
+    """pandas < 2.1 的 concat 不传递 attrs：增量拼接后仍记录数据源，下次同步不重建"""
+    concat = pd.concat
+
+    def concat_without_attrs(*args, **kwargs):
+        out = concat(*args, **kwargs)
+        out.attrs = {}
+        return out
+
+    fake = SourcedHist()
+    store = PriceStore(tmp_path, history_days=30, fetcher=fake)
+    with mock.patch.object(pd, "concat", concat_without_attrs):
+        store.sync("600519", now=datetime(2026, 3, 4, 16, 0))
+        store.sync("600519", now=datetime(2026, 3, 5, 16, 0))
+        assert store.load("600519").attrs["source"] == "akshare"
+        store.sync("600519", now=datetime(2026, 3, 6, 16, 0))
+    assert fake.sources == [None, "akshare", "akshare"]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_incremental_sync_downloads_only_missing_days,
+                 test_intraday_bar_is_returned_but_not_persisted,
+                 test_adjustment_change_triggers_rebuild,
+                 test_incremental_sync_stays_on_one_source,
+                 test_source_survives_concat_without_attrs):
+        with tempfile.TemporaryDirectory() as d:
+            test(Path(d))
+    print("✅ 价格库测试通过")
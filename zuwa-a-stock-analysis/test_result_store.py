@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+祖蛙分析结果库测试 - 结果读写、有效期、配置指纹与历史查询（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import threading
+import time
+from datetime import date, datetime
+
+from src.data.result_store import ResultStore, config_hash, result_window
+
+
+def make_result(symbol: str, score: float, rating: str, name: str = "") -> dict:
+    """与 analyze_stock 返回格式一致的结果"""
+    technical = {"agent_name": "技术分析师", "signal": "BULLISH", "confidence": 70.0,
+                 "summary": "多头排列", "details": {"score": score, "ma": [1.0, 2.0]},
+                 "timestamp": "2025-06-03T15:40:00"}
+    return {
+        "symbol": symbol, "name": name, "timestamp": "2025-06-03T15:40:00",
+        "final_decision": {
+            "agent_name": "首席分析师", "signal": "BUY", "confidence": 66.0, "summary": f"{rating} {score}",
+            "details": {"composite_score": score, "rating": rating, "individual_scores": {"technical": score},
+                        "agent_outputs": {"technical": technical}},
+            "timestamp": "2025-06-03T15:40:00",
+        },
+        "agent_outputs": {"technical": technical},
+        "timing": {"total": 12.3},
+    }
+
+
+def test_roundtrip_and_freshness(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    day = date(2025, 6, 3)
+    result = make_result("600519", 72.5, "推荐买入", "贵州茅台")
+    store.put(result, day, "cfg")
+
+    assert store.get("600519", day, "cfg") == result
+    assert store.get("600519", day, "other") is None
+    assert store.get("600519", date(2025, 6, 4), "cfg") is None
+    assert store.get("600519", day, "cfg", max_age=0.0) is None
+    assert store.get("600519", day, "cfg", not_before=time.time() + 60) is None
+    assert store.get("600519", day, "cfg", not_before=time.time() - 60) is not None
+
+    # 失败结果不保存；重复写入覆盖，Agent明细随之替换
+    store.put({"symbol": "000001", "error": "超时"}, day, "cfg")
+    assert store.get("000001", day, "cfg") is None
+    updated = make_result("600519", 55.0, "中性持有")
+    updated["agent_outputs"] = {}
+    updated["final_decision"]["details"]["agent_outputs"] = {}
+    store.put(updated, day, "cfg")
+    assert store.get("600519", day, "cfg")["agent_outputs"] == {}
+    assert store.stats() == {"hits": 3, "misses": 5}
+
+
+def test_history_queries(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    yesterday, today = date(2025, 6, 2), date(2025, 6, 3)
+    for symbol, score, rating in [("600000", 65, "推荐买入"), ("600001", 45, "中性持有"), ("600002", 30, "建议卖出")]:
+        store.put(make_result(symbol, score, rating), yesterday, "cfg")
+    for symbol, score, rating in [("600000", 50, "中性持有"), ("600001", 82, "强烈推荐"), ("600002", 35, "建议卖出"),
+                                  ("600003", 70, "推荐买入")]:
+        store.put(make_result(symbol, score, rating), today, "cfg")
+    store.put(make_result("600000", 90, "强烈推荐"), today, "new")
+
+    top = store.top(2, config="cfg")
+    assert list(top["symbol"]) == ["600001", "600003"]
+    assert list(store.top(1)["symbol"]) == ["600000"]
+
+    changes = store.rating_changes(today, config="cfg")
+    assert list(changes["symbol"]) == ["600001", "600000"]
+    assert list(changes["previous_rating"]) == ["中性持有", "推荐买入"]
+    assert list(changes["change"]) == [37, -15]
+    # 默认对比前一交易日
+    assert list(store.rating_changes(config="cfg")["symbol"]) == ["600001", "600000"]
+
+    latest = store.latest(config="cfg")
+    assert list(latest["symbol"]) == ["600000", "600001", "600002", "600003"]
+    assert set(latest["trade_date"]) == {"2025-06-03"}
+    assert store.latest(["600000"])["config_hash"].tolist() == ["new"]
+    assert list(store.history("600000", config="cfg")["trade_date"]) == ["2025-06-03", "2025-06-02"]
+
+    # 排行与评级变化查询走 (交易日, 配置, 评分) 索引
+    plan = store._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT symbol FROM analyses WHERE trade_date = ? AND config_hash = ? "
+        "ORDER BY composite DESC LIMIT 5", ("2025-06-03", "cfg")).fetchall()
+    assert any("idx_analyses_day_score" in row[-1] for row in plan)
+
+
+def test_concurrent_writers(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    day = date(2025, 6, 3)
+
+    def write(offset: int):
+        for i in range(20):
+            store.put(make_result(f"{offset + i:06d}", i, "中性持有"), day, "cfg")
+        store.close()
+
+    threads = [threading.Thread(target=write, args=(n * 100,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store.latest()) == 80
+    assert store._connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_config_hash_and_window():
+    config = {"weights": {"technical": 0.2}, "thresholds": {"buy": 60}, "system": {"max_workers": 5}}
+    assert config_hash(config) == config_hash({**config, "system": {"max_workers": 8}})
+    assert config_hash(config) != config_hash({**config, "weights": {"technical": 0.3}})
+
+    # 周二盘中：归属当天，有有效期；收盘后：只认日线落地后的结果
+    day, max_age, not_before = result_window(datetime(2025, 6, 3, 10, 30), intraday_ttl=600)
+    assert day == date(2025, 6, 3) and max_age == 600 and not_before is None
+    day, max_age, not_before = result_window(datetime(2025, 6, 3, 20, 0))
+    assert day == date(2025, 6, 3) and max_age is None
+    assert not_before == datetime(2025, 6, 3, 15, 30).timestamp()
+    day, _, _ = result_window(datetime(2025, 6, 3, 8, 0))
+    assert day == date(2025, 6, 2)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_roundtrip_and_freshness, test_history_queries, test_concurrent_writers):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    test_config_hash_and_window()
+    print("✅ 分析结果库测试通过")
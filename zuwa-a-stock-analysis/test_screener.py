@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+祖蛙选股测试 - 快照条件先行、日线指标与补K线、形态筛选、条件校验与日线缓存（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.agents.technical_agent import TechnicalAnalysisAgent
+from src.analysis.advanced_analyzer import VOLUME_PRICE_SIGNALS, AdvancedAnalyzer
+from src.analysis.feature_store import FeatureStore
+from src.analysis.technical_indicators import PanelIndicators
+from src.data.market_snapshot import MarketSnapshot
+from src.data.price_store import PriceStore
+from src.data.storage import write_frame
+from src.screener import Screener, filter_fields, spot_day
+
+NOW = datetime.now()
+
+
+def make_daily(end: str, days: int = 90, seed: int = 0) -> pd.DataFrame:
+    """价格库标准列的随机日线，最后一根K线在 end"""
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0.002, 0.02, days)))
+    open_ = close * (1 + rng.normal(0, 0.01, days))
+    return pd.DataFrame({
+        "date": pd.bdate_range(end=end, periods=days).strftime("%Y-%m-%d"),
+        "open": open_,
+        "high": np.maximum(open_, close) * 1.01,
+        "low": np.minimum(open_, close) * 0.99,
+        "close": close,
+        "volume": 1e6,
+        "pct_change": np.r_[np.nan, (close[1:] / close[:-1] - 1) * 100],
+    })
+
+
+def make_market(root):
+    """四只股票：600000 日线已含快照当日，000001 缺快照当日，300750 为ST，688001 无本地日线"""
+    day = spot_day(NOW)
+    frames = {
+        "600000": make_daily(day, seed=1),
+        "000001": make_daily(day, seed=2).iloc[:-1],
+        "300750": make_daily(day, seed=3),
+    }
+    for symbol, df in frames.items():
+        write_frame(df, root / symbol)
+
+    last = {s: df.iloc[-1] for s, df in frames.items()}
+    price_000001 = last["000001"]["close"] * 1.1
+
+    def spot():
+        return pd.DataFrame({
+            "代码": ["600000", "000001", "300750", "688001", "600001"],
+            "名称": ["浦发银行", "平安银行", "*ST宁德", "华兴源创", "停牌股"],
+            "最新价": [last["600000"]["close"], price_000001, last["300750"]["close"], 30.0, np.nan],
+            "涨跌幅": [1.0, 10.0, -1.0, 2.0, np.nan],
+            "量比": [1.2, 3.5, 0.8, 2.0, np.nan],
+            "换手率": [0.5, 4.0, 1.0, 2.0, np.nan],
+            "成交额": [8e8, 2e9, 1e8, 5e8, 0],
+            "今开": [last["600000"]["open"], price_000001 / 1.05, last["300750"]["open"], 29.0, np.nan],
+            "最高": [last["600000"]["high"], price_000001, last["300750"]["high"], 31.0, np.nan],
+            "最低": [last["600000"]["low"], price_000001 / 1.06, last["300750"]["low"], 29.0, np.nan],
+        })
+
+    return frames, MarketSnapshot(ttl=60, fetcher=spot), price_000001
+
+
+def test_screen_stages_and_indicators(tmp_path, monkeypatch):
+    monkeypatch.setenv("ZUWA_CACHE_DIR", str(tmp_path / "cache"))
+    frames, snapshot, price = make_market(tmp_path / "prices")
+    screener = Screener(snapshot=snapshot, store=PriceStore(tmp_path / "prices"))
+
+    result = asyncio.run(screener.run(filters=["not st", "amount >= 3e8"], now=NOW))
+    table = result["table"]
+    # 停牌股剔除；快照条件在读日线之前执行
+    assert result["stages"] == [("全市场", 4), ("快照条件", 3)]
+    assert set(table["symbol"]) == {"600000", "000001", "688001"}
+    assert set(result["timing"]) == {"snapshot", "history", "indicators", "filter"}
+    # 按技术评分降序，无日线的股票排在最后
+    assert table["symbol"].iloc[-1] == "688001" and np.isnan(table["tech_score"].iloc[-1])
+    assert table["tech_score"].iloc[:-1].is_monotonic_decreasing
+
+    rows = table.set_index("symbol")
+    assert rows.loc["688001", "bars"] == 0
+    # 日线已含当日：指标与逐只计算一致
+    close = frames["600000"]["close"].to_numpy()
+    assert rows.loc["600000", "bars"] == len(close)
+    assert np.isclose(rows.loc["600000", "rsi"], PanelIndicators.rsi(close, 14)[-1])
+    assert np.isclose(rows.loc["600000", "sma20"], close[-20:].mean())
+    assert np.isclose(rows.loc["600000", "ret_5d"], (close[-1] / close[-6] - 1) * 100)
+    vp = AdvancedAnalyzer().analyze_volume_price_series(frames["600000"]).iloc[-1]
+    assert rows.loc["600000", "vp_health"] == vp["health_score"]
+    assert rows.loc["600000", "vp_signals"] == [s for s in VOLUME_PRICE_SIGNALS if vp[s]]
+    # 缺当日：以快照最新价补上一根K线
+    close = np.r_[frames["000001"]["close"].to_numpy(), price]
+    assert rows.loc["000001", "bars"] == len(close)
+    assert np.isclose(rows.loc["000001", "sma5"], close[-5:].mean())
+    assert np.isclose(rows.loc["000001", "rsi"], PanelIndicators.rsi(close, 14)[-1])
+
+    # 日线条件与排序字段
+    result = asyncio.run(screener.run(filters=["volume_ratio > 1", "bars >= 60 and ret_5d > -100"],
+                                      sort="volume_ratio", top=1, now=NOW))
+    assert result["stages"] == [("全市场", 4), ("快照条件", 3), ("日线条件", 2)]
+    assert result["table"]["symbol"].tolist() == ["000001"]
+
+
+def test_suspended_stocks_match_agents(tmp_path):
+    """停牌（日线有缺口）、新上市的股票：指标只用自身K线，技术评分、量价字段同对应的Agent"""
+    day = spot_day(NOW)
+    frames = {}
+    for seed in range(12):
+        df = make_daily(day, days=80, seed=seed)
+        gap = 50 + 2 * seed
+        frames[f"60{seed:04d}"] = df.drop(df.index[gap:gap + 3 + seed % 5]).reset_index(drop=True)
+    frames["301000"] = make_daily(day, days=12, seed=20)
+    history = pd.concat([df.assign(symbol=s) for s, df in frames.items()], ignore_index=True)
+    spot = pd.DataFrame({"symbol": list(frames), "price": [df["close"].iloc[-1] for df in frames.values()]})
+    table = Screener(snapshot=object(), store=object()).indicators(spot, history, now=NOW).set_index("symbol")
+
+    agent = TechnicalAnalysisAgent({})
+    for symbol, df in frames.items():
+        row = table.loc[symbol]
+        features = FeatureStore(symbol)
+        analysis = {"trend": agent._analyze_trend(df, features), "momentum": agent._analyze_momentum(df, features)}
+        assert row["tech_score"] == agent._calculate_score(analysis), symbol
+        close = df["close"].to_numpy()
+        assert row["bars"] == len(close)
+        assert np.isclose(row["sma5"], close[-5:].mean())
+        assert np.isclose(row["ret_5d"], (close[-1] / close[-6] - 1) * 100)
+        rsi = PanelIndicators.rsi(close, 14)[-1]
+        assert np.isclose(row["rsi"], rsi) or np.isnan(row["rsi"]) and np.isnan(rsi), symbol
+        vp = AdvancedAnalyzer().analyze_volume_price_series(df).iloc[-1]
+        assert row["vp_health"] == vp["health_score"] or np.isnan(row["vp_health"]) and np.isnan(vp["health_score"])
+        assert row["vp_signals"] == [s for s in VOLUME_PRICE_SIGNALS if vp[s]], symbol
+        assert np.isclose(row["volume_percentile"], df["volume"].tail(60).rank(pct=True).iloc[-1]), symbol
+
+
+def test_patterns_validation_and_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("ZUWA_CACHE_DIR", str(tmp_path / "cache"))
+    frames, snapshot, _ = make_market(tmp_path / "prices")
+    store = PriceStore(tmp_path / "prices")
+    screener = Screener(snapshot=snapshot, store=store)
+
+    # 补上的当日K线涨10%：主板涨停
+    result = asyncio.run(screener.run(patterns=["涨停"], pattern_days=1, now=NOW))
+    assert result["stages"][-1] == ("K线形态", 1)
+    assert result["table"]["symbol"].tolist() == ["000001"]
+    assert result["table"]["patterns"].iloc[0] == ["涨停"]
+
+    for bad in ("price >", "foo > 1", "__import__('os')"):
+        try:
+            filter_fields(bad)
+            assert False, bad
+        except ValueError:
+            pass
+    for kwargs in ({"sort": "unknown"}, {"patterns": ["不存在的形态"]}):
+        try:
+            asyncio.run(screener.run(**kwargs))
+            assert False, kwargs
+        except ValueError:
+            pass
+
+    # 日线长表缓存为单个文件；价格库变化后重新读取并清理旧缓存
+    cached = screener.history(NOW)
+    assert set(cached["symbol"]) == set(frames)
+    files = list((tmp_path / "cache" / "screener").glob("history_*"))
+    assert len(files) == 1
+    write_frame(make_daily(spot_day(NOW), seed=9), tmp_path / "prices" / "688001")
+    assert set(screener.history(NOW)["symbol"]) == {*frames, "688001"}
+    assert len(list((tmp_path / "cache" / "screener").glob("history_*"))) == 1
+    assert not files[0].exists()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    import pytest
+    for test in (test_screen_stages_and_indicators, test_patterns_validation_and_cache):
+        with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as monkeypatch:
+            test(Path(tmp), monkeypatch)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_suspended_stocks_match_agents(Path(tmp))
+    print("✅ 选股测试通过")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+祖蛙分析会话测试 - 后台任务进度、结果缓存与按新权重重新评分（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+import time
+from datetime import datetime
+
+from src.agents.chief_agent import ChiefAnalystAgent
+from src.session import AnalysisSession
+
+
+class FakeAnalyzer:
+    """模拟 ZuwaStockAnalyzer：按代码生成固定的各Agent评分"""
+
+    def __init__(self):
+        self.agents = {"chief": ChiefAnalystAgent({})}
+        self.calls = []
+
+    def _result(self, symbol: str, name: str):
+        seed = int(symbol) % 50
+        scores = {"technical": 30 + seed, "capital": 80 - seed, "intelligence": 50,
+                  "sector": 40 + seed / 2, "bull_view": 70, "bear_view": 35, "retail_sentiment": 70}
+        chief = self.agents["chief"]
+        composite = chief._calculate_composite_score(scores)
+        return {
+            "symbol": symbol, "name": name, "timestamp": datetime.now().isoformat(),
+            "final_decision": {"details": {"composite_score": composite, "individual_scores": scores,
+                                           "rating": chief._determine_rating(composite)["label"]}},
+            "agent_outputs": {},
+        }
+
+    async def analyze_stock(self, symbol, name="", verbose=True, progress=None, refresh=False):
+        self.calls.append(symbol)
+        for i, label in enumerate(("数据收集", "多维分析", "首席决策")):
+            if progress:
+                progress(label, i / 3)
+            await asyncio.sleep(0.01)
+        if symbol == "999999":
+            raise ValueError("无数据")
+        return self._result(symbol, name)
+
+    async def analyze_batch(self, symbols, concurrency=None, refresh=False):
+        for symbol, name in symbols:
+            try:
+                yield await self.analyze_stock(symbol, name)
+            except Exception as e:
+                yield {"symbol": symbol, "name": name, "error": str(e)}
+
+
+def wait(job, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while job.running and time.time() < deadline:
+        time.sleep(0.01)
+    assert not job.running
+
+
+def test_single_stock_progress_and_cache():
+    analyzer = FakeAnalyzer()
+    session = AnalysisSession(lambda: analyzer)
+    seen = []
+
+    job = session.submit([("600519", "贵州茅台")])
+    while job.running:
+        seen.append(job.progress)
+        time.sleep(0.002)
+    assert job.status == "done" and job.progress == 1.0
+    assert max(seen, default=0) < 1.0
+    assert session.get("600519")["name"] == "贵州茅台"
+
+    # 重跑界面/再次提交：直接使用缓存，不再分析
+    again = session.submit([("600519", "贵州茅台")])
+    assert again.status == "done" and analyzer.calls == ["600519"]
+
+    # 强制刷新
+    wait(session.submit([("600519", "")], refresh=True))
+    assert analyzer.calls == ["600519", "600519"]
+
+
+def test_rescore_matches_chief_without_reanalysis():
+    analyzer = FakeAnalyzer()
+    session = AnalysisSession(lambda: analyzer)
+    symbols = [(f"{600000 + i}", "") for i in range(30)]
+    job = session.submit(symbols + [("999999", "坏数据")])
+    wait(job)
+    assert job.status == "done" and set(job.errors) == {"999999"}
+    calls = len(analyzer.calls)
+
+    weights = {"technical": 0.6, "capital": 0.1, "intelligence": 0.1, "sector": 0.1, "bull_view": 0.05, "bear_view": 0.05}
+    thresholds = {"strong_buy": 70, "buy": 55, "hold": 45, "sell": 20}
+    started = time.perf_counter()
+    table = session.rescore([s for s, _ in symbols] + ["999999"], weights, thresholds)
+    assert time.perf_counter() - started < 0.5
+    assert len(analyzer.calls) == calls
+    assert len(table) == 30
+    assert table["composite"].is_monotonic_decreasing
+
+    chief = ChiefAnalystAgent({"weights": weights, "thresholds": thresholds})
+    for _, row in table.iterrows():
+        scores = session.get(row["symbol"])["final_decision"]["details"]["individual_scores"]
+        expected = chief._calculate_composite_score(scores)
+        assert abs(row["composite"] - round(expected, 2)) < 1e-9
+        assert row["rating"] == chief._determine_rating(expected)["label"]
+
+
+def test_cache_expires():
+    analyzer = FakeAnalyzer()
+    session = AnalysisSession(lambda: analyzer, ttl=0.05)
+    wait(session.submit([("000001", "")]))
+    assert session.get("000001") is not None
+    time.sleep(0.06)
+    assert session.get("000001") is None
+    assert session.rescore(["000001"], session.default_weights()).empty
+
+
+if __name__ == "__main__":
+    test_single_stock_progress_and_cache()
+    test_rescore_matches_chief_without_reanalysis()
+    test_cache_expires()
+    print("✅ 分析会话测试通过")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+祖蛙流式指标测试 - 逐根更新与批量计算一致、状态序列化（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.technical_indicators import TechnicalIndicators
+from src.analysis.streaming_indicators import IndicatorState, StreamingEMA
+
+
+def make_bars(n: int = 300, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = pd.Series(20 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+    high = close * (1 + np.abs(rng.normal(0, 0.01, n)))
+    low = close * (1 - np.abs(rng.normal(0, 0.01, n)))
+    df = pd.DataFrame({"close": close, "high": high, "low": low})
+    df.iloc[100:103] = np.nan  # 停牌缺口
+    return df
+
+
+def expected_indicators(df: pd.DataFrame, rsi_method: str) -> dict:
+    c = df["close"]
+    macd = TechnicalIndicators.macd(c)
+    boll = TechnicalIndicators.bollinger_bands(c)
+    kdj = TechnicalIndicators.kdj(df["high"], df["low"], c)
+    return {
+        "sma5": TechnicalIndicators.sma(c, 5),
+        "sma60": TechnicalIndicators.sma(c, 60),
+        "ema26": TechnicalIndicators.ema(c, 26),
+        "macd": macd["macd"],
+        "macd_signal": macd["signal"],
+        "rsi": TechnicalIndicators.rsi(c, method=rsi_method),
+        "boll_upper": boll["upper"],
+        "boll_lower": boll["lower"],
+        "kdj_k": kdj["k"],
+        "kdj_d": kdj["d"],
+        "kdj_j": kdj["j"],
+    }
+
+
+def test_streaming_matches_batch():
+    """逐根更新结果与批量计算一致，中途序列化/反序列化不影响结果"""
+    df = make_bars()
+    for method in ("sma", "wilder"):
+        state = IndicatorState("000001", rsi_method=method)
+        rows = []
+        for i, bar in enumerate(df.itertuples()):
+            if i == 150:
+                state = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+            rows.append(state.update(bar.close, bar.high, bar.low))
+        streamed = pd.DataFrame(rows)
+        
+        for name, series in expected_indicators(df, method).items():
+            np.testing.assert_allclose(
+                streamed[name].to_numpy(), series.to_numpy(),
+                rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=f"{method} {name}"
+            )
+
+
+def test_ema_adjust_matches_pandas_default():
+    """adjust=True 与 pandas ewm 默认参数一致（技术分析Agent的MACD算法）"""
+    close = make_bars()["close"]
+    ema = StreamingEMA(12, adjust=True)
+    streamed = [ema.update(x) for x in close]
+    np.testing.assert_allclose(streamed, close.ewm(span=12).mean().to_numpy(), rtol=1e-12, equal_nan=True)
+
+
+def test_preview_and_persistence():
+    """盘中试算不改变状态；保存后读取继续更新结果一致"""
+    df = make_bars(120)
+    state = IndicatorState.from_history(df.iloc[:-1], symbol="600519")
+    before = state.values()
+    
+    last = df.iloc[-1]
+    preview = state.preview(last["close"], last["high"], last["low"])
+    assert pd.Series(state.values()).equals(pd.Series(before))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = state.save(Path(tmp) / "600519.json")
+        restored = IndicatorState.load(path)
+    assert restored.bars == state.bars == 119
+    
+    final = restored.update(last["close"], last["high"], last["low"])
+    for name, value in preview.items():
+        assert np.isclose(final[name], value, equal_nan=True), name
+    assert IndicatorState.load(Path("/nonexistent/state.json")) is None
+
+
+if __name__ == "__main__":
+    test_streaming_matches_batch()
+    test_ema_adjust_matches_pandas_default()
+    test_preview_and_persistence()
+    print("✅ 流式指标测试通过")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+祖蛙链路追踪测试 - Agent/数据源/LLM span、上下文传递、汇总表与 Chrome Trace 导出（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+import contextvars
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.agents.base import AgentOutput, BaseAgent
+from src.utils import tracing
+from src.utils.concurrency import data_source, run_blocking
+from src.utils.llm_cache import LLMCache
+from src.utils.llm_helper import LLMAnalyzer
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@data_source("akshare")
+def fetch_daily(symbol: str) -> pd.DataFrame:
+    """模拟数据源：返回日线并标记缓存未命中"""
+    tracing.annotate(cache="miss")
+    return pd.DataFrame({"close": np.arange(100, dtype=float), "seen": request_id.get()})
+
+
+class FakeAgent(BaseAgent):
+    """调用数据源的Agent"""
+
+    def __init__(self):
+        super().__init__("测试分析师")
+
+    async def analyze(self, symbol, context):
+        df = await run_blocking(fetch_daily, symbol)
+        return AgentOutput(self.name, "BULLISH", 70.0, str(df["seen"].iloc[0]), {}, datetime.now())
+
+
+def test_disabled_is_noop():
+    assert not tracing.enabled()
+    assert tracing.span("x") is tracing.span("y")
+    tracing.annotate(cache="hit")
+    assert getattr(FakeAgent.analyze, "__traced__", False)
+
+    result = asyncio.run(FakeAgent().analyze("600519", {}))
+    assert result.signal == "BULLISH"
+    assert tracing.get_tracer() is None
+
+
+def test_spans_nest_across_threads(tmp_path):
+    async def run():
+        request_id.set("req-1")
+        agent = FakeAgent()
+        return await asyncio.gather(agent.analyze("600519", {}), agent.analyze("000001", {}))
+
+    tracer = tracing.start_tracing()
+    try:
+        results = asyncio.run(run())
+    finally:
+        assert tracing.stop_tracing() is tracer
+
+    # 调用方的 contextvars 复制到了线程池
+    assert [r.summary for r in results] == ["req-1", "req-1"]
+
+    agents = [s for s in tracer.spans if s.cat == "agent"]
+    data = [s for s in tracer.spans if s.cat == "data"]
+    assert len(agents) == 2 and len(data) == 2
+    assert {s.attrs["symbol"] for s in agents} == {"600519", "000001"}
+    assert all(s.attrs["signal"] == "BULLISH" for s in agents)
+    # 数据源 span 挂在发起它的Agent下，且在不同泳道（线程）
+    assert {s.parent for s in data} == {s.id for s in agents}
+    assert len({s.lane for s in agents}) == 2
+    for s in data:
+        assert s.name == "akshare.fetch_daily"
+        assert s.attrs["bytes"] == 100 * 8 + 100 * 8 and s.attrs["cache"] == "miss"
+        assert s.wall > 0 and s.cpu >= 0 and s.attrs["queued"] >= 0
+
+    summary = tracer.summary()
+    row = summary[summary["name"] == "akshare.fetch_daily"].iloc[0]
+    assert row["count"] == 2 and row["misses"] == 2 and row["bytes"] == 3200
+
+    trace = json.loads(tracer.write_chrome_trace(tmp_path / "trace.json").read_text(encoding="utf-8"))
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert len(events) == 4 and all(e["dur"] >= 0 for e in events)
+    assert {e["tid"] for e in trace["traceEvents"] if e["ph"] == "M"} >= {e["tid"] for e in events}
+
+
+def test_llm_span_records_cache(tmp_path):
+    class FakeScheduler:
+        calls = 0
+
+        async def complete(self, client, **kwargs):
+            FakeScheduler.calls += 1
+            return '{"signal": "BULLISH", "confidence": 80}'
+
+    llm = LLMAnalyzer(cache=LLMCache(root=tmp_path / "llm"), scheduler=FakeScheduler())
+    llm.api_key = "test"
+    tracer = tracing.start_tracing()
+    try:
+        for _ in range(2):
+            result = asyncio.run(llm.analyze_stock("600519", "贵州茅台", {}, "technical"))
+            assert result["signal"] == "BULLISH"
+    finally:
+        tracing.stop_tracing()
+
+    spans = [s for s in tracer.spans if s.cat == "llm"]
+    assert [s.attrs["cache"] for s in spans] == ["miss", "hit"]
+    assert FakeScheduler.calls == 1
+    assert spans[0].name == "llm.technical" and spans[0].attrs["bytes"] > 0
+    row = tracer.summary().iloc[0]
+    assert row["hits"] == 1 and row["misses"] == 1
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_disabled_is_noop()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_spans_nest_across_threads(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_llm_span_records_cache(Path(tmp))
+    print("✅ 链路追踪测试通过")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+祖蛙量价序列测试 - 逐K线量价信号与截断日线的单次分析一致、面板与单只股票一致（离线）
+"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.advanced_analyzer import (
+    DIVERGENCE_SIGNALS, VOLUME_PRICE_MIN_BARS, VOLUME_PRICE_SIGNALS, AdvancedAnalyzer
+)
+
+TRENDS = {"UP": 1, "DOWN": -1, "FLAT": 0}
+
+
+def make_daily(days: int = 150, seed: int = 0) -> pd.DataFrame:
+    """随机日线，含连续放量与成交量相同的K线"""
+    rng = np.random.default_rng(seed)
+    volume = rng.lognormal(13, 0.5, days).round(-3)
+    volume[50:53] *= 5
+    volume[80] = volume[79]
+    return pd.DataFrame({
+        "date": pd.bdate_range("2024-01-01", periods=days).strftime("%Y-%m-%d"),
+        "close": 10 * np.exp(np.cumsum(rng.normal(0, 0.03, days))),
+        "volume": volume,
+    })
+
+
+def test_series_matches_latest_analysis():
+    df = make_daily()
+    analyzer = AdvancedAnalyzer()
+    series = analyzer.analyze_volume_price_series(df)
+    assert list(series.index) == list(df.index)
+    assert not series.iloc[:VOLUME_PRICE_MIN_BARS - 1][VOLUME_PRICE_SIGNALS].any().any()
+    assert series["health_score"].iloc[:VOLUME_PRICE_MIN_BARS - 1].isna().all()
+    assert series["量堆"].iloc[52]
+
+    for row in range(VOLUME_PRICE_MIN_BARS - 1, len(df)):
+        latest = analyzer.analyze_volume_price_relationship(df.iloc[:row + 1])
+        bar = series.iloc[row]
+        assert [s["type"] for s in latest["signals"]] == [
+            s for s in ("放量上涨", "缩量上涨", "放量下跌", "缩量下跌", "量堆", "地量", "天量", "成交量突破") if bar[s]
+        ], row
+        assert [d.split("：")[0] for d in latest["divergence"]] == [s for s in DIVERGENCE_SIGNALS if bar[s]], row
+        assert latest["health_score"] == bar["health_score"]
+        assert latest["volume_percentile"] == round(bar["volume_percentile"], 2)
+        assert latest["volume_ratio"] == round(bar["volume_ratio"], 2)
+        assert TRENDS[latest["price_trend"]] == bar["price_trend"]
+        assert TRENDS[latest["volume_trend"]] == bar["volume_trend"]
+
+
+def test_panel_matches_series():
+    frames = {symbol: make_daily(seed=i) for i, symbol in enumerate(("600000", "000001", "300750"))}
+    # 000001 在第 100~104 根K线停牌
+    frames["000001"].loc[100:104, ["close", "volume"]] = np.nan
+    close = pd.DataFrame({s: df["close"] for s, df in frames.items()})
+    volume = pd.DataFrame({s: df["volume"] for s, df in frames.items()})
+    close.index = volume.index = frames["600000"]["date"]
+
+    analyzer = AdvancedAnalyzer()
+    panel = analyzer.analyze_volume_price_panel(close, volume)
+    assert set(panel) == {*VOLUME_PRICE_SIGNALS, *DIVERGENCE_SIGNALS, "volume_ma5", "volume_ma20", "volume_ratio",
+                          "volume_percentile", "price_change", "price_trend", "volume_trend", "health_score"}
+    for symbol in ("600000", "300750"):
+        series = analyzer.analyze_volume_price_series(frames[symbol])
+        for name, frame in panel.items():
+            assert np.allclose(frame[symbol].to_numpy(dtype=float), series[name].to_numpy(dtype=float),
+                               equal_nan=True), (symbol, name)
+
+    # 停牌日无信号；百分位与 pandas 滚动排名一致（跳过缺失值）
+    gap = close.index[100:105]
+    assert not panel["放量上涨"].loc[gap, "000001"].any() and panel["health_score"].loc[gap, "000001"].isna().all()
+    expected = volume["000001"].rolling(60, min_periods=1).rank(pct=True)
+    assert np.allclose(panel["volume_percentile"]["000001"], expected, equal_nan=True)
+
+
+if __name__ == "__main__":
+    test_series_matches_latest_analysis()
+    test_panel_matches_series()
+    print("✅ 量价序列测试通过")
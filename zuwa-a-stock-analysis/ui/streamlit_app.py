@@ -1,10 +1,16 @@
 """
 祖蛙系统 - Streamlit Web界面
+
+分析在后台线程中执行并缓存各Agent输出；调整权重滑块只重新计算综合评分
 """
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
 import streamlit as st
-import asyncio
-import json
-from datetime import datetime
+
+from src.session import AnalysisSession
 
 # 页面配置
 st.set_page_config(
@@ -42,8 +48,81 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# 权重滑块：Agent键 -> 显示名称
+WEIGHT_LABELS = {
+    "technical": "技术面",
+    "capital": "资金面",
+    "intelligence": "消息面",
+    "sector": "行业面",
+    "bull_view": "多头观点",
+    "bear_view": "空头观点",
+}
+
+# 进度轮询间隔（秒）
+POLL_INTERVAL = 0.5
+
+
+@st.cache_resource
+def get_session() -> AnalysisSession:
+    """跨重跑共享的分析会话（Agent输出缓存与后台任务）"""
+    def create_analyzer():
+        from main import ZuwaStockAnalyzer
+        return ZuwaStockAnalyzer(str(Path(__file__).resolve().parents[1] / "config" / "agents.yaml"))
+    return AnalysisSession(create_analyzer)
+
+
+def parse_watchlist(text: str):
+    """自选股文本：每行 "代码" 或 "代码 名称" """
+    symbols = []
+    for line in text.splitlines():
+        parts = line.replace(',', ' ').split()
+        if parts:
+            symbols.append((parts[0], parts[1] if len(parts) > 1 else ""))
+    return symbols
+
+
+def show_job_progress(session: AnalysisSession) -> bool:
+    """显示后台任务进度，任务未结束时返回 True"""
+    job = session.job(st.session_state.get("job_id", ""))
+    if job is None:
+        return False
+    if job.running:
+        st.progress(job.progress, text=f"🐸 {job.message or '祖蛙正在分析中...'}")
+        return True
+    for symbol, error in job.errors.items():
+        st.error(f"{symbol} 分析失败: {error}")
+    return False
+
+
+def show_stock(session: AnalysisSession, symbol: str, weights, thresholds):
+    """单只股票：按当前权重重新评分，并展示各Agent输出"""
+    result = session.get(symbol)
+    if result is None:
+        return
+    row = session.rescore([symbol], weights, thresholds).iloc[0]
+    original = result["final_decision"]["details"]["composite_score"]
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("综合评分", f"{row['composite']:.1f}/100", f"{row['composite'] - original:+.1f}")
+    with col2:
+        st.metric("投资评级", row["rating"])
+    with col3:
+        st.metric("分析时间", result["timestamp"][11:19])
+    
+    st.subheader("📋 各Agent观点")
+    outputs = result.get("agent_outputs", {})
+    st.dataframe(
+        [{"Agent": o["agent_name"], "信号": o["signal"], "置信度": round(o["confidence"], 1), "摘要": o["summary"]}
+         for o in outputs.values()],
+        use_container_width=True, hide_index=True
+    )
+
+
 def main():
     """主界面"""
+    session = get_session()
+    
     # 标题
     st.markdown('<p class="main-header">🐸 祖蛙沪深A股分析系统</p>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">基于多Agent协作的智能股票分析平台</p>', unsafe_allow_html=True)
@@ -53,117 +132,138 @@ def main():
         st.header("⚙️ 配置")
         symbol = st.text_input("股票代码", placeholder="如: 600519")
         name = st.text_input("股票名称", placeholder="如: 贵州茅台")
+        refresh = st.checkbox("忽略缓存重新分析", value=False)
+        analyze_btn = st.button("🚀 开始分析", type="primary", use_container_width=True)
         
         st.divider()
         
-        st.header("📊 Agent权重")
-        tech_weight = st.slider("技术面", 0.0, 1.0, 0.20)
-        capital_weight = st.slider("资金面", 0.0, 1.0, 0.25)
-        intel_weight = st.slider("消息面", 0.0, 1.0, 0.20)
-        sector_weight = st.slider("行业面", 0.0, 1.0, 0.15)
+        st.header("⭐ 自选股")
+        watchlist_text = st.text_area("每行一个代码（可跟名称）", placeholder="600519 贵州茅台\n000001 平安银行")
+        batch_btn = st.button("📊 批量分析", use_container_width=True)
         
         st.divider()
         
-        analyze_btn = st.button("🚀 开始分析", type="primary", use_container_width=True)
+        # 滑块只影响首席分析师的综合评分，不会重新分析
+        st.header("📊 Agent权重")
+        defaults = session.default_weights()
+        weights = {key: st.slider(label, 0.0, 1.0, float(defaults.get(key, 0.0)), 0.05)
+                   for key, label in WEIGHT_LABELS.items()}
+        
+        st.header("🎯 评级阈值")
+        thresholds = session.default_thresholds()
+        thresholds["buy"] = st.slider("推荐买入", 0.0, 100.0, float(thresholds["buy"]), 1.0)
+        thresholds["hold"] = st.slider("中性持有", 0.0, 100.0, float(thresholds["hold"]), 1.0)
     
-    # 主内容区
     if analyze_btn and symbol:
-        with st.spinner("🐸 祖蛙正在分析中..."):
-            # 这里会调用分析逻辑
-            st.info("分析功能开发中...")
-            
-            # 模拟结果展示
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("综合评分", "72/100", "+5")
-            with col2:
-                st.metric("投资评级", "推荐买入")
-            with col3:
-                st.metric("置信度", "78%")
-    
-    else:
-        # 默认显示欢迎信息
-        st.info("👈 请在左侧输入股票代码开始分析")
-        
-        # 系统架构图
-        st.subheader("📐 系统架构")
-        
-        arch_col1, arch_col2 = st.columns([1, 2])
-        
-        with arch_col1:
-            st.markdown("""
-            **Agent分工:**
-            
-            🧠 **首席Agent** - 综合决策
-            
-            🐂 **多头Agent** - 看涨理由
-            
-            🐻 **空头Agent** - 风险警示
-            
-            👥 **散户情绪** - 反向指标
-            
-            📈 **技术Agent** - 指标分析
-            
-            💰 **资金Agent** - 资金流向
-            
-            🔍 **情报Agent** - 新闻舆情
-            
-            🏭 **行业Agent** - 行业对比
-            """)
-        
-        with arch_col2:
-            st.markdown("""
-            **分析流程:**
-            
-            1️⃣ 数据收集Agent获取股票基础数据
-            
-            2️⃣ 各分析Agent并行工作：
-               - 技术面分析（RSI、MACD、均线等）
-               - 资金面分析（主力、北向、龙虎榜）
-               - 消息面分析（新闻、公告、政策）
-               - 行业面分析（板块排名、估值对比）
-            
-            3️⃣ 多空辩论：
-               - 多头Agent寻找看涨理由
-               - 空头Agent寻找风险隐患
-            
-            4️⃣ 散户情绪监控（反向指标）
-            
-            5️⃣ 首席Agent综合所有分析，生成最终建议
-            """)
-        
-        # 特色功能
-        st.subheader("✨ 特色功能")
-        
-        feat_col1, feat_col2, feat_col3 = st.columns(3)
-        
-        with feat_col1:
-            st.markdown("""
-            **🔥 多空辩论机制**
-            
-            多头vs空头观点碰撞
-            避免confirmation bias
-            更全面的风险评估
-            """)
-        
-        with feat_col2:
-            st.markdown("""
-            **💹 散户情绪监控**
-            
-            监控散户情绪指数
-            提供反向交易信号
-            避免追高杀低
-            """)
-        
-        with feat_col3:
-            st.markdown("""
-            **🎯 A股专属指标**
-            
-            涨停、龙虎榜监控
-            北向资金流向
-            主力资金追踪
-            """)
+        st.session_state["symbol"] = symbol.strip()
+        st.session_state["job_id"] = session.submit([(symbol, name)], refresh=refresh).job_id
+    if batch_btn and watchlist_text.strip():
+        watchlist = parse_watchlist(watchlist_text)
+        st.session_state["watchlist"] = [s for s, _ in watchlist]
+        st.session_state["job_id"] = session.submit(watchlist, refresh=refresh).job_id
+    
+    running = show_job_progress(session)
+    current = st.session_state.get("symbol")
+    watchlist = st.session_state.get("watchlist", [])
+    
+    if current and session.get(current) is not None:
+        show_stock(session, current, weights, thresholds)
+    
+    if watchlist:
+        st.subheader("⭐ 自选股排行")
+        table = session.rescore(watchlist, weights, thresholds)
+        if not table.empty:
+            st.dataframe(table, use_container_width=True, hide_index=True)
+    
+    if running:
+        # 后台任务进行中：稍后重跑以刷新进度
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+    
+    if current or watchlist or running:
+        return
+    
+    # 默认显示欢迎信息
+    st.info("👈 请在左侧输入股票代码开始分析")
+    
+    # 系统架构图
+    st.subheader("📐 系统架构")
+    
+    arch_col1, arch_col2 = st.columns([1, 2])
+    
+    with arch_col1:
+        st.markdown("""
+        **Agent分工:**
+        
+        🧠 **首席Agent** - 综合决策
+        
+        🐂 **多头Agent** - 看涨理由
+        
+        🐻 **空头Agent** - 风险警示
+        
+        👥 **散户情绪** - 反向指标
+        
+        📈 **技术Agent** - 指标分析
+        
+        💰 **资金Agent** - 资金流向
+        
+        🔍 **情报Agent** - 新闻舆情
+        
+        🏭 **行业Agent** - 行业对比
+        """)
+    
+    with arch_col2:
+        st.markdown("""
+        **分析流程:**
+        
+        1️⃣ 数据收集Agent获取股票基础数据
+        
+        2️⃣ 各分析Agent并行工作：
+           - 技术面分析（RSI、MACD、均线等）
+           - 资金面分析（主力、北向、龙虎榜）
+           - 消息面分析（新闻、公告、政策）
+           - 行业面分析（板块排名、估值对比）
+        
+        3️⃣ 多空辩论：
+           - 多头Agent寻找看涨理由
+           - 空头Agent寻找风险隐患
+        
+        4️⃣ 散户情绪监控（反向指标）
+        
+        5️⃣ 首席Agent综合所有分析，生成最终建议
+        """)
+    
+    # 特色功能
+    st.subheader("✨ 特色功能")
+    
+    feat_col1, feat_col2, feat_col3 = st.columns(3)
+    
+    with feat_col1:
+        st.markdown("""
+        **🔥 多空辩论机制**
+        
+        多头vs空头观点碰撞
+        避免confirmation bias
+        更全面的风险评估
+        """)
+    
+    with feat_col2:
+        st.markdown("""
+        **💹 散户情绪监控**
+        
+        监控散户情绪指数
+        提供反向交易信号
+        避免追高杀低
+        """)
+    
+    with feat_col3:
+        st.markdown("""
+        **🎯 A股专属指标**
+        
+        涨停、龙虎榜监控
+        北向资金流向
+        主力资金追踪
+        """)
 
 if __name__ == "__main__":
     main()